@@ -13,6 +13,22 @@ class Settings(BaseSettings):
     neynar_api_key: str | None = None
     neynar_app_fid: int | None = None  # FID de la app en Farcaster (requerido para crear signers)
     neynar_app_mnemonic: str | None = None  # Mnemonic de la app para firmar (requerido para crear signers)
+
+    # Pool HTTP compartido hacia Neynar
+    neynar_max_connections: int = 20
+    neynar_max_keepalive_connections: int = 10
+    neynar_keepalive_expiry: float = 30.0  # Segundos que una conexión ociosa sigue abierta
+    neynar_http2: bool = True
+    neynar_timeout_seconds: float = 10.0
+    # Cache de respuestas de Neynar (TTL en segundos; 0 desactiva el endpoint)
+    neynar_cache_max_entries: int = 2048
+    neynar_profile_cache_ttl: float = 300.0  # Perfiles por fid/address/username: minutos
+    neynar_followers_cache_ttl: float = 21600.0  # Relevant followers: horas
+    neynar_casts_cache_ttl: float = 20.0  # Casts recientes de un usuario: segundos
+    # Rate limit hacia Neynar (ajustar al plan contratado; Starter ~300 req/min)
+    neynar_rate_limit_per_second: float = 5.0
+    neynar_rate_limit_burst: int = 10
+
     minipay_tool_url: str = "https://api.minipay.celo.org"
     minipay_project_id: str | None = None
     minipay_project_secret: str | None = None
@@ -22,10 +38,19 @@ class Settings(BaseSettings):
     max_recent_casts: int = 8
     min_trend_score: float = 0.35
     max_reward_recipients: int = 5
+    # Análisis de participación en paralelo por elegibilidad (casts por tema de cada usuario)
+    eligibility_max_concurrency: int = 8
     max_onchain_rewards: int = 2
-    leaderboard_max_entries: int = 100
+    leaderboard_max_entries: int = 100  # Solo recorta el backend "file"
+    leaderboard_backend: str = "sqlite"  # "sqlite" (WAL, ranking indexado) | "file" (JSON, dev local)
+    # Ranking en memoria con volcado write-behind (replay log para crashes)
+    leaderboard_in_memory: bool = True
+    leaderboard_flush_interval_seconds: float = 5.0
+    leaderboard_flush_max_dirty: int = 500
     allow_manual_target: bool = False
     reward_metadata_uri: str = "ipfs://QmExample"
+    # URL pública de /api/nft/metadata/ (con "/" final): baseURI de las campañas y prefijo de la metadata NFT
+    nft_metadata_base_url: str | None = None
     default_reward_type: str = "nft"
     
     # Modo demo: permite usuarios sin Farcaster (solo para demostración)
@@ -34,6 +59,28 @@ class Settings(BaseSettings):
     # Scheduler
     auto_scan_on_startup: bool = True
     auto_scan_interval_minutes: int = 30
+
+    # Detección de tendencias: deadline por fuente y presupuesto total del fetch (segundos)
+    trend_viral_timeout_seconds: float = 4.0
+    trend_community_timeout_seconds: float = 3.0
+    trend_recent_timeout_seconds: float = 3.0
+    trend_fetch_budget_seconds: float = 5.0
+    # Canales que escanean el scheduler y el cron, separados por coma (p.ej. "global,celo,base")
+    trend_scan_channels: str = "global"
+    # Snapshot compartido: edad máxima antes de refrescar en background, y edad a partir
+    # de la cual un request espera el re-scan en lugar de servir el snapshot viejo
+    trend_snapshot_max_age_seconds: float = 300.0
+    trend_snapshot_max_stale_seconds: float = 1800.0
+    # Ventana deslizante de casts candidatos (scoring incremental entre scans)
+    trend_pool_window_hours: float = 24.0
+    trend_pool_max_entries: int = 500
+    # Velocidad de engagement (snapshots por scan): casts seguidos, puntos por cast,
+    # engagement/hora con el que el bonus satura y peso de velocidad/aceleración en el score
+    trend_series_max_casts: int = 5000
+    trend_series_points: int = 8
+    trend_velocity_saturation: float = 100.0
+    trend_velocity_weight: float = 0.25
+    trend_acceleration_weight: float = 0.1
     
     # Sistema de Tiers y Ponderaciones
     tier_nft_threshold: float = 80.0  # Score mínimo para NFT (reducido de 85.0)
@@ -55,6 +102,24 @@ class Settings(BaseSettings):
     # Celo Sepolia: 0x874069Fa1Eb16D44d622F2e0Ca25eeA172369bC1
     # Celo Mainnet: 0x765DE816845861e75A25fCA122bb6898B8B1282a
     cusd_address: str = "0x765DE816845861e75A25fCA122bb6898B8B1282a"  # cUSD en Mainnet (por defecto)
+    # Multicall3 para lecturas agrupadas (misma dirección en Mainnet, Alfajores y Celo Sepolia)
+    multicall3_address: str = "0xcA11bde05977b3631167028862bE2a173976CA11"
+    multicall_chunk_size: int = 200
+    # Hilos para lecturas on-chain (las transacciones usan siempre un único hilo dedicado)
+    celo_read_workers: int = 8
+    # Intervalo de polling de bloques del ReceiptTracker (con RPC wss se despierta con newHeads)
+    receipt_poll_interval_seconds: float = 2.0
+    # Fees: snapshot de baseFee por bloque y re-emisión de transacciones atascadas
+    fee_cache_ttl_seconds: float = 1.0
+    fee_bump_after_blocks: int = 3
+    fee_bump_percent: float = 12.5
+    fee_bump_max_attempts: int = 5
+    fee_max_gwei: float = 500.0
+    # Mints NFT agrupados en mintBatch: ventana para juntar corridas concurrentes y gas por tx
+    nft_mint_batch_window_seconds: float = 0.0
+    nft_mint_gas_budget: int = 10_000_000
+    # Grants de XP agrupados en grantXpBatch: ventana para juntar API, scheduler y corridas
+    xp_grant_batch_window_seconds: float = 0.5
     
     # Deployment Block (for history scan)
     deployment_block: int = 53338074
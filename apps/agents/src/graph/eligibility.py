@@ -1,11 +1,12 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import Any
 
 from ..config import Settings
-from ..tools.celo import CeloToolbox
-from ..tools.farcaster import FarcasterToolbox
+from ..tools.celo import get_async_celo_toolbox
+from ..tools.farcaster import get_farcaster_toolbox
 
 logger = logging.getLogger(__name__)
 
@@ -15,12 +16,9 @@ class EligibilityAgent:
 
     def __init__(self, settings: Settings) -> None:
         self.settings = settings
-        self.farcaster = FarcasterToolbox(
-            base_url=settings.farcaster_hub_api,
-            api_token=settings.farcaster_api_token,
-            neynar_key=settings.neynar_api_key,
-        )
-        self.celo_tool = CeloToolbox(rpc_url=settings.celo_rpc_url, private_key=settings.celo_private_key)
+        self.farcaster = get_farcaster_toolbox(settings)
+        # Fachada asíncrona compartida: las lecturas on-chain corren fuera del event loop
+        self.celo_tool = get_async_celo_toolbox(settings)
 
     async def handle(self, context: dict[str, Any]) -> dict[str, Any]:
         """Evalúa usuarios analizando su participación en tendencias globales."""
@@ -225,23 +223,26 @@ class EligibilityAgent:
                     if cast_hash:
                         logger.info("📊 Analizando participación de @%s en cast: %s", username, cast_hash[:16])
                         
+                        # Engagement del cast una sola vez: sirve para el análisis y para la participación directa
+                        # OPTIMIZATION: Reducir límite de 100 a 50 para ahorrar créditos API
+                        participants = await self.farcaster.fetch_cast_engagement(cast_hash, limit=50)
+                        engagement_by_fid = self.farcaster.index_engagement_by_fid(participants)
+
                         # Analizar participación detallada
                         trend_participation = await self.farcaster.analyze_user_participation_in_trend(
                             user_fid=user_fid,
                             cast_hash=cast_hash,
                             topic_tags=topic_tags,
+                            engagement_by_fid=engagement_by_fid,
                         )
                         participation_data.update(trend_participation)
                         
                         # Verificar si participó directamente en el cast
-                        # OPTIMIZATION: Reducir límite de 100 a 50 para ahorrar créditos API
-                        participants = await self.farcaster.fetch_cast_engagement(cast_hash, limit=50)
-                        for p in participants:
-                            if p.get("fid") == user_fid:
-                                engagement_weight = p.get("engagement_weight", 0.0)
-                                reasons.extend(p.get("reasons", []))
-                                logger.info("  - Participación directa: %s (weight: %.2f)", p.get("reasons", []), engagement_weight)
-                                break
+                        p = engagement_by_fid.get(user_fid)
+                        if p is not None:
+                            engagement_weight = p.get("engagement_weight", 0.0)
+                            reasons.extend(p.get("reasons", []))
+                            logger.info("  - Participación directa: %s (weight: %.2f)", p.get("reasons", []), engagement_weight)
                     else:
                         logger.info("⚠️ No hay cast_hash disponible, analizando solo perfil del usuario")
                         # Sin cast_hash, dar score base basado en perfil y best_cast
@@ -409,19 +410,39 @@ class EligibilityAgent:
             # OPTIMIZATION: Reducir límite de 100 a 50 para ahorrar créditos API
             participants = await self.farcaster.fetch_cast_engagement(cast_hash, limit=50)
             
+            # El engagement del cast se pide una sola vez y se comparte entre todos los análisis
+            engagement_by_fid = self.farcaster.index_engagement_by_fid(participants)
+
+            candidates: list[tuple[dict[str, Any], str, int | None]] = []
             for participant in participants:
                 try:
                     checksum = self.celo_tool.checksum(participant["custody_address"])
                     user_fid = participant.get("fid")
                 except (ValueError, KeyError):
                     continue
+                candidates.append((participant, checksum, user_fid))
+
+            # Casts por tema de cada usuario en paralelo, con concurrencia acotada
+            # (el rate limiter de Neynar sigue regulando la tasa global)
+            semaphore = asyncio.Semaphore(max(1, self.settings.eligibility_max_concurrency))
+
+            async def analyze(user_fid: int | None) -> dict[str, Any]:
+                async with semaphore:
+                    return await self.farcaster.analyze_user_participation_in_trend(
+                        user_fid=user_fid,
+                        cast_hash=cast_hash,
+                        topic_tags=topic_tags,
+                        engagement_by_fid=engagement_by_fid,
+                    )
 
-                # Analizar participación detallada del usuario en esta tendencia
-                participation_data = await self.farcaster.analyze_user_participation_in_trend(
-                    user_fid=user_fid,
-                    cast_hash=cast_hash,
-                    topic_tags=topic_tags,
-                )
+            analyses = await asyncio.gather(
+                *(analyze(user_fid) for _, _, user_fid in candidates), return_exceptions=True
+            )
+
+            for (participant, checksum, user_fid), participation_data in zip(candidates, analyses):
+                if isinstance(participation_data, BaseException):
+                    logger.warning("Error analizando participación de FID %s: %s", user_fid, participation_data)
+                    continue
 
                 # Calcular score usando ponderaciones configuradas
                 score = self._score_user_advanced(
@@ -446,55 +467,30 @@ class EligibilityAgent:
         rankings.sort(key=lambda user: user["score"], reverse=True)
         shortlisted: list[dict[str, Any]] = []
 
-        for candidate in rankings:
-            if len(shortlisted) >= self.settings.max_reward_recipients:
-                break
-
+        # canClaim de todos los candidatos en una sola lectura agrupada (Multicall3)
+        claim_status: dict[str, bool | None] = {}
+        if rankings:
             try:
-                can_claim = self.celo_tool.can_claim(
+                claim_status = await self.celo_tool.can_claim_many(
                     registry_address=self.settings.registry_address,
                     campaign_id=campaign_id,
-                    participant=candidate["address"],
+                    participants=[candidate["address"] for candidate in rankings],
                 )
             except Exception as exc:  # noqa: BLE001
-                error_str = str(exc)
-                # Si la campaña no está configurada (error 0x050aad92), intentar con demo-campaign
-                if "0x050aad92" in error_str or "CampaignNotConfigured" in error_str:
-                    if campaign_id != "demo-campaign":
-                        logger.warning(
-                            "Campaña %s no configurada en LootAccessRegistry. "
-                            "Verificando con 'demo-campaign' como fallback...",
-                            campaign_id
-                        )
-                        try:
-                            can_claim = self.celo_tool.can_claim(
-                                registry_address=self.settings.registry_address,
-                                campaign_id="demo-campaign",
-                                participant=candidate["address"],
-                            )
-                            # Si funciona con demo-campaign, actualizar el campaign_id para esta ejecución
-                            campaign_id = "demo-campaign"
-                        except Exception as fallback_exc:  # noqa: BLE001
-                            logger.warning(
-                                "Error consultando LootAccessRegistry incluso con 'demo-campaign' (asumiendo que puede reclamar): %s",
-                                fallback_exc
-                            )
-                            can_claim = True
-                    else:
-                        logger.warning(
-                            "Error consultando LootAccessRegistry (asumiendo que puede reclamar): %s. "
-                            "Registry: %s, Campaign: %s",
-                            exc, self.settings.registry_address, campaign_id
-                        )
-                        can_claim = True
-                else:
-                    # Otro tipo de error, asumir que puede reclamar para no bloquear el flujo
-                    logger.warning(
-                        "Error consultando LootAccessRegistry (asumiendo que puede reclamar): %s. "
-                        "Registry: %s, Campaign: %s, Participant: %s",
-                        exc, self.settings.registry_address, campaign_id, candidate["address"]
-                    )
-                    can_claim = True
+                logger.warning(
+                    "Error consultando LootAccessRegistry en bloque (asumiendo que pueden reclamar): %s. "
+                    "Registry: %s, Campaign: %s",
+                    exc, self.settings.registry_address, campaign_id
+                )
+
+        for candidate in rankings:
+            if len(shortlisted) >= self.settings.max_reward_recipients:
+                break
+
+            can_claim = claim_status.get(candidate["address"])
+            if can_claim is None:
+                # Lectura fallida (registry caído, campaña no configurada): no bloquear el flujo
+                can_claim = True
 
             if not can_claim:
                 continue
@@ -1,15 +1,20 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import Any
 
 from ..config import Settings
 from ..stores.leaderboard import LeaderboardStore
 from ..stores.cooldown import default_cooldown_store
-from ..tools.celo import CeloToolbox
+from ..stores.nft_metadata import get_nft_metadata_store
+from ..tools.celo import VAULT_MAX_RECIPIENTS_PER_BATCH, get_async_celo_toolbox
+from ..tools.receipt_tracker import TransactionDropped, TransactionReplaced
 from ..tools.minipay import MiniPayToolbox
-from ..tools.farcaster import FarcasterToolbox
+from ..tools.farcaster import get_farcaster_toolbox
 from ..services.mint_history import mint_history
+from ..services.nft_mint_batcher import MintRequest, get_nft_mint_batcher
+from ..services.xp_grant_queue import get_xp_grant_queue
 
 logger = logging.getLogger(__name__)
 
@@ -21,10 +26,8 @@ class RewardDistributorAgent:
         self.settings = settings
         self.leaderboard = leaderboard
         self.cooldown_store = default_cooldown_store()
-        self.celo_tool = CeloToolbox(
-            rpc_url=settings.celo_rpc_url,
-            private_key=settings.celo_private_key,
-        )
+        # Fachada asíncrona compartida: la I/O on-chain corre fuera del event loop
+        self.celo_tool = get_async_celo_toolbox(settings)
         self.minipay_tool = (
             MiniPayToolbox(
                 base_url=settings.minipay_tool_url,
@@ -34,10 +37,12 @@ class RewardDistributorAgent:
             if settings.minipay_project_id and settings.minipay_project_secret
             else None
         )
-        self.farcaster_tool = FarcasterToolbox(
-            base_url="https://api.neynar.com/v2",
-            neynar_key=settings.neynar_api_key
-        )
+        self.farcaster_tool = get_farcaster_toolbox(settings)
+        self.mint_batcher = get_nft_mint_batcher(settings)
+        self.xp_queue = get_xp_grant_queue(settings)
+        self.metadata_store = get_nft_metadata_store()
+        # baseURI de cada campaña si el minter resuelve claves de metadata relativas
+        self._relative_base_uris: dict[str, str | None] = {}
 
     def _calculate_dynamic_xp(self, user_score: float) -> int:
         """Calcula XP dinámico basado en el score de viralidad.
@@ -100,7 +105,7 @@ class RewardDistributorAgent:
                 
                 # 1. Configurar en LootAccessRegistry
                 try:
-                    self.celo_tool.configure_campaign_registry(
+                    await self.celo_tool.configure_campaign_registry(
                         registry_address=self.settings.registry_address,
                         campaign_id=campaign_id,
                         cooldown_seconds=86400,  # 1 día
@@ -110,24 +115,25 @@ class RewardDistributorAgent:
                     # Si la campaña ya existe, continuar (no es un error fatal)
                     if "replacement transaction underpriced" in error_str.lower():
                         logger.warning("Transacción pendiente detectada para Registry, continuando...")
-                        import time
-                        time.sleep(5) # Esperar a que se mine la pendiente
+                        await asyncio.sleep(5) # Esperar a que se mine la pendiente
                     else:
                         logger.warning("Error configurando Registry (puede que ya exista): %s", reg_exc)
                 
                 # 2. Configurar en LootBoxMinter
                 try:
-                    self.celo_tool.configure_campaign_minter(
+                    await self.celo_tool.configure_campaign_minter(
                         minter_address=self.settings.minter_address,
                         campaign_id=campaign_id,
-                        base_uri=self.settings.reward_metadata_uri or "ipfs://QmExample/",
+                        base_uri=(
+                            self.settings.nft_metadata_base_url or self.settings.reward_metadata_uri or "ipfs://QmExample/"
+                        ),
                     )
+                    self._relative_base_uris.pop(campaign_id, None)
                 except Exception as minter_exc:  # noqa: BLE001
                     error_str = str(minter_exc)
                     if "replacement transaction underpriced" in error_str.lower():
                         logger.warning("Transacción pendiente detectada para Minter, continuando...")
-                        import time
-                        time.sleep(5) # Esperar a que se mine la pendiente
+                        await asyncio.sleep(5) # Esperar a que se mine la pendiente
                     else:
                         logger.warning("Error configurando Minter (puede que ya exista): %s", minter_exc)
                 
@@ -135,7 +141,7 @@ class RewardDistributorAgent:
                 # Nota: Esto requiere que el vault tenga fondos depositados después
                 try:
                     reward_amount_wei = int(self.settings.minipay_reward_amount * 1e18)
-                    self.celo_tool.initialize_campaign_vault(
+                    await self.celo_tool.initialize_campaign_vault(
                         vault_address=self.settings.lootbox_vault_address,
                         campaign_id=campaign_id,
                         token_address=self.settings.cusd_address,
@@ -235,7 +241,13 @@ class RewardDistributorAgent:
         minted: dict[str, str] = {}
         micropayments: dict[str, str] = {}
         xp_awards: dict[str, str] = {}
+        # address -> (future del grant en la XpGrantQueue, es bonus de NFT)
+        xp_grants: dict[str, tuple[asyncio.Future, bool]] = {}
         nft_images: dict[str, str] = {}
+        nft_token_ids: dict[str, int] = {}
+        # (request, cast recompensado, score) de cada ganador NFT; se mintean juntos al final
+        pending_mints: list[tuple[MintRequest, str | None, float]] = []
+        cusd_recipients: list[str] = []
         
         # Si reward_type no fue determinado, asignar por usuario según score (tiers)
         if reward_type is None:
@@ -337,83 +349,18 @@ class RewardDistributorAgent:
                             ]
                         }
                         
-                        # Codificar metadata
-                        import json
-                        import base64
-                        meta_json = json.dumps(nft_metadata)
-                        meta_b64 = base64.b64encode(meta_json.encode()).decode()
-                        token_uri = f"data:application/json;base64,{meta_b64}"
-
-                        tx_hash = self.celo_tool.mint_nft(
-                            minter_address=self.settings.minter_address,
-                            campaign_id=campaign_id,
-                            recipient=address,
-                            metadata_uri=token_uri,
-                        )
-                        minted[address] = tx_hash
-                        
-                        # RECORD IN HISTORY
-                        if cast_hash_to_reward:
-                            mint_history.record_mint(address, cast_hash_to_reward)
-                        
-                        # SERIALIZATION FIX: Esperar confirmación para evitar race conditions de nonce/gas
-                        logger.info("Esperando confirmación de NFT mint para %s...", address)
-                        self.celo_tool.wait_for_receipt(tx_hash)
-                        
-                        # También otorgar XP como bonus
-                        try:
-                            import time
-                            # Esperar más tiempo para asegurar propagación del nonce tras el minteo
-                            time.sleep(5)
-                            
-                            # Calcular XP dinámico
-                            xp_amount = self._calculate_dynamic_xp(user_score)
-                            logger.info("Otorgando XP bonus (%d) a %s junto con NFT...", xp_amount, address)
-                            
-                            tx_xp = self.celo_tool.grant_xp(
-                                registry_address=self.settings.registry_address,
-                                campaign_id=campaign_id,
-                                participant=address,
-                                amount=xp_amount,
-                            )
-                            logger.info("XP bonus otorgado exitosamente: %s", tx_xp)
-                            
-                            # SERIALIZATION FIX: Esperar confirmación de XP también
-                            logger.info("Esperando confirmación de XP bonus...")
-                            self.celo_tool.wait_for_receipt(tx_xp)
-                            
-                            xp_awards[address] = "bonus_with_nft"
-                        except Exception as xp_exc:
-                            logger.warning("Fallo otorgando XP bonus con NFT: %s", xp_exc)
+                        token_uri = await self._token_uri(campaign_id, nft_metadata)
+
+                        # El mint se difiere: todos los ganadores NFT de la corrida van en mintBatch
+                        pending_mints.append((MintRequest(address, token_uri), cast_hash_to_reward, user_score))
 
                     except Exception as exc:  # noqa: BLE001
-                        logger.error("Fallo minteando NFT: %s", exc)
+                        logger.error("Fallo preparando NFT: %s", exc)
                 
                 elif user_score >= self.settings.tier_cusd_threshold:
-                    # Priorizar distribución vía contrato como solicitó el usuario
-                    try:
-                        logger.info("Enviando cUSD via contrato (LootBoxVault) a %s (score: %.2f)...", address, user_score)
-                        tx_hash = self.celo_tool.distribute_cusd(
-                            vault_address=self.settings.lootbox_vault_address,
-                            campaign_id=campaign_id,
-                            recipients=[address],
-                        )
-                        micropayments[address] = tx_hash
-                    except Exception as exc:  # noqa: BLE001
-                        logger.error("Fallo distribuyendo cUSD via contrato: %s", exc)
-                        
-                        # Fallback opcional a MiniPay Tool
-                        if self.settings.minipay_tool_url:
-                            try:
-                                logger.info("Intentando fallback a MiniPay Tool API...")
-                                resp = await self.minipay.send_micropayment(
-                                    recipient=address,
-                                    amount=self.settings.cusd_reward_amount,
-                                    note=f"Premio {campaign_id}",
-                                )
-                                micropayments[address] = resp.get("tx_hash") or resp.get("id") or "micropayment"
-                            except Exception as exc2:
-                                logger.error("Fallo fallback MiniPay Tool: %s", exc2)
+                    # Se acumula: todos los ganadores cUSD de la corrida van en un distributeERC20
+                    logger.info("cUSD via contrato (LootBoxVault) para %s (score: %.2f)", address, user_score)
+                    cusd_recipients.append(address)
                 
                 else:
                     # Tier 3: XP para scores bajos pero elegibles
@@ -422,16 +369,14 @@ class RewardDistributorAgent:
                         xp_amount = self._calculate_dynamic_xp(user_score)
                         logger.info("Otorgando XP (tier 3, %d XP) a %s (score: %.2f)...", xp_amount, address, user_score)
                         
-                        tx_hash = self.celo_tool.grant_xp(
-                            registry_address=self.settings.registry_address,
-                            campaign_id=campaign_id,
-                            participant=address,
-                            amount=xp_amount,
-                        )
-                        xp_awards[address] = tx_hash
+                        xp_grants[address] = (self.xp_queue.submit(campaign_id, address, xp_amount), False)
                     except Exception as exc:  # noqa: BLE001
                         logger.error("Fallo otorgando XP: %s", exc)
             
+            await self._distribute_cusd_pending(campaign_id, cusd_recipients, micropayments)
+            await self._mint_pending(campaign_id, pending_mints, minted, xp_grants, nft_token_ids)
+            await self._settle_xp_grants(xp_grants, xp_awards)
+
             # Determinar modo principal basado en qué tipo de recompensa se dio más
             if minted:
                 reward_type = "nft"
@@ -451,13 +396,7 @@ class RewardDistributorAgent:
                     xp_amount = self._calculate_dynamic_xp(user_score)
                     
                     logger.info("Otorgando XP (%d) a %s...", xp_amount, address)
-                    tx_hash = self.celo_tool.grant_xp(
-                        registry_address=self.settings.registry_address,
-                        campaign_id=campaign_id,
-                        participant=address,
-                        amount=xp_amount,
-                    )
-                    xp_awards[address] = tx_hash
+                    xp_grants[address] = (self.xp_queue.submit(campaign_id, address, xp_amount), False)
                 except Exception as exc:  # noqa: BLE001
                     logger.error("Fallo otorgando XP: %s", exc)
         elif reward_type == "cusd":
@@ -480,7 +419,7 @@ class RewardDistributorAgent:
                 # Si falla, intentamos con "demo-campaign" que ya está configurada
                 try:
                     logger.info("Usando LootBoxVault para distribuir cUSD (campaña: %s)...", campaign_id)
-                    tx_hash = self.celo_tool.distribute_cusd(
+                    tx_hash = await self.celo_tool.distribute_cusd(
                         vault_address=self.settings.lootbox_vault_address,
                         campaign_id=campaign_id,
                         recipients=recipients,
@@ -499,7 +438,7 @@ class RewardDistributorAgent:
                                 campaign_id
                             )
                             try:
-                                tx_hash = self.celo_tool.distribute_cusd(
+                                tx_hash = await self.celo_tool.distribute_cusd(
                                     vault_address=self.settings.lootbox_vault_address,
                                     campaign_id="demo-campaign",
                                     recipients=recipients,
@@ -605,43 +544,20 @@ class RewardDistributorAgent:
                         ]
                     }
                     
-                    # Codificar metadata a data URI para pasar al contrato
-                    import json
-                    import base64
-                    meta_json = json.dumps(nft_metadata)
-                    meta_b64 = base64.b64encode(meta_json.encode()).decode()
-                    token_uri = f"data:application/json;base64,{meta_b64}"
-                    
-                    tx_hash = self.celo_tool.mint_nft(
-                        minter_address=self.settings.minter_address,
-                        campaign_id=campaign_id,
-                        recipient=address,
-                        metadata_uri=token_uri, # Usar dynamic URI
-                    )
-                    minted[address] = tx_hash
+                    token_uri = await self._token_uri(campaign_id, nft_metadata)
                     
-                    # También otorgar XP como bonus
-                    try:
-                        # Buscar score ya obtenido arriba
-                        # user_info = ... (ya estÃ¡ definido)
-                        user_score = user_info.get("score", 0.0)
-                        xp_amount = self._calculate_dynamic_xp(user_score)
-                        final_granted_xp = xp_amount # Capture for UI
-                        
-                        self.celo_tool.grant_xp(
-                            registry_address=self.settings.registry_address,
-                            campaign_id=campaign_id,
-                            participant=address,
-                            amount=xp_amount,
-                        )
-                        xp_awards[address] = "bonus_with_nft"
-                    except Exception as xp_exc:
-                        logger.warning("Fallo otorgando XP bonus con NFT: %s", xp_exc)
+                    pending_mints.append((MintRequest(address, token_uri), None, user_info.get("score", 0.0)))
 
                 except Exception as exc:  # noqa: BLE001
                     logger.error("Fallo al generar/mintear NFT: %s", exc)
                     self.last_mint_error = str(exc)
 
+            granted = await self._mint_pending(
+                campaign_id, pending_mints, minted, xp_grants, nft_token_ids
+            )
+            if granted:
+                final_granted_xp = list(granted.values())[-1]  # Capture for UI
+
             extra_targets = recipients[self.settings.max_onchain_rewards :]
             if self.minipay_tool and extra_targets:
                 for address in extra_targets:
@@ -656,17 +572,10 @@ class RewardDistributorAgent:
                     except Exception as exc:  # noqa: BLE001
                         logger.error("Fallo en micropago MiniPay: %s", exc)
 
-        # Fetch initial XP balances for all recipients
-        initial_xp_balances: dict[str, int] = {}
-        for address in recipients:
-            try:
-                balance = self.celo_tool.get_xp_balance(self.settings.registry_address, campaign_id, address)
-                initial_xp_balances[address] = balance
-            except Exception as e:
-                logger.warning("Failed to fetch XP balance for %s: %s", address, e)
-                initial_xp_balances[address] = 0
+        # Los grants viajan en grantXpBatch; se esperan sus confirmaciones antes de leer XP on-chain
+        await self._settle_xp_grants(xp_grants, xp_awards)
 
-        self._record_leaderboard(rankings, minted, micropayments, xp_awards, campaign_id, metadata, reward_type, initial_xp_balances)
+        await self._record_leaderboard(rankings, minted, micropayments, xp_awards, campaign_id, metadata, reward_type)
 
         primary_tx = (
             next(iter(minted.values()), None)
@@ -699,6 +608,7 @@ class RewardDistributorAgent:
             "xp_awards": xp_awards,
             "reward_type": reward_type,
             "nft_images": nft_images,
+            "nft_token_ids": nft_token_ids,
             "error": self.last_mint_error if hasattr(self, "last_mint_error") else None,
             "xp_granted": final_granted_xp,
             "cast_text": final_cast_text,
@@ -706,7 +616,199 @@ class RewardDistributorAgent:
             "trace_logs": trace_logs,
         }
 
-    def _record_leaderboard(
+    async def _distribute_cusd_pending(
+        self, campaign_id: str, cusd_recipients: list[str], micropayments: dict[str, str]
+    ) -> None:
+        """Paga a todos los ganadores cUSD con ``distributeERC20`` agrupado.
+
+        - Batches de hasta ``max_reward_recipients`` (y el tope del vault).
+        - Solo se incluyen los recipients que el ``remainingBudget`` de la campaña alcanza a cubrir.
+        - Un batch que revierte se divide para aislar al recipient problemático; los que
+          finalmente fallan (o no entran en el presupuesto) usan el fallback MiniPay individual.
+        """
+        if not cusd_recipients:
+            return
+        batch_size = max(1, min(self.settings.max_reward_recipients, VAULT_MAX_RECIPIENTS_PER_BATCH))
+        failed: list[str] = []
+        payable = list(cusd_recipients)
+
+        try:
+            campaign = await self.celo_tool.get_vault_campaign(self.settings.lootbox_vault_address, campaign_id)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("No se pudo leer el presupuesto del vault para %s: %s", campaign_id, exc)
+            campaign = None
+        if campaign is not None:
+            affordable = campaign["remaining_budget"] // max(campaign["reward_per_recipient"], 1)
+            if not campaign["active"]:
+                affordable = 0
+            if affordable < len(payable):
+                logger.warning(
+                    "Presupuesto del vault alcanza para %d de %d recipients cUSD en %s",
+                    affordable, len(payable), campaign_id,
+                )
+                payable, failed = payable[:affordable], payable[affordable:]
+
+        sent: list[tuple[str, list[str]]] = []
+        for start in range(0, len(payable), batch_size):
+            sent.extend(await self._send_cusd_batch(campaign_id, payable[start : start + batch_size], failed))
+
+        # Confirmar los batches en paralelo: un revert on-chain también cae al fallback
+        receipts = await asyncio.gather(
+            *(self.celo_tool.confirm(tx_hash, timeout=60) for tx_hash, _ in sent), return_exceptions=True
+        )
+        for (tx_hash, batch), receipt in zip(sent, receipts):
+            if isinstance(receipt, (TransactionDropped, TransactionReplaced)):
+                logger.error("distributeERC20 %s no se minó (%s): %d recipients al fallback", tx_hash, receipt, len(batch))
+                failed.extend(batch)
+                continue
+            if isinstance(receipt, BaseException):
+                # Sin receipt a tiempo la tx aún puede minarse: ni se registra como pagada ni
+                # se usa el fallback (sería un doble pago); el FeeBumper la sigue re-emitiendo
+                logger.error(
+                    "distributeERC20 %s sin confirmar (%s): %d recipients quedan sin registrar",
+                    tx_hash, receipt, len(batch),
+                )
+                continue
+            if receipt.get("status") == 0:
+                logger.error("distributeERC20 %s revertido on-chain (%d recipients)", tx_hash, len(batch))
+                failed.extend(batch)
+                continue
+            # Transacción batch: el mismo tx_hash para cada recipient del batch
+            for address in batch:
+                micropayments[address] = tx_hash
+
+        # Fallback opcional a MiniPay Tool, solo para los que no se pudieron pagar vía vault
+        if failed and self.minipay_tool:
+            for address in failed:
+                try:
+                    logger.info("Intentando fallback a MiniPay Tool API para %s...", address)
+                    resp = await self.minipay_tool.send_micropayment(
+                        recipient=address,
+                        amount=self.settings.minipay_reward_amount,
+                        note=f"Premio {campaign_id}",
+                    )
+                    micropayments[address] = resp.get("tx_hash") or resp.get("id") or "micropayment"
+                except Exception as exc2:  # noqa: BLE001
+                    logger.error("Fallo fallback MiniPay Tool: %s", exc2)
+        elif failed:
+            logger.error("%d recipients cUSD sin pagar y sin MiniPay Tool configurado", len(failed))
+
+    async def _send_cusd_batch(
+        self, campaign_id: str, batch: list[str], failed: list[str]
+    ) -> list[tuple[str, list[str]]]:
+        try:
+            logger.info("Enviando cUSD via contrato (LootBoxVault) a %d recipients...", len(batch))
+            tx_hash = await self.celo_tool.distribute_cusd(
+                vault_address=self.settings.lootbox_vault_address,
+                campaign_id=campaign_id,
+                recipients=batch,
+            )
+        except Exception as exc:  # noqa: BLE001
+            if len(batch) == 1:
+                logger.error("Fallo distribuyendo cUSD via contrato a %s: %s", batch[0], exc)
+                failed.extend(batch)
+                return []
+            middle = len(batch) // 2
+            logger.warning("distributeERC20 de %d recipients falló (%s), dividiendo el batch", len(batch), exc)
+            return (
+                await self._send_cusd_batch(campaign_id, batch[:middle], failed)
+                + await self._send_cusd_batch(campaign_id, batch[middle:], failed)
+            )
+        return [(tx_hash, batch)]
+
+    async def _token_uri(self, campaign_id: str, nft_metadata: dict[str, Any]) -> str:
+        """URI a mintear: la clave de contenido de la metadata en lugar del JSON en base64.
+
+        - Minter con claves relativas y campaña apuntando a ``nft_metadata_base_url``: solo la clave.
+        - Minter anterior: URL absoluta al endpoint de metadata.
+        - Sin ``nft_metadata_base_url`` (endpoint no publicado) o sin almacenamiento durable
+          (``/tmp`` de Vercel sin Redis): data URI como antes, la metadata viaja en el token.
+        """
+        base_url = self.settings.nft_metadata_base_url
+        if base_url and self.metadata_store.durable:
+            try:
+                # Puede escribir en Upstash (HTTP): fuera del event loop
+                key = await asyncio.to_thread(self.metadata_store.put, nft_metadata)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("No se pudo guardar la metadata NFT, usando data URI: %s", exc)
+            else:
+                if campaign_id not in self._relative_base_uris:
+                    self._relative_base_uris[campaign_id] = await self.celo_tool.minter_relative_base_uri(
+                        self.settings.minter_address, campaign_id
+                    )
+                if self._relative_base_uris[campaign_id] == base_url:
+                    return key
+                return f"{base_url}{key}"
+
+        import json
+        import base64
+        meta_b64 = base64.b64encode(json.dumps(nft_metadata).encode()).decode()
+        return f"data:application/json;base64,{meta_b64}"
+
+    async def _mint_pending(
+        self,
+        campaign_id: str,
+        pending_mints: list[tuple[MintRequest, str | None, float]],
+        minted: dict[str, str],
+        xp_grants: dict[str, tuple[asyncio.Future, bool]],
+        nft_token_ids: dict[str, int],
+    ) -> dict[str, int]:
+        """Mintea los NFTs diferidos en batches y otorga el XP bonus a cada ganador minteado.
+
+        Devuelve el XP bonus otorgado por address.
+        """
+        if not pending_mints:
+            return {}
+        results = await self.mint_batcher.submit(campaign_id, [request for request, _, _ in pending_mints])
+        granted: dict[str, int] = {}
+        for request, cast_hash_to_reward, user_score in pending_mints:
+            address = request.recipient
+            result = results.get(address)
+            if result is None or not result.ok:
+                error = result.error if result else "mint no procesado"
+                logger.error("Fallo minteando NFT para %s: %s", address, error)
+                self.last_mint_error = error
+                continue
+            minted[address] = result.tx_hash
+            if result.token_id is not None:
+                nft_token_ids[address] = result.token_id
+
+            # RECORD IN HISTORY
+            if cast_hash_to_reward:
+                mint_history.record_mint(address, cast_hash_to_reward)
+
+            # También otorgar XP como bonus (se encola junto al resto de grants de la corrida)
+            try:
+                xp_amount = self._calculate_dynamic_xp(user_score)
+                logger.info("Otorgando XP bonus (%d) a %s junto con NFT...", xp_amount, address)
+                xp_grants[address] = (self.xp_queue.submit(campaign_id, address, xp_amount), True)
+                granted[address] = xp_amount
+            except Exception as xp_exc:  # noqa: BLE001
+                logger.warning("Fallo otorgando XP bonus con NFT: %s", xp_exc)
+        return granted
+
+    async def _settle_xp_grants(
+        self,
+        xp_grants: dict[str, tuple[asyncio.Future, bool]],
+        xp_awards: dict[str, str],
+    ) -> None:
+        """Espera los grants encolados y registra en ``xp_awards`` los que se confirmaron.
+
+        ``handle`` sí espera los receipts: el resultado del run (XP otorgado, leaderboard,
+        fallback MiniPay) depende de qué transacciones se confirmaron de verdad.
+        """
+        pending = list(xp_grants.items())
+        xp_grants.clear()
+        if not pending:
+            return
+        results = await asyncio.gather(*(future for _, (future, _) in pending), return_exceptions=True)
+        for (address, (_, is_bonus)), result in zip(pending, results):
+            if isinstance(result, BaseException):
+                logger.error("Fallo otorgando XP%s a %s: %s", " bonus con NFT" if is_bonus else "", address, result)
+                continue
+            xp_awards[address] = "bonus_with_nft" if is_bonus else result
+
+    async def _record_leaderboard(
         self,
         rankings: list[dict[str, Any]],
         minted: dict[str, str],
@@ -715,9 +817,25 @@ class RewardDistributorAgent:
         campaign_id: str,
         metadata: dict[str, Any],
         reward_type: str,
-        initial_xp_balances: dict[str, int],
     ) -> None:
         """Registra cada ganador en el leaderboard con su reward_type específico."""
+
+        # XP autoritativo on-chain de todos los ganadores en una sola lectura agrupada (Multicall3)
+        rewarded = [
+            entry["address"] for entry in rankings
+            if entry["address"] in minted or entry["address"] in micropayments or entry["address"] in xp_awards
+        ]
+        onchain_xp: dict[str, int] = {}
+        onchain_error: Exception | None = None
+        if rewarded:
+            try:
+                onchain_xp = await self.celo_tool.get_xp_balances(
+                    registry_address=self.settings.registry_address,
+                    campaign_id=campaign_id,
+                    participants=rewarded,
+                )
+            except Exception as e:
+                onchain_error = e
         
         for entry in rankings:
             address = entry["address"]
@@ -750,15 +868,9 @@ class RewardDistributorAgent:
             # The user wants the leaderboard to reflect the TRUE on-chain score,
             # not just a local accumulation.
             try:
-                # Wait a moment for the chain to index the recent grant
-                import time
-                time.sleep(5) 
-                
-                final_onchain_xp = self.celo_tool.get_xp_balance(
-                    registry_address=self.settings.registry_address,
-                    campaign_id=campaign_id,
-                    participant=address
-                )
+                if onchain_error is not None:
+                    raise onchain_error
+                final_onchain_xp = onchain_xp.get(self.celo_tool.checksum(address), 0)
                 
                 if final_onchain_xp > 0:
                     logger.info("✅ Synced authoritative XP for %s: %d", address, final_onchain_xp)
@@ -1,3 +1,4 @@
+import asyncio
 from dataclasses import dataclass, field
 from typing import Any
 
@@ -52,6 +53,8 @@ class SupervisorOrchestrator:
         self.leaderboard = leaderboard
         self.trends_store = trends_store or default_trends_store()
         self.settings = settings
+        # Versión del snapshot de tendencias ya persistida en trends_store, por canal
+        self._recorded_snapshot_versions: dict[str, int] = {}
 
     @classmethod
     def from_settings(cls, settings: Settings) -> "SupervisorOrchestrator":
@@ -59,11 +62,45 @@ class SupervisorOrchestrator:
 
         trend = TrendWatcherAgent(settings)
         eligibility = EligibilityAgent(settings)
-        leaderboard = default_store(settings.leaderboard_max_entries)
+        leaderboard = default_store(
+            settings.leaderboard_max_entries,
+            backend=settings.leaderboard_backend,
+            in_memory=settings.leaderboard_in_memory,
+            flush_interval=settings.leaderboard_flush_interval_seconds,
+            flush_max_dirty=settings.leaderboard_flush_max_dirty,
+        )
         trends_store = default_trends_store()
         distributor = RewardDistributorAgent(settings, leaderboard)
         return cls(trend, eligibility, distributor, leaderboard, trends_store, settings)
 
+    def _record_trends(self, trend_context: dict[str, Any]) -> None:
+        """Persiste en trends_store el ranking de cada canal cuyo snapshot aún no se guardó."""
+        versions = trend_context.get("snapshot_versions") or {}
+        channel_trends = trend_context.get("channel_trends") or {
+            trend_context.get("channel_id") or "global": trend_context.get("trends") or [trend_context]
+        }
+        for channel_id, trends in channel_trends.items():
+            version = versions.get(channel_id)
+            if version is not None and self._recorded_snapshot_versions.get(channel_id) == version:
+                continue
+            entries = []
+            for trend in trends:
+                author_info = trend.get("author", {})
+                entries.append({
+                    "frame_id": trend.get("frame_id"),
+                    "cast_hash": trend.get("cast_hash"),
+                    "trend_score": trend.get("trend_score"),
+                    "source_text": trend.get("source_text"),
+                    "ai_analysis": trend.get("ai_analysis"),
+                    "topic_tags": trend.get("topic_tags", []),
+                    "channel_id": trend.get("channel_id"),
+                    "author_username": author_info.get("username") if isinstance(author_info, dict) else None,
+                    "author_fid": author_info.get("fid") if isinstance(author_info, dict) else None,
+                })
+            self.trends_store.record_channel(channel_id, entries)
+            if version is not None:
+                self._recorded_snapshot_versions[channel_id] = version
+
     async def run(self, payload: dict[str, Any]) -> RunResult:
         """Ejecución mínima: detectar tendencia -> filtrar usuarios -> recompensar."""
         # 0. ENERGY CHECK (STAMINA SYSTEM)
@@ -78,20 +115,12 @@ class SupervisorOrchestrator:
         if target_address:
             from ..services.energy import energy_service
             
-            # Check if we should block (consume returns False if empty)
-            # NOTE: We only consume if we proceed? Or do we consume on attempt?
-            # Standard: Consume on attempt to prevent spamming? 
-            # Or better: Check status first, then consume if eligible?
-            # To be friendly, we check status first. If > 0, we consume.
-            
-            # Log antes de consumir
-            from ..services.energy import energy_service as es
-            pre_status = es.get_status(target_address)
-            logger.info(f"⚡ [Supervisor] Estado ANTES de consumir para {target_address}: {pre_status['current_energy']}/{pre_status['max_energy']}")
-            
-            if not energy_service.consume_energy(target_address):
+            # Consumo atómico: verifica, consume y devuelve el estado resultante en una sola operación.
+            # En un hilo del executor: el script de Redis o la espera del fsync agrupado del log
+            # bloquean, y así varias peticiones concurrentes comparten un mismo fsync.
+            consumed, status = await asyncio.to_thread(energy_service.try_consume, target_address)
+            if not consumed:
                 # No energy!
-                status = energy_service.get_status(target_address)
                 next_refill = status.get("seconds_to_refill", 0)
                 minutes = int(next_refill // 60)
                 seconds = int(next_refill % 60)
@@ -118,11 +147,9 @@ class SupervisorOrchestrator:
                     energy_status=status,  # Incluir estado de energía incluso cuando no hay energía
                 )
             
-            # Log después de consumir y guardar estado para incluir en respuesta
-            post_status = energy_service.get_status(target_address)
-            logger.info(f"⚡ [Supervisor] Estado DESPUÉS de consumir para {target_address}: {post_status['current_energy']}/{post_status['max_energy']}")
+            logger.info(f"⚡ [Supervisor] Estado DESPUÉS de consumir para {target_address}: {status['current_energy']}/{status['max_energy']}")
             # Guardar estado de energía para incluir en RunResult
-            energy_status_after_consume = post_status
+            energy_status_after_consume = status
         else:
             # Si no hay target_address, no se consume energía
             energy_status_after_consume = None
@@ -130,39 +157,10 @@ class SupervisorOrchestrator:
         mode = None
         trend_context = await self.trend_watcher.handle(payload)
         
-        # Guardar todas las tendencias detectadas si es válida o si es la mejor encontrada (aunque sea bajo umbral)
+        # Guardar el ranking de cada canal si es válido o es el mejor encontrado (aunque sea bajo umbral).
+        # Solo una vez por snapshot: los runs que reutilizan el mismo ranking no reescriben el store
         if trend_context.get("status") in ["trend_detected", "trend_below_threshold"]:
-            trends_list = trend_context.get("trends", [])
-            
-            # Si hay una lista de tendencias, guardar todas
-            if trends_list:
-                for trend in trends_list:
-                    author_info = trend.get("author", {})
-                    self.trends_store.record({
-                        "frame_id": trend.get("frame_id"),
-                        "cast_hash": trend.get("cast_hash"),
-                        "trend_score": trend.get("trend_score"),
-                        "source_text": trend.get("source_text"),
-                        "ai_analysis": trend.get("ai_analysis"),
-                        "topic_tags": trend.get("topic_tags", []),
-                        "channel_id": trend.get("channel_id"),
-                        "author_username": author_info.get("username") if isinstance(author_info, dict) else None,
-                        "author_fid": author_info.get("fid") if isinstance(author_info, dict) else None,
-                    })
-            else:
-                # Fallback: guardar la tendencia individual (compatibilidad)
-                author_info = trend_context.get("author", {})
-            self.trends_store.record({
-                "frame_id": trend_context.get("frame_id"),
-                "cast_hash": trend_context.get("cast_hash"),
-                "trend_score": trend_context.get("trend_score"),
-                "source_text": trend_context.get("source_text"),
-                "ai_analysis": trend_context.get("ai_analysis"),
-                "topic_tags": trend_context.get("topic_tags", []),
-                "channel_id": trend_context.get("channel_id"),
-                    "author_username": author_info.get("username") if isinstance(author_info, dict) else None,
-                    "author_fid": author_info.get("fid") if isinstance(author_info, dict) else None,
-            })
+            self._record_trends(trend_context)
         
         eligible_users = await self.eligibility.handle(trend_context)
         
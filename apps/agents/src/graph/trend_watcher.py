@@ -1,28 +1,62 @@
 from __future__ import annotations
 
+import asyncio
+import copy
 import hashlib
+import heapq
 import logging
 import re
 from typing import Any
 
+import numpy as np
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_google_genai import ChatGoogleGenerativeAI
 
 from ..config import Settings
-from ..tools.farcaster import FarcasterToolbox
+from ..services.engagement_series import EngagementSeriesStore
+from ..services.trend_pool import TIER_HIGH, TIER_LOW, TIER_MID, RollingTrendPool
+from ..services.trend_scoring import ENGAGEMENT_WEIGHTS, reaction_matrix, score_casts, select_tiers
+from ..services.trend_snapshot import TrendSnapshot, TrendSnapshotService
+from ..tools.farcaster import get_farcaster_toolbox
 
 logger = logging.getLogger(__name__)
 
+def parse_channel_list(value: Any) -> list[str]:
+    """Normaliza una lista de canales (lista o texto separado por comas), sin duplicados."""
+    if not value:
+        return []
+    items = value.split(",") if isinstance(value, str) else value
+    channels: list[str] = []
+    for item in items:
+        channel = str(item).strip()
+        if channel and channel not in channels:
+            channels.append(channel)
+    return channels
+
+
+# Cupos por tier del ranking final (High / Mid / Low) y tamaño objetivo
+TREND_TIER_QUOTAS = {TIER_HIGH: 3, TIER_MID: 4, TIER_LOW: 3}
+TREND_TARGET_COUNT = 10
+
 
 class TrendWatcherAgent:
     """Consulta señales de Farcaster y construye contexto de campaña usando AI."""
 
     def __init__(self, settings: Settings) -> None:
         self.settings = settings
-        self.farcaster = FarcasterToolbox(
-            base_url=settings.farcaster_hub_api,
-            api_token=settings.farcaster_api_token,
-            neynar_key=settings.neynar_api_key,
+        self.farcaster = get_farcaster_toolbox(settings)
+        # Historial de engagement por cast (compartido entre canales) para el término de velocidad
+        self.engagement_series = EngagementSeriesStore(
+            max_casts=settings.trend_series_max_casts,
+            points_per_cast=settings.trend_series_points,
+        )
+        # Ventana deslizante de candidatos por canal (scoring incremental entre scans)
+        self._pools: dict[str, RollingTrendPool] = {}
+        # Ranking de tendencias compartido entre runs (lo refresca el scheduler/cron)
+        self.snapshots = TrendSnapshotService(
+            self.scan,
+            max_age_seconds=settings.trend_snapshot_max_age_seconds,
+            max_stale_seconds=settings.trend_snapshot_max_stale_seconds,
         )
         # LLM se inicializará de forma lazy (solo cuando se necesite)
         # Esto evita errores al iniciar el servidor si el modelo no está disponible
@@ -54,113 +88,119 @@ class TrendWatcherAgent:
                 "status": "analyzed",
             }
 
-        # --- ESTRATEGIA DUAL: Viral + Comunitario ---
-        # --- ESTRATEGIA MIXTA: Viral + Community + Fresh ---
-        # 1. Fetch Viral Trends (High Score Candidates)
-        logger.info("Consultando tendencias virales de Neynar (canal=%s)...", channel_id)
-        viral_casts = []
-        try:
-            # Reducir límite a 15 para evitar errores 400 y ahorrar créditos
-            viral_casts = await self.farcaster.fetch_trending_feed(
-                channel_id=channel_id, 
-                limit=15, 
-                time_window="24h"
-            )
-        except Exception as exc:
-            logger.warning("⚠️ Error obteniendo trending feed: %s", exc)
+        # --- Tendencias desde el snapshot compartido ---
+        # Los requests de usuarios leen el ranking vigente en O(1); solo el scheduler,
+        # el cron o un run forzado re-escanean Neynar. Con varios canales, los scans
+        # corren en paralelo y los rankings se mezclan (k-way merge, sin duplicados).
+        force_refresh = bool(payload.get("force_trend_refresh"))
+        channel_ids = parse_channel_list(payload.get("channel_ids")) or [channel_id]
+        snapshots = await self.fetch_snapshots(channel_ids, force=force_refresh)
+        # Copia: los agentes siguientes enriquecen los dicts de tendencias
+        channel_trends = {cid: copy.deepcopy(snap.trends) for cid, snap in snapshots.items()}
+        if len(channel_trends) == 1:
+            detected_trends = next(iter(channel_trends.values()))
+        else:
+            detected_trends = self.merge_channel_trends(channel_trends)
+        if not detected_trends:
+            return {"status": "no_trends_found", **base_context}
 
-        # 2. Fetch Community Targets (Mid Score Candidates)
-        target_users = ["oyealmond.base.eth", "celopg", "muchogang", "kmacb.eth", "jesse.xyz"]
-        logger.info("Consultando casts de usuarios comunitarios: %s", target_users)
-        community_casts = []
-        try:
-            # Seleccionar 3 usuarios al azar
-            import random
-            selected_users = random.sample(target_users, min(3, len(target_users)))
-            community_casts = await self.farcaster.fetch_casts_from_users(selected_users, limit_per_user=3)
-        except Exception as exc:
-            logger.warning("⚠️ Error obteniendo community casts: %s", exc)
-
-        # 3. Fetch Recent Casts (Low Score / Fresh Candidates)
-        # Always fetch recent to allow "new/low score" discovery
-        logger.info("Consultando casts recientes (Fresh/Low score)...")
-        recent_casts = []
-        try:
-            # OPTIMIZATION: Reducir límite de 20 a 10 para ahorrar créditos API
-            recent_casts = await self.farcaster.fetch_recent_casts(channel_id=channel_id, limit=10)
-        except Exception as exc:
-             logger.warning("⚠️ Error obteniendo recent casts: %s", exc)
+        await self._maybe_notify_trend(payload, detected_trends)
         
-        # Combinar pools
-        all_candidates = viral_casts + community_casts + recent_casts
-        
-        if not all_candidates:
-            return {"status": "no_trends_found", **base_context}
-            
-        # Scoring para unificar criterios
-        scored_casts = []
-        seen_hashes = set()
+        return {
+            **base_context,
+            "status": "trend_detected" if any(t["trend_score"] >= self.settings.min_trend_score for t in detected_trends) else "trend_below_threshold",
+            "trends": detected_trends,
+            "channel_trends": channel_trends,
+            "snapshot_versions": {cid: snap.version for cid, snap in snapshots.items()},
+            # Mantener compatibilidad con campos legacy usando la primera tendencia
+            "frame_id": detected_trends[0]["frame_id"],
+            "cast_hash": detected_trends[0]["cast_hash"],
+            "trend_score": detected_trends[0]["trend_score"],
+            "source_text": detected_trends[0]["source_text"],
+            "ai_analysis": detected_trends[0]["ai_analysis"],
+            "ai_enabled": detected_trends[0]["ai_enabled"],
+            "topic_tags": detected_trends[0]["topic_tags"],
+            "channel_id": detected_trends[0]["channel_id"],
+            "author": detected_trends[0]["author"],
+        }
+
+    async def fetch_snapshots(self, channel_ids: list[str], force: bool = False) -> dict[str, TrendSnapshot]:
+        """Snapshots de varios canales en paralelo (todas las requests pasan por el rate limiter).
 
-        for candidate in all_candidates:
-            c_hash = candidate.get("hash")
-            if c_hash in seen_hashes:
+        El tiempo total queda acotado por el canal más lento; un canal que falla se omite.
+        """
+        results = await asyncio.gather(
+            *(self.snapshots.get(cid, force=force) for cid in channel_ids),
+            return_exceptions=True,
+        )
+        snapshots: dict[str, TrendSnapshot] = {}
+        for cid, result in zip(channel_ids, results):
+            if isinstance(result, BaseException):
+                logger.warning("⚠️ Error escaneando tendencias del canal %s: %s", cid, result)
                 continue
-            seen_hashes.add(c_hash)
+            snapshots[cid] = result
+        return snapshots
 
-            # Si es targeted, ya tiene flag. Si no, calcular score.
-            is_targeted = candidate.get("is_targeted", False)
-            candidate_score = self._score_cast(candidate)
-            
-            # Boost artificial a los targeted
-            final_score = candidate_score
-            if is_targeted:
-                final_score = max(candidate_score, 0.45) 
-
-            scored_casts.append(
-                {
-                    **candidate,
-                    "trend_score": final_score,
-                    "is_targeted": is_targeted
-                }
-            )
+    @staticmethod
+    def merge_channel_trends(
+        channel_trends: dict[str, list[dict[str, Any]]], limit: int = TREND_TARGET_COUNT
+    ) -> list[dict[str, Any]]:
+        """Mezcla rankings por canal (ya ordenados por score) con un heap k-way, sin duplicados.
 
-        # --- SELECCIÓN POR NIVELES (TIERS) ---
-        # Clasificar
-        high_tier = [c for c in scored_casts if c["trend_score"] >= 0.7]
-        mid_tier = [c for c in scored_casts if 0.3 <= c["trend_score"] < 0.7]
-        low_tier = [c for c in scored_casts if c["trend_score"] < 0.3]
+        Un cast que aparece en varios canales se queda con su mejor posición.
+        """
+        merged: list[dict[str, Any]] = []
+        seen: set[str] = set()
+        for trend in heapq.merge(*channel_trends.values(), key=lambda t: -t["trend_score"]):
+            cast_hash = trend.get("cast_hash")
+            if cast_hash in seen:
+                continue
+            if cast_hash:
+                seen.add(cast_hash)
+            merged.append(trend)
+            if len(merged) >= limit:
+                break
+        return merged
 
-        # Ordenar cada tier
-        high_tier.sort(key=lambda x: x["trend_score"], reverse=True)
-        mid_tier.sort(key=lambda x: x["trend_score"], reverse=True)
-        low_tier.sort(key=lambda x: x["trend_score"], reverse=True)
+    async def scan(self, channel_id: str) -> list[dict[str, Any]]:
+        """Escanea Neynar y devuelve el ranking de tendencias (hasta 10, mezclando tiers).
 
-        final_selection = []
-        
-        # Objetivos: 3 High, 4 Mid, 3 Low = 10 Total
-        # High (Virales Top)
-        final_selection.extend(high_tier[:3])
-        
-        # Mid (Comunidad/Viral Medio)
-        final_selection.extend(mid_tier[:4])
+        Es la parte costosa del pipeline; ``handle`` la consume a través del snapshot compartido.
+        """
+        # --- ESTRATEGIA MIXTA: Viral + Community + Fresh ---
+        # Las tres fuentes se consultan en paralelo (bajo el rate limiter compartido);
+        # una fuente lenta se descarta en lugar de frenar todo el scan.
+        pools = await self._fetch_candidate_pools(channel_id)
+        viral_casts = pools.get("viral", [])
+        community_casts = pools.get("community", [])
+        recent_casts = pools.get("recent", [])
         
-        # Low (Nuevos/Emergentes)
-        final_selection.extend(low_tier[:3])
+        all_candidates = viral_casts + community_casts + recent_casts
+        self._track_engagement(all_candidates)
+        unique_candidates: dict[str, dict[str, Any]] = {}
+        for cast in all_candidates:
+            if cast.get("hash"):
+                unique_candidates.setdefault(cast["hash"], cast)
 
-        # Rellenar si faltan (backfill)
-        current_count = len(final_selection)
-        target_count = 10
-        
-        if current_count < target_count:
-            remaining = target_count - current_count
-            # Prioridad para rellenar: Mid -> High -> Low
-            backfill_pool = mid_tier[4:] + high_tier[3:] + low_tier[3:]
-            final_selection.extend(backfill_pool[:remaining])
-            
-        # Ordenar selección final por score para visualización coherente (o shuffle si se prefiere mezcla)
-        # El usuario pidió "mostrar unos 10 post, entre virales de alto puntaje, bajo puntaje y medio"
-        # Ordenar descendente es lo estándar.
-        final_selection.sort(key=lambda x: x["trend_score"], reverse=True)
+        # --- SELECCIÓN POR NIVELES (TIERS) ---
+        # Objetivos: 3 High (Virales Top), 4 Mid (Comunidad/Viral Medio), 3 Low (Nuevos/Emergentes)
+        # Si faltan se rellena con prioridad Mid -> High -> Low, y la selección final se
+        # ordena por score descendente para una visualización coherente.
+        pool = self._get_pool(channel_id)
+        if len(unique_candidates) > pool.max_entries:
+            # El pool no puede retener el lote (lo recortaría a max_entries y re-puntuaría todo
+            # en cada scan): scoring vectorizado de todo el lote + argpartition por tier
+            final_selection = self._rank_batch(list(unique_candidates.values()))
+            logger.info("Ranking en bloque (%s): %d casts, sin pool", channel_id, len(unique_candidates))
+        else:
+            # Ventana deslizante del canal: solo se puntúan casts nuevos, con engagement
+            # distinto o aún dentro de la ventana de recencia
+            ingest_stats = pool.ingest(all_candidates)
+            logger.info("Pool de candidatos (%s): %d casts, %s", channel_id, len(pool), ingest_stats)
+            final_selection = pool.select(TREND_TIER_QUOTAS, target_count=TREND_TARGET_COUNT)
+
+        if not final_selection:
+            return []
 
         # Procesar selección final
         detected_trends = []
@@ -186,8 +226,48 @@ class TrendWatcherAgent:
                    len(detected_trends), 
                    len([t for t in detected_trends if not t.get("is_promoted")]),
                    len([t for t in detected_trends if t.get("is_promoted")]))
-        
-        # Notificar al usuario si se detectó una tendencia fuerte y hay un target_fid
+        return detected_trends
+
+    def _track_engagement(self, candidates: list[dict[str, Any]]) -> None:
+        """Registra un snapshot de engagement por cast y anota velocidad/aceleración en cada candidato."""
+        first_by_hash: dict[str, dict[str, Any]] = {}
+        for cast in candidates:
+            cast_hash = cast.get("hash")
+            if cast_hash and cast_hash not in first_by_hash:
+                first_by_hash[cast_hash] = cast
+        if not first_by_hash:
+            return
+
+        hashes = list(first_by_hash)
+        # Mismos pesos que el término de engagement de _score_cast
+        engagement = reaction_matrix(list(first_by_hash.values())) @ ENGAGEMENT_WEIGHTS
+        self.engagement_series.record(hashes, engagement)
+        velocity, acceleration = self.engagement_series.kinematics(hashes)
+
+        for cast_hash, vel, acc in zip(hashes, velocity.tolist(), acceleration.tolist()):
+            by_hash = first_by_hash[cast_hash]
+            by_hash["engagement_velocity"] = vel
+            by_hash["engagement_acceleration"] = acc
+        for cast in candidates:
+            source = first_by_hash.get(cast.get("hash"))
+            if source is not None and source is not cast:
+                cast["engagement_velocity"] = source["engagement_velocity"]
+                cast["engagement_acceleration"] = source["engagement_acceleration"]
+
+    def _get_pool(self, channel_id: str) -> RollingTrendPool:
+        pool = self._pools.get(channel_id)
+        if pool is None:
+            pool = RollingTrendPool(
+                self._candidate_score,
+                window_hours=self.settings.trend_pool_window_hours,
+                max_entries=self.settings.trend_pool_max_entries,
+                batch_scorer=self._score_batch,
+            )
+            self._pools[channel_id] = pool
+        return pool
+
+    async def _maybe_notify_trend(self, payload: dict[str, Any], detected_trends: list[dict[str, Any]]) -> None:
+        """Notifica al usuario si se detectó una tendencia fuerte y hay un target_fid."""
         top_trend = detected_trends[0] if detected_trends else None
         is_strong_trend = any(t["trend_score"] >= self.settings.min_trend_score for t in detected_trends)
         
@@ -237,22 +317,69 @@ class TrendWatcherAgent:
                         store.record_notification_sent(target_fid)
             except Exception as exc:
                 logger.warning("Error enviando notificación: %s", exc)
-        
-        return {
-            **base_context,
-            "status": "trend_detected" if any(t["trend_score"] >= self.settings.min_trend_score for t in detected_trends) else "trend_below_threshold",
-            "trends": detected_trends,
-            # Mantener compatibilidad con campos legacy usando la primera tendencia
-            "frame_id": detected_trends[0]["frame_id"],
-            "cast_hash": detected_trends[0]["cast_hash"],
-            "trend_score": detected_trends[0]["trend_score"],
-            "source_text": detected_trends[0]["source_text"],
-            "ai_analysis": detected_trends[0]["ai_analysis"],
-            "ai_enabled": detected_trends[0]["ai_enabled"],
-            "topic_tags": detected_trends[0]["topic_tags"],
-            "channel_id": detected_trends[0]["channel_id"],
-            "author": detected_trends[0]["author"],
+
+    async def _fetch_candidate_pools(self, channel_id: str) -> dict[str, list[dict[str, Any]]]:
+        """Consulta viral/community/recent en paralelo con deadline por fuente.
+
+        Devuelve lo que haya llegado dentro del presupuesto de latencia global; las
+        fuentes que fallan o se pasan de su deadline quedan fuera (lista vacía).
+        """
+        import random
+
+        # 1. Viral Trends (High Score Candidates)
+        # Reducir límite a 15 para evitar errores 400 y ahorrar créditos
+        # 2. Community Targets (Mid Score Candidates): 3 usuarios al azar
+        # 3. Recent Casts (Low Score / Fresh Candidates)
+        # OPTIMIZATION: Reducir límite de 20 a 10 para ahorrar créditos API
+        target_users = ["oyealmond.base.eth", "celopg", "muchogang", "kmacb.eth", "jesse.xyz"]
+        selected_users = random.sample(target_users, min(3, len(target_users)))
+        sources = {
+            "viral": (
+                self.farcaster.fetch_trending_feed(channel_id=channel_id, limit=15, time_window="24h"),
+                self.settings.trend_viral_timeout_seconds,
+            ),
+            "community": (
+                self.farcaster.fetch_casts_from_users(selected_users, limit_per_user=3),
+                self.settings.trend_community_timeout_seconds,
+            ),
+            "recent": (
+                self.farcaster.fetch_recent_casts(channel_id=channel_id, limit=10),
+                self.settings.trend_recent_timeout_seconds,
+            ),
         }
+        budget = self.settings.trend_fetch_budget_seconds
+        logger.info(
+            "Consultando fuentes de tendencias en paralelo (canal=%s, comunidad=%s, presupuesto=%.1fs)...",
+            channel_id, selected_users, budget,
+        )
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        tasks = {
+            asyncio.create_task(asyncio.wait_for(coro, timeout=timeout)): name
+            for name, (coro, timeout) in sources.items()
+        }
+        done, pending = await asyncio.wait(tasks, timeout=budget)
+        for task in pending:
+            task.cancel()
+            logger.warning("⏱️ Fuente '%s' excedió el presupuesto de %.1fs, se descarta", tasks[task], budget)
+
+        pools: dict[str, list[dict[str, Any]]] = {}
+        for task in done:
+            name = tasks[task]
+            try:
+                pools[name] = task.result() or []
+            except asyncio.TimeoutError:
+                logger.warning("⏱️ Fuente '%s' excedió su deadline, se descarta", name)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("⚠️ Error obteniendo fuente '%s': %s", name, exc)
+
+        logger.info(
+            "Fuentes listas en %.2fs: %s",
+            loop.time() - started,
+            {name: len(casts) for name, casts in pools.items()},
+        )
+        return pools
 
     def _get_llm(self) -> ChatGoogleGenerativeAI | None:
         """Inicializa el LLM de forma lazy solo cuando se necesite."""
@@ -303,6 +430,32 @@ class TrendWatcherAgent:
         # El frontend mostrará directamente el cast original.
         return ("", False)
 
+    def _candidate_score(self, cast: dict[str, Any]) -> float:
+        """Score final de un candidato: los casts targeted reciben un boost artificial."""
+        candidate_score = self._score_cast(cast)
+        if cast.get("is_targeted", False):
+            return max(candidate_score, 0.45)
+        return candidate_score
+
+    def _score_batch(
+        self, casts: list[dict[str, Any]], published_at: np.ndarray | None = None, now: float | None = None
+    ) -> np.ndarray:
+        """``_candidate_score`` vectorizado para un lote de casts (timestamps parseados una vez)."""
+        return score_casts(
+            casts,
+            published_at=published_at,
+            now=now,
+            velocity_saturation=self.settings.trend_velocity_saturation,
+            velocity_weight=self.settings.trend_velocity_weight,
+            acceleration_weight=self.settings.trend_acceleration_weight,
+        )
+
+    def _rank_batch(self, candidates: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Misma selección que ``RollingTrendPool.select`` en un solo paso sobre todo el lote."""
+        scores = self._score_batch(candidates)
+        chosen = select_tiers(scores, TREND_TIER_QUOTAS, TREND_TARGET_COUNT)
+        return [{**candidates[i], "trend_score": float(scores[i])} for i in chosen.tolist()]
+
     def _score_cast(self, cast: dict[str, Any]) -> float:
         reactions = cast.get("reactions", {})
         likes = reactions.get("likes", 0)
@@ -312,9 +465,19 @@ class TrendWatcherAgent:
         engagement_score = (likes * 1.0 + recasts * 2.0 + replies * 0.6) / 200.0
         recency_hours = self.farcaster.timestamp_age_hours(cast.get("timestamp"))
         recency_bonus = max(0.0, 12 - recency_hours) / 12.0
-        combined = engagement_score + recency_bonus * 0.3
+        combined = engagement_score + recency_bonus * 0.3 + self._velocity_bonus(cast)
         return min(combined, 1.0)
 
+    def _velocity_bonus(self, cast: dict[str, Any]) -> float:
+        """Premia casts que están acelerando ahora (engagement/hora entre scans)."""
+        saturation = self.settings.trend_velocity_saturation
+        velocity = max(0.0, cast.get("engagement_velocity", 0.0) or 0.0)
+        acceleration = max(0.0, cast.get("engagement_acceleration", 0.0) or 0.0)
+        return (
+            min(velocity / saturation, 1.0) * self.settings.trend_velocity_weight
+            + min(acceleration / saturation, 1.0) * self.settings.trend_acceleration_weight
+        )
+
     @staticmethod
     def _extract_tags(text: str) -> list[str]:
         tags = set(tag.lower() for tag in re.findall(r"#(\w+)", text))
@@ -11,6 +11,8 @@ from .config import settings
 from .graph.supervisor import SupervisorOrchestrator
 from .scheduler import lifespan, supervisor as scheduler_supervisor
 from .services.leaderboard_sync import LeaderboardSyncer
+from .services.xp_grant_queue import get_xp_grant_queue
+from .tools.celo import get_async_celo_toolbox
 
 logger = logging.getLogger(__name__)
 
@@ -103,12 +105,9 @@ except Exception as exc:
 # Inicializar Syncer (lazy init en startup)
 leaderboard_syncer = None
 
-# Inicializar Farcaster Toolbox
-from .tools.farcaster import FarcasterToolbox
-farcaster_toolbox = FarcasterToolbox(
-    base_url=settings.farcaster_hub_api or "https://api.neynar.com/v2",
-    neynar_key=settings.neynar_api_key
-)
+# Inicializar Farcaster Toolbox (pool HTTP compartido con agentes y syncer)
+from .tools.farcaster import get_farcaster_toolbox
+farcaster_toolbox = get_farcaster_toolbox(settings)
 
 # Rate limiting simple: almacenar últimos requests por IP
 # En producción, usar Redis o un middleware más robusto
@@ -291,6 +290,7 @@ async def healthcheck() -> dict[str, object]:
         response = {
             "status": status,
             "supervisor_initialized": supervisor_status,
+            "neynar_cache": farcaster_toolbox.cache_stats(),
         }
         
         if missing_vars:
@@ -337,6 +337,7 @@ async def get_energy_status(address: str = Query(...)):
         }
     """
     try:
+        import asyncio
         from .services.energy import energy_service
         
         # CRITICAL: get_status ya recarga los datos del archivo/Redis y calcula todo correctamente
@@ -344,7 +345,8 @@ async def get_energy_status(address: str = Query(...)):
         logger.info(f"🔋 [Energy API] Consultando energía para {address}")
         
         # get_status ya hace todo: recarga datos, calcula estado, filtra rayos recargados, y devuelve bolts
-        status = energy_service.get_status(address)
+        # En un hilo: con Redis es un round trip de red y no debe bloquear el event loop
+        status = await asyncio.to_thread(energy_service.get_status, address)
         
         logger.info(f"🔋 [Energy API] Estado obtenido: {status['current_energy']}/{status['max_energy']} rayos")
         logger.info(f"🔋 [Energy API] Rayos disponibles: {sum(1 for b in status.get('bolts', []) if b.get('available', False))}")
@@ -380,16 +382,10 @@ async def get_xp(wallet_address: str, campaign_id: str = Query(default="demo-cam
         {"xp": 100, "wallet": "0x...", "campaign_id": "demo-campaign"}
     """
     try:
-        from .tools.celo import CeloToolbox
-        
-        # Inicializar CeloToolbox
-        celo_tool = CeloToolbox(
-            rpc_url=settings.celo_rpc_url,
-            private_key=None,  # Solo lectura, no necesita private key
-        )
+        from .tools.celo import get_async_celo_toolbox
         
-        # Leer XP on-chain
-        xp_balance = celo_tool.get_xp_balance(
+        # Leer XP on-chain (fuera del event loop)
+        xp_balance = await get_async_celo_toolbox(settings).get_xp_balance(
             registry_address=settings.registry_address,
             campaign_id=campaign_id,
             participant=wallet_address,
@@ -429,11 +425,35 @@ async def get_xp(wallet_address: str, campaign_id: str = Query(default="demo-cam
         )
 
 
+@app.get("/api/nft/metadata/{key}")
+async def get_nft_metadata(key: str, request: Request):
+    """Metadata JSON de una carta NFT por su clave de contenido (``tokenURI`` = baseURI + clave).
+
+    El contenido de una clave nunca cambia, así que se sirve con caché inmutable (CDN y wallets).
+    """
+    import asyncio
+    from fastapi.responses import Response
+    from .stores.nft_metadata import get_nft_metadata_store
+
+    # Si no está en esta instancia puede leerse de Upstash (HTTP): fuera del event loop
+    payload = await asyncio.to_thread(get_nft_metadata_store().get, key)
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Metadata no encontrada")
+    headers = {"Cache-Control": "public, max-age=31536000, immutable", "ETag": f'"{key}"'}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload, media_type="application/json", headers=headers)
+
+
 from fastapi import BackgroundTasks
 
 @app.get("/api/lootbox/leaderboard")
-async def leaderboard(background_tasks: BackgroundTasks, limit: int = Query(50, ge=1, le=100)) -> dict[str, list[dict[str, object]]]:
-    """Devuelve el top de ganadores recientes.
+async def leaderboard(
+    background_tasks: BackgroundTasks,
+    limit: int = Query(50, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+) -> dict[str, list[dict[str, object]]]:
+    """Devuelve el top de ganadores recientes (paginado con ``offset``).
     
     Si el leaderboard está vacío (cold start), dispara una sincronización en background.
     """
@@ -444,10 +464,10 @@ async def leaderboard(background_tasks: BackgroundTasks, limit: int = Query(50,
             logger.warning("Supervisor no inicializado, retornando leaderboard vacío")
             return {"items": []}
             
-        items = active_supervisor.leaderboard.top(limit)
+        items = active_supervisor.leaderboard.top(limit, offset)
         
         # COLD START HANDLER: Si no hay items, disparar sync en background
-        if len(items) == 0:
+        if len(items) == 0 and offset == 0:
             logger.info("❄️ Cold Start detectado (Leaderboard vacío). Iniciando sync en background...")
             
             async def _bg_sync():
@@ -487,7 +507,10 @@ async def sync_leaderboard():
         raise HTTPException(status_code=500, detail=str(exc))
 
 @app.get("/api/lootbox/trends")
-async def get_trends(limit: int = Query(10, ge=1, le=50)) -> dict[str, list[dict[str, object]]]:
+async def get_trends(
+    limit: int = Query(10, ge=1, le=50),
+    channel_id: str | None = Query(None, max_length=100),
+) -> dict[str, list[dict[str, object]]]:
     """Devuelve las tendencias detectadas recientemente por TrendWatcherAgent."""
     try:
         # Usar supervisor del scheduler si está disponible, sino el global
@@ -495,7 +518,7 @@ async def get_trends(limit: int = Query(10, ge=1, le=50)) -> dict[str, list[dict
         if not active_supervisor:
             logger.warning("Supervisor no inicializado, retornando trends vacío")
             return {"items": []}
-        trends = active_supervisor.trends_store.recent(limit)
+        trends = active_supervisor.trends_store.recent(limit, channel_id=channel_id)
         return {"items": trends}
     except Exception as exc:
         logger.error("Error obteniendo trends: %s", exc, exc_info=True)
@@ -530,6 +553,8 @@ async def verify_recharge(req: VerifyRechargeRequest):
             )
 
         # 1. Fetch recent casts (last 5) - OPTIMIZATION: Reducir para ahorrar créditos API
+        # El usuario acaba de compartir: descartar casts cacheados para ver el nuevo
+        farcaster_toolbox.invalidate_user_casts(req.fid)
         casts = await farcaster_toolbox.fetch_user_recent_casts(req.fid, limit=5)
         
         # 2. Check for campaign keywords/links
@@ -557,8 +582,10 @@ async def verify_recharge(req: VerifyRechargeRequest):
         
         # 3. Refill Energy if verified
         if verified:
+            import asyncio
             from .services.energy import energy_service
-            energy_service.refill_energy(req.address)
+            # En un hilo: script en Redis o escritura durable (fsync) en el log de archivo
+            await asyncio.to_thread(energy_service.refill_energy, req.address)
 
         # 4. Return result
         return {
@@ -579,17 +606,24 @@ async def trigger_scan(req: LootboxEvent):
         if not active_supervisor:
             raise HTTPException(status_code=500, detail="Supervisor no inicializado")
         
-        # Ejecutar scan automático
+        # Ejecutar scan automático (re-escanea en paralelo los canales configurados)
+        from .graph.trend_watcher import parse_channel_list
+        channel_ids = parse_channel_list(settings.trend_scan_channels) or ["global"]
         payload = {
             "frame_id": "",
-            "channel_id": "global",
+            "channel_id": channel_ids[0],
+            "channel_ids": channel_ids,
             "trend_score": 0.0,
+            "force_trend_refresh": True,
         }
         
         import time
         start_time = time.time()
         
-        result = await active_supervisor.run(payload)
+        # Scan de cron: carril de baja prioridad frente a requests de usuarios
+        from .tools.rate_limiter import background_priority
+        with background_priority():
+            result = await active_supervisor.run(payload)
         
         end_time = time.time()
         duration = end_time - start_time
@@ -795,95 +829,97 @@ async def notify_energy_reminder():
     Envía notificaciones a usuarios que tienen al menos 1 rayo disponible o que están recargando.
     """
     try:
+        import asyncio
         from .services.energy import energy_service
-        from .tools.farcaster import FarcasterToolbox
-        from .config import settings
         
         logger.info("🔔 Iniciando envío de notificaciones de energía...")
         
         # Obtener todas las direcciones con estado de energía
-        addresses = energy_service.get_all_addresses()
+        addresses = await asyncio.to_thread(energy_service.get_all_addresses)
         logger.info(f"📋 Encontradas {len(addresses)} direcciones con estado de energía")
         
         if not addresses:
             return {"status": "success", "notifications_sent": 0, "message": "No hay usuarios con energía registrada"}
         
-        # Inicializar Farcaster toolbox
-        farcaster = FarcasterToolbox(neynar_key=settings.neynar_api_key)
-        
-        notifications_sent = 0
-        notifications_failed = 0
+        # Reutilizar el toolbox global (pool HTTP compartido)
+        farcaster = farcaster_toolbox
+
+        # Cron diario: sus llamadas a Neynar van por el carril de fondo del rate limiter
+        from .tools.rate_limiter import background_priority
+        with background_priority():
+            notifications_sent = 0
+            notifications_failed = 0
         
-        # Obtener store de notificaciones para mapeo dirección -> FID
-        from .stores.notifications import get_notification_store
-        store = get_notification_store()
+            # Obtener store de notificaciones para mapeo dirección -> FID
+            from .stores.notifications import get_notification_store
+            store = get_notification_store()
         
-        # Para cada dirección, buscar su FID y enviar notificación
-        for address in addresses:
-            try:
-                # Obtener estado de energía
-                energy_status = energy_service.get_status(address)
-                current_energy = energy_status.get("current_energy", 0)
-                max_energy = energy_status.get("max_energy", 3)
-                seconds_to_refill = energy_status.get("seconds_to_refill", 0)
+            # Para cada dirección, buscar su FID y enviar notificación
+            for address in addresses:
+                try:
+                    # Obtener estado de energía
+                    energy_status = await asyncio.to_thread(energy_service.get_status, address)
+                    current_energy = energy_status.get("current_energy", 0)
+                    max_energy = energy_status.get("max_energy", 3)
+                    seconds_to_refill = energy_status.get("seconds_to_refill", 0)
                 
-                # Solo notificar si el usuario tiene todos los rayos disponibles (3/3) o está recargando
-                # No notificar si tiene 1-2 rayos disponibles
-                if current_energy > 0 and current_energy < max_energy:
-                    # Usuario con algunos rayos pero no todos, saltar
-                    continue
+                    # Solo notificar si el usuario tiene todos los rayos disponibles (3/3) o está recargando
+                    # No notificar si tiene 1-2 rayos disponibles
+                    if current_energy > 0 and current_energy < max_energy:
+                        # Usuario con algunos rayos pero no todos, saltar
+                        continue
                 
-                if current_energy == 0 and seconds_to_refill == 0:
-                    # Usuario sin energía y sin recargas pendientes, saltar
-                    continue
+                    if current_energy == 0 and seconds_to_refill == 0:
+                        # Usuario sin energía y sin recargas pendientes, saltar
+                        continue
                 
-                # Buscar FID usando el mapeo guardado
-                fid = store.get_fid_by_address(address)
-                if not fid:
-                    logger.debug(f"⚠️ No se encontró FID para dirección {address}, saltando...")
-                    continue
+                    # Buscar FID usando el mapeo guardado
+                    fid = store.get_fid_by_address(address)
+                    if not fid:
+                        logger.debug(f"⚠️ No se encontró FID para dirección {address}, saltando...")
+                        continue
                 
-                # Verificar cooldown de 48 horas
-                can_send, seconds_remaining = store.can_send_notification(fid)
-                if not can_send:
-                    hours_remaining = seconds_remaining / 3600
-                    logger.debug(f"⏳ FID {fid} en cooldown. Restan {hours_remaining:.1f} horas. Saltando...")
-                    continue
+                    # Verificar cooldown de 48 horas
+                    can_send, seconds_remaining = store.can_send_notification(fid)
+                    if not can_send:
+                        hours_remaining = seconds_remaining / 3600
+                        logger.debug(f"⏳ FID {fid} en cooldown. Restan {hours_remaining:.1f} horas. Saltando...")
+                        continue
                 
-                logger.info(f"📨 Enviando notificación a FID {fid} (dirección: {address}, energía: {current_energy}/{max_energy})")
+                    logger.info(f"📨 Enviando notificación a FID {fid} (dirección: {address}, energía: {current_energy}/{max_energy})")
                 
-                # Preparar mensaje según estado de energía
-                if current_energy == max_energy:
-                    title = "⚡ ¡Tus Rayos Están Listos!"
-                    body = f"Tienes {current_energy} rayos disponibles. ¡Obtén tu recompensa ahora!"
-                else:
-                    # Usuario sin energía pero recargando
-                    hours = seconds_to_refill // 3600
-                    minutes = (seconds_to_refill % 3600) // 60
-                    title = "⚡ Rayos Recargando"
-                    body = f"Tu próximo rayo estará listo en {hours}h {minutes}m. ¡Vuelve pronto!"
+                    # Preparar mensaje según estado de energía
+                    if current_energy == max_energy:
+                        title = "⚡ ¡Tus Rayos Están Listos!"
+                        body = f"Tienes {current_energy} rayos disponibles. ¡Obtén tu recompensa ahora!"
+                    else:
+                        # Usuario sin energía pero recargando
+                        hours = seconds_to_refill // 3600
+                        minutes = (seconds_to_refill % 3600) // 60
+                        title = "⚡ Rayos Recargando"
+                        body = f"Tu próximo rayo estará listo en {hours}h {minutes}m. ¡Vuelve pronto!"
                 
-                # Enviar notificación
-                result = await farcaster.publish_frame_notification(
-                    target_fids=[fid],
-                    title=title,
-                    body=body,
-                    target_url="https://celo-build-web-8rej.vercel.app/"
-                )
+                    # Enviar notificación
+                    result = await farcaster.publish_frame_notification(
+                        target_fids=[fid],
+                        title=title,
+                        body=body,
+                        target_url="https://celo-build-web-8rej.vercel.app/"
+                    )
                 
-                if result.get("status") == "success" or "status" not in result:
-                    notifications_sent += 1
-                    # Registrar que se envió la notificación
-                    store.record_notification_sent(fid)
-                    logger.info(f"✅ Notificación enviada a FID {fid}")
-                else:
-                    notifications_failed += 1
-                    logger.warning(f"❌ Error enviando notificación a FID {fid}: {result}")
+                    if result.get("status") == "success" or "status" not in result:
+                        notifications_sent += 1
+                        # Registrar que se envió la notificación
+                        store.record_notification_sent(fid)
+                        logger.info(f"✅ Notificación enviada a FID {fid}")
+                    else:
+                        notifications_failed += 1
+                        logger.warning(f"❌ Error enviando notificación a FID {fid}: {result}")
                     
-            except Exception as exc:
-                logger.error(f"Error procesando dirección {address}: {exc}")
-                notifications_failed += 1
-                continue
+                except Exception as exc:
+                    logger.error(f"Error procesando dirección {address}: {exc}")
+                    notifications_failed += 1
+                    continue
         
         logger.info(f"✅ Notificaciones completadas: {notifications_sent} enviadas, {notifications_failed} fallidas")
         
@@ -905,20 +941,20 @@ async def notify_energy_reminder():
 
 from .services.cast_generator import CastGeneratorService
 from .services.cast_scheduler import CastSchedulerService
-from .tools.celo import CeloToolbox
 from datetime import datetime
 from web3 import Web3
 
 # Inicializar servicios
 cast_generator = CastGeneratorService(settings)
-celo_toolbox = CeloToolbox(
-    rpc_url=settings.celo_rpc_url,
-    private_key=settings.celo_private_key
-)
+# Fachada asíncrona compartida: validación de pagos y grants de XP fuera del event loop
+celo_toolbox = get_async_celo_toolbox(settings)
+# Los grants de XP de la API, el scheduler y el distribuidor viajan juntos en grantXpBatch
+xp_grant_queue = get_xp_grant_queue(settings)
 cast_scheduler = CastSchedulerService(
     farcaster_toolbox=farcaster_toolbox,
     celo_toolbox=celo_toolbox,
-    registry_address=settings.registry_address
+    registry_address=settings.registry_address,
+    xp_queue=xp_grant_queue,
 )
 
 # Iniciar scheduler si no estamos en Vercel
@@ -1016,7 +1052,7 @@ async def publish_cast(request: PublishCastRequest):
         PRICE_WEI = int(0.1 * 10**18)
         
         # Validar pago en CELO nativo
-        payment_validation = celo_toolbox.validate_native_payment(
+        payment_validation = await celo_toolbox.validate_native_payment(
             tx_hash=request.payment_tx_hash,
             expected_recipient=agent_address,
             expected_amount=PRICE_WEI
@@ -1288,12 +1324,7 @@ async def grant_xp_for_publish(request: GrantXpRequest):
         
         # Otorgar XP (usar "demo-campaign" para que se acumule con el resto del XP de la app)
         campaign_id = "demo-campaign"
-        tx_hash = celo_toolbox.grant_xp(
-            registry_address=settings.registry_address,
-            campaign_id=campaign_id,
-            participant=request.user_address,
-            amount=xp_amount
-        )
+        tx_hash = await xp_grant_queue.grant(campaign_id, request.user_address, xp_amount)
         
         logger.info(f"✅ XP otorgado: {xp_amount} XP a {request.user_address}, tx: {tx_hash}")
         return {
@@ -1329,7 +1360,7 @@ async def verify_publication(request: VerifyPublicationRequest):
         PRICE_WEI = int(0.1 * 10**18)
         
         # Validar pago en CELO nativo
-        payment_validation = celo_toolbox.validate_native_payment(
+        payment_validation = await celo_toolbox.validate_native_payment(
             tx_hash=request.payment_tx_hash,
             expected_recipient=agent_address,
             expected_amount=PRICE_WEI
@@ -1350,7 +1381,8 @@ async def verify_publication(request: VerifyPublicationRequest):
         
         logger.info(f"✅ Pago validado para usuario {request.user_address}")
         
-        # Buscar el cast en los casts recientes del usuario
+        # Buscar el cast en los casts recientes del usuario (sin cache: acaba de publicar)
+        farcaster_toolbox.invalidate_user_casts(request.user_fid)
         casts = await farcaster_toolbox.fetch_user_recent_casts(request.user_fid, limit=5)
         
         # Normalizar el texto del cast para comparación (sin espacios extra, lowercase)
@@ -1373,7 +1405,11 @@ async def verify_publication(request: VerifyPublicationRequest):
         if verified:
             # Otorgar XP
             xp_amount = 100
-            xp_result = celo_toolbox.grant_xp(request.user_address, xp_amount)
+            try:
+                tx_hash = await xp_grant_queue.grant("demo-campaign", request.user_address, xp_amount)
+                xp_result = {"success": True, "tx_hash": tx_hash}
+            except Exception as xp_exc:  # noqa: BLE001
+                xp_result = {"success": False, "message": str(xp_exc)}
             
             if xp_result.get("success"):
                 logger.info(f"✅ XP otorgado: {xp_amount} XP a {request.user_address}")
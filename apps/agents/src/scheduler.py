@@ -13,6 +13,10 @@ from apscheduler.triggers.interval import IntervalTrigger
 
 from .config import settings
 from .graph.supervisor import SupervisorOrchestrator
+from .graph.trend_watcher import parse_channel_list
+from .tools.celo import close_async_celo_toolbox
+from .tools.farcaster import close_farcaster_toolbox
+from .tools.rate_limiter import background_priority
 
 logger = logging.getLogger(__name__)
 
@@ -28,14 +32,19 @@ async def run_automatic_scan() -> None:
 
     logger.info("🔄 Iniciando scan automático de tendencias...")
     try:
-        # Ejecutamos sin target_address específico para buscar tendencias globales
+        # Ejecutamos sin target_address específico; los canales configurados se escanean en paralelo
+        channel_ids = parse_channel_list(settings.trend_scan_channels) or ["global"]
         payload = {
             "frame_id": "",  # Vacío para buscar tendencias globales
-            "channel_id": "global",
+            "channel_id": channel_ids[0],
+            "channel_ids": channel_ids,
             "trend_score": 0.0,  # Se calculará automáticamente
+            "force_trend_refresh": True,  # Refresca el snapshot que leen los runs de usuarios
         }
 
-        result = await supervisor.run(payload)
+        # Carril de baja prioridad en el rate limiter de Neynar
+        with background_priority():
+            result = await supervisor.run(payload)
         logger.info(
             "✅ Scan automático completado: %s (tx: %s)",
             result.summary[:100],
@@ -93,3 +102,12 @@ async def lifespan(app):
         except Exception as exc:
             logger.warning("Error deteniendo scheduler: %s", exc)
 
+    # Cerrar el pool HTTP compartido de Neynar
+    try:
+        await close_farcaster_toolbox()
+    except Exception as exc:
+        logger.warning("Error cerrando pool HTTP de Neynar: %s", exc)
+
+    # Liberar los hilos de I/O on-chain
+    close_async_celo_toolbox()
+
@@ -0,0 +1,176 @@
+"""Benchmark del scoring de tendencias: loop por cast vs. scoring vectorizado + argpartition.
+
+``batch`` es el camino de ``TrendWatcherAgent.scan`` cuando el lote supera la capacidad del pool
+(``trend_pool_max_entries``). ``pool cold`` es el primer ingest de un ``RollingTrendPool`` (el
+costo lo domina el bookkeeping por cast, no el scoring) y ``pool warm`` un re-scan con ~5% de
+casts con engagement nuevo, el caso de ``scan`` con lotes que caben en el pool.
+
+Uso:
+    python -m src.scripts.benchmark_trend_scoring --sizes 1000 10000 50000 --repeat 5
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+# Add src to path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from src.services.trend_pool import TIER_HIGH, TIER_LOW, TIER_MID, RollingTrendPool
+from src.services.trend_scoring import score_casts, select_tiers
+
+QUOTAS = {TIER_HIGH: 3, TIER_MID: 4, TIER_LOW: 3}
+TARGET = 10
+SETTINGS = SimpleNamespace(trend_velocity_saturation=100.0, trend_velocity_weight=0.25, trend_acceleration_weight=0.1)
+
+
+def make_candidates(n: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    casts = []
+    for i in range(n):
+        published = now - timedelta(minutes=rng.randint(0, 36 * 60))
+        casts.append({
+            "hash": f"0x{i:040x}",
+            "timestamp": published.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            "reactions": {
+                "likes": int(rng.paretovariate(1.2)) - 1,
+                "recasts": int(rng.paretovariate(1.6)) - 1,
+                "replies": int(rng.paretovariate(1.4)) - 1,
+            },
+            "is_targeted": rng.random() < 0.05,
+            "engagement_velocity": max(0.0, rng.gauss(5, 20)),
+            "engagement_acceleration": rng.gauss(0, 10),
+        })
+    return casts
+
+
+def _age_hours(timestamp: str | None) -> float:
+    # Réplica de FarcasterToolbox.timestamp_age_hours (sin instanciar el cliente HTTP)
+    if not timestamp:
+        return 24.0
+    try:
+        dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except ValueError:
+        return 24.0
+    return max((datetime.now(timezone.utc) - dt).total_seconds() / 3600, 0.0)
+
+
+def legacy_score(cast: dict) -> float:
+    """Scoring por cast tal como lo hace TrendWatcherAgent._candidate_score."""
+    reactions = cast.get("reactions", {})
+    engagement = (reactions.get("likes", 0) * 1.0 + reactions.get("recasts", 0) * 2.0 + reactions.get("replies", 0) * 0.6) / 200.0
+    recency = max(0.0, 12 - _age_hours(cast.get("timestamp"))) / 12.0
+    velocity = max(0.0, cast.get("engagement_velocity", 0.0) or 0.0)
+    acceleration = max(0.0, cast.get("engagement_acceleration", 0.0) or 0.0)
+    bonus = min(velocity / 100.0, 1.0) * 0.25 + min(acceleration / 100.0, 1.0) * 0.1
+    score = min(engagement + recency * 0.3 + bonus, 1.0)
+    return max(score, 0.45) if cast.get("is_targeted") else score
+
+
+def legacy_rank(candidates: list[dict]) -> list[dict]:
+    """Loop original: copia cada dict, tres comprensiones y tres sorts completos."""
+    scored = [{**c, "trend_score": legacy_score(c)} for c in candidates]
+    high = sorted([c for c in scored if c["trend_score"] >= 0.7], key=lambda c: c["trend_score"], reverse=True)
+    mid = sorted([c for c in scored if 0.3 <= c["trend_score"] < 0.7], key=lambda c: c["trend_score"], reverse=True)
+    low = sorted([c for c in scored if c["trend_score"] < 0.3], key=lambda c: c["trend_score"], reverse=True)
+    selection = high[:3] + mid[:4] + low[:3]
+    for extra in (mid[4:], high[3:], low[3:]):
+        selection.extend(extra[: max(0, TARGET - len(selection))])
+    return sorted(selection, key=lambda c: c["trend_score"], reverse=True)
+
+
+def batch_rank(candidates: list[dict]) -> list[dict]:
+    scores = score_casts(candidates)
+    chosen = select_tiers(scores, QUOTAS, TARGET)
+    return [{**candidates[i], "trend_score": float(scores[i])} for i in chosen.tolist()]
+
+
+def _batch_scorer(casts, published_at, now):
+    return score_casts(
+        casts, published_at=published_at, now=now,
+        velocity_saturation=SETTINGS.trend_velocity_saturation,
+        velocity_weight=SETTINGS.trend_velocity_weight,
+        acceleration_weight=SETTINGS.trend_acceleration_weight,
+    )
+
+
+def _new_pool(size: int) -> RollingTrendPool:
+    return RollingTrendPool(legacy_score, max_entries=size, batch_scorer=_batch_scorer)
+
+
+def pool_rank(candidates: list[dict]) -> list[dict]:
+    pool = _new_pool(len(candidates))
+    pool.ingest(candidates)
+    return pool.select(QUOTAS, TARGET)
+
+
+def rescan(candidates: list[dict], changed_fraction: float = 0.05, seed: int = 11) -> list[dict]:
+    """El mismo lote con una fracción de casts con más likes (lo que trae un scan siguiente)."""
+    rng = random.Random(seed)
+    changed = []
+    for cast in candidates:
+        if rng.random() < changed_fraction:
+            reactions = dict(cast["reactions"], likes=cast["reactions"]["likes"] + rng.randint(1, 20))
+            cast = {**cast, "reactions": reactions}
+        changed.append(cast)
+    return changed
+
+
+def timeit(fn, candidates: list[dict], repeat: int) -> tuple[float, list[dict]]:
+    best = float("inf")
+    result: list[dict] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(candidates)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(
+        f"{'candidatos':>10} | {'loop (ms)':>10} | {'batch (ms)':>10} | {'pool cold (ms)':>14} | "
+        f"{'pool warm (ms)':>14} | {'batch casts/s':>13} | speedup"
+    )
+    for size in args.sizes:
+        candidates = make_candidates(size)
+        legacy_t, legacy_result = timeit(legacy_rank, candidates, args.repeat)
+        batch_t, batch_result = timeit(batch_rank, candidates, args.repeat)
+        pool_t, _ = timeit(pool_rank, candidates, max(1, args.repeat // 2))
+
+        # Pool ya cargado: cada repetición re-ingiere un scan con ~5% de casts cambiados
+        warm_pool = _new_pool(size)
+        warm_pool.ingest(candidates)
+        scans = [rescan(candidates, seed=seed) for seed in range(args.repeat)]
+        warm_t = float("inf")
+        for scan in scans:
+            started = time.perf_counter()
+            warm_pool.ingest(scan)
+            warm_pool.select(QUOTAS, TARGET)
+            warm_t = min(warm_t, time.perf_counter() - started)
+
+        legacy_scores = np.array([c["trend_score"] for c in legacy_result])
+        batch_scores = np.array([c["trend_score"] for c in batch_result])
+        # El loop recalcula "ahora" por cast: la recencia difiere ~7e-6 por segundo de ejecución
+        assert np.allclose(legacy_scores, batch_scores, atol=1e-4), "El ranking vectorizado difiere del loop original"
+
+        print(
+            f"{size:>10} | {legacy_t * 1000:>10.1f} | {batch_t * 1000:>10.1f} | {pool_t * 1000:>14.1f} | "
+            f"{warm_t * 1000:>14.1f} | "
+            f"{size / batch_t:>13,.0f} | {legacy_t / batch_t:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
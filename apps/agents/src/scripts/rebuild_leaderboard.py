@@ -2,7 +2,6 @@ import asyncio
 import logging
 import sys
 import os
-import json
 from pathlib import Path
 from dotenv import load_dotenv
 from web3 import Web3
@@ -182,15 +181,13 @@ async def rebuild_leaderboard():
         # Fix timestamp to use time.time()
         leaderboard_data[-1]["timestamp"] = int(__import__("time").time())
 
-    # Sort by XP
-    leaderboard_data.sort(key=lambda x: x["xp"], reverse=True)
-    
     logger.info(f"Saving {len(leaderboard_data)} entries to leaderboard...")
     
-    # Direct write to ensure clean state
-    data_path = Path(__file__).resolve().parents[1] / "data" / "leaderboard.json"
-    with open(data_path, "w") as f:
-        json.dump(leaderboard_data, f, indent=2)
+    # Reemplazo completo y atómico (estado limpio), con el backend configurado. El reemplazo
+    # sube la generación del store: un servidor en marcha descarta su copia en memoria y
+    # recarga en su próximo ciclo de volcado (``leaderboard_flush_interval_seconds``).
+    store = default_store(settings.leaderboard_max_entries, backend=settings.leaderboard_backend)
+    store.replace_all(leaderboard_data)
         
     logger.info("✅ Leaderboard rebuilt successfully!")
 
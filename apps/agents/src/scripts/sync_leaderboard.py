@@ -19,16 +19,23 @@ from src.tools.celo import CeloToolbox
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SYNC_PAGE_SIZE = 1000
+
 async def sync_leaderboard():
     logger.info("Starting Leaderboard Sync with Blockchain...")
     
-    store = default_store(settings.leaderboard_max_entries)
+    # Mismo backend que el servidor (sqlite guarda a toda la población, sin recorte)
+    store = default_store(settings.leaderboard_max_entries, backend=settings.leaderboard_backend)
     celo = CeloToolbox(settings.celo_rpc_url, settings.celo_private_key)
     
-    # Read all entries directly to avoid lock issues during iteration
-    # (though store methods use lock, we want to process and write back)
-    # We'll use the public methods which are safe.
-    entries = store.top(limit=1000) # Get all
+    # Leer todas las páginas antes de escribir: cada record() puede mover el ranking
+    # y desplazar los offsets de las páginas siguientes
+    entries = []
+    while True:
+        page = store.top(limit=SYNC_PAGE_SIZE, offset=len(entries))
+        entries.extend(page)
+        if len(page) < SYNC_PAGE_SIZE:
+            break
     
     if not entries:
         logger.info("No entries found in leaderboard.")
@@ -57,13 +57,17 @@ class ScheduledCast:
 class CastSchedulerService:
     """Maneja la programación y publicación de casts."""
     
-    def __init__(self, farcaster_toolbox: Any, celo_toolbox: Any, registry_address: str) -> None:
+    def __init__(
+        self, farcaster_toolbox: Any, celo_toolbox: Any, registry_address: str, xp_queue: Any | None = None
+    ) -> None:
         self.scheduler = AsyncIOScheduler()
         self.scheduled_casts: dict[str, ScheduledCast] = {}
         self.farcaster_toolbox = farcaster_toolbox
         self.celo_toolbox = celo_toolbox
         self.registry_address = registry_address
         self.campaign_id = "cast-generation"  # ID de campaña para XP
+        # XpGrantQueue compartida: el grant viaja en un grantXpBatch con los de la API y el distribuidor
+        self.xp_queue = xp_queue
         
     def start(self):
         """Inicia el scheduler."""
@@ -77,6 +81,17 @@ class CastSchedulerService:
             self.scheduler.shutdown()
             logger.info("✅ CastSchedulerService detenido")
     
+    async def _grant_xp(self, participant: str, amount: int) -> str:
+        """Otorga XP vía la cola de batches (si hay) o con un ``grantXp`` directo."""
+        if self.xp_queue is not None:
+            return await self.xp_queue.grant(self.campaign_id, participant, amount)
+        return await self.celo_toolbox.grant_xp(
+            registry_address=self.registry_address,
+            campaign_id=self.campaign_id,
+            participant=participant,
+            amount=amount,
+        )
+
     def schedule_cast(
         self,
         user_address: str,
@@ -162,12 +177,7 @@ class CastSchedulerService:
                 
                 # Otorgar XP
                 try:
-                    self.celo_toolbox.grant_xp(
-                        registry_address=self.registry_address,
-                        campaign_id=self.campaign_id,
-                        participant=cast.user_address,
-                        amount=100  # XP por publicar
-                    )
+                    await self._grant_xp(cast.user_address, 100)  # XP por publicar
                     cast.xp_granted = 100
                     logger.info(f"✅ XP otorgado a {cast.user_address}")
                 except Exception as e:
@@ -254,12 +264,7 @@ class CastSchedulerService:
                 
                 # Otorgar XP después de publicar exitosamente
                 try:
-                    tx_hash = self.celo_toolbox.grant_xp(
-                        registry_address=self.registry_address,
-                        campaign_id=self.campaign_id,
-                        participant=user_address,
-                        amount=100  # XP por publicar
-                    )
+                    tx_hash = await self._grant_xp(user_address, 100)  # XP por publicar
                     scheduled_cast.xp_granted = 100
                     logger.info(f"✅ XP otorgado a {user_address} (tx: {tx_hash})")
                 except Exception as e:
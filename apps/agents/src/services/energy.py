@@ -1,14 +1,16 @@
 from __future__ import annotations
 
 import json
+import math
 import os
 import shutil
 import time
 import logging
 from pathlib import Path
-from threading import Lock
 from typing import TypedDict, Dict, Optional
 
+from ..stores.energy_log import EnergyLogStore
+
 logger = logging.getLogger(__name__)
 
 # Try to import Upstash Redis, fallback to file storage if not available
@@ -19,35 +21,167 @@ except ImportError:
     UPSTASH_AVAILABLE = False
     Redis = None
 
+# redis-py opcional: REDIS_URL permite usar un Redis local en lugar de Upstash
+try:
+    import redis as redis_py
+except ImportError:
+    redis_py = None
+
 
 class EnergyState(TypedDict):
     consumed_bolts: list[float]  # Array of timestamps when each bolt was consumed
 
 
+# Claves en Redis: un string JSON por usuario (TTL = hasta que recarga su último rayo)
+# y un sorted set address -> última actividad para get_all_addresses
+REDIS_USER_PREFIX = "energy:user:"
+REDIS_INDEX_KEY = "energy:users"
+REDIS_LEGACY_KEY = "energy:store"
+# Los scripts declaran en KEYS todas las claves que tocan, pero combinan la del usuario con el
+# índice: en Redis Cluster (slots distintos) no aplica; Upstash estándar y Redis único sí.
+# Cuánto tiempo sigue listada una dirección sin actividad (recordatorios de rayos listos)
+ADDRESS_INDEX_RETENTION = 7 * 24 * 60 * 60
+
+# Rayos activos (aún recargando) de un usuario; cjson codifica la tabla vacía como "{}"
+_LUA_ACTIVE = """
+local function active_bolts(raw, now, recharge)
+  local active, newest = {}, 0
+  if raw then
+    for _, t in ipairs(cjson.decode(raw)) do
+      if now - t < recharge then
+        table.insert(active, t)
+        if t > newest then newest = t end
+      end
+    end
+  end
+  return active, newest
+end
+"""
+
+# KEYS: usuario, índice. ARGV: now, recharge, max, address -> {consumido 0/1, rayos activos JSON}
+LUA_CONSUME = _LUA_ACTIVE + """
+local now, recharge, max_energy = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local active, newest = active_bolts(redis.call('GET', KEYS[1]), now, recharge)
+if #active >= max_energy then
+  return {0, cjson.encode(active)}
+end
+table.insert(active, now)
+redis.call('SET', KEYS[1], cjson.encode(active), 'PX', math.ceil(recharge * 1000))
+redis.call('ZADD', KEYS[2], now, ARGV[4])
+return {1, cjson.encode(active)}
+"""
+
+# KEYS: usuario, índice. ARGV: now, recharge, amount, address -> rayos activos JSON tras recargar
+LUA_REFILL = _LUA_ACTIVE + """
+local now, recharge, amount = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local active = active_bolts(redis.call('GET', KEYS[1]), now, recharge)
+table.sort(active)
+local remaining, newest = {}, 0
+for i = amount + 1, #active do
+  table.insert(remaining, active[i])
+  if active[i] > newest then newest = active[i] end
+end
+if #remaining == 0 then
+  redis.call('DEL', KEYS[1])
+else
+  redis.call('SET', KEYS[1], cjson.encode(remaining), 'PX', math.ceil((newest + recharge - now) * 1000))
+end
+redis.call('ZADD', KEYS[2], now, ARGV[4])
+return cjson.encode(remaining)
+"""
+
+# KEYS: índice. ARGV: corte de retención -> direcciones con actividad reciente
+LUA_ADDRESSES = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[1])
+return redis.call('ZRANGE', KEYS[1], 0, -1)
+"""
+
+# KEYS: índice, usuario_1..usuario_n. ARGV: now, luego por usuario address, rayos JSON, TTL ms
+# Idempotente: no pisa claves que ya existen (consumos posteriores) ni el índice ya escrito
+LUA_MIGRATE_CHUNK = """
+local now = tonumber(ARGV[1])
+for i = 2, #KEYS do
+  local base = 2 + (i - 2) * 3
+  local address, bolts, ttl = ARGV[base], ARGV[base + 1], tonumber(ARGV[base + 2])
+  if ttl > 0 then
+    redis.call('SET', KEYS[i], bolts, 'PX', ttl, 'NX')
+  end
+  local score = now
+  for _, t in ipairs(cjson.decode(bolts)) do score = t end
+  redis.call('ZADD', KEYS[1], 'NX', score, address)
+end
+return #KEYS - 1
+"""
+
+# KEYS: blob legado, copia archivada. Archiva el blob una vez migrado (otro worker pudo hacerlo ya)
+LUA_ARCHIVE = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+  redis.call('RENAME', KEYS[1], KEYS[2])
+  return 1
+end
+return 0
+"""
+# Usuarios por llamada a LUA_MIGRATE_CHUNK (cada usuario es una clave declarada)
+MIGRATE_CHUNK = 200
+
+
+def _decode_bolts(raw) -> list[float]:
+    if raw is None:
+        return []
+    if isinstance(raw, bytes):
+        raw = raw.decode("utf-8")
+    bolts = json.loads(raw)
+    return [float(t) for t in bolts] if isinstance(bolts, list) else []
+
+
+class _RedisClient:
+    """Misma interfaz para Upstash (REST) y redis-py (``REDIS_URL``, p.ej. un Redis local)."""
+
+    def __init__(self, client) -> None:
+        self.client = client
+        self._upstash = UPSTASH_AVAILABLE and isinstance(client, Redis)
+
+    def get(self, key: str):
+        return self.client.get(key)
+
+    def eval(self, script: str, keys: list[str], args: list):
+        if self._upstash:
+            return self.client.eval(script, keys=keys, args=[str(arg) for arg in args])
+        return self.client.eval(script, len(keys), *keys, *args)
+
+
 class EnergyService:
     """
     Manages user energy (stamina).
     - Max 3 bolts.
     - Each bolt recharges independently every 60 minutes.
-    - Persistent storage in JSON.
+    - Persistencia en Redis (una clave por usuario) o en archivo (log de eventos + snapshot).
     """
 
     MAX_ENERGY = 3
     RECHARGE_TIME = 60 * 60  # 60 minutes in seconds
 
     def __init__(self, storage_path: str = None):
-        self._lock = Lock()
         self._use_redis = False
-        self._redis_client: Optional[Redis] = None
+        self._redis_client: Optional[_RedisClient] = None
+        
+        redis_url = os.getenv("REDIS_URL")
+        if redis_url and redis_py is not None:
+            try:
+                self._redis_client = _RedisClient(redis_py.Redis.from_url(redis_url))
+                self._use_redis = True
+                logger.info("✅ [Energy] Usando Redis (REDIS_URL) para persistencia")
+            except Exception as e:
+                logger.warning(f"⚠️ [Energy] Error inicializando Redis desde REDIS_URL: {e}")
         
         # Try to initialize Upstash Redis if available
-        if UPSTASH_AVAILABLE:
+        if UPSTASH_AVAILABLE and not self._use_redis:
             upstash_url = os.getenv("UPSTASH_REDIS_REST_URL")
             upstash_token = os.getenv("UPSTASH_REDIS_REST_TOKEN")
             
             if upstash_url and upstash_token:
                 try:
-                    self._redis_client = Redis(url=upstash_url, token=upstash_token)
+                    self._redis_client = _RedisClient(Redis(url=upstash_url, token=upstash_token))
                     self._use_redis = True
                     logger.info("✅ [Energy] Usando Upstash Redis para persistencia")
                 except Exception as e:
@@ -66,114 +200,158 @@ class EnergyService:
                     self.storage_path = "data/energy_store.json"
             else:
                 self.storage_path = storage_path
-            logger.info(f"📁 [Energy] Usando almacenamiento en archivo: {self.storage_path}")
-            
-        self._data: Dict[str, EnergyState] = self._load()
+            # Log de eventos + snapshot junto al JSON anterior, que solo se importa la primera vez
+            self._store = EnergyLogStore(
+                Path(self.storage_path).with_suffix(""),
+                self.RECHARGE_TIME,
+                legacy_loader=self._load,
+            )
+            logger.info(f"📁 [Energy] Usando log de eventos en archivo: {self._store.directory}")
+        else:
+            self._migrate_redis_blob()
+
+    # --- Redis: una clave por usuario, consumo atómico en el servidor ---
+    def _user_key(self, address: str) -> str:
+        return f"{REDIS_USER_PREFIX}{address}"
+
+    def _legacy_bolts(self, state: dict) -> list[float]:
+        """Rayos de una entrada del blob legado, incluido el formato antiguo (contador + último consumo)."""
+        if "last_consume_time" in state and "energy_consumed" in state:
+            # Formato antiguo: rayos espaciados RECHARGE_TIME hacia atrás desde el último consumo
+            return [state["last_consume_time"] - i * self.RECHARGE_TIME for i in range(state["energy_consumed"])]
+        return [float(t) for t in state.get("consumed_bolts") or []]
+
+    def _migrate_redis_blob(self) -> None:
+        """Reparte el blob legado ``energy:store`` en claves por usuario (una sola vez).
+
+        Se hace desde el cliente y por lotes para que cada script declare en ``KEYS`` todas las
+        claves que toca (Upstash y Redis Cluster rechazan claves no declaradas). Es idempotente:
+        si dos workers migran a la vez o uno se interrumpe, repetir no pisa consumos nuevos.
+        """
+        try:
+            raw = self._redis_client.get(REDIS_LEGACY_KEY)
+            if raw is None:
+                return
+            legacy = json.loads(raw.decode("utf-8") if isinstance(raw, bytes) else raw)
+            now = time.time()
+            users = []
+            for address, state in legacy.items():
+                active = sorted(t for t in self._legacy_bolts(state) if now - t < self.RECHARGE_TIME)
+                ttl_ms = math.ceil((active[-1] + self.RECHARGE_TIME - now) * 1000) if active else 0
+                users.append((address.lower(), json.dumps(active), ttl_ms))
+            for start in range(0, len(users), MIGRATE_CHUNK):
+                chunk = users[start:start + MIGRATE_CHUNK]
+                self._redis_client.eval(
+                    LUA_MIGRATE_CHUNK,
+                    [REDIS_INDEX_KEY, *(self._user_key(address) for address, _, _ in chunk)],
+                    [now, *(value for user in chunk for value in user)],
+                )
+            self._redis_client.eval(LUA_ARCHIVE, [REDIS_LEGACY_KEY, f"{REDIS_LEGACY_KEY}:migrated"], [])
+            logger.info(f"📦 [Energy] Migrados {len(users)} usuarios desde {REDIS_LEGACY_KEY} a claves por usuario")
+        except Exception as e:
+            logger.error(f"❌ [Energy] Error migrando {REDIS_LEGACY_KEY}: {e}", exc_info=True)
+
+    def _redis_active_bolts(self, address: str, now: float) -> list[float]:
+        bolts = _decode_bolts(self._redis_client.get(self._user_key(address)))
+        return [t for t in bolts if now - t < self.RECHARGE_TIME]
 
     def _load(self) -> Dict[str, EnergyState]:
-        """Loads energy data from Redis or JSON file and migrates old format if needed."""
-        if self._use_redis and self._redis_client:
-            try:
-                # Load from Redis
-                redis_data = self._redis_client.get("energy:store")
-                if redis_data is None:
-                    logger.info("📂 [Load] ⚠️ No hay datos en Redis, retornando datos vacíos")
-                    return {}
-                
-                # Parse JSON string
-                if isinstance(redis_data, bytes):
-                    redis_data = redis_data.decode('utf-8')
-                data = json.loads(redis_data)
-                logger.info(f"📂 [Load] ✅ Datos cargados desde Redis: {len(data)} usuarios")
-                if data:
-                    logger.info(f"📂 [Load] Direcciones encontradas: {list(data.keys())[:5]}...")
-            except Exception as e:
-                logger.error(f"❌ [Load] Error cargando desde Redis: {e}", exc_info=True)
-                return {}
-        else:
-            # Load from file
-            path = Path(self.storage_path)
-            if not path.exists():
-                logger.info(f"📂 [Load] ⚠️ Archivo no existe: {self.storage_path}, retornando datos vacíos")
-                logger.info(f"📂 [Load] Directorio padre existe: {path.parent.exists() if path.parent else 'N/A'}")
-                logger.info(f"📂 [Load] Ruta completa: {path.absolute()}")
-                return {}
-            try:
-                with open(path, "r") as f:
-                    data = json.load(f)
-                logger.info(f"📂 [Load] ✅ Datos cargados desde {self.storage_path}: {len(data)} usuarios")
-                if data:
-                    logger.info(f"📂 [Load] Direcciones encontradas: {list(data.keys())[:5]}...")  # Primeras 5
-                
-                # Migrate old format to new format
-                migrated = False
-                for address, state in data.items():
-                    if "last_consume_time" in state and "energy_consumed" in state:
-                        # Old format detected - migrate to new format
-                        logger.info(f"Migrating energy data for {address} from old format to new format")
-                        last_consume = state["last_consume_time"]
-                        consumed_count = state["energy_consumed"]
-                        
-                        # Convert to new format: create array of timestamps
-                        # For old data, we approximate by creating timestamps spaced by RECHARGE_TIME
-                        consumed_bolts = []
-                        for i in range(consumed_count):
-                            # Approximate: each bolt was consumed RECHARGE_TIME apart
-                            bolt_time = last_consume - (i * self.RECHARGE_TIME)
-                            consumed_bolts.append(bolt_time)
-                        
-                        data[address] = {"consumed_bolts": consumed_bolts}
-                        migrated = True
-                
-                if migrated:
-                    # Save migrated data
-                    try:
-                        with open(path, "w") as f:
-                            json.dump(data, f, indent=2)
-                        logger.info("Energy data migration completed successfully")
-                    except Exception as e:
-                        logger.error(f"Failed to save migrated energy data: {e}")
-                
-                return data
-            except Exception as e:
-                logger.error(f"❌ [Load] Failed to load energy store from {self.storage_path}: {e}", exc_info=True)
-                return {}
+        """Loads the legacy energy JSON file (one-time import) and migrates old format if needed."""
+        # Load from file
+        path = Path(self.storage_path)
+        if not path.exists():
+            logger.info(f"📂 [Load] ⚠️ Archivo no existe: {self.storage_path}, retornando datos vacíos")
+            logger.info(f"📂 [Load] Directorio padre existe: {path.parent.exists() if path.parent else 'N/A'}")
+            logger.info(f"📂 [Load] Ruta completa: {path.absolute()}")
+            return {}
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            logger.info(f"📂 [Load] ✅ Datos cargados desde {self.storage_path}: {len(data)} usuarios")
+            if data:
+                logger.info(f"📂 [Load] Direcciones encontradas: {list(data.keys())[:5]}...")  # Primeras 5
+            
+            # Migrate old format to new format
+            migrated = False
+            for address, state in data.items():
+                if "last_consume_time" in state and "energy_consumed" in state:
+                    # Old format detected - migrate to new format
+                    logger.info(f"Migrating energy data for {address} from old format to new format")
+                    last_consume = state["last_consume_time"]
+                    consumed_count = state["energy_consumed"]
+                    
+                    # Convert to new format: create array of timestamps
+                    # For old data, we approximate by creating timestamps spaced by RECHARGE_TIME
+                    consumed_bolts = []
+                    for i in range(consumed_count):
+                        # Approximate: each bolt was consumed RECHARGE_TIME apart
+                        bolt_time = last_consume - (i * self.RECHARGE_TIME)
+                        consumed_bolts.append(bolt_time)
+                    
+                    data[address] = {"consumed_bolts": consumed_bolts}
+                    migrated = True
+            
+            if migrated:
+                # Save migrated data
+                try:
+                    with open(path, "w") as f:
+                        json.dump(data, f, indent=2)
+                    logger.info("Energy data migration completed successfully")
+                except Exception as e:
+                    logger.error(f"Failed to save migrated energy data: {e}")
+            
+            return data
+        except Exception as e:
+            logger.error(f"❌ [Load] Failed to load energy store from {self.storage_path}: {e}", exc_info=True)
+            return {}
 
-    def _save(self):
-        """Saves energy data to Redis or JSON file."""
-        if self._use_redis and self._redis_client:
-            try:
-                # Save to Redis
-                data_json = json.dumps(self._data)
-                self._redis_client.set("energy:store", data_json)
-                logger.info(f"💾 [Save] ✅ Datos guardados en Redis: {len(self._data)} usuarios")
-            except Exception as e:
-                logger.error(f"❌ [Save] Error guardando en Redis: {e}", exc_info=True)
-        else:
-            # Save to file
-            path = Path(self.storage_path)
-            path.parent.mkdir(parents=True, exist_ok=True)
+    def get_all_addresses(self) -> list[str]:
+        """Obtiene todas las direcciones que tienen estado de energía guardado."""
+        if self._use_redis:
             try:
-                # Usar modo 'w' con flush para asegurar que se escriba inmediatamente
-                with open(path, "w") as f:
-                    json.dump(self._data, f, indent=2)
-                    f.flush()
-                    import os
-                    os.fsync(f.fileno())  # Forzar escritura a disco
-                # Verificar que se escribió correctamente
-                if path.exists():
-                    file_size = path.stat().st_size
-                    logger.info(f"💾 [Save] Datos guardados en {self.storage_path}: {len(self._data)} usuarios, {file_size} bytes")
-                else:
-                    logger.error(f"❌ [Save] ADVERTENCIA: Archivo no existe después de guardar: {self.storage_path}")
+                cutoff = time.time() - ADDRESS_INDEX_RETENTION
+                addresses = self._redis_client.eval(LUA_ADDRESSES, [REDIS_INDEX_KEY], [cutoff])
+                return [a.decode("utf-8") if isinstance(a, bytes) else a for a in addresses or []]
             except Exception as e:
-                logger.error(f"❌ [Save] Failed to save energy store to {self.storage_path}: {e}", exc_info=True)
+                logger.error(f"❌ [Energy] Error listando direcciones en Redis: {e}", exc_info=True)
+                return []
+        return self._store.addresses()
 
-    def get_all_addresses(self) -> list[str]:
-        """Obtiene todas las direcciones que tienen estado de energía guardado."""
-        with self._lock:
-            self._data = self._load()
-            return list(self._data.keys())
+    def _status_from_bolts(self, active_consumed: list[float], now: float) -> dict:
+        """Arma la respuesta de ``get_status`` a partir de los rayos aún recargando."""
+        # Ordenar los rayos consumidos por tiempo (más antiguo primero, recarga primero)
+        sorted_consumed = sorted(active_consumed)
+        bolts_info = []
+        for i in range(self.MAX_ENERGY):
+            if i < len(sorted_consumed):
+                bolt_time = sorted_consumed[i]
+                bolts_info.append({
+                    "index": i,
+                    "available": False,
+                    "seconds_to_refill": max(0, int(self.RECHARGE_TIME - (now - bolt_time))),
+                    "refill_at": bolt_time + self.RECHARGE_TIME
+                })
+            else:
+                bolts_info.append({
+                    "index": i,
+                    "available": True,
+                    "seconds_to_refill": 0,
+                    "refill_at": None
+                })
+
+        next_refill_at = None
+        seconds_remaining = 0
+        if sorted_consumed:
+            next_refill_at = sorted_consumed[0] + self.RECHARGE_TIME
+            seconds_remaining = max(0, int(next_refill_at - now))
+
+        return {
+            "current_energy": max(0, self.MAX_ENERGY - len(sorted_consumed)),
+            "max_energy": self.MAX_ENERGY,
+            "next_refill_at": next_refill_at,
+            "seconds_to_refill": seconds_remaining,
+            "bolts": bolts_info
+        }
 
     def get_status(self, address: str) -> dict:
         """
@@ -197,101 +375,44 @@ class EnergyService:
                 ]
             }
         """
-        # CRITICAL: En serverless (Vercel), recargar datos del archivo/Redis antes de leer
-        # porque cada invocación puede ser una nueva instancia
-        # Esto asegura que siempre tengamos el estado más reciente
-        with self._lock:
-            self._data = self._load()
-            logger.info(f"📖 [GetStatus] Datos cargados para {address}: {len(self._data)} usuarios en memoria")
-            logger.info(f"📖 [GetStatus] Usando {'Redis' if self._use_redis else 'archivo'} para almacenamiento")
-        
         address = address.lower()
-        state = self._data.get(address)
-
-        if not state or not state.get("consumed_bolts"):
-            # Todos los rayos disponibles
-            bolts_info = [
-                {"index": i, "available": True, "seconds_to_refill": 0, "refill_at": None}
-                for i in range(self.MAX_ENERGY)
-            ]
-            return {
-                "current_energy": self.MAX_ENERGY,
-                "max_energy": self.MAX_ENERGY,
-                "next_refill_at": None,
-                "seconds_to_refill": 0,
-                "bolts": bolts_info
-            }
-
         now = time.time()
-        consumed_bolts = state.get("consumed_bolts", [])
-        
-        # Filter out bolts that have already recharged (elapsed >= RECHARGE_TIME)
-        active_consumed = []
-        for bolt_time in consumed_bolts:
-            elapsed = now - bolt_time
-            if elapsed < self.RECHARGE_TIME:
-                active_consumed.append(bolt_time)
-        
-        # Update state if some bolts recharged
-        if len(active_consumed) != len(consumed_bolts):
-            if active_consumed:
-                self._data[address] = {"consumed_bolts": active_consumed}
-            else:
-                # All bolts recharged, remove entry
-                del self._data[address]
-            self._save()
-        
-        current_energy = self.MAX_ENERGY - len(active_consumed)
-        
-        # Calculate time until next bolt recharges
-        seconds_remaining = 0
-        next_refill_at = None
-        
-        if active_consumed:
-            # Find the oldest consumed bolt (will recharge first)
-            oldest_bolt_time = min(active_consumed)
-            elapsed = now - oldest_bolt_time
-            seconds_remaining = int(self.RECHARGE_TIME - elapsed)
-            next_refill_at = oldest_bolt_time + self.RECHARGE_TIME
-            
-            # Ensure we don't return negative time
-            if seconds_remaining < 0:
-                seconds_remaining = 0
+        if self._use_redis:
+            # Un solo GET de la clave del usuario; el TTL ya descarta los rayos recargados
+            try:
+                return self._status_from_bolts(self._redis_active_bolts(address, now), now)
+            except Exception as e:
+                logger.error(f"❌ [GetStatus] Error leyendo energía de {address} en Redis: {e}", exc_info=True)
+                return self._status_from_bolts([], now)
 
-        # Crear información detallada de cada rayo
-        # Ordenar los rayos consumidos por tiempo (más antiguo primero)
-        sorted_consumed = sorted(active_consumed)
-        bolts_info = []
-        
-        for i in range(self.MAX_ENERGY):
-            if i < len(sorted_consumed):
-                # Este rayo está consumido
-                bolt_time = sorted_consumed[i]
-                elapsed = now - bolt_time
-                seconds_to_refill = max(0, int(self.RECHARGE_TIME - elapsed))
-                refill_at = bolt_time + self.RECHARGE_TIME
-                bolts_info.append({
-                    "index": i,
-                    "available": False,
-                    "seconds_to_refill": seconds_to_refill,
-                    "refill_at": refill_at
-                })
-            else:
-                # Este rayo está disponible
-                bolts_info.append({
-                    "index": i,
-                    "available": True,
-                    "seconds_to_refill": 0,
-                    "refill_at": None
-                })
+        # Servido desde la vista en memoria del log, sin I/O
+        return self._status_from_bolts(self._store.active_bolts(address, now), now)
 
-        return {
-            "current_energy": current_energy,
-            "max_energy": self.MAX_ENERGY,
-            "next_refill_at": next_refill_at,
-            "seconds_to_refill": max(0, seconds_remaining),
-            "bolts": bolts_info
-        }
+    def try_consume(self, address: str) -> tuple[bool, dict]:
+        """
+        Intenta consumir 1 rayo y devuelve ``(consumido, estado_resultante)``.
+        En Redis es un único script atómico: verificar, consumir y leer el estado en un round trip,
+        sin carreras entre workers.
+        """
+        address = address.lower()
+        now = time.time()
+        if self._use_redis:
+            consumed, bolts_json = self._redis_client.eval(
+                LUA_CONSUME,
+                [self._user_key(address), REDIS_INDEX_KEY],
+                [now, self.RECHARGE_TIME, self.MAX_ENERGY, address],
+            )
+            consumed = bool(int(consumed))
+            status = self._status_from_bolts(_decode_bolts(bolts_json), now)
+        else:
+            consumed, bolts = self._store.consume(address, now, self.MAX_ENERGY)
+            status = self._status_from_bolts(bolts, now)
+
+        if consumed:
+            logger.info(f"⚡ [Consume] ✅ Consumido 1 energía para {address}. Restantes: {status['current_energy']}/{self.MAX_ENERGY}")
+        else:
+            logger.warning(f"User {address} has no energy to consume.")
+        return consumed, status
 
     def consume_energy(self, address: str) -> bool:
         """
@@ -299,81 +420,8 @@ class EnergyService:
         Returns True if successful, False if not enough energy.
         Each bolt recharges independently 60 minutes after it was consumed.
         """
-        with self._lock:
-            address = address.lower()
-            
-            # CRITICAL: Recargar datos del archivo ANTES de verificar estado
-            # En serverless, cada invocación puede ser nueva
-            self._data = self._load()
-            logger.info(f"⚡ [Consume] Datos recargados: {len(self._data)} usuarios en memoria")
-            
-            # Calcular estado actual directamente sin modificar _data
-            now = time.time()
-            state = self._data.get(address)
-            
-            # Filtrar rayos que ya recargaron
-            active_consumed = []
-            if state and state.get("consumed_bolts"):
-                consumed_bolts = state.get("consumed_bolts", [])
-                for bolt_time in consumed_bolts:
-                    elapsed = now - bolt_time
-                    if elapsed < self.RECHARGE_TIME:
-                        active_consumed.append(bolt_time)
-            
-            current_energy = self.MAX_ENERGY - len(active_consumed)
-            logger.info(f"⚡ [Consume] Estado antes de consumir para {address}: {current_energy}/{self.MAX_ENERGY}")
-            
-            if current_energy <= 0:
-                logger.warning(f"User {address} has no energy to consume.")
-                return False
-            
-            # Actualizar estado con rayos activos (ya filtrados)
-            if active_consumed:
-                self._data[address] = {"consumed_bolts": active_consumed}
-            else:
-                # Si no hay rayos activos, eliminar entrada
-                if address in self._data:
-                    del self._data[address]
-            
-            # Agregar nuevo rayo consumido
-            active_consumed.append(now)
-            self._data[address] = {"consumed_bolts": active_consumed}
-            logger.info(f"⚡ [Consume] Agregando timestamp {now} a consumed_bolts. Total consumidos: {len(active_consumed)}")
-            
-            # Guardar inmediatamente
-            self._save()
-            logger.info(f"⚡ [Consume] Datos guardados en {'Upstash Redis' if self._use_redis else self.storage_path}")
-            
-            # CRITICAL: En serverless, forzar escritura sincrónica y verificar
-            try:
-                # Forzar sincronización del sistema de archivos
-                if hasattr(os, 'sync'):
-                    os.sync()
-                
-                # Verificar que el archivo existe y tiene el contenido correcto
-                if os.path.exists(self.storage_path):
-                    with open(self.storage_path, "r") as f:
-                        saved_data = json.load(f)
-                        saved_state = saved_data.get(address)
-                        if saved_state:
-                            saved_bolts = saved_state.get("consumed_bolts", [])
-                            logger.info(f"✅ [Consume] Verificación: Archivo contiene {len(saved_bolts)} bolts para {address}")
-                            
-                            # Verificar que el último timestamp es el que acabamos de agregar
-                            if saved_bolts and abs(saved_bolts[-1] - now) < 5:  # 5 segundos de tolerancia
-                                logger.info(f"✅ [Consume] Timestamp verificado: {saved_bolts[-1]} ≈ {now}")
-                            else:
-                                logger.warning(f"⚠️ [Consume] Timestamp no coincide: esperado {now}, encontrado {saved_bolts[-1] if saved_bolts else 'None'}")
-                        else:
-                            logger.error(f"❌ [Consume] ERROR CRÍTICO: No se encontró {address} en archivo después de guardar!")
-                else:
-                    logger.error(f"❌ [Consume] ERROR CRÍTICO: Archivo {self.storage_path} no existe después de guardar!")
-            except Exception as e:
-                logger.error(f"❌ [Consume] Error verificando archivo: {e}", exc_info=True)
-            
-            remaining = self.MAX_ENERGY - len(active_consumed)
-            logger.info(f"⚡ [Consume] ✅ Consumido 1 energía para {address}. Restantes: {remaining}/{self.MAX_ENERGY}")
-            return True
+        consumed, _ = self.try_consume(address)
+        return consumed
 
     def refill_energy(self, address: str, amount: int = 3) -> dict:
         """
@@ -381,36 +429,22 @@ class EnergyService:
         Default amount=3 (Full Refill).
         Removes the oldest consumed bolt timestamps.
         """
-        with self._lock:
-            address = address.lower()
-            status = self.get_status(address)  # Update state first (removes recharged bolts)
-            
-            state = self._data.get(address)
-            if not state or not state.get("consumed_bolts"):
-                # Already full
-                return self.get_status(address)
-            
-            consumed_bolts = state.get("consumed_bolts", [])
-            
-            # Remove the oldest bolts (amount to refill)
-            # Sort by timestamp (oldest first) and remove the first 'amount' entries
-            consumed_bolts.sort()  # Oldest first
-            new_consumed_bolts = consumed_bolts[amount:]  # Remove first 'amount' entries
-            
-            if not new_consumed_bolts:
-                # Fully refilled - remove entry
-                if address in self._data:
-                    del self._data[address]
-            else:
-                # Partially refilled - keep remaining bolts
-                self._data[address] = {
-                    "consumed_bolts": new_consumed_bolts
-                }
-            
-            self._save()
-            remaining_consumed = len(new_consumed_bolts) if new_consumed_bolts else 0
-            logger.info(f"Refilled {amount} energy for {address}. Remaining consumed bolts: {remaining_consumed}")
-            return self.get_status(address)
+        address = address.lower()
+        now = time.time()
+        if self._use_redis:
+            bolts_json = self._redis_client.eval(
+                LUA_REFILL,
+                [self._user_key(address), REDIS_INDEX_KEY],
+                [now, self.RECHARGE_TIME, amount, address],
+            )
+            remaining = _decode_bolts(bolts_json)
+            logger.info(f"Refilled {amount} energy for {address}. Remaining consumed bolts: {len(remaining)}")
+            return self._status_from_bolts(remaining, now)
+
+        # Oldest first: se eliminan las primeras 'amount' entradas
+        remaining = self._store.refill(address, now, amount)
+        logger.info(f"Refilled {amount} energy for {address}. Remaining consumed bolts: {len(remaining)}")
+        return self._status_from_bolts(remaining, now)
 
 
 # Global instance
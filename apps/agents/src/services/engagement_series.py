@@ -0,0 +1,136 @@
+"""Serie temporal compacta de engagement por cast (snapshots tomados en cada scan)."""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EngagementSeriesStore:
+    """Historial de engagement en arrays NumPy: una fila por cast, un ring buffer por fila.
+
+    - ``times``/``values`` son matrices ``[max_casts, points_per_cast]``; el único mapa
+      Python es ``hash -> fila``, el historial nunca vive en dicts por cast.
+    - Cuando se llena se desalojan en bloque las filas menos vistas recientemente.
+    - ``kinematics`` devuelve velocidad y aceleración (engagement/hora) vectorizadas.
+    """
+
+    def __init__(
+        self,
+        max_casts: int = 5000,
+        points_per_cast: int = 8,
+        evict_fraction: float = 0.1,
+        min_interval_seconds: float = 60.0,
+    ) -> None:
+        self.max_casts = max_casts
+        # Snapshots más juntos que esto sobrescriben el último punto (scans concurrentes)
+        self.min_interval_seconds = min_interval_seconds
+        self.points = max(3, points_per_cast)
+        self.evict_batch = max(1, int(max_casts * evict_fraction))
+        self.times = np.zeros((max_casts, self.points), dtype=np.float64)
+        self.values = np.zeros((max_casts, self.points), dtype=np.float32)
+        self.head = np.zeros(max_casts, dtype=np.int32)  # Próxima posición a escribir
+        self.count = np.zeros(max_casts, dtype=np.int32)  # Puntos válidos (<= points)
+        self.last_seen = np.zeros(max_casts, dtype=np.float64)
+        self._rows: dict[str, int] = {}
+        self._free: list[int] = list(range(max_casts - 1, -1, -1))
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _evict_cold(self, protected: np.ndarray, needed: int) -> None:
+        """Libera en bloque las filas con ``last_seen`` más antiguo, salvo las ``protected``."""
+        used = np.fromiter(self._rows.values(), dtype=np.int64, count=len(self._rows))
+        used = used[~np.isin(used, protected)]
+        k = min(max(self.evict_batch, needed), len(used))
+        if k == 0:
+            return
+        cold = used[np.argpartition(self.last_seen[used], k - 1)[:k]]
+        cold_set = set(cold.tolist())
+        self._rows = {h: r for h, r in self._rows.items() if r not in cold_set}
+        self.count[cold] = 0
+        self.head[cold] = 0
+        self._free.extend(cold.tolist())
+
+    def _rows_for(self, hashes: Sequence[str]) -> np.ndarray:
+        if len(hashes) > self.max_casts:
+            raise ValueError(f"Lote de {len(hashes)} casts excede max_casts ({self.max_casts})")
+        rows = np.fromiter((self._rows.get(h, -1) for h in hashes), dtype=np.int64, count=len(hashes))
+        missing = np.flatnonzero(rows < 0)
+        if len(missing) == 0:
+            return rows
+        shortfall = len(missing) - len(self._free)
+        if shortfall > 0:
+            # Se desaloja antes de asignar: ninguna fila ya resuelta en este lote puede perderse
+            self._evict_cold(rows[rows >= 0], shortfall)
+        for i in missing:
+            cast_hash = hashes[i]
+            row = self._rows.get(cast_hash)
+            if row is None:
+                row = self._free.pop()
+                self._rows[cast_hash] = row
+            rows[i] = row
+        return rows
+
+    def record(self, hashes: Sequence[str], engagement: np.ndarray, now: float | None = None) -> None:
+        """Agrega un snapshot ``(now, engagement)`` para cada cast (hashes únicos)."""
+        if len(hashes) == 0:
+            return
+        now = time.time() if now is None else now
+        if len(hashes) > self.max_casts:
+            # Más casts que filas: se siguen los primeros; el resto queda con velocidad 0
+            logger.debug("Lote de %d casts, se registran %d (max_casts)", len(hashes), self.max_casts)
+            hashes, engagement = hashes[: self.max_casts], np.asarray(engagement)[: self.max_casts]
+        rows = self._rows_for(hashes)
+        overwrite = (self.count[rows] > 0) & (now - self.last_seen[rows] < self.min_interval_seconds)
+        cols = np.where(overwrite, (self.head[rows] - 1) % self.points, self.head[rows])
+        self.times[rows, cols] = now
+        self.values[rows, cols] = np.asarray(engagement, dtype=np.float32)
+        advance = rows[~overwrite]
+        self.head[advance] = (self.head[advance] + 1) % self.points
+        self.count[advance] = np.minimum(self.count[advance] + 1, self.points)
+        self.last_seen[rows] = now
+
+    def kinematics(self, hashes: Sequence[str]) -> tuple[np.ndarray, np.ndarray]:
+        """Velocidad y aceleración del engagement por hora para cada hash.
+
+        La velocidad es la pendiente entre los dos últimos snapshots; la aceleración es
+        el cambio de pendiente respecto al tramo anterior. Casts desconocidos o con pocos
+        puntos devuelven 0.
+        """
+        n = len(hashes)
+        velocity = np.zeros(n, dtype=np.float64)
+        acceleration = np.zeros(n, dtype=np.float64)
+        if n == 0:
+            return velocity, acceleration
+
+        rows = np.fromiter((self._rows.get(h, -1) for h in hashes), dtype=np.int64, count=n)
+        known = rows >= 0
+        if not known.any():
+            return velocity, acceleration
+        r = rows[known]
+        head = self.head[r]
+        count = self.count[r]
+        i1 = (head - 1) % self.points
+        i2 = (head - 2) % self.points
+        i3 = (head - 3) % self.points
+
+        t1, t2, t3 = self.times[r, i1], self.times[r, i2], self.times[r, i3]
+        v1, v2, v3 = self.values[r, i1], self.values[r, i2], self.values[r, i3]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            dt_recent = (t1 - t2) / 3600.0
+            dt_prev = (t2 - t3) / 3600.0
+            slope_recent = np.where((count >= 2) & (dt_recent > 0), (v1 - v2) / dt_recent, 0.0)
+            slope_prev = np.where((count >= 3) & (dt_prev > 0), (v2 - v3) / dt_prev, 0.0)
+            span = (t1 - t3) / 3600.0 / 2.0
+            accel = np.where((count >= 3) & (span > 0), (slope_recent - slope_prev) / span, 0.0)
+
+        velocity[known] = slope_recent
+        acceleration[known] = accel
+        return velocity, acceleration
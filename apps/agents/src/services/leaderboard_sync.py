@@ -3,7 +3,9 @@ import logging
 import time
 from web3 import Web3
 from ..config import settings
-from ..tools.farcaster import FarcasterToolbox
+from ..tools.celo import CeloToolbox
+from ..tools.farcaster import get_farcaster_toolbox
+from ..tools.rate_limiter import background_priority
 from ..stores.leaderboard import LeaderboardStore
 
 logger = logging.getLogger(__name__)
@@ -28,14 +30,23 @@ class LeaderboardSyncer:
         session.mount("http://", adapter)
         
         self.w3 = Web3(Web3.HTTPProvider(settings.celo_rpc_url, session=session))
-        
-        self.farcaster = FarcasterToolbox(
-            base_url=settings.farcaster_hub_api or "https://api.neynar.com/v2",
-            neynar_key=settings.neynar_api_key
+        # Lecturas de XP agrupadas vía Multicall3 sobre el mismo cliente con retries
+        self.celo = CeloToolbox(
+            rpc_url=settings.celo_rpc_url,
+            web3=self.w3,
+            multicall_address=settings.multicall3_address,
+            multicall_chunk_size=settings.multicall_chunk_size,
         )
         
+        self.farcaster = get_farcaster_toolbox(settings)
+        
     async def sync(self):
         """Sincroniza el leaderboard con los datos on-chain y Farcaster de forma paralela."""
+        # Trabajo de fondo: cede el rate limit de Neynar a los requests de usuarios
+        with background_priority():
+            return await self._sync()
+
+    async def _sync(self):
         logger.info("🔄 Iniciando Sincronización de Leaderboard desde bloque %s...", settings.deployment_block)
         
         try:
@@ -45,7 +56,7 @@ class LeaderboardSyncer:
                 return
 
             loop = asyncio.get_running_loop()
-            current_block = self.w3.eth.block_number
+            current_block = await loop.run_in_executor(None, lambda: self.w3.eth.block_number)
             from_block = settings.deployment_block
             
             # Ensure we don't go backwards
@@ -95,14 +106,15 @@ class LeaderboardSyncer:
                 
             logger.info("Found %d unique participants in blockchain history", len(participants))
             
-            # 2. Parallel Participant Processing (XP + Farcaster)
-            campaign_id_bytes = self.w3.keccak(text="demo-campaign")
-            xp_abi = [{"type": "function", "name": "getXpBalance", "inputs": [{"name": "campaignId", "type": "bytes32"}, {"name": "participant", "type": "address"}], "outputs": [{"name": "", "type": "uint256"}], "stateMutability": "view"}]
-            xp_contract = self.w3.eth.contract(address=self.w3.to_checksum_address(registry_address), abi=xp_abi)
-            
-            # Step 2a: Batch fetch Farcaster profiles (Optimization)
+            # 2. Participant Processing (XP + Farcaster)
             unique_addresses = list(participants)
-            logger.info("Resolving Farcaster profiles for %d users...", len(unique_addresses))
+            logger.info("Resolving XP and Farcaster profiles for %d users...", len(unique_addresses))
+
+            # Step 2a: XP de todos los participantes vía Multicall3 (pocos eth_calls en lugar de N),
+            # en paralelo con el batch de perfiles de Farcaster
+            xp_future = loop.run_in_executor(
+                None, self.celo.get_xp_balances, registry_address, "demo-campaign", unique_addresses
+            )
             
             users_map = {}
             try:
@@ -111,17 +123,14 @@ class LeaderboardSyncer:
             except Exception as e:
                 logger.warning("Bulk user fetch failed (partial fallback will occur): %s", e)
 
+            xp_map = {}
+            try:
+                xp_map = await xp_future
+            except Exception as e:
+                logger.error("Error fetching XP balances in batch: %s", e)
+
             async def process_participant(participant):
-                # Get XP (Blocking)
-                xp = 0
-                try:
-                    def get_xp_blocking():
-                        return xp_contract.functions.getXpBalance(campaign_id_bytes, participant).call()
-                    # Use semaphore if RPC limits are strict, but read calls are usually fine
-                    async with rpc_sem:
-                         xp = await loop.run_in_executor(None, get_xp_blocking)
-                except Exception as e:
-                    logger.error(f"Error fetching XP for {participant}: {e}")
+                xp = xp_map.get(participant, 0)
                 
                 if xp == 0:
                     return None # Solo incluir usuarios con XP > 0
@@ -156,11 +165,8 @@ class LeaderboardSyncer:
             # Filter None and save
             leaderboard_data = [e for e in processed_entries if e is not None]
             
-            # Batch record (LeaderboardStore handles sorting/limiting internally per record loop, 
-            # but we can just invoke it sequentially or optimize store to accept batch. 
-            # For now, sequential record is fast enough as it's just JSON manipulation)
-            for entry in leaderboard_data:
-                self.store.record(entry)
+            # Un solo merge + sort + escritura para todo el lote
+            self.store.record_many(leaderboard_data)
             
             logger.info("✅ Leaderboard Sync Complete. Updated %d active entries.", len(leaderboard_data))
             return len(leaderboard_data)
@@ -0,0 +1,218 @@
+"""Agrupa los mints de NFT de una o varias corridas en pocas transacciones ``mintBatch``."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+from ..tools.celo import MAX_MINT_BATCH_SIZE, AsyncCeloToolbox, get_async_celo_toolbox
+
+logger = logging.getLogger(__name__)
+
+# Modelo de gas de LootBoxMinter.mintBatch: costo fijo de la tx, _safeMint + flags + evento
+# por token, y almacenamiento del tokenURI (~20k gas por slot de 32 bytes + calldata)
+MINT_BASE_GAS = 60_000
+MINT_GAS_PER_RECIPIENT = 90_000
+MINT_GAS_PER_URI_BYTE = 700
+
+
+@dataclass
+class MintRequest:
+    recipient: str
+    metadata_uri: str
+    soulbound: bool = False
+
+    @property
+    def estimated_gas(self) -> int:
+        return MINT_GAS_PER_RECIPIENT + MINT_GAS_PER_URI_BYTE * len(self.metadata_uri.encode())
+
+
+@dataclass
+class MintResult:
+    recipient: str
+    tx_hash: str | None = None
+    token_id: int | None = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.tx_hash is not None and self.error is None
+
+
+@dataclass
+class _Queued:
+    request: MintRequest
+    future: asyncio.Future
+
+
+def plan_batches(requests: Sequence[MintRequest], gas_budget: int, max_size: int = MAX_MINT_BATCH_SIZE) -> list[list[MintRequest]]:
+    """Parte ``requests`` en batches que respetan el presupuesto de gas y ``MAX_MINT_BATCH_SIZE``.
+
+    Un mismo recipient nunca se repite dentro de un batch (el contrato revierte); el
+    repetido pasa al siguiente. Un request que por sí solo excede el presupuesto va solo.
+    """
+    batches: list[list[MintRequest]] = []
+    current: list[MintRequest] = []
+    current_gas = MINT_BASE_GAS
+    seen: set[str] = set()
+    deferred: list[MintRequest] = []
+
+    for request in requests:
+        key = request.recipient.lower()
+        if key in seen:
+            deferred.append(request)
+            continue
+        if current and (len(current) >= max_size or current_gas + request.estimated_gas > gas_budget):
+            batches.append(current)
+            current, current_gas, seen = [], MINT_BASE_GAS, set()
+        current.append(request)
+        current_gas += request.estimated_gas
+        seen.add(key)
+    if current:
+        batches.append(current)
+    if deferred:
+        batches.extend(plan_batches(deferred, gas_budget, max_size))
+    return batches
+
+
+class NftMintBatcher:
+    """Cola de mints por campaña que se vacía en transacciones ``mintBatch``.
+
+    - ``submit`` encola los mints de una corrida y espera su resultado por recipient.
+    - Con ``window_seconds > 0`` los mints de corridas concurrentes que lleguen dentro de
+      la ventana viajan en los mismos batches; con 0 se agrupa solo dentro de la corrida.
+    - Los batches se envían seguidos (nonces locales) y sus receipts se esperan en paralelo;
+      los ``tokenId`` salen de los eventos ``LootMinted``. Solo un receipt exitoso cuenta como mint.
+    - Si un batch revierte al estimar gas, se divide a la mitad para aislar al recipient
+      problemático en lugar de perder todo el batch.
+    """
+
+    def __init__(
+        self,
+        celo_tool: AsyncCeloToolbox,
+        minter_address: str,
+        window_seconds: float = 0.0,
+        gas_budget: int = 10_000_000,
+        confirm_timeout: float = 120,
+    ) -> None:
+        self.celo_tool = celo_tool
+        self.minter_address = minter_address
+        self.window_seconds = max(0.0, window_seconds)
+        self.gas_budget = gas_budget
+        self.confirm_timeout = confirm_timeout
+        self._queues: dict[str, list[_Queued]] = {}
+        self._flush_tasks: dict[str, asyncio.Task] = {}
+        self.stats = {"requests": 0, "transactions": 0, "minted": 0, "failed": 0}
+
+    async def submit(self, campaign_id: str, requests: Sequence[MintRequest]) -> dict[str, MintResult]:
+        """Encola ``requests`` y devuelve ``{recipient: MintResult}`` cuando sus batches se confirman."""
+        if not requests:
+            return {}
+        loop = asyncio.get_running_loop()
+        queued = [_Queued(request, loop.create_future()) for request in requests]
+        self._queues.setdefault(campaign_id, []).extend(queued)
+        self.stats["requests"] += len(queued)
+        if campaign_id not in self._flush_tasks:
+            self._flush_tasks[campaign_id] = asyncio.create_task(self._flush_after_window(campaign_id))
+        results = await asyncio.gather(*(item.future for item in queued))
+        return {result.recipient: result for result in results}
+
+    async def _flush_after_window(self, campaign_id: str) -> None:
+        try:
+            # sleep(0) cede el loop: con ventana 0 igual agrupa lo encolado en la misma iteración
+            await asyncio.sleep(self.window_seconds)
+        finally:
+            self._flush_tasks.pop(campaign_id, None)
+            queued = self._queues.pop(campaign_id, [])
+        try:
+            await self._flush(campaign_id, queued)
+        except Exception as exc:  # noqa: BLE001
+            logger.error("Fallo vaciando la cola de mints de %s: %s", campaign_id, exc)
+        for item in queued:
+            if not item.future.done():
+                item.future.set_result(MintResult(item.request.recipient, error="mint no procesado"))
+
+    async def _flush(self, campaign_id: str, queued: list[_Queued]) -> None:
+        if not queued:
+            return
+        by_request = {id(item.request): item for item in queued}
+        batches = plan_batches([item.request for item in queued], self.gas_budget)
+        logger.info("🎨 Minteando %d NFTs de %s en %d transacción(es) mintBatch", len(queued), campaign_id, len(batches))
+
+        # 1. Enviar todos los batches seguidos; el NonceManager evita esperar entre envíos
+        sent: list[tuple[str, list[_Queued]]] = []
+        for batch in batches:
+            sent.extend(await self._send(campaign_id, [by_request[id(request)] for request in batch]))
+
+        # 2. Esperar los receipts en paralelo y mapear LootMinted -> recipient
+        await asyncio.gather(*(self._settle(tx_hash, items) for tx_hash, items in sent))
+
+    async def _send(self, campaign_id: str, items: list[_Queued]) -> list[tuple[str, list[_Queued]]]:
+        try:
+            tx_hash = await self.celo_tool.mint_nft_batch(
+                minter_address=self.minter_address,
+                campaign_id=campaign_id,
+                recipients=[item.request.recipient for item in items],
+                metadata_uris=[item.request.metadata_uri for item in items],
+                soulbound_flags=[item.request.soulbound for item in items],
+            )
+        except Exception as exc:  # noqa: BLE001
+            if len(items) == 1:
+                self._fail(items, str(exc))
+                return []
+            middle = len(items) // 2
+            logger.warning("mintBatch de %d recipients falló (%s), dividiendo el batch", len(items), exc)
+            return await self._send(campaign_id, items[:middle]) + await self._send(campaign_id, items[middle:])
+        self.stats["transactions"] += 1
+        return [(tx_hash, items)]
+
+    async def _settle(self, tx_hash: str, items: list[_Queued]) -> None:
+        try:
+            receipt = await self.celo_tool.confirm(tx_hash, timeout=self.confirm_timeout)
+        except Exception as exc:  # noqa: BLE001
+            # Sin receipt (timeout, descartada o reemplazada) no se sabe si los NFTs existen:
+            # igual que en XpGrantQueue, se reporta como fallo y no como mint
+            logger.warning("mintBatch %s sin confirmar: %s", tx_hash, exc)
+            self._fail(items, f"mintBatch {tx_hash} sin confirmar: {exc}")
+            return
+        if receipt.get("status") == 0:
+            self._fail(items, f"mintBatch {tx_hash} revertido on-chain")
+            return
+        tokens: dict[str, int] = {}
+        try:
+            tokens = self.celo_tool.loot_minted_tokens(self.minter_address, receipt)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("No se pudieron decodificar eventos LootMinted de %s: %s", tx_hash, exc)
+        self._resolve(items, tx_hash, tokens)
+
+    def _resolve(self, items: list[_Queued], tx_hash: str, tokens: dict[str, int]) -> None:
+        for item in items:
+            recipient = item.request.recipient
+            token_id = tokens.get(self.celo_tool.checksum(recipient))
+            self.stats["minted"] += 1
+            if not item.future.done():
+                item.future.set_result(MintResult(recipient, tx_hash=tx_hash, token_id=token_id))
+
+    def _fail(self, items: list[_Queued], error: str) -> None:
+        for item in items:
+            self.stats["failed"] += 1
+            if not item.future.done():
+                item.future.set_result(MintResult(item.request.recipient, error=error))
+
+
+_nft_mint_batcher: NftMintBatcher | None = None
+
+
+def get_nft_mint_batcher(settings: Any) -> NftMintBatcher:
+    """Instancia compartida: las corridas concurrentes comparten la ventana de acumulación."""
+    global _nft_mint_batcher
+    if _nft_mint_batcher is None:
+        _nft_mint_batcher = NftMintBatcher(
+            get_async_celo_toolbox(settings),
+            minter_address=settings.minter_address,
+            window_seconds=settings.nft_mint_batch_window_seconds,
+            gas_budget=settings.nft_mint_gas_budget,
+        )
+    return _nft_mint_batcher
@@ -0,0 +1,246 @@
+"""Pool incremental de casts candidatos para la detección de tendencias."""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TIER_HIGH = "high"
+TIER_MID = "mid"
+TIER_LOW = "low"
+
+# Mientras el cast tenga menos de estas horas su score cambia con el tiempo (bonus de recencia)
+RECENCY_WINDOW_HOURS = 12.0
+
+# (casts, published_at epoch o NaN, now) -> scores; puntúa en bloque todo lo pendiente de un ingest
+BatchScorer = Callable[[Sequence[dict[str, Any]], np.ndarray, float], np.ndarray]
+
+
+def _published_at(cast: dict[str, Any]) -> float | None:
+    timestamp = cast.get("timestamp")
+    if not timestamp:
+        return None
+    try:
+        return datetime.fromisoformat(str(timestamp).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def _engagement_key(cast: dict[str, Any]) -> tuple[int, int, int, bool, float, float]:
+    reactions = cast.get("reactions") or {}
+    return (
+        int(reactions.get("likes", 0) or 0),
+        int(reactions.get("recasts", 0) or 0),
+        int(reactions.get("replies", 0) or 0),
+        bool(cast.get("is_targeted", False)),
+        round(float(cast.get("engagement_velocity", 0.0) or 0.0), 2),
+        round(float(cast.get("engagement_acceleration", 0.0) or 0.0), 2),
+    )
+
+
+@dataclass
+class PoolEntry:
+    cast: dict[str, Any]
+    score: float
+    tier: str
+    engagement: tuple[int, int, int, bool, float, float]
+    published_at: float | None
+    last_seen: float
+    version: int
+
+
+class RollingTrendPool:
+    """Ventana deslizante de casts (por hash) con un heap de máximos por tier.
+
+    ``ingest`` solo puntúa casts nuevos, casts cuyo engagement cambió y casts que
+    siguen dentro de la ventana de recencia (su bonus decae con el tiempo); el resto
+    conserva su score. Con ``batch_scorer`` todo lo pendiente se puntúa en una sola
+    llamada vectorizada reutilizando los timestamps ya parseados. ``select`` extrae el top de cada heap sin ordenar todo el pool.
+    Los heaps usan borrado perezoso: una entrada es válida si su versión coincide.
+    """
+
+    def __init__(
+        self,
+        scorer: Callable[[dict[str, Any]], float],
+        high_threshold: float = 0.7,
+        low_threshold: float = 0.3,
+        window_hours: float = 24.0,
+        max_entries: int = 500,
+        batch_scorer: BatchScorer | None = None,
+    ) -> None:
+        self._scorer = scorer
+        self._batch_scorer = batch_scorer
+        self.high_threshold = high_threshold
+        self.low_threshold = low_threshold
+        self.window_seconds = window_hours * 3600
+        self.max_entries = max_entries
+        # Ordenado por last_seen (el menos visto primero) para expirar sin recorrer todo
+        self._entries: OrderedDict[str, PoolEntry] = OrderedDict()
+        # Casts cuyo bonus de recencia todavía cambia con el tiempo
+        self._unsettled: set[str] = set()
+        self._heaps: dict[str, list[tuple[float, int, str, int]]] = {TIER_HIGH: [], TIER_MID: [], TIER_LOW: []}
+        self._seq = itertools.count()
+        self._version = itertools.count(1)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _tier_for(self, score: float) -> str:
+        if score >= self.high_threshold:
+            return TIER_HIGH
+        if score >= self.low_threshold:
+            return TIER_MID
+        return TIER_LOW
+
+    def _place(self, cast_hash: str, entry: PoolEntry) -> None:
+        entry.version = next(self._version)
+        entry.tier = self._tier_for(entry.score)
+        self._entries[cast_hash] = entry
+        heapq.heappush(self._heaps[entry.tier], (-entry.score, next(self._seq), cast_hash, entry.version))
+
+    def _is_live(self, item: tuple[float, int, str, int], tier: str) -> bool:
+        entry = self._entries.get(item[2])
+        return entry is not None and entry.version == item[3] and entry.tier == tier
+
+    def _score_entries(self, entries: list[PoolEntry], now: float) -> list[float]:
+        if not entries:
+            return []
+        if self._batch_scorer is None:
+            return [self._scorer(entry.cast) for entry in entries]
+        published_at = np.fromiter(
+            (np.nan if e.published_at is None else e.published_at for e in entries),
+            dtype=np.float64,
+            count=len(entries),
+        )
+        return self._batch_scorer([e.cast for e in entries], published_at, now).tolist()
+
+    def ingest(self, candidates: list[dict[str, Any]], now: float | None = None) -> dict[str, int]:
+        """Incorpora los casts de un scan. Devuelve cuántos fueron nuevos, cambiados o intactos."""
+        now = time.time() if now is None else now
+        stats = {"new": 0, "changed": 0, "decayed": 0, "unchanged": 0, "evicted": 0}
+        seen_in_batch: set[str] = set()
+        # Casts nuevos o con engagement distinto: se puntúan todos juntos al final
+        pending: dict[str, PoolEntry] = {}
+
+        for cast in candidates:
+            cast_hash = cast.get("hash")
+            if not cast_hash or cast_hash in seen_in_batch:
+                continue
+            seen_in_batch.add(cast_hash)
+            engagement = _engagement_key(cast)
+            entry = self._entries.get(cast_hash)
+
+            if entry is None:
+                stats["new"] += 1
+                entry = PoolEntry(
+                    cast=cast, score=0.0, tier=TIER_LOW, engagement=engagement,
+                    published_at=_published_at(cast), last_seen=now, version=0,
+                )
+                self._entries[cast_hash] = entry
+                self._unsettled.add(cast_hash)
+                pending[cast_hash] = entry
+            elif entry.engagement != engagement:
+                stats["changed"] += 1
+                entry.cast = {**entry.cast, **cast}
+                entry.engagement = engagement
+                entry.last_seen = now
+                self._entries.move_to_end(cast_hash)
+                pending[cast_hash] = entry
+            else:
+                entry.last_seen = now
+                self._entries.move_to_end(cast_hash)
+
+        # Decaimiento de recencia: solo casts aún no estabilizados (dentro de la ventana de 12h
+        # o recién salidos de ella); los demás mantienen su score sin recalcular
+        decaying = [h for h in self._unsettled if h not in pending]
+        hashes = list(pending) + decaying
+        entries = list(pending.values()) + [self._entries[h] for h in decaying]
+        scores = self._score_entries(entries, now)
+
+        for cast_hash, entry, score in zip(hashes, entries, scores):
+            if cast_hash in pending:
+                entry.score = score
+                self._place(cast_hash, entry)
+            elif score != entry.score:
+                entry.score = score
+                self._place(cast_hash, entry)
+                stats["decayed"] += 1
+
+        recency_cutoff = now - RECENCY_WINDOW_HOURS * 3600
+        for cast_hash in list(self._unsettled):
+            published_at = self._entries[cast_hash].published_at
+            if published_at is None or published_at < recency_cutoff:
+                self._unsettled.discard(cast_hash)
+
+        stats["unchanged"] = len(seen_in_batch) - stats["new"] - stats["changed"]
+        stats["evicted"] = self._evict(now)
+        self._compact()
+        return stats
+
+    def _evict(self, now: float) -> int:
+        """Saca casts que no aparecen en los scans desde hace más de la ventana, y recorta al máximo."""
+        cutoff = now - self.window_seconds
+        expired = 0
+        while self._entries:
+            cast_hash, entry = next(iter(self._entries.items()))
+            if entry.last_seen >= cutoff:
+                break
+            del self._entries[cast_hash]
+            self._unsettled.discard(cast_hash)
+            expired += 1
+        overflow = len(self._entries) - self.max_entries
+        if overflow > 0:
+            # Recortar los de menor score (nsmallest es O(n log k), sin ordenar todo el pool)
+            for cast_hash, _ in heapq.nsmallest(overflow, self._entries.items(), key=lambda kv: kv[1].score):
+                del self._entries[cast_hash]
+                self._unsettled.discard(cast_hash)
+        return expired + max(overflow, 0)
+
+    def _compact(self) -> None:
+        """Reconstruye un heap cuando acumula demasiadas entradas obsoletas."""
+        for tier, heap in self._heaps.items():
+            if len(heap) > 2 * len(self._entries) + 32:
+                self._heaps[tier] = [item for item in heap if self._is_live(item, tier)]
+                heapq.heapify(self._heaps[tier])
+
+    def top(self, tier: str, k: int, skip: int = 0) -> list[dict[str, Any]]:
+        """Devuelve los casts ``skip..skip+k`` de mayor score del tier (O((skip+k) log n))."""
+        heap = self._heaps[tier]
+        popped: list[tuple[float, int, str, int]] = []
+        result: list[dict[str, Any]] = []
+        while heap and len(result) < k:
+            item = heapq.heappop(heap)
+            if not self._is_live(item, tier):
+                continue
+            popped.append(item)
+            if len(popped) > skip:
+                entry = self._entries[item[2]]
+                result.append({**entry.cast, "trend_score": entry.score})
+        for item in popped:
+            heapq.heappush(heap, item)
+        return result
+
+    def select(self, quotas: dict[str, int], target_count: int) -> list[dict[str, Any]]:
+        """Selección por tiers con backfill Mid -> High -> Low, ordenada por score."""
+        selection: list[dict[str, Any]] = []
+        for tier in (TIER_HIGH, TIER_MID, TIER_LOW):
+            selection.extend(self.top(tier, quotas.get(tier, 0)))
+
+        for tier in (TIER_MID, TIER_HIGH, TIER_LOW):
+            remaining = target_count - len(selection)
+            if remaining <= 0:
+                break
+            selection.extend(self.top(tier, remaining, skip=quotas.get(tier, 0)))
+
+        selection.sort(key=lambda c: c["trend_score"], reverse=True)
+        return selection
@@ -0,0 +1,169 @@
+"""Scoring vectorizado de casts candidatos (mismos pesos que ``TrendWatcherAgent._score_cast``)."""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import time
+from datetime import datetime
+from typing import Any, Sequence
+
+import numpy as np
+
+from .trend_pool import TIER_HIGH, TIER_LOW, TIER_MID
+
+logger = logging.getLogger(__name__)
+
+# Pesos del término de engagement: likes, recasts, replies (normalizado a 200)
+ENGAGEMENT_WEIGHTS = np.array([1.0, 2.0, 0.6])
+ENGAGEMENT_NORMALIZER = 200.0
+RECENCY_WINDOW_HOURS = 12.0
+RECENCY_WEIGHT = 0.3
+# Edad asumida cuando el timestamp falta o no se puede parsear
+DEFAULT_AGE_HOURS = 24.0
+TARGETED_FLOOR = 0.45
+
+HIGH_THRESHOLD = 0.7
+LOW_THRESHOLD = 0.3
+
+
+def _parse_one(timestamp: Any) -> float:
+    if not timestamp:
+        return np.nan
+    try:
+        return datetime.fromisoformat(str(timestamp).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return np.nan
+
+
+def parse_timestamps(timestamps: Sequence[Any]) -> np.ndarray:
+    """Convierte timestamps ISO de Neynar a epoch (segundos). Inválidos o vacíos -> NaN.
+
+    Los timestamps de Neynar vienen en UTC con sufijo ``Z``; esos se parsean en bloque
+    con ``datetime64``. Cualquier otro formato (offsets, fechas sin hora) cae al parseo
+    individual con ``fromisoformat``.
+    """
+    n = len(timestamps)
+    if n == 0:
+        return np.empty(0, dtype=np.float64)
+    raw = [t if isinstance(t, str) else (str(t) if t else "") for t in timestamps]
+    if all(len(t) >= 19 and t.endswith("Z") and t[10] == "T" for t in raw):
+        try:
+            parsed = np.array([t[:-1] for t in raw], dtype="datetime64[ms]")
+            return parsed.astype(np.int64).astype(np.float64) / 1000.0
+        except ValueError:
+            pass
+    return np.fromiter((_parse_one(t) for t in raw), dtype=np.float64, count=n)
+
+
+def _column(casts: Sequence[dict[str, Any]], key: str) -> np.ndarray:
+    return np.fromiter(
+        (float(c.get(key, 0.0) or 0.0) for c in casts), dtype=np.float64, count=len(casts)
+    )
+
+
+def reaction_matrix(casts: Sequence[dict[str, Any]]) -> np.ndarray:
+    """Matriz ``[n, 3]`` con likes, recasts y replies de cada cast."""
+    flat = np.fromiter(
+        itertools.chain.from_iterable(
+            (r.get("likes", 0) or 0, r.get("recasts", 0) or 0, r.get("replies", 0) or 0)
+            for r in ((c.get("reactions") or {}) for c in casts)
+        ),
+        dtype=np.float64,
+        count=3 * len(casts),
+    )
+    return flat.reshape(len(casts), 3)
+
+
+def score_casts(
+    casts: Sequence[dict[str, Any]],
+    published_at: np.ndarray | None = None,
+    now: float | None = None,
+    velocity_saturation: float = 100.0,
+    velocity_weight: float = 0.25,
+    acceleration_weight: float = 0.1,
+    targeted_floor: float | None = TARGETED_FLOOR,
+) -> np.ndarray:
+    """Score de todos los casts en un solo paso (equivalente a ``_candidate_score``).
+
+    ``published_at`` permite reutilizar timestamps ya parseados (p.ej. los del pool);
+    si no se pasa, se parsean una vez aquí. Con ``targeted_floor=None`` se omite el
+    boost de casts targeted y el resultado coincide con ``_score_cast``.
+    """
+    n = len(casts)
+    if n == 0:
+        return np.empty(0, dtype=np.float64)
+    now = time.time() if now is None else now
+    if published_at is None:
+        published_at = parse_timestamps([c.get("timestamp") for c in casts])
+
+    engagement = reaction_matrix(casts) @ ENGAGEMENT_WEIGHTS / ENGAGEMENT_NORMALIZER
+    age_hours = np.where(
+        np.isnan(published_at), DEFAULT_AGE_HOURS, np.maximum((now - published_at) / 3600.0, 0.0)
+    )
+    recency = np.maximum(RECENCY_WINDOW_HOURS - age_hours, 0.0) / RECENCY_WINDOW_HOURS
+
+    velocity = np.maximum(_column(casts, "engagement_velocity"), 0.0)
+    acceleration = np.maximum(_column(casts, "engagement_acceleration"), 0.0)
+    velocity_bonus = (
+        np.minimum(velocity / velocity_saturation, 1.0) * velocity_weight
+        + np.minimum(acceleration / velocity_saturation, 1.0) * acceleration_weight
+    )
+
+    scores = np.minimum(engagement + recency * RECENCY_WEIGHT + velocity_bonus, 1.0)
+    if targeted_floor is not None:
+        targeted = np.fromiter((bool(c.get("is_targeted", False)) for c in casts), dtype=bool, count=n)
+        scores = np.where(targeted, np.maximum(scores, targeted_floor), scores)
+    return scores
+
+
+def _top_indices(scores: np.ndarray, candidates: np.ndarray, k: int) -> np.ndarray:
+    """Los ``k`` índices de mayor score dentro de ``candidates``, ordenados (argpartition + sort de k)."""
+    if k <= 0 or candidates.size == 0:
+        return candidates[:0]
+    if k < candidates.size:
+        part = np.argpartition(-scores[candidates], k - 1)[:k]
+        candidates = candidates[part]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def select_tiers(
+    scores: np.ndarray,
+    quotas: dict[str, int],
+    target_count: int,
+    high_threshold: float = HIGH_THRESHOLD,
+    low_threshold: float = LOW_THRESHOLD,
+) -> np.ndarray:
+    """Índices seleccionados por tiers (High/Mid/Low) con backfill Mid -> High -> Low.
+
+    Misma política que ``RollingTrendPool.select`` pero sobre un array de scores: cada
+    tier se resuelve con ``argpartition`` (O(n)) y solo se ordenan los elegidos.
+    """
+    tiers = {
+        TIER_HIGH: np.flatnonzero(scores >= high_threshold),
+        TIER_MID: np.flatnonzero((scores >= low_threshold) & (scores < high_threshold)),
+        TIER_LOW: np.flatnonzero(scores < low_threshold),
+    }
+    # Cada tier se ordena una sola vez, solo hasta su cuota más el backfill posible
+    ranked = {
+        tier: _top_indices(scores, idx, quotas.get(tier, 0) + target_count) for tier, idx in tiers.items()
+    }
+
+    selection: list[np.ndarray] = []
+    taken = 0
+    for tier in (TIER_HIGH, TIER_MID, TIER_LOW):
+        chosen = ranked[tier][: quotas.get(tier, 0)]
+        selection.append(chosen)
+        taken += chosen.size
+
+    for tier in (TIER_MID, TIER_HIGH, TIER_LOW):
+        remaining = target_count - taken
+        if remaining <= 0:
+            break
+        start = quotas.get(tier, 0)
+        extra = ranked[tier][start : start + remaining]
+        selection.append(extra)
+        taken += extra.size
+
+    chosen = np.concatenate(selection) if selection else np.empty(0, dtype=np.int64)
+    return chosen[np.argsort(-scores[chosen], kind="stable")]
@@ -0,0 +1,99 @@
+"""Snapshot compartido de tendencias para no re-escanear Neynar en cada request de usuario."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+from ..tools.rate_limiter import background_priority
+from ..tools.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+ScanFn = Callable[[str], Awaitable[list[dict[str, Any]]]]
+
+
+@dataclass
+class TrendSnapshot:
+    channel_id: str
+    trends: list[dict[str, Any]]
+    version: int
+    created_at: float = field(default_factory=time.time)
+    _monotonic: float = field(default_factory=time.monotonic, repr=False)
+
+    @property
+    def age_seconds(self) -> float:
+        return time.monotonic() - self._monotonic
+
+
+class TrendSnapshotService:
+    """Mantiene el ranking de tendencias vigente por canal.
+
+    - Lecturas en O(1) mientras el snapshot tenga menos de ``max_age_seconds``.
+    - Si expiró (pero no supera ``max_stale_seconds``) se sirve el snapshot viejo y
+      se refresca en segundo plano; si no hay snapshot o es demasiado viejo, se espera el scan.
+    - ``force=True`` (scheduler, cron o admin) siempre re-escanea.
+    Los scans concurrentes del mismo canal se coalescen en uno solo.
+    """
+
+    def __init__(self, scan_fn: ScanFn, max_age_seconds: float = 300.0, max_stale_seconds: float = 1800.0) -> None:
+        self._scan_fn = scan_fn
+        self.max_age_seconds = max_age_seconds
+        self.max_stale_seconds = max(max_stale_seconds, max_age_seconds)
+        self._snapshots: dict[str, TrendSnapshot] = {}
+        self._version = 0
+        self._singleflight = SingleFlight()
+        self._tasks: set[asyncio.Task] = set()
+
+    def peek(self, channel_id: str) -> TrendSnapshot | None:
+        return self._snapshots.get(channel_id)
+
+    async def get(self, channel_id: str, force: bool = False) -> TrendSnapshot:
+        snapshot = self._snapshots.get(channel_id)
+        if force or snapshot is None:
+            return await self.refresh(channel_id)
+
+        age = snapshot.age_seconds
+        if age < self.max_age_seconds:
+            return snapshot
+        if age < self.max_stale_seconds:
+            logger.info("♻️ Snapshot de tendencias (%s) expirado hace %.0fs, refrescando en background", channel_id, age)
+            self._refresh_in_background(channel_id)
+            return snapshot
+        return await self.refresh(channel_id)
+
+    async def refresh(self, channel_id: str) -> TrendSnapshot:
+        """Re-escanea el canal y publica el nuevo snapshot (coalescido por canal)."""
+        return await self._singleflight.do(channel_id, lambda: self._scan(channel_id))
+
+    async def _scan(self, channel_id: str) -> TrendSnapshot:
+        started = time.monotonic()
+        trends = await self._scan_fn(channel_id)
+        previous = self._snapshots.get(channel_id)
+        if not trends and previous is not None and previous.trends:
+            # Un scan vacío (Neynar caído, deadlines) no debe borrar un ranking válido
+            logger.warning("⚠️ Scan de tendencias vacío para %s, se conserva el snapshot anterior", channel_id)
+            return previous
+        self._version += 1
+        snapshot = TrendSnapshot(channel_id=channel_id, trends=trends, version=self._version)
+        self._snapshots[channel_id] = snapshot
+        logger.info(
+            "📸 Snapshot de tendencias v%d (%s): %d tendencias en %.2fs",
+            snapshot.version, channel_id, len(trends), time.monotonic() - started,
+        )
+        return snapshot
+
+    def _refresh_in_background(self, channel_id: str) -> None:
+        async def _run() -> None:
+            try:
+                with background_priority():
+                    await self.refresh(channel_id)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Error refrescando snapshot de tendencias (%s): %s", channel_id, exc)
+
+        task = asyncio.create_task(_run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
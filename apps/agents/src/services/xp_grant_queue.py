@@ -0,0 +1,158 @@
+"""Cola de grants de XP que agrupa los otorgamientos cercanos en transacciones ``grantXpBatch``."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any
+
+from ..tools.celo import MAX_XP_BATCH_SIZE, MAX_XP_PER_GRANT, AsyncCeloToolbox, get_async_celo_toolbox
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _QueuedGrant:
+    participant: str
+    amount: int
+    future: asyncio.Future
+
+
+class XpGrantQueue:
+    """Acumula grants de XP por campaña y los envía como ``grantXpBatch``.
+
+    - ``submit`` valida y encola el grant al instante y devuelve un future que se resuelve
+      con el hash de la transacción cuando su batch se confirma (o falla con la excepción).
+    - Los grants que llegan dentro de ``window_seconds`` (distribuidor, API y scheduler)
+      comparten transacción; con 0 se agrupa lo encolado en la misma iteración del loop.
+    - Un participante puede repetirse en el batch: el contrato suma cada entrada.
+    - Si el registry desplegado no tiene ``grantXpBatch`` se envía un ``grantXp`` por grant,
+      seguidos gracias al ``NonceManager``.
+    - Un batch que revierte al estimar gas se divide a la mitad para aislar el grant inválido.
+    """
+
+    def __init__(
+        self,
+        celo_tool: AsyncCeloToolbox,
+        registry_address: str,
+        window_seconds: float = 0.0,
+        confirm_timeout: float = 120,
+    ) -> None:
+        self.celo_tool = celo_tool
+        self.registry_address = registry_address
+        self.window_seconds = max(0.0, window_seconds)
+        self.confirm_timeout = confirm_timeout
+        self._queues: dict[str, list[_QueuedGrant]] = {}
+        self._flush_tasks: dict[str, asyncio.Task] = {}
+        self.stats = {"grants": 0, "transactions": 0, "confirmed": 0, "failed": 0}
+
+    def submit(self, campaign_id: str, participant: str, amount: int) -> asyncio.Future:
+        """Encola el grant; el future devuelve el hash de la transacción que lo incluyó."""
+        if amount <= 0:
+            raise ValueError("Amount debe ser mayor a 0")
+        if amount > MAX_XP_PER_GRANT:
+            raise ValueError(f"Amount ({amount}) excede el límite máximo ({MAX_XP_PER_GRANT})")
+        if not participant or not participant.startswith("0x") or len(participant) != 42:
+            raise ValueError(f"Dirección de participante inválida: {participant}")
+
+        loop = asyncio.get_running_loop()
+        queued = _QueuedGrant(participant, int(amount), loop.create_future())
+        self._queues.setdefault(campaign_id, []).append(queued)
+        self.stats["grants"] += 1
+        if campaign_id not in self._flush_tasks:
+            self._flush_tasks[campaign_id] = asyncio.create_task(self._flush_after_window(campaign_id))
+        return queued.future
+
+    async def grant(self, campaign_id: str, participant: str, amount: int) -> str:
+        """Encola el grant y espera a que su transacción se confirme."""
+        return await self.submit(campaign_id, participant, amount)
+
+    async def _flush_after_window(self, campaign_id: str) -> None:
+        try:
+            await asyncio.sleep(self.window_seconds)
+        finally:
+            self._flush_tasks.pop(campaign_id, None)
+            queued = self._queues.pop(campaign_id, [])
+        try:
+            await self._flush(campaign_id, queued)
+        except Exception as exc:  # noqa: BLE001
+            logger.error("Fallo vaciando la cola de XP de %s: %s", campaign_id, exc)
+            self._fail(queued, exc)
+        self._fail(queued, RuntimeError("grant de XP no procesado"))
+
+    async def _flush(self, campaign_id: str, queued: list[_QueuedGrant]) -> None:
+        if not queued:
+            return
+        batched = len(queued) > 1 and await self.celo_tool.supports_xp_batch(self.registry_address)
+        chunk = MAX_XP_BATCH_SIZE if batched else 1
+        batches = [queued[i:i + chunk] for i in range(0, len(queued), chunk)]
+        logger.info("⭐ Otorgando %d grants de XP de %s en %d transacción(es)", len(queued), campaign_id, len(batches))
+
+        # 1. Enviar todo seguido; 2. esperar los receipts en paralelo
+        sent: list[tuple[str, list[_QueuedGrant]]] = []
+        for batch in batches:
+            sent.extend(await self._send(campaign_id, batch))
+        await asyncio.gather(*(self._settle(tx_hash, items) for tx_hash, items in sent))
+
+    async def _send(self, campaign_id: str, items: list[_QueuedGrant]) -> list[tuple[str, list[_QueuedGrant]]]:
+        try:
+            if len(items) == 1:
+                tx_hash = await self.celo_tool.grant_xp(
+                    registry_address=self.registry_address,
+                    campaign_id=campaign_id,
+                    participant=items[0].participant,
+                    amount=items[0].amount,
+                )
+            else:
+                tx_hash = await self.celo_tool.grant_xp_batch(
+                    registry_address=self.registry_address,
+                    campaign_id=campaign_id,
+                    participants=[item.participant for item in items],
+                    amounts=[item.amount for item in items],
+                )
+        except Exception as exc:  # noqa: BLE001
+            if len(items) == 1:
+                self._fail(items, exc)
+                return []
+            middle = len(items) // 2
+            logger.warning("grantXpBatch de %d grants falló (%s), dividiendo el batch", len(items), exc)
+            return await self._send(campaign_id, items[:middle]) + await self._send(campaign_id, items[middle:])
+        self.stats["transactions"] += 1
+        return [(tx_hash, items)]
+
+    async def _settle(self, tx_hash: str, items: list[_QueuedGrant]) -> None:
+        try:
+            receipt = await self.celo_tool.confirm(tx_hash, timeout=self.confirm_timeout)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Grant de XP %s sin confirmar: %s", tx_hash, exc)
+            self._fail(items, exc)
+            return
+        if receipt.get("status") == 0:
+            self._fail(items, RuntimeError(f"grant de XP {tx_hash} revertido on-chain"))
+            return
+        for item in items:
+            self.stats["confirmed"] += 1
+            if not item.future.done():
+                item.future.set_result(tx_hash)
+
+    def _fail(self, items: list[_QueuedGrant], error: Exception) -> None:
+        for item in items:
+            if not item.future.done():
+                self.stats["failed"] += 1
+                item.future.set_exception(error)
+
+
+_xp_grant_queue: XpGrantQueue | None = None
+
+
+def get_xp_grant_queue(settings: Any) -> XpGrantQueue:
+    """Instancia compartida: distribuidor, API y scheduler comparten la ventana de acumulación."""
+    global _xp_grant_queue
+    if _xp_grant_queue is None:
+        _xp_grant_queue = XpGrantQueue(
+            get_async_celo_toolbox(settings),
+            registry_address=settings.registry_address,
+            window_seconds=settings.xp_grant_batch_window_seconds,
+        )
+    return _xp_grant_queue
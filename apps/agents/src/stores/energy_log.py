@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_NAME = "snapshot.json"
+LOG_NAME = "events.log"
+
+
+class EnergyLogStore:
+    """Energía en disco como log de eventos append-only con vista materializada en memoria.
+
+    - Cada ``consume``/``refill`` agrega una línea JSONL (``s`` secuencia, ``op``, ``a`` address,
+      ``t`` timestamp, ``n`` cantidad) y actualiza el dict ``address -> rayos`` en memoria.
+      Las lecturas se sirven solo desde memoria.
+    - Group commit: la llamada vuelve cuando su evento está en disco, pero un solo ``fsync``
+      (del primer hilo que llega, tras ``commit_window`` segundos) cubre a todos los eventos
+      escritos hasta ese momento.
+    - Compactación: cada ``compact_every`` eventos o ``compact_interval`` segundos el log se
+      rota, el estado (sin rayos ya recargados) se escribe en ``snapshot.json`` junto con la
+      última secuencia incluida, y el segmento rotado se borra.
+    - Al arrancar se carga el snapshot y se re-aplican los eventos con secuencia posterior; el
+      replay es determinista porque cada evento poda los rayos con su propio timestamp.
+    - Si no hay snapshot ni log, ``legacy_loader`` (el ``energy_store.json`` anterior) se importa una vez.
+    - Un proceso por directorio: con varios workers en la misma máquina usar Redis.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        recharge_time: float,
+        legacy_loader: Callable[[], dict[str, Any]] | None = None,
+        commit_window: float = 0.002,
+        compact_every: int = 5000,
+        compact_interval: float = 300.0,
+    ) -> None:
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.snapshot_path = directory / SNAPSHOT_NAME
+        self.log_path = directory / LOG_NAME
+        self.rotated_path = directory / f"{LOG_NAME}.old"
+        self.recharge_time = recharge_time
+        self.commit_window = max(0.0, commit_window)
+        self.compact_every = max(1, compact_every)
+        self.compact_interval = max(1.0, compact_interval)
+
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._sync_cond = threading.Condition()
+        self._users: dict[str, list[float]] = {}
+        self._seq = 0
+        self._snapshot_seq = 0
+        self._synced_seq = 0
+        self._syncing = False
+        self._wake = threading.Event()
+        self._closed = False
+        self.stats = {"events": 0, "fsyncs": 0, "compactions": 0, "replayed": 0}
+
+        self._load(legacy_loader)
+        self._fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        if self.stats["replayed"] or self.rotated_path.exists():
+            # Dejar el estado re-aplicado en un snapshot y arrancar con el log vacío
+            self.compact()
+        self._thread = threading.Thread(target=self._compact_loop, name="energy-compact", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # --- Carga y replay ---
+    def _load(self, legacy_loader: Callable[[], dict[str, Any]] | None) -> None:
+        if self.snapshot_path.exists():
+            snapshot = json.loads(self.snapshot_path.read_text("utf-8"))
+            self._snapshot_seq = self._seq = int(snapshot.get("seq", 0))
+            for address, state in snapshot.get("users", {}).items():
+                self._users[address] = [float(t) for t in state.get("consumed_bolts", [])]
+        elif not self.log_path.exists() and not self.rotated_path.exists() and legacy_loader is not None:
+            legacy = legacy_loader()
+            for address, state in legacy.items():
+                bolts = state.get("consumed_bolts") or []
+                if bolts:
+                    self._users[address.lower()] = sorted(float(t) for t in bolts)
+            self._write_snapshot(self._users, 0)
+            logger.info(f"📥 [Energy] Importados {len(self._users)} usuarios desde el almacenamiento JSON anterior")
+
+        for path in (self.rotated_path, self.log_path):
+            if not path.exists():
+                continue
+            with open(path, "r", encoding="utf-8") as log:
+                for line in log:
+                    try:
+                        event = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Última línea a medio escribir por un crash: se descarta
+                        logger.warning(f"⚠️ [Energy] Línea corrupta en {path.name}, ignorada")
+                        continue
+                    if event["s"] <= self._snapshot_seq:
+                        continue
+                    self._apply(event)
+                    self._seq = max(self._seq, event["s"])
+                    self.stats["replayed"] += 1
+        self._synced_seq = self._seq
+        if self.stats["replayed"]:
+            logger.info(f"🔁 [Energy] {self.stats['replayed']} eventos re-aplicados desde el log")
+
+    # --- Vista materializada ---
+    def _active(self, address: str, now: float) -> list[float]:
+        """Rayos aún recargando; poda en memoria los ya recargados (con ``self._lock`` tomado)."""
+        bolts = self._users.get(address)
+        if not bolts:
+            return []
+        active = [t for t in bolts if now - t < self.recharge_time]
+        if len(active) != len(bolts):
+            if active:
+                self._users[address] = active
+            else:
+                del self._users[address]
+        return active
+
+    def _apply(self, event: dict[str, Any]) -> list[float]:
+        address, now = event["a"], event["t"]
+        active = self._active(address, now)
+        if event["op"] == "consume":
+            active = sorted([*active, now])
+        else:
+            active = active[int(event["n"]):]
+        if active:
+            self._users[address] = active
+        else:
+            self._users.pop(address, None)
+        return active
+
+    def _append(self, op: str, address: str, now: float, **extra: Any) -> tuple[list[float], int]:
+        """Aplica el evento en memoria y lo escribe al log (con ``self._lock`` tomado)."""
+        self._seq += 1
+        event = {"s": self._seq, "op": op, "a": address, "t": now, **extra}
+        active = self._apply(event)
+        os.write(self._fd, (json.dumps(event) + "\n").encode("utf-8"))
+        self.stats["events"] += 1
+        if self._seq - self._snapshot_seq >= self.compact_every:
+            self._wake.set()
+        return active, self._seq
+
+    # --- Interfaz usada por EnergyService ---
+    def active_bolts(self, address: str, now: float) -> list[float]:
+        with self._lock:
+            return list(self._active(address, now))
+
+    def consume(self, address: str, now: float, max_energy: int) -> tuple[bool, list[float]]:
+        """Consume un rayo si hay energía; vuelve cuando el evento es durable."""
+        with self._lock:
+            active = self._active(address, now)
+            if len(active) >= max_energy:
+                return False, list(active)
+            active, seq = self._append("consume", address, now)
+        self._wait_durable(seq)
+        return True, list(active)
+
+    def refill(self, address: str, now: float, amount: int) -> list[float]:
+        """Devuelve ``amount`` rayos (los más antiguos); vuelve cuando el evento es durable."""
+        with self._lock:
+            if not self._active(address, now):
+                return []
+            active, seq = self._append("refill", address, now, n=int(amount))
+        self._wait_durable(seq)
+        return list(active)
+
+    def addresses(self) -> list[str]:
+        with self._lock:
+            return list(self._users)
+
+    # --- Group commit ---
+    def _wait_durable(self, seq: int) -> None:
+        with self._sync_cond:
+            while self._synced_seq < seq:
+                if self._syncing:
+                    self._sync_cond.wait()
+                    continue
+                # Este hilo hace el fsync por todos los eventos escritos hasta ahora
+                self._syncing = True
+                self._sync_cond.release()
+                try:
+                    if self.commit_window:
+                        time.sleep(self.commit_window)
+                    with self._lock:
+                        target = self._seq
+                        # dup: la compactación puede cerrar el descriptor mientras se sincroniza
+                        fd = os.dup(self._fd)
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        os.close(fd)
+                    self.stats["fsyncs"] += 1
+                finally:
+                    self._sync_cond.acquire()
+                    self._syncing = False
+                    self._sync_cond.notify_all()
+                self._synced_seq = max(self._synced_seq, target)
+
+    # --- Compactación ---
+    def _write_snapshot(self, users: dict[str, list[float]], seq: int) -> None:
+        payload = {"seq": seq, "users": {address: {"consumed_bolts": bolts} for address, bolts in users.items()}}
+        tmp_path = self.snapshot_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+    def compact(self) -> None:
+        """Escribe el estado actual como snapshot y descarta los eventos que cubre."""
+        with self._compact_lock:
+            with self._lock:
+                if self._seq == self._snapshot_seq and not self.rotated_path.exists():
+                    return
+                os.fsync(self._fd)
+                os.close(self._fd)
+                if not self.rotated_path.exists():
+                    self.log_path.rename(self.rotated_path)
+                else:
+                    # Compactación anterior interrumpida: el segmento rotado ya está re-aplicado
+                    with open(self.rotated_path, "ab") as rotated, open(self.log_path, "rb") as log:
+                        rotated.write(log.read())
+                        rotated.flush()
+                        os.fsync(rotated.fileno())
+                    self.log_path.unlink()
+                self._fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                now = time.time()
+                for address in list(self._users):
+                    self._active(address, now)
+                users = {address: list(bolts) for address, bolts in self._users.items()}
+                seq = self._seq
+            with self._sync_cond:
+                self._synced_seq = max(self._synced_seq, seq)
+                self._sync_cond.notify_all()
+            self._write_snapshot(users, seq)
+            self._snapshot_seq = seq
+            self.rotated_path.unlink(missing_ok=True)
+            self.stats["compactions"] += 1
+            logger.info(f"🗜️ [Energy] Log compactado: {len(users)} usuarios en snapshot (seq {seq})")
+
+    def _compact_loop(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.compact_interval)
+            self._wake.clear()
+            if self._closed:
+                break
+            try:
+                self.compact()
+            except Exception as e:  # noqa: BLE001
+                logger.error(f"❌ [Energy] Error compactando el log: {e}", exc_info=True)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self.compact()
+        with self._lock:
+            os.close(self._fd)
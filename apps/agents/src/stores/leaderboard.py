@@ -5,7 +5,7 @@ import logging
 import time
 from pathlib import Path
 from threading import Lock
-from typing import Any
+from typing import Any, Iterable
 
 logger = logging.getLogger(__name__)
 
@@ -50,43 +50,76 @@ class LeaderboardStore:
             except:
                 pass
 
+    @staticmethod
+    def _merge_record(user_map: dict[str, dict[str, Any]], entry: dict[str, Any]) -> None:
+        """Fusiona ``entry`` en ``user_map`` con las reglas de ``record``."""
+        entry.setdefault("timestamp", int(time.time()))
+
+        # Normalizar dirección a minúsculas para consistencia
+        address = entry.get("address", "").lower()
+        if not address:
+            return
+
+        if address in user_map:
+            current = user_map[address]
+            # Merge new entry data
+            # Mantener el XP más alto (on-chain truth vs local accumulation)
+            new_xp = max(current.get("xp", 0), entry.get("xp", 0))
+
+            current.update(entry)
+            current["address"] = address # Asegurar que se guarde en lowercase
+            current["xp"] = new_xp
+        else:
+            # Add new
+            entry["address"] = address # Asegurar que se guarde en lowercase
+            user_map[address] = entry
+
+    def _write_sorted(self, user_map: dict[str, dict[str, Any]]) -> None:
+        # Sort by XP (desc) then Score (desc), una sola vez por escritura
+        data = sorted(user_map.values(), key=lambda x: (x.get("xp", 0), x.get("score", 0)), reverse=True)
+        # Trim to max entries
+        self._write(data[: self.max_entries])
+
     def record(self, entry: dict[str, Any]) -> None:
         """Guarda un nuevo ganador y mantiene el límite configurado."""
-        entry.setdefault("timestamp", int(time.time()))
-        
+        self.record_many([entry])
+
+    def record_many(self, entries: Iterable[dict[str, Any]]) -> None:
+        """Fusiona un lote de entradas con una sola lectura, un solo sort y una sola escritura."""
+        entries = list(entries)
+        if not entries:
+            return
         with self._lock:
-            data = self._read()
-            
-            # Normalizar dirección a minúsculas para consistencia
-            address = entry.get("address", "").lower()
-            if not address:
-                return
+            user_map = {item["address"].lower(): item for item in self._read() if "address" in item}
+            for entry in entries:
+                self._merge_record(user_map, entry)
+            self._write_sorted(user_map)
 
-            # Buscar si ya existe
-            user_map = {item["address"].lower(): item for item in data if "address" in item}
-            
-            if address in user_map:
-                current = user_map[address]
-                # Merge new entry data
-                # Mantener el XP más alto (on-chain truth vs local accumulation)
-                new_xp = max(current.get("xp", 0), entry.get("xp", 0))
-                
-                current.update(entry)
-                current["address"] = address # Asegurar que se guarde en lowercase
-                current["xp"] = new_xp
-            else:
-                # Add new
-                entry["address"] = address # Asegurar que se guarde en lowercase
-                data.append(entry)
-            
-            # Sort by XP (desc) then Score (desc)
-            data.sort(key=lambda x: (x.get("xp", 0), x.get("score", 0)), reverse=True)
-            
-            # Trim to max entries
-            if len(data) > self.max_entries:
-                data = data[:self.max_entries]
-                
-            self._write(data)
+    def replace_all(self, entries: Iterable[dict[str, Any]]) -> None:
+        """Reemplaza el leaderboard completo por ``entries`` (p.ej. reconstrucción desde la cadena)."""
+        user_map: dict[str, dict[str, Any]] = {}
+        for entry in entries:
+            self._merge_record(user_map, entry)
+        with self._lock:
+            self._write_sorted(user_map)
+            generation_path = self._generation_path()
+            generation_path.write_text(str(self.version()[0] + 1), "utf-8")
+
+    def _generation_path(self) -> Path:
+        return self.storage_path.with_name(f"{self.storage_path.name}.generation")
+
+    def version(self) -> tuple[int, int]:
+        """``(generación, mtime)``: la generación cambia con cada ``replace_all`` y el mtime
+        con cualquier escritura (la caché en memoria lo usa para detectar cambios externos)."""
+        try:
+            generation = int(self._generation_path().read_text("utf-8"))
+        except (OSError, ValueError):
+            generation = 0
+        try:
+            mtime = self.storage_path.stat().st_mtime_ns
+        except OSError:
+            mtime = 0
+        return (generation, mtime)
 
     def increment_score(self, entry: dict[str, Any], xp_increment: int) -> None:
         """Incrementa el XP de un usuario existente o crea uno nuevo."""
@@ -122,10 +155,10 @@ class LeaderboardStore:
             data.sort(key=lambda item: (item.get("xp", 0), item.get("score", 0)), reverse=True)
             self._write(data[: self.max_entries])
 
-    def top(self, limit: int = 10) -> list[dict[str, Any]]:
-        """Retorna el top N del leaderboard."""
+    def top(self, limit: int = 10, offset: int = 0) -> list[dict[str, Any]]:
+        """Retorna el top N del leaderboard (desde ``offset``)."""
         with self._lock:
-            return self._read()[:limit]
+            return self._read()[offset:offset + limit]
 
     def get_rank(self, address: str) -> int | None:
         """Retorna el ranking (1-based) de una dirección."""
@@ -141,11 +174,51 @@ class LeaderboardStore:
         return None
 
 
-def default_store(max_entries: int = 100) -> LeaderboardStore:
+_memory_stores: dict[Path, Any] = {}
+_memory_stores_lock = Lock()
+
+
+def default_store(
+    max_entries: int = 100,
+    backend: str = "sqlite",
+    in_memory: bool = False,
+    flush_interval: float = 5.0,
+    flush_max_dirty: int = 500,
+) -> LeaderboardStore:
+    """Store del leaderboard: ``sqlite`` (población completa, índice de ranking) o ``file`` (JSON, dev local).
+
+    Con ``in_memory`` el store se sirve desde memoria y persiste en segundo plano; hay una
+    sola instancia por proceso (las lecturas y el replay log no pueden duplicarse).
+    """
     import os
     # En Vercel serverless, usar /tmp que es writable
     if os.getenv("VERCEL"):
         base_path = Path("/tmp/lootbox")
     else:
         base_path = Path(__file__).resolve().parents[1] / "data"
+
+    if in_memory:
+        log_path = base_path / f"leaderboard.{backend}.log"
+        with _memory_stores_lock:
+            store = _memory_stores.get(log_path)
+            if store is None:
+                from .leaderboard_memory import MemoryLeaderboardStore
+
+                store = MemoryLeaderboardStore(
+                    default_store(max_entries, backend=backend),
+                    log_path,
+                    flush_interval=flush_interval,
+                    flush_max_dirty=flush_max_dirty,
+                )
+                _memory_stores[log_path] = store
+            return store
+
+    if backend == "sqlite":
+        from .leaderboard_sqlite import SqliteLeaderboardStore
+
+        return SqliteLeaderboardStore(
+            base_path / "leaderboard.sqlite3",
+            max_entries=max_entries,
+            import_path=base_path / "leaderboard.json",
+        )
     return LeaderboardStore(base_path / "leaderboard.json", max_entries=max_entries)
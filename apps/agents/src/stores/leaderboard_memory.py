@@ -0,0 +1,317 @@
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left, insort
+from pathlib import Path
+from typing import Any, Iterable
+
+from .leaderboard import LeaderboardStore
+
+logger = logging.getLogger(__name__)
+
+
+def _rank_key(entry: dict[str, Any]) -> tuple[float, float, str]:
+    """Orden del ranking: XP desc, score desc, address asc (igual que el índice SQLite)."""
+    try:
+        score = float(entry.get("score") or 0)
+    except (TypeError, ValueError):
+        score = 0.0
+    return (-float(entry.get("xp") or 0), -score, entry["address"])
+
+
+class MemoryLeaderboardStore:
+    """Leaderboard servido desde memoria con persistencia write-behind.
+
+    - Índice ordenado (lista de claves + ``bisect``) y dict por address: ``get_rank`` y el
+      inicio de ``top`` son O(log n) sin I/O. Cada escritura reubica solo la entrada tocada,
+      pero ``insort``/``del`` en la lista son O(n) (memmove); con decenas de miles de entradas
+      eso es del orden de microsegundos, no una consulta SQL.
+    - Cada cambio se agrega al replay log (JSONL con el estado resultante de la entrada,
+      idempotente al re-aplicarse) antes de responder.
+    - Un hilo vuelca las entradas sucias al store durable (``record_many``) cada
+      ``flush_interval`` segundos o al juntar ``flush_max_dirty`` cambios. Antes de volcar
+      se rota el log; el segmento rotado se borra cuando el store durable confirmó.
+    - Al arrancar se carga el store durable (el snapshot) y se re-aplican los segmentos de log
+      pendientes, así que un crash entre volcados no pierde cambios.
+    - Antes de cada volcado se compara ``backend.version()`` con la última vista: si otro proceso
+      reconstruyó el store (``scripts/rebuild_leaderboard.py``, cambia la generación) se descarta
+      la memoria, incluidas las entradas sucias, y se recarga; si solo fusionó entradas
+      (``scripts/sync_leaderboard.py``) se recarga y las sucias se re-fusionan encima.
+    """
+
+    def __init__(
+        self,
+        backend: Any,
+        log_path: Path,
+        flush_interval: float = 5.0,
+        flush_max_dirty: int = 500,
+    ) -> None:
+        self.backend = backend
+        self.log_path = log_path
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = max(0.1, flush_interval)
+        self.flush_max_dirty = max(1, flush_max_dirty)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._keys: list[tuple[float, float, str]] = []
+        self._dirty: set[str] = set()
+        self._segment = 0
+        self._wake = threading.Event()
+        self._closed = False
+        self.stats = {"writes": 0, "flushes": 0, "flushed_entries": 0, "replayed": 0}
+        self._log: Any = None
+        self._backend_version: tuple[int, int] = (0, 0)
+
+        self._load()
+        if self._log is None:
+            self._log = open(self.log_path, "a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._flush_loop, name="leaderboard-flush", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # --- Carga y replay ---
+    def _pending_segments(self) -> list[Path]:
+        segments = self.log_path.parent.glob(f"{self.log_path.name}.*.pending")
+        return sorted(segments, key=lambda path: int(path.name.split(".")[-2]))
+
+    def _backend_entries(self) -> list[dict[str, Any]]:
+        return [
+            dict(entry, address=entry["address"].lower())
+            for entry in self.backend.top(limit=sys.maxsize)
+            if entry.get("address")
+        ]
+
+    def _load(self) -> None:
+        self._backend_version = self.backend.version()
+        for entry in self._backend_entries():
+            self._put(entry)
+
+        segments = self._pending_segments()
+        if segments:
+            self._segment = int(segments[-1].name.split(".")[-2])
+        for path in [*segments, self.log_path]:
+            if not path.exists():
+                continue
+            with open(path, "r", encoding="utf-8") as log:
+                for line in log:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Última línea a medio escribir por un crash: se descarta
+                        logger.warning("Línea corrupta en %s, ignorada", path.name)
+                        continue
+                    self._put(entry)
+                    self._dirty.add(entry["address"])
+                    self.stats["replayed"] += 1
+        if self.stats["replayed"]:
+            logger.info("🔁 Leaderboard: %d cambios re-aplicados desde el replay log", self.stats["replayed"])
+            # Persistir lo re-aplicado antes de abrir el log nuevo
+            self._rotate_log()
+            self._flush_once()
+
+    # --- Índice ---
+    def _put(self, entry: dict[str, Any]) -> None:
+        address = entry["address"]
+        previous = self._entries.get(address)
+        if previous is not None:
+            old_key = _rank_key(previous)
+            index = bisect_left(self._keys, old_key)
+            if index < len(self._keys) and self._keys[index] == old_key:
+                del self._keys[index]
+        self._entries[address] = entry
+        insort(self._keys, _rank_key(entry))
+
+    def _commit(self, entries: list[dict[str, Any]]) -> None:
+        """Aplica al índice, escribe el log y marca sucias (con ``self._lock`` tomado)."""
+        for entry in entries:
+            self._put(entry)
+            self._dirty.add(entry["address"])
+            self._log.write(json.dumps(entry) + "\n")
+        self._log.flush()
+        self.stats["writes"] += len(entries)
+        if len(self._dirty) >= self.flush_max_dirty:
+            self._wake.set()
+
+    # --- Interfaz de LeaderboardStore ---
+    def record(self, entry: dict[str, Any]) -> None:
+        """Guarda un ganador; conserva el XP más alto entre el guardado y el nuevo."""
+        self.record_many([entry])
+
+    def record_many(self, entries: Iterable[dict[str, Any]]) -> None:
+        with self._lock:
+            touched: dict[str, dict[str, Any]] = {}
+            for entry in entries:
+                address = entry.get("address", "").lower()
+                if not address:
+                    continue
+                if address not in touched and address in self._entries:
+                    touched[address] = dict(self._entries[address])
+                # Mismas reglas de merge que el backend de archivo
+                LeaderboardStore._merge_record(touched, entry)
+            self._commit([dict(entry) for entry in touched.values()])
+
+    def increment_score(self, entry: dict[str, Any], xp_increment: int) -> None:
+        """Incrementa el XP de un usuario existente o crea uno nuevo."""
+        entry.setdefault("timestamp", int(time.time()))
+        address = entry.get("address", "").lower()
+        if not address:
+            return
+        with self._lock:
+            current = self._entries.get(address)
+            if current is not None:
+                merged = dict(current)
+                merged.update({k: v for k, v in entry.items() if k != "xp"})
+                merged["xp"] = current.get("xp", 0) + xp_increment
+            else:
+                merged = {**entry, "xp": xp_increment}
+            merged["address"] = address
+            self._commit([merged])
+
+    def replace_all(self, entries: Iterable[dict[str, Any]]) -> None:
+        """Reemplaza todo de forma síncrona: el store durable primero, luego la memoria."""
+        user_map: dict[str, dict[str, Any]] = {}
+        for entry in entries:
+            LeaderboardStore._merge_record(user_map, entry)
+        with self._flush_lock, self._lock:
+            self.backend.replace_all(list(user_map.values()))
+            self._entries.clear()
+            self._keys.clear()
+            self._dirty.clear()
+            for entry in user_map.values():
+                self._put(dict(entry))
+            self._discard_log()
+            self._backend_version = self.backend.version()
+
+    def _discard_log(self) -> None:
+        """Lo anterior a un reemplazo ya no debe re-aplicarse (con ``self._lock`` tomado)."""
+        self._log.close()
+        for path in self._pending_segments():
+            path.unlink(missing_ok=True)
+        self._log = open(self.log_path, "w", encoding="utf-8")
+
+    def reload(self, discard_dirty: bool = False) -> None:
+        """Recarga desde el store durable; con ``discard_dirty`` se pierden los cambios sin volcar."""
+        with self._flush_lock:
+            self._reload(discard_dirty)
+
+    def _reload(self, discard_dirty: bool) -> None:
+        """Debe llamarse con ``self._flush_lock`` tomado (ningún volcado en curso)."""
+        version = self.backend.version()
+        entries = self._backend_entries()
+        with self._lock:
+            pending = len(self._dirty)
+            dirty = [] if discard_dirty else [self._entries[address] for address in self._dirty]
+            user_map = {entry["address"]: entry for entry in entries}
+            for entry in dirty:
+                # Mismas reglas que el volcado: se conserva el XP más alto
+                LeaderboardStore._merge_record(user_map, dict(entry))
+            self._entries.clear()
+            self._keys.clear()
+            for entry in user_map.values():
+                self._put(entry)
+            if discard_dirty:
+                self._dirty.clear()
+                self._discard_log()
+            self._backend_version = version
+        logger.info(
+            "🔄 Leaderboard recargado desde el store durable (%d entradas, %d cambios locales %s)",
+            len(user_map), pending, "re-fusionados" if not discard_dirty else "descartados",
+        )
+
+    def _check_backend(self) -> None:
+        """Detecta escrituras de otros procesos (con ``self._flush_lock`` tomado)."""
+        try:
+            version = self.backend.version()
+            if version == self._backend_version:
+                return
+            rebuilt = version[0] != self._backend_version[0]
+            if rebuilt:
+                logger.warning("⚠️ Leaderboard reconstruido por otro proceso; se descarta la copia en memoria")
+            self._reload(discard_dirty=rebuilt)
+        except Exception as exc:  # noqa: BLE001
+            logger.error("❌ Error comprobando la versión del leaderboard durable: %s", exc)
+
+    def top(self, limit: int = 10, offset: int = 0) -> list[dict[str, Any]]:
+        with self._lock:
+            keys = self._keys[max(0, offset):max(0, offset) + max(0, limit)]
+            return [dict(self._entries[key[2]]) for key in keys]
+
+    def get_rank(self, address: str) -> int | None:
+        if not address:
+            return None
+        with self._lock:
+            entry = self._entries.get(address.lower())
+            if entry is None:
+                return None
+            return bisect_left(self._keys, _rank_key(entry)) + 1
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    # --- Write-behind ---
+    def _rotate_log(self) -> None:
+        """Cierra el log actual como segmento pendiente (con ``self._lock`` tomado o sin hilos aún)."""
+        log = self._log
+        if log is not None:
+            log.flush()
+            os.fsync(log.fileno())
+            log.close()
+        if self.log_path.exists() and self.log_path.stat().st_size:
+            self._segment += 1
+            self.log_path.rename(self.log_path.with_name(f"{self.log_path.name}.{self._segment}.pending"))
+        self._log = open(self.log_path, "a", encoding="utf-8")
+
+    def _flush_once(self) -> None:
+        with self._flush_lock:
+            self._check_backend()
+            with self._lock:
+                if not self._dirty:
+                    return
+                batch = [dict(self._entries[address]) for address in self._dirty]
+                self._dirty.clear()
+                self._rotate_log()
+                flushed_segment = self._segment
+            try:
+                self.backend.record_many(batch)
+            except Exception as exc:  # noqa: BLE001
+                logger.error("❌ Error volcando %d entradas del leaderboard: %s", len(batch), exc)
+                with self._lock:
+                    # Se reintentan en el próximo volcado; el segmento queda para el replay
+                    self._dirty.update(entry["address"] for entry in batch)
+                return
+            for path in self._pending_segments():
+                if int(path.name.split(".")[-2]) <= flushed_segment:
+                    path.unlink(missing_ok=True)
+            # El propio volcado no cuenta como cambio externo (el backend de archivo cambia de mtime)
+            self._backend_version = self.backend.version()
+            self.stats["flushes"] += 1
+            self.stats["flushed_entries"] += len(batch)
+
+    def flush(self) -> None:
+        """Vuelca ya las entradas sucias al store durable."""
+        self._flush_once()
+
+    def _flush_loop(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._closed:
+                break
+            self._flush_once()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._flush_once()
+        with self._lock:
+            self._log.close()
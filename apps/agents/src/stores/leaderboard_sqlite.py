@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Any, Iterable
+
+logger = logging.getLogger(__name__)
+
+# SQLite limita los parámetros por sentencia (999 en builds antiguos)
+_SELECT_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leaderboard (
+    address   TEXT PRIMARY KEY,
+    xp        INTEGER NOT NULL DEFAULT 0,
+    score     REAL    NOT NULL DEFAULT 0,
+    timestamp INTEGER NOT NULL,
+    data      TEXT    NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_leaderboard_rank ON leaderboard (xp DESC, score DESC, address);
+CREATE TABLE IF NOT EXISTS leaderboard_meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+_UPSERT = """
+INSERT INTO leaderboard (address, xp, score, timestamp, data) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(address) DO UPDATE SET
+    xp = excluded.xp, score = excluded.score, timestamp = excluded.timestamp, data = excluded.data
+"""
+
+
+def _score(entry: dict[str, Any]) -> float:
+    try:
+        return float(entry.get("score") or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class SqliteLeaderboardStore:
+    """Leaderboard en SQLite (modo WAL) con la misma interfaz que ``LeaderboardStore``.
+
+    - Guarda a toda la población (sin recorte a ``max_entries``): cualquiera tiene rank.
+    - ``get_rank`` es un conteo sobre el índice ``(xp DESC, score DESC, address)``, sin
+      leer el resto de filas; ``top`` pagina con ``LIMIT/OFFSET`` sobre el mismo índice.
+    - Las escrituras de una llamada (``record_many``/``replace_all`` para lotes) van en una sola
+      transacción (lectura de las filas existentes por lotes + ``executemany`` del upsert).
+    - WAL permite que otros procesos lean mientras el agente escribe.
+    - Si la base está vacía y existe el ``leaderboard.json`` del backend de archivo, lo importa.
+    - ``replace_all`` incrementa la generación en ``leaderboard_meta``; ``version`` la expone
+      para que la caché en memoria de otro proceso detecte reconstrucciones.
+    """
+
+    def __init__(self, db_path: Path, max_entries: int = 100, import_path: Path | None = None) -> None:
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Se conserva por compatibilidad de interfaz; aquí no se recorta la población
+        self.max_entries = max_entries
+        self._lock = Lock()
+        self._conn = sqlite3.connect(str(db_path), timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(_SCHEMA)
+        if import_path is not None:
+            self._import_json(import_path)
+
+    def _import_json(self, path: Path) -> None:
+        if not path.exists() or self._conn.execute("SELECT 1 FROM leaderboard LIMIT 1").fetchone():
+            return
+        try:
+            entries = json.loads(path.read_text("utf-8"))
+        except (OSError, json.JSONDecodeError) as exc:
+            logger.warning("No se pudo importar %s al leaderboard SQLite: %s", path, exc)
+            return
+        entries = [entry for entry in entries if isinstance(entry, dict)]
+        self.record_many(entries)
+        logger.info("📥 Leaderboard importado desde %s (%d entradas)", path, len(entries))
+
+    def _existing(self, addresses: list[str]) -> dict[str, dict[str, Any]]:
+        existing: dict[str, dict[str, Any]] = {}
+        for start in range(0, len(addresses), _SELECT_CHUNK):
+            chunk = addresses[start:start + _SELECT_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            for address, data in self._conn.execute(
+                f"SELECT address, data FROM leaderboard WHERE address IN ({placeholders})", chunk
+            ):
+                existing[address] = json.loads(data)
+        return existing
+
+    def _apply(self, updates: Iterable[tuple[dict[str, Any], int | None]], replace: bool = False) -> None:
+        """Aplica ``(entry, xp_increment)`` en una transacción; ``None`` = merge de ``record``.
+
+        Con ``replace`` la tabla se vacía en la misma transacción (los lectores nunca la ven vacía).
+        Debe llamarse con ``self._lock`` tomado.
+        """
+        updates = list(updates)
+        if not updates and not replace:
+            return
+        now = int(time.time())
+        addresses = list({entry["address"].lower() for entry, _ in updates})
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if replace:
+                conn.execute("DELETE FROM leaderboard")
+                conn.execute(
+                    "INSERT INTO leaderboard_meta (key, value) VALUES ('generation', 1) "
+                    "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+                )
+                current: dict[str, dict[str, Any]] = {}
+            else:
+                current = self._existing(addresses)
+            for entry, increment in updates:
+                address = entry["address"].lower()
+                previous = current.get(address)
+                if increment is None:
+                    merged = dict(previous or {})
+                    merged.update(entry)
+                    # Mantener el XP más alto (on-chain truth vs local accumulation)
+                    merged["xp"] = max((previous or {}).get("xp", 0), entry.get("xp", 0))
+                elif previous is not None:
+                    merged = dict(previous)
+                    merged.update({k: v for k, v in entry.items() if k != "xp"})
+                    merged["xp"] = previous.get("xp", 0) + increment
+                else:
+                    merged = {**entry, "xp": increment}
+                merged["address"] = address
+                merged.setdefault("timestamp", now)
+                current[address] = merged
+            conn.executemany(
+                _UPSERT,
+                [
+                    (address, int(entry.get("xp") or 0), _score(entry), int(entry["timestamp"]), json.dumps(entry))
+                    for address, entry in current.items()
+                ],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def record(self, entry: dict[str, Any]) -> None:
+        """Guarda un ganador; conserva el XP más alto entre el guardado y el nuevo."""
+        entry.setdefault("timestamp", int(time.time()))
+        if not entry.get("address"):
+            return
+        with self._lock:
+            self._apply([(entry, None)])
+
+    def record_many(self, entries: Iterable[dict[str, Any]]) -> None:
+        """Fusiona un lote de entradas en una sola transacción."""
+        updates = [(entry, None) for entry in entries if entry.get("address")]
+        with self._lock:
+            self._apply(updates)
+
+    def replace_all(self, entries: Iterable[dict[str, Any]]) -> None:
+        """Reemplaza el leaderboard completo por ``entries`` de forma atómica."""
+        updates = [(entry, None) for entry in entries if entry.get("address")]
+        with self._lock:
+            self._apply(updates, replace=True)
+
+    def increment_score(self, entry: dict[str, Any], xp_increment: int) -> None:
+        """Incrementa el XP de un usuario existente o crea uno nuevo."""
+        entry.setdefault("timestamp", int(time.time()))
+        if not entry.get("address"):
+            return
+        with self._lock:
+            self._apply([(entry, int(xp_increment))])
+
+    def top(self, limit: int = 10, offset: int = 0) -> list[dict[str, Any]]:
+        """Retorna una página del leaderboard ordenada por XP y score."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM leaderboard ORDER BY xp DESC, score DESC, address LIMIT ? OFFSET ?",
+                (max(0, limit), max(0, offset)),
+            ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def get_rank(self, address: str) -> int | None:
+        """Retorna el ranking (1-based) de una dirección contando solo las filas que la superan."""
+        if not address:
+            return None
+        address = address.lower()
+        with self._lock:
+            row = self._conn.execute("SELECT xp, score FROM leaderboard WHERE address = ?", (address,)).fetchone()
+            if row is None:
+                return None
+            xp, score = row
+            # Tres rangos del índice en lugar de un OR, para que cada conteo sea un range scan
+            (ahead,) = self._conn.execute(
+                """
+                SELECT (SELECT COUNT(*) FROM leaderboard WHERE xp > :xp)
+                     + (SELECT COUNT(*) FROM leaderboard WHERE xp = :xp AND score > :score)
+                     + (SELECT COUNT(*) FROM leaderboard WHERE xp = :xp AND score = :score AND address < :address)
+                """,
+                {"xp": xp, "score": score, "address": address},
+            ).fetchone()
+        return int(ahead) + 1
+
+    def count(self) -> int:
+        with self._lock:
+            (total,) = self._conn.execute("SELECT COUNT(*) FROM leaderboard").fetchone()
+        return int(total)
+
+    def version(self) -> tuple[int, int]:
+        """``(generación, data_version)``: la generación cambia con cada ``replace_all`` y
+        ``data_version`` con cualquier commit de otra conexión (p.ej. un script de sync)."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM leaderboard_meta WHERE key = 'generation'").fetchone()
+            (data_version,) = self._conn.execute("PRAGMA data_version").fetchone()
+        return (int(row[0]) if row else 0, int(data_version))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Any
+
+# Upstash Redis opcional: copia compartida y durable de la metadata entre instancias serverless
+try:
+    from upstash_redis import Redis
+except ImportError:
+    Redis = None
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "nft:metadata:"
+
+# 96 bits de sha256 en hex: cabe (con holgura) en un slot de storage del minter
+KEY_LENGTH = 24
+_KEY_RE = re.compile(rf"^[0-9a-f]{{{KEY_LENGTH}}}$")
+
+
+def canonical_metadata(metadata: dict[str, Any]) -> bytes:
+    """JSON canónico (claves ordenadas, sin espacios): la misma carta siempre produce los mismos bytes."""
+    return json.dumps(metadata, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def metadata_key(payload: bytes) -> str:
+    return hashlib.sha256(payload).hexdigest()[:KEY_LENGTH]
+
+
+def is_metadata_key(key: str) -> bool:
+    return bool(_KEY_RE.match(key))
+
+
+class NftMetadataStore:
+    """Metadata de cartas NFT direccionada por contenido.
+
+    Cada JSON se guarda una sola vez bajo el hash de sus bytes canónicos; el mint solo
+    lleva esa clave (relativa al ``baseURI`` de la campaña) en lugar del JSON completo.
+    Como el contenido de una clave no cambia nunca, el endpoint puede servirla con caché
+    inmutable. Las cartas idénticas comparten archivo.
+
+    La clave queda on-chain para siempre, así que solo se usa si el store es ``durable``:
+    con ``redis`` cada JSON se guarda también ahí (compartido entre instancias y cold starts);
+    sin Redis solo cuenta como durable un directorio local persistente (no el ``/tmp`` de Vercel).
+    """
+
+    def __init__(self, directory: Path, cache_entries: int = 256, redis: Any = None, durable_directory: bool = True) -> None:
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.redis = redis
+        self.durable = redis is not None or durable_directory
+        self.cache_entries = cache_entries
+        self._cache: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = Lock()
+        self.stats = {"stored": 0, "deduplicated": 0}
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def put(self, metadata: dict[str, Any]) -> str:
+        """Persiste ``metadata`` y devuelve su clave de contenido."""
+        payload = canonical_metadata(metadata)
+        key = metadata_key(payload)
+        path = self._path(key)
+        if self.redis is not None:
+            # Antes que el archivo local: sin copia compartida la clave no se puede mintear
+            self.redis.set(f"{REDIS_KEY_PREFIX}{key}", payload.decode("utf-8"), nx=True)
+        with self._lock:
+            if path.exists():
+                if path.read_bytes() != payload:
+                    raise ValueError(f"Colisión de clave de metadata {key}")
+                self.stats["deduplicated"] += 1
+            else:
+                # Escritura atómica: un lector concurrente nunca ve un JSON a medias
+                tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+                tmp_path.write_bytes(payload)
+                os.replace(tmp_path, path)
+                self.stats["stored"] += 1
+            self._remember(key, payload)
+        return key
+
+    def get(self, key: str) -> bytes | None:
+        """Bytes del JSON guardado bajo ``key`` o ``None`` si no existe."""
+        if not is_metadata_key(key):
+            return None
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+            path = self._path(key)
+            payload = None
+            if path.exists():
+                try:
+                    payload = path.read_bytes()
+                except OSError as exc:
+                    logger.error("Error leyendo metadata %s: %s", key, exc)
+        if payload is None and self.redis is not None:
+            # Minteada por otra instancia (o antes de un cold start)
+            try:
+                stored = self.redis.get(f"{REDIS_KEY_PREFIX}{key}")
+            except Exception as exc:  # noqa: BLE001
+                logger.error("Error leyendo metadata %s de Redis: %s", key, exc)
+                return None
+            if stored is not None:
+                payload = stored.encode("utf-8") if isinstance(stored, str) else bytes(stored)
+        if payload is None:
+            return None
+        with self._lock:
+            self._remember(key, payload)
+        return payload
+
+    def _remember(self, key: str, payload: bytes) -> None:
+        self._cache[key] = payload
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_entries:
+            self._cache.popitem(last=False)
+
+
+_store: NftMetadataStore | None = None
+
+
+def get_nft_metadata_store() -> NftMetadataStore:
+    global _store
+    if _store is None:
+        # En Vercel serverless, usar /tmp que es writable (pero efímero y por instancia)
+        serverless = bool(os.getenv("VERCEL"))
+        if serverless:
+            base_path = Path("/tmp/lootbox")
+        else:
+            base_path = Path(__file__).resolve().parents[1] / "data"
+        redis = None
+        upstash_url = os.getenv("UPSTASH_REDIS_REST_URL")
+        upstash_token = os.getenv("UPSTASH_REDIS_REST_TOKEN")
+        if Redis is not None and upstash_url and upstash_token:
+            try:
+                redis = Redis(url=upstash_url, token=upstash_token)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("No se pudo inicializar Upstash Redis para metadata NFT: %s", exc)
+        _store = NftMetadataStore(base_path / "nft_metadata", redis=redis, durable_directory=not serverless)
+        if not _store.durable:
+            logger.warning("⚠️ Metadata NFT sin almacenamiento durable (/tmp sin Redis): se mintean data URIs")
+    return _store
@@ -10,6 +10,11 @@ from typing import Any
 logger = logging.getLogger(__name__)
 
 
+def _scan_channel(entry: dict[str, Any]) -> str | None:
+    # Entradas previas al escaneo multi-canal solo tienen el canal del cast
+    return entry.get("scan_channel") or entry.get("channel_id")
+
+
 class TrendsStore:
     """Almacena las tendencias detectadas recientemente por TrendWatcherAgent."""
 
@@ -43,19 +48,56 @@ class TrendsStore:
             data.insert(0, trend_data)  # Agregar al inicio
             self._write(data[: self.max_entries])
 
-    def recent(self, limit: int = 10) -> list[dict[str, Any]]:
-        """Retorna las tendencias más recientes."""
+    def record_channel(self, channel_id: str, trends: list[dict[str, Any]]) -> None:
+        """Guarda el ranking de un canal escaneado en una sola escritura.
+
+        Cada canal conserva su propio historial (hasta ``max_entries``), deduplicado
+        por ``cast_hash`` dentro del canal; los demás canales no se tocan.
+        """
+        if not trends:
+            return
+        now = int(time.time())
+        new_entries = []
+        new_hashes = set()
+        for trend in trends:
+            entry = {**trend, "scan_channel": channel_id}
+            entry.setdefault("timestamp", now)
+            cast_hash = entry.get("cast_hash")
+            if cast_hash:
+                if cast_hash in new_hashes:
+                    continue
+                new_hashes.add(cast_hash)
+            new_entries.append(entry)
+
+        with self._lock:
+            data = self._read()
+            kept_for_channel = 0
+            others = []
+            for entry in data:
+                if _scan_channel(entry) != channel_id:
+                    others.append(entry)
+                elif entry.get("cast_hash") not in new_hashes and kept_for_channel < self.max_entries - len(new_entries):
+                    kept_for_channel += 1
+                    others.append(entry)
+            self._write(new_entries[: self.max_entries] + others)
+
+    def recent(self, limit: int = 10, channel_id: str | None = None) -> list[dict[str, Any]]:
+        """Retorna las tendencias más recientes (opcionalmente solo las de un canal)."""
         with self._lock:
             data = self._read()
+        if channel_id is not None:
+            data = [entry for entry in data if _scan_channel(entry) == channel_id]
         return data[:limit]
 
-    def active_trends(self, max_age_hours: int = 24) -> list[dict[str, Any]]:
+    def active_trends(self, max_age_hours: int = 24, channel_id: str | None = None) -> list[dict[str, Any]]:
         """Retorna tendencias activas (dentro de las últimas N horas)."""
         current_time = int(time.time())
         max_age_seconds = max_age_hours * 3600
         
         with self._lock:
             data = self._read()
+        if channel_id is not None:
+            data = [entry for entry in data if _scan_channel(entry) == channel_id]
         
         active = [
             trend for trend in data
@@ -0,0 +1,147 @@
+"""Cache en memoria (TTL + LRU) para respuestas de APIs externas como Neynar."""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+CacheKey = tuple[Hashable, ...]
+
+
+@dataclass
+class _Entry:
+    value: Any
+    expires_at: float
+    stale_until: float
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == [] or value == {}
+
+
+class TTLCache:
+    """Cache acotado con expiración por entrada y stale-while-revalidate.
+
+    Las claves son tuplas ``(endpoint, identificador, *args)``; el primer elemento
+    agrupa estadísticas y permite invalidar por endpoint o por identificador.
+    Los valores se devuelven como copia para que los llamadores puedan mutarlos.
+    """
+
+    def __init__(self, max_entries: int = 2048, clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[CacheKey, _Entry] = OrderedDict()
+        self._refreshing: set[CacheKey] = set()
+        self._tasks: set[asyncio.Task] = set()
+        self._stats: dict[str, dict[str, int]] = {}
+
+    def _count(self, endpoint: Hashable, field: str) -> None:
+        bucket = self._stats.setdefault(
+            str(endpoint), {"hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+        )
+        bucket[field] += 1
+
+    def _store(self, key: CacheKey, value: Any, ttl: float, stale_ttl: float, negative_ttl: float) -> None:
+        if _is_empty(value):
+            # Resultados vacíos (no encontrado / error tragado) viven poco y sin ventana stale
+            ttl, stale_ttl = min(ttl, negative_ttl), 0.0
+        if ttl <= 0:
+            return
+        now = self._clock()
+        self._entries[key] = _Entry(value=value, expires_at=now + ttl, stale_until=now + ttl + stale_ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted_key, _ = self._entries.popitem(last=False)
+            self._count(evicted_key[0], "evictions")
+
+    async def get_or_fetch(
+        self,
+        key: CacheKey,
+        fetcher: Callable[[], Awaitable[Any]],
+        ttl: float,
+        stale_ttl: float = 0.0,
+        negative_ttl: float = 30.0,
+    ) -> Any:
+        """Devuelve el valor cacheado o lo obtiene con ``fetcher``.
+
+        Si la entrada expiró pero sigue dentro de ``stale_ttl`` se devuelve el valor
+        viejo y se refresca en segundo plano (stale-while-revalidate).
+        """
+        endpoint = key[0]
+        entry = self._entries.get(key)
+        now = self._clock()
+
+        if entry is not None:
+            if now < entry.expires_at:
+                self._entries.move_to_end(key)
+                self._count(endpoint, "hits")
+                return copy.deepcopy(entry.value)
+            if now < entry.stale_until:
+                self._entries.move_to_end(key)
+                self._count(endpoint, "stale_hits")
+                self._schedule_refresh(key, fetcher, ttl, stale_ttl, negative_ttl)
+                return copy.deepcopy(entry.value)
+            del self._entries[key]
+
+        self._count(endpoint, "misses")
+        value = await fetcher()
+        self._store(key, value, ttl, stale_ttl, negative_ttl)
+        return copy.deepcopy(value)
+
+    def _schedule_refresh(
+        self,
+        key: CacheKey,
+        fetcher: Callable[[], Awaitable[Any]],
+        ttl: float,
+        stale_ttl: float,
+        negative_ttl: float,
+    ) -> None:
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def _refresh() -> None:
+            try:
+                value = await fetcher()
+                current = self._entries.get(key)
+                # No pisar un valor bueno con un vacío (probablemente un error transitorio)
+                if _is_empty(value) and current is not None and not _is_empty(current.value):
+                    return
+                self._store(key, value, ttl, stale_ttl, negative_ttl)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Error refrescando cache para %s: %s", key, exc)
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.create_task(_refresh())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def invalidate(self, endpoint: Hashable, ident: Hashable | None = None) -> int:
+        """Elimina las entradas de un endpoint (o solo las de un identificador concreto)."""
+        keys = [
+            key for key in self._entries
+            if key[0] == endpoint and (ident is None or (len(key) > 1 and key[1] == ident))
+        ]
+        for key in keys:
+            del self._entries[key]
+            self._count(endpoint, "invalidations")
+        return len(keys)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Contadores de hit/miss por endpoint y tamaño actual del cache."""
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "endpoints": {name: dict(counts) for name, counts in self._stats.items()},
+        }
@@ -1,52 +1,301 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import functools
 import json
 import logging
-from typing import Any
+from typing import Any, Callable, Sequence
 from web3 import Web3
-from web3.exceptions import Web3RPCError
+from web3.exceptions import ContractLogicError
+from web3.logs import DISCARD
 from web3.middleware import ExtraDataToPOAMiddleware
 
+from .fees import FeeBumper, FeeBumpPolicy, FeeOracle
+from .multicall import MULTICALL3_ADDRESS, Multicall3
+from .nonce_manager import NonceManager, get_nonce_manager
+from .receipt_tracker import ReceiptTracker, TransactionReplaced
+
 logger = logging.getLogger(__name__)
 
+# Funciones view de LootAccessRegistry que se leen en bloque vía Multicall3
+REGISTRY_READ_ABI = [
+    {
+        "type": "function",
+        "name": "canClaim",
+        "stateMutability": "view",
+        "inputs": [
+            {"name": "campaignId", "type": "bytes32"},
+            {"name": "participant", "type": "address"},
+        ],
+        "outputs": [{"name": "", "type": "bool"}],
+    },
+    {
+        "type": "function",
+        "name": "getXpBalance",
+        "stateMutability": "view",
+        "inputs": [
+            {"name": "campaignId", "type": "bytes32"},
+            {"name": "participant", "type": "address"},
+        ],
+        "outputs": [{"name": "", "type": "uint256"}],
+    },
+    {
+        "type": "function",
+        "name": "getClaimData",
+        "stateMutability": "view",
+        "inputs": [
+            {"name": "campaignId", "type": "bytes32"},
+            {"name": "participant", "type": "address"},
+        ],
+        "outputs": [
+            {
+                "name": "",
+                "type": "tuple",
+                "components": [
+                    {"name": "lastClaimAt", "type": "uint64"},
+                    {"name": "totalClaims", "type": "uint32"},
+                ],
+            }
+        ],
+    },
+]
+REGISTRY_READ_OUTPUTS = {
+    "canClaim": ["bool"],
+    "getXpBalance": ["uint256"],
+    "getClaimData": ["(uint64,uint32)"],
+}
+# Selector del error CampaignNotConfigured()
+CAMPAIGN_NOT_CONFIGURED_SELECTOR = bytes.fromhex("050aad92")
+
+# LootBoxMinter: mintBatch y el evento que emite por cada token
+LOOTBOX_MINTER_ABI = [
+    {
+        "type": "function",
+        "name": "mintBatch",
+        "inputs": [
+            {"name": "campaignId", "type": "bytes32"},
+            {"name": "recipients", "type": "address[]"},
+            {"name": "metadataURIs", "type": "string[]"},
+            {"name": "soulboundFlags", "type": "bool[]"},
+        ],
+        "outputs": [],
+        "stateMutability": "nonpayable",
+    },
+    {
+        "type": "event",
+        "name": "LootMinted",
+        "anonymous": False,
+        "inputs": [
+            {"name": "campaignId", "type": "bytes32", "indexed": True},
+            {"name": "to", "type": "address", "indexed": True},
+            {"name": "tokenId", "type": "uint256", "indexed": False},
+            {"name": "soulbound", "type": "bool", "indexed": False},
+        ],
+    },
+]
+# LootAccessRegistry.grantXpBatch: un XpGranted por entrada
+REGISTRY_GRANT_XP_BATCH_ABI = [
+    {
+        "type": "function",
+        "name": "grantXpBatch",
+        "inputs": [
+            {"name": "campaignId", "type": "bytes32"},
+            {"name": "participants", "type": "address[]"},
+            {"name": "amounts", "type": "uint32[]"},
+        ],
+        "outputs": [],
+        "stateMutability": "nonpayable",
+    }
+]
+GRANT_XP_BATCH_SELECTOR = bytes(Web3.keccak(text="grantXpBatch(bytes32,address[],uint32[])")[:4])
+# LootAccessRegistry.MAX_XP_BATCH_SIZE / MAX_XP_PER_GRANT
+MAX_XP_BATCH_SIZE = 100
+MAX_XP_PER_GRANT = 10000
+# LootBoxMinter.MAX_MINT_BATCH_SIZE
+MAX_MINT_BATCH_SIZE = 50
+# LootBoxMinter.MAX_RELATIVE_URI_LENGTH: claves de metadata que el contrato resuelve contra el baseURI
+MAX_RELATIVE_URI_LENGTH = 31
+MINTER_CAMPAIGNS_ABI = [
+    {
+        "type": "function",
+        "name": "campaigns",
+        "stateMutability": "view",
+        "inputs": [{"name": "campaignId", "type": "bytes32"}],
+        "outputs": [{"name": "baseURI", "type": "string"}, {"name": "active", "type": "bool"}],
+    }
+]
+RELATIVE_URI_SELECTOR = bytes(Web3.keccak(text="MAX_RELATIVE_URI_LENGTH()")[:4])
+# LootBoxVault.MAX_RECIPIENTS_PER_BATCH
+VAULT_MAX_RECIPIENTS_PER_BATCH = 50
+
+VAULT_GET_CAMPAIGN_ABI = [
+    {
+        "type": "function",
+        "name": "getCampaign",
+        "stateMutability": "view",
+        "inputs": [{"name": "campaignId", "type": "bytes32"}],
+        "outputs": [
+            {
+                "name": "",
+                "type": "tuple",
+                "components": [
+                    {"name": "token", "type": "address"},
+                    {"name": "rewardPerRecipient", "type": "uint96"},
+                    {"name": "remainingBudget", "type": "uint256"},
+                    {"name": "active", "type": "bool"},
+                ],
+            }
+        ],
+    }
+]
+
 @dataclass
 class CeloToolbox:
     """Envoltorio para consultar y escribir en contratos de Celo."""
 
     rpc_url: str
     private_key: str | None = None
+    # Permite reutilizar un cliente Web3 ya configurado (p.ej. con sesión HTTP con retries)
+    web3: Any = field(default=None, repr=False)
+    multicall_address: str = MULTICALL3_ADDRESS
+    multicall_chunk_size: int = 200
+    # Vigencia del snapshot de fees (≈ tiempo de bloque de Celo)
+    fee_cache_ttl_seconds: float = 1.0
 
     def __post_init__(self) -> None:
+        if self.web3 is None:
+            self.web3 = self._build_web3()
+        self._multicall: Multicall3 | None = None
+        self._xp_batch_support: dict[str, bool] = {}
+        self._relative_uri_support: dict[str, bool] = {}
+        self.fee_oracle = FeeOracle(self.web3, ttl_seconds=self.fee_cache_ttl_seconds)
+        
+        if self.private_key:
+            self.account = self.web3.eth.account.from_key(self.private_key)
+            self.nonces: NonceManager = get_nonce_manager(self.web3, self.account.address)
+
+    def _build_web3(self) -> Web3:
         if self.rpc_url.startswith("wss://") or self.rpc_url.startswith("ws://"):
             try:
-                self.web3 = Web3(Web3.LegacyWebSocketProvider(self.rpc_url))
+                web3 = Web3(Web3.LegacyWebSocketProvider(self.rpc_url))
             except AttributeError:
                 # Fallback for older web3 versions or if Legacy is not found directly
                 from web3.providers.websocket import WebSocketProvider
-                self.web3 = Web3(WebSocketProvider(self.rpc_url))
+                web3 = Web3(WebSocketProvider(self.rpc_url))
         else:
-            self.web3 = Web3(Web3.HTTPProvider(self.rpc_url))
+            web3 = Web3(Web3.HTTPProvider(self.rpc_url))
             
         # Inyectar middleware para compatibilidad con redes POA como Alfajores/Sepolia
-        self.web3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
-        
-        if self.private_key:
-            self.account = self.web3.eth.account.from_key(self.private_key)
+        web3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
+        return web3
 
     def wait_for_receipt(self, tx_hash: str, timeout: int = 30) -> Any:
         """Espera a que una transacción sea minada."""
         try:
             receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash, timeout=timeout)
+            if self.private_key:
+                self.nonces.mark_confirmed(tx_hash)
             return receipt
         except Exception as e:
             logger.warning(f"Timeout o error esperando receipt para {tx_hash}: {e}")
             return None
 
+    def _send_transaction(self, call: Any, label: str, gas_multiplier: float = 1.2, max_retries: int = 5) -> str:
+        """Firma y envía ``call`` con un nonce del ``NonceManager`` local y retorna apenas se difunde.
+
+        - "nonce too low": otro proceso (o una tx ya minada) ocupó el nonce -> resync y nonce nuevo.
+        - "replacement transaction underpriced": hay una tx desconocida en el mempool con ese
+          nonce; no se reemplaza a ciegas, se re-sincroniza y se toma el siguiente libre.
+        - Fee por debajo del baseFee actual: se invalida el snapshot de fees y se reintenta con
+          más margen. Las transacciones que quedan atascadas las re-emite el ``FeeBumper``.
+        - "already known": la misma tx firmada ya está en el mempool -> se devuelve su hash.
+        - Cualquier otro error (revert en estimateGas, RPC caído) libera el nonce para reutilizarlo.
+        """
+        nonce: int | None = None
+        fee_retries = 0
+        for attempt in range(max_retries):
+            if nonce is None:
+                nonce = self.nonces.allocate()
+            signed_tx = None
+            tx: dict[str, Any] | None = None
+            try:
+                gas_fees = self._get_gas_fees(multiplier=gas_multiplier * (1.5 ** fee_retries))
+                tx = call.build_transaction({
+                    "from": self.account.address,
+                    "nonce": nonce,
+                    **gas_fees,  # Usar maxFeePerGas/maxPriorityFeePerGas o gasPrice
+                })
+                signed_tx = self.web3.eth.account.sign_transaction(tx, self.private_key)
+                tx_hash = self.web3.eth.send_raw_transaction(signed_tx.raw_transaction).hex()
+            except Exception as exc:  # noqa: BLE001
+                error_msg = str(exc).lower()
+                if "already known" in error_msg and signed_tx is not None:
+                    logger.info("Transacción %s ya conocida en mempool, retornando hash existente.", label)
+                    tx_hash = signed_tx.hash.hex()
+                    self.nonces.mark_sent(nonce, tx_hash, tx=tx, block=self.fee_oracle.block_number)
+                    return tx_hash
+                is_nonce_conflict = "nonce too low" in error_msg or "replacement transaction underpriced" in error_msg
+                is_fee_too_low = not is_nonce_conflict and (
+                    "underpriced" in error_msg or "less than block base fee" in error_msg
+                )
+                if (is_nonce_conflict or is_fee_too_low) and attempt < max_retries - 1:
+                    logger.warning(
+                        "Transacción %s rechazada (nonce %d: %s), reintentando (%d/%d)",
+                        label, nonce, exc, attempt + 1, max_retries,
+                    )
+                    if is_nonce_conflict:
+                        self.nonces.resync(abandon=nonce)
+                        nonce = None
+                    else:
+                        self.fee_oracle.invalidate()
+                        fee_retries += 1
+                    continue
+                self.nonces.release(nonce)
+                if is_nonce_conflict or is_fee_too_low:
+                    logger.error("Fallo definitivo enviando %s tras %d intentos: %s", label, attempt + 1, exc)
+                raise
+            self.nonces.mark_sent(nonce, tx_hash, tx=tx, block=self.fee_oracle.block_number)
+            logger.info("%s transaction sent: %s (nonce %d)", label, tx_hash, nonce)
+            return tx_hash
+        raise RuntimeError(f"No se pudo enviar {label} tras {max_retries} intentos")
+
+    def replace_transaction(self, nonce: int, policy: FeeBumpPolicy) -> str | None:
+        """Re-emite la tx en vuelo con ``nonce`` con fees subidos. ``None`` si ya no hace falta o no se pudo."""
+        info = self.nonces.inflight_info(nonce)
+        if not info or not info.get("tx"):
+            return None
+        snapshot = self.fee_oracle.snapshot()
+        fees = policy.bumped_fees(info["tx"], snapshot)
+        if fees is None:
+            logger.warning("⛽ Tx %s (nonce %d) atascada pero el bump superaría el tope de fees", info["tx_hash"], nonce)
+            return None
+
+        tx = {**info["tx"], **fees}
+        signed_tx = self.web3.eth.account.sign_transaction(tx, self.private_key)
+        try:
+            tx_hash = self.web3.eth.send_raw_transaction(signed_tx.raw_transaction).hex()
+        except Exception as exc:  # noqa: BLE001
+            error_msg = str(exc).lower()
+            if "already known" in error_msg:
+                tx_hash = signed_tx.hash.hex()
+            else:
+                # "nonce too low": la original ya se minó; el resto se reintenta en la próxima ronda
+                logger.info("Reemplazo de nonce %d no enviado: %s", nonce, exc)
+                return None
+        self.nonces.mark_sent(nonce, tx_hash, tx=tx, block=snapshot.block_number)
+        logger.warning(
+            "⛽ Tx atascada re-emitida: nonce %d, %s -> %s (bump %d, fees %s)",
+            nonce, info["tx_hash"], tx_hash, info["bumps"] + 1, fees,
+        )
+        return tx_hash
+
     def _get_gas_fees(self, multiplier: float = 1.2) -> dict:
         """
         Calcula los gas fees usando EIP-1559 (maxFeePerGas y maxPriorityFeePerGas).
         Asegura que maxFeePerGas sea mayor que el baseFee del bloque con un margen de seguridad.
+        El baseFee sale de ``FeeOracle`` (cacheado por bloque) en vez de un ``get_block`` por envío.
         
         Args:
             multiplier: Multiplicador de seguridad para el baseFee (default 1.2 = 20% más)
@@ -55,31 +304,10 @@ class CeloToolbox:
             dict con 'maxFeePerGas' y 'maxPriorityFeePerGas', o 'gasPrice' si EIP-1559 no está disponible
         """
         try:
-            # Obtener el bloque más reciente
-            latest_block = self.web3.eth.get_block('latest')
-            base_fee = latest_block.get('baseFeePerGas')
-            
-            if base_fee is None:
-                # Si no hay baseFee, usar gasPrice legacy
-                gas_price = self.web3.eth.gas_price
-                logger.info(f"Usando gasPrice legacy: {gas_price}")
-                return {"gasPrice": gas_price}
-            
-            # Calcular maxPriorityFeePerGas (tip para el minero)
-            # Usar 2 gwei como tip mínimo, o 10% del baseFee, lo que sea mayor
-            priority_fee = max(2_000_000_000, int(base_fee * 0.1))  # 2 gwei o 10% del baseFee
-            
-            # Calcular maxFeePerGas con margen de seguridad
-            # maxFeePerGas debe ser >= baseFee + maxPriorityFeePerGas
-            # Agregamos un multiplicador de seguridad para evitar errores
-            max_fee_per_gas = int(base_fee * multiplier) + priority_fee
-            
-            logger.info(f"Gas fees EIP-1559: baseFee={base_fee}, priorityFee={priority_fee}, maxFee={max_fee_per_gas}")
-            
-            return {
-                "maxFeePerGas": max_fee_per_gas,
-                "maxPriorityFeePerGas": priority_fee
-            }
+            # Snapshot del último bloque compartido por todos los envíos de ese bloque
+            gas_fees = self.fee_oracle.fees(multiplier=multiplier)
+            logger.debug("Gas fees: %s", gas_fees)
+            return gas_fees
         except Exception as e:
             # Fallback a gasPrice legacy si hay error
             logger.warning(f"Error calculando gas fees EIP-1559: {e}. Usando gasPrice legacy.")
@@ -135,6 +363,97 @@ class CeloToolbox:
                 )
             raise
 
+    @property
+    def multicall(self) -> Multicall3:
+        if self._multicall is None:
+            self._multicall = Multicall3(self.web3, self.multicall_address, self.multicall_chunk_size)
+        return self._multicall
+
+    def batch_registry_reads(
+        self, registry_address: str, reads: Sequence[tuple[str, str, str]]
+    ) -> list[tuple[bool, Any]]:
+        """Ejecuta lecturas ``(función, campaign_id, participante)`` del registry vía Multicall3.
+
+        Soporta ``canClaim``, ``getXpBalance`` y ``getClaimData``. Devuelve, en el mismo
+        orden, ``(True, valor)`` o ``(False, revert_data)``: un fallo no afecta al resto.
+        """
+        if not reads:
+            return []
+        registry = self.checksum(registry_address)
+        contract = self.web3.eth.contract(address=registry, abi=REGISTRY_READ_ABI)
+        campaign_cache: dict[str, bytes] = {}
+        calls = []
+        for fn_name, campaign_id, participant in reads:
+            if fn_name not in REGISTRY_READ_OUTPUTS:
+                raise ValueError(f"Lectura no soportada en batch: {fn_name}")
+            campaign_bytes = campaign_cache.get(campaign_id)
+            if campaign_bytes is None:
+                campaign_bytes = campaign_cache[campaign_id] = self._campaign_bytes(campaign_id)
+            calldata = contract.encode_abi(fn_name, args=[campaign_bytes, self.checksum(participant)])
+            calls.append((registry, Web3.to_bytes(hexstr=calldata)))
+
+        results = []
+        for (fn_name, _, _), result in zip(reads, self.multicall.aggregate3(calls)):
+            if not result.success:
+                results.append((False, result.return_data))
+                continue
+            try:
+                results.append((True, self.multicall.decode(REGISTRY_READ_OUTPUTS[fn_name], result)))
+            except Exception as exc:  # noqa: BLE001
+                # Respuesta vacía: el registry no está desplegado en esa dirección
+                logger.warning("No se pudo decodificar %s del registry: %s", fn_name, exc)
+                results.append((False, result.return_data))
+        return results
+
+    def can_claim_many(
+        self, registry_address: str, campaign_id: str, participants: Sequence[str]
+    ) -> dict[str, bool | None]:
+        """``canClaim`` en bloque. ``None`` indica que la lectura falló para ese participante."""
+        addresses = [self.checksum(p) for p in participants]
+        results = self.batch_registry_reads(registry_address, [("canClaim", campaign_id, a) for a in addresses])
+        claims: dict[str, bool | None] = {}
+        for address, (ok, value) in zip(addresses, results):
+            if ok:
+                claims[address] = bool(value)
+                continue
+            claims[address] = None
+            if value[:4] == CAMPAIGN_NOT_CONFIGURED_SELECTOR:
+                logger.warning(
+                    "LootAccessRegistry: campaña %s no configurada (canClaim). Registry: %s, Participant: %s",
+                    campaign_id, registry_address, address,
+                )
+            else:
+                logger.warning("Error consultando canClaim para %s (registry %s)", address, registry_address)
+        return claims
+
+    def get_xp_balances(
+        self, registry_address: str, campaign_id: str, participants: Sequence[str]
+    ) -> dict[str, int]:
+        """``getXpBalance`` en bloque. Igual que ``get_xp_balance``, una lectura fallida vale 0."""
+        addresses = [self.checksum(p) for p in participants]
+        results = self.batch_registry_reads(registry_address, [("getXpBalance", campaign_id, a) for a in addresses])
+        balances: dict[str, int] = {}
+        for address, (ok, value) in zip(addresses, results):
+            if not ok:
+                logger.warning("Error leyendo XP balance para %s", address)
+            balances[address] = int(value) if ok else 0
+        return balances
+
+    def get_claim_data_many(
+        self, registry_address: str, campaign_id: str, participants: Sequence[str]
+    ) -> dict[str, dict[str, int] | None]:
+        """``getClaimData`` en bloque (``last_claim_at``, ``total_claims``); ``None`` si falló."""
+        addresses = [self.checksum(p) for p in participants]
+        results = self.batch_registry_reads(registry_address, [("getClaimData", campaign_id, a) for a in addresses])
+        claim_data: dict[str, dict[str, int] | None] = {}
+        for address, (ok, value) in zip(addresses, results):
+            if ok:
+                last_claim_at, total_claims = value
+                claim_data[address] = {"last_claim_at": int(last_claim_at), "total_claims": int(total_claims)}
+            else:
+                claim_data[address] = None
+        return claim_data
+
     def grant_xp(self, registry_address: str, campaign_id: str, participant: str, amount: int) -> str:
         """Invoca grantXp en el LootAccessRegistry."""
         if not self.private_key:
@@ -143,8 +462,8 @@ class CeloToolbox:
         # Validaciones de seguridad
         if amount <= 0:
             raise ValueError("Amount debe ser mayor a 0")
-        if amount > 10000:  # Límite máximo del contrato
-            raise ValueError(f"Amount ({amount}) excede el límite máximo (10000)")
+        if amount > MAX_XP_PER_GRANT:  # Límite máximo del contrato
+            raise ValueError(f"Amount ({amount}) excede el límite máximo ({MAX_XP_PER_GRANT})")
         
         # Validar formato de dirección
         if not participant or not participant.startswith("0x") or len(participant) != 42:
@@ -167,76 +486,51 @@ class CeloToolbox:
         campaign_bytes = self._campaign_bytes(campaign_id)
         checksum_recipient = self.checksum(participant)
 
-        # Reintentos robustos para manejar race conditions de nonce
-        # Reintentos robustos para manejar race conditions de nonce
-        max_retries = 5
-        manual_nonce = None
-        
-        for attempt in range(max_retries):
+        return self._send_transaction(
+            contract.functions.grantXp(campaign_bytes, checksum_recipient, amount), "XP grant"
+        )
+
+    def grant_xp_batch(
+        self, registry_address: str, campaign_id: str, participants: Sequence[str], amounts: Sequence[int]
+    ) -> str:
+        """Invoca grantXpBatch: varios grants de XP en una sola transacción."""
+        if not self.private_key:
+            raise ValueError("Private key requerida para transacciones")
+        if not participants:
+            raise ValueError("Lista de participantes vacía")
+        if len(participants) > MAX_XP_BATCH_SIZE:
+            raise ValueError(f"Batch de {len(participants)} grants excede MAX_XP_BATCH_SIZE ({MAX_XP_BATCH_SIZE})")
+        if len(amounts) != len(participants):
+            raise ValueError("amounts debe tener un valor por participante")
+        for participant, amount in zip(participants, amounts):
+            if amount <= 0 or amount > MAX_XP_PER_GRANT:
+                raise ValueError(f"Amount ({amount}) fuera de rango para {participant}")
+            if not participant or not participant.startswith("0x") or len(participant) != 42:
+                raise ValueError(f"Dirección de participante inválida: {participant}")
+
+        contract = self.web3.eth.contract(address=self.checksum(registry_address), abi=REGISTRY_GRANT_XP_BATCH_ABI)
+        return self._send_transaction(
+            contract.functions.grantXpBatch(
+                self._campaign_bytes(campaign_id),
+                [self.checksum(participant) for participant in participants],
+                [int(amount) for amount in amounts],
+            ),
+            f"XP grant x{len(participants)}",
+        )
+
+    def supports_xp_batch(self, registry_address: str) -> bool:
+        """True si el registry desplegado expone ``grantXpBatch`` (los despliegues previos no lo tienen)."""
+        registry = self.checksum(registry_address)
+        cached = self._xp_batch_support.get(registry)
+        if cached is None:
             try:
-                # Usar nonce "pending" para incluir transacciones pendientes
-                # Si tenemos un manual_nonce (por error previo), usarlo. Si no, consultar red.
-                if manual_nonce is not None:
-                    nonce = manual_nonce
-                else:
-                    nonce = self.web3.eth.get_transaction_count(self.account.address, "pending")
-                
-                # Calcular gas fees con EIP-1559
-                # Aumentar multiplicador en reintentos
-                gas_multiplier = 1.2 * (1.5 ** attempt) if attempt > 0 else 1.2
-                gas_fees = self._get_gas_fees(multiplier=gas_multiplier)
-                if attempt > 0:
-                    logger.info("Reintento XP %d/%d con gas fees aumentados", attempt + 1, max_retries)
-
-                tx = contract.functions.grantXp(campaign_bytes, checksum_recipient, amount).build_transaction(
-                    {
-                        "from": self.account.address,
-                        "nonce": nonce,
-                        **gas_fees,  # Usar maxFeePerGas/maxPriorityFeePerGas o gasPrice
-                    }
-                )
-                signed_tx = self.web3.eth.account.sign_transaction(tx, self.private_key)
-                tx_hash = self.web3.eth.send_raw_transaction(signed_tx.raw_transaction)
-                logger.info("XP grant transaction sent: %s", tx_hash.hex())
-                return tx_hash.hex()
-            
-            except (ValueError, Web3RPCError) as e:
-                error_msg = str(e)
-                
-                # Si la transacción ya es conocida, significa que ya está en el mempool.
-                # Podemos asumir que se envió correctamente y devolver el hash.
-                if "already known" in error_msg.lower():
-                    logger.info("Transacción ya conocida en mempool, retornando hash existente.")
-                    return signed_tx.hash.hex()
-
-                is_retryable = (
-                    "replacement transaction underpriced" in error_msg.lower() or 
-                    "nonce too low" in error_msg.lower()
-                )
-                
-                if is_retryable and attempt < max_retries - 1:
-                    wait_time = 2 * (attempt + 1)
-                    logger.warning("Transacción XP rechazada (nonce/gas), reintentando en %ds... (%s)", wait_time, error_msg)
-                    import time
-                    time.sleep(wait_time)
-                    
-                    # CRITICAL FIX: Si dice "replacement transaction underpriced", significa que hay una tx pendiente
-                    # con el mismo nonce. Debemos reemplazarla con mayor gas, NO cambiar el nonce.
-                    if "replacement transaction underpriced" in error_msg.lower():
-                         logger.info("Detectado conflicto de nonce (replacement underpriced). Reintentando con mismo nonce y mayor gas.")
-                         manual_nonce = nonce # Mantener mismo nonce
-                         # Forzar un bump de gas mayor para el siguiente intento
-                         # El loop ya hace bump, pero aseguramos que sea suficiente
-                    else:
-                        # Para otros errores, limpiar manual_nonce para volver a consultar a la red
-                        manual_nonce = None
-                    
-                    continue
-                
-                # Si no es retryable o se acabaron los intentos, relanzar
-                logger.error("Fallo definitivo enviando XP tras %d intentos: %s", attempt + 1, error_msg)
-                raise
-    
+                cached = GRANT_XP_BATCH_SELECTOR in bytes(self.web3.eth.get_code(registry))
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("No se pudo leer el bytecode del registry %s: %s", registry, exc)
+                return False
+            self._xp_batch_support[registry] = cached
+        return cached
+
     def get_xp_balance(self, registry_address: str, campaign_id: str, participant: str) -> int:
         """Lee el balance de XP de un participante desde el contrato LootAccessRegistry."""
         abi = [
@@ -271,126 +565,119 @@ class CeloToolbox:
         metadata_uri: str | None = None,
     ) -> str:
         """Mintea un NFT usando el contrato LootBoxMinter."""
+        return self.mint_nft_batch(
+            minter_address=minter_address,
+            campaign_id=campaign_id,
+            recipients=[recipient],
+            metadata_uris=[metadata_uri or "ipfs://QmExample"],
+        )
+
+    def mint_nft_batch(
+        self,
+        minter_address: str,
+        campaign_id: str,
+        recipients: Sequence[str],
+        metadata_uris: Sequence[str],
+        soulbound_flags: Sequence[bool] | None = None,
+    ) -> str:
+        """Mintea un NFT por recipient en una sola transacción ``mintBatch``."""
         if not self.private_key:
             raise ValueError("Private key requerida para transacciones")
+        if not recipients:
+            raise ValueError("Lista de recipients vacía")
+        if len(recipients) > MAX_MINT_BATCH_SIZE:
+            raise ValueError(f"Batch de {len(recipients)} recipients excede MAX_MINT_BATCH_SIZE ({MAX_MINT_BATCH_SIZE})")
+        if len(metadata_uris) != len(recipients):
+            raise ValueError("metadata_uris debe tener un URI por recipient")
 
-        # ABI mínima para la función mintBatch
-        # function mintBatch(bytes32 campaignId, address[] calldata recipients, string[] calldata metadataURIs, bool[] calldata soulboundFlags)
-        abi = [
-            {
-                "type": "function",
-                "name": "mintBatch",
-                "inputs": [
-                    {"name": "campaignId", "type": "bytes32"},
-                    {"name": "recipients", "type": "address[]"},
-                    {"name": "metadataURIs", "type": "string[]"},
-                    {"name": "soulboundFlags", "type": "bool[]"}
-                ],
-                "outputs": [],
-                "stateMutability": "nonpayable"
-            }
-        ]
-
-        contract = self.web3.eth.contract(address=self.checksum(minter_address), abi=abi)
+        contract = self.web3.eth.contract(address=self.checksum(minter_address), abi=LOOTBOX_MINTER_ABI)
         campaign_bytes = self._campaign_bytes(campaign_id)
         
-        # Asegurar checksum de la dirección
+        # Asegurar checksum de las direcciones
         try:
-            checksum_recipient = self.checksum(recipient)
+            checksum_recipients = [self.checksum(recipient) for recipient in recipients]
         except ValueError:
              # Si falla la validación, lanzamos error claro
-             raise ValueError(f"Dirección inválida: {recipient}")
+             raise ValueError(f"Dirección inválida en recipients: {list(recipients)}")
+        # El contrato revierte con InvalidCampaign() si una dirección se repite en el batch
+        if len(set(checksum_recipients)) != len(checksum_recipients):
+            raise ValueError("Recipients duplicados en el batch de mint")
 
-        # Construir transacción
-        metadata_uri = metadata_uri or "ipfs://QmExample"
-        
-        # Reintentos robustos para manejar race conditions de nonce
-        max_retries = 5
-        manual_nonce = None
-        
-        for attempt in range(max_retries):
-            try:
-                # Usar nonce "pending" para incluir transacciones pendientes
-                if manual_nonce is not None:
-                    nonce = manual_nonce
-                else:
-                    nonce = self.web3.eth.get_transaction_count(self.account.address, "pending")
-                
-                # Calcular gas fees con EIP-1559
-                # Aumentar multiplicador en reintentos
-                gas_multiplier = 1.2 * (1.5 ** attempt) if attempt > 0 else 1.2
-                gas_fees = self._get_gas_fees(multiplier=gas_multiplier)
-                if attempt > 0:
-                    logger.info("Reintento NFT %d/%d con gas fees aumentados", attempt + 1, max_retries)
-
-                tx = contract.functions.mintBatch(
-                    campaign_bytes,
-                    [checksum_recipient],
-                    [metadata_uri],
-                    [False] # Transferible
-                ).build_transaction({
-                    "from": self.account.address,
-                    "nonce": nonce,
-                    **gas_fees,  # Usar maxFeePerGas/maxPriorityFeePerGas o gasPrice
-                })
+        soulbound = list(soulbound_flags) if soulbound_flags is not None else [False] * len(recipients)  # Transferible
+        try:
+            return self._send_transaction(
+                contract.functions.mintBatch(campaign_bytes, checksum_recipients, list(metadata_uris), soulbound),
+                f"NFT mint x{len(recipients)}",
+            )
+        except Exception as exc:  # noqa: BLE001
+            error_str = str(exc)
+            logger.error(f"FULL ERROR MINTING NFT: {error_str}")
+            # Decodificar códigos de error comunes
+            if "0x477a3e50" in error_str:
+                logger.error(
+                    "LootBoxMinter: Error al mintear NFT. "
+                    "Posibles causas: contrato no desplegado, dirección incorrecta, falta de permisos (minter role), "
+                    "o campaña no configurada. Minter: %s, Campaign: %s, Recipients: %s",
+                    minter_address, campaign_id, list(recipients)
+                )
+            elif "0x050aad92" in error_str:
+                logger.error(
+                    "LootBoxMinter: Error de acceso o permisos. "
+                    "Verifica que la cuenta tenga el rol 'minter' en el contrato. "
+                    "Minter: %s, Campaign: %s",
+                    minter_address, campaign_id
+                )
+            raise
 
-                # Firmar y enviar
-                signed_tx = self.web3.eth.account.sign_transaction(tx, self.private_key)
-                tx_hash = self.web3.eth.send_raw_transaction(signed_tx.raw_transaction)
-                
-                logger.info(f"NFT mint transaction sent: {tx_hash.hex()}")
-                return tx_hash.hex()
-            
-            except Exception as exc:  # noqa: BLE001
-                error_str = str(exc)
-                
-                # Handle "already known" (transaction already in mempool)
-                if "already known" in error_str.lower():
-                    logger.info("Transacción NFT ya conocida en mempool, retornando hash existente.")
-                    # En este punto signed_tx ya está definido si falló en send_raw_transaction
-                    if 'signed_tx' in locals():
-                        return signed_tx.hash.hex()
-                    else:
-                        # Si falló antes de firmar (raro para already known), no podemos recuperar el hash
-                        raise
+    def minter_relative_base_uri(self, minter_address: str, campaign_id: str) -> str | None:
+        """``baseURI`` de la campaña si el minter resuelve claves relativas contra él; si no, ``None``.
 
-                is_retryable = (
-                    "replacement transaction underpriced" in error_str.lower() or 
-                    "nonce too low" in error_str.lower()
-                )
-                
-                if is_retryable and attempt < max_retries - 1:
-                    wait_time = 2 * (attempt + 1)
-                    logger.warning("Transacción NFT rechazada (nonce/gas), reintentando en %ds... (%s)", wait_time, error_str)
-                    import time
-                    time.sleep(wait_time)
-                    
-                    if "replacement transaction underpriced" in error_str.lower():
-                         logger.info("Detectado conflicto de nonce en NFT. Reintentando con mismo nonce y mayor gas.")
-                         manual_nonce = nonce # Mantener mismo nonce
-                    else:
-                        manual_nonce = None
-                    
-                    continue
-                    
-                logger.error(f"FULL ERROR MINTING NFT: {error_str}")
-                # Decodificar códigos de error comunes
-                if "0x477a3e50" in error_str:
-                    logger.error(
-                        "LootBoxMinter: Error al mintear NFT. "
-                        "Posibles causas: contrato no desplegado, dirección incorrecta, falta de permisos (minter role), "
-                        "o campaña no configurada. Minter: %s, Campaign: %s, Recipient: %s",
-                        minter_address, campaign_id, recipient
-                    )
-                elif "0x050aad92" in error_str:
-                    logger.error(
-                        "LootBoxMinter: Error de acceso o permisos. "
-                        "Verifica que la cuenta tenga el rol 'minter' en el contrato. "
-                        "Minter: %s, Campaign: %s",
-                        minter_address, campaign_id
-                    )
-                raise
+        Los despliegues anteriores guardan la URI tal cual, así que una clave relativa quedaría rota.
+        """
+        minter = self.checksum(minter_address)
+        try:
+            supported = self._relative_uri_support.get(minter)
+            if supported is None:
+                supported = RELATIVE_URI_SELECTOR in bytes(self.web3.eth.get_code(minter))
+                self._relative_uri_support[minter] = supported
+            if not supported:
+                return None
+            contract = self.web3.eth.contract(address=minter, abi=MINTER_CAMPAIGNS_ABI)
+            base_uri, active = contract.functions.campaigns(self._campaign_bytes(campaign_id)).call()
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("No se pudo leer la campaña %s del minter %s: %s", campaign_id, minter, exc)
+            return None
+        return base_uri if base_uri and active else None
+
+    def loot_minted_tokens(self, minter_address: str, receipt: Any) -> dict[str, int]:
+        """``{recipient: tokenId}`` a partir de los eventos ``LootMinted`` de un receipt de ``mintBatch``."""
+        contract = self.web3.eth.contract(address=self.checksum(minter_address), abi=LOOTBOX_MINTER_ABI)
+        minter = contract.address.lower()
+        tokens: dict[str, int] = {}
+        for event in contract.events.LootMinted().process_receipt(receipt, errors=DISCARD):
+            if str(event["address"]).lower() == minter:
+                tokens[self.checksum(event["args"]["to"])] = int(event["args"]["tokenId"])
+        return tokens
 
+    def get_vault_campaign(self, vault_address: str, campaign_id: str) -> dict[str, Any] | None:
+        """Token, recompensa por recipient y presupuesto restante de la campaña en LootBoxVault.
+
+        ``None`` si la campaña no está inicializada (el vault revierte con InvalidCampaign).
+        """
+        contract = self.web3.eth.contract(address=self.checksum(vault_address), abi=VAULT_GET_CAMPAIGN_ABI)
+        try:
+            token, reward_per_recipient, remaining_budget, active = contract.functions.getCampaign(
+                self._campaign_bytes(campaign_id)
+            ).call()
+        except ContractLogicError as exc:
+            logger.info("Campaña %s no inicializada en LootBoxVault: %s", campaign_id, exc)
+            return None
+        return {
+            "token": token,
+            "reward_per_recipient": int(reward_per_recipient),
+            "remaining_budget": int(remaining_budget),
+            "active": bool(active),
+        }
 
     def distribute_cusd(
         self,
@@ -423,23 +710,13 @@ class CeloToolbox:
         campaign_bytes = self._campaign_bytes(campaign_id)
         checksum_recipients = [self.checksum(r) for r in recipients]
 
-        # Usar nonce "pending" para incluir transacciones pendientes
-        nonce = self.web3.eth.get_transaction_count(self.account.address, "pending")
-        gas_fees = self._get_gas_fees(multiplier=1.2)
-        tx = contract.functions.distributeERC20(campaign_bytes, checksum_recipients).build_transaction(
-            {
-                "from": self.account.address,
-                "nonce": nonce,
-                **gas_fees,  # Usar maxFeePerGas/maxPriorityFeePerGas o gasPrice
-            }
+        return self._send_transaction(
+            contract.functions.distributeERC20(campaign_bytes, checksum_recipients), "cUSD distribution"
         )
 
-        signed_tx = self.web3.eth.account.sign_transaction(tx, self.private_key)
-        tx_hash = self.web3.eth.send_raw_transaction(signed_tx.raw_transaction)
-        logger.info("cUSD distribution transaction sent: %s", tx_hash.hex())
-        return tx_hash.hex()
-
-    def configure_campaign_registry(self, registry_address: str, campaign_id: str, cooldown_seconds: int = 86400) -> str:
+    def configure_campaign_registry(
+        self, registry_address: str, campaign_id: str, cooldown_seconds: int = 86400, wait: bool = True
+    ) -> str:
         """Configura una campaña en LootAccessRegistry si no existe."""
         if not self.private_key:
             raise ValueError("Private key requerida para transacciones")
@@ -460,53 +737,19 @@ class CeloToolbox:
         contract = self.web3.eth.contract(address=self.checksum(registry_address), abi=abi)
         campaign_bytes = self._campaign_bytes(campaign_id)
         
-        # Obtener nonce con manejo de errores
-        # Usar nonce "pending" para incluir transacciones pendientes
-        nonce = self.web3.eth.get_transaction_count(self.account.address, "pending")
-        
-        # Si hay transacciones pendientes, aumentar multiplicador de gas
-        confirmed_nonce = self.web3.eth.get_transaction_count(self.account.address)
-        gas_multiplier = 1.4 if nonce > confirmed_nonce else 1.2
-        if nonce > confirmed_nonce:
-            logger.warning(
-                "Transacciones pendientes detectadas (nonce: %s -> %s), usando gas fees aumentados",
-                confirmed_nonce, nonce
-            )
-        
-        try:
-            gas_fees = self._get_gas_fees(multiplier=gas_multiplier)
-            tx = contract.functions.configureCampaign(campaign_bytes, cooldown_seconds).build_transaction({
-                "from": self.account.address,
-                "nonce": nonce,
-                **gas_fees,
-            })
-            
-            signed_tx = self.web3.eth.account.sign_transaction(tx, self.private_key)
-            tx_hash = self.web3.eth.send_raw_transaction(signed_tx.raw_transaction)
-            logger.info("Campaign configured in Registry: %s (tx: %s)", campaign_id, tx_hash.hex())
-            # Esperar confirmación para evitar race conditions
+        tx_hash = self._send_transaction(
+            contract.functions.configureCampaign(campaign_bytes, cooldown_seconds), "Registry configureCampaign"
+        )
+        logger.info("Campaign configured in Registry: %s (tx: %s)", campaign_id, tx_hash)
+        # Esperar confirmación: las grants de la campaña dependen de esta configuración
+        if wait:
             self.web3.eth.wait_for_transaction_receipt(tx_hash, timeout=60)
-            return tx_hash.hex()
-        except ValueError as e:
-            error_msg = str(e)
-            if "replacement transaction underpriced" in error_msg.lower() or "max fee per gas" in error_msg.lower():
-                # Reintentar con gas fees aún más altos
-                logger.warning("Transacción rechazada por gas fees bajos, reintentando con fees más altos...")
-                gas_fees = self._get_gas_fees(multiplier=1.8)
-                tx = contract.functions.configureCampaign(campaign_bytes, cooldown_seconds).build_transaction({
-                    "from": self.account.address,
-                    "nonce": nonce,
-                    **gas_fees,
-                })
-                signed_tx = self.web3.eth.account.sign_transaction(tx, self.private_key)
-                tx_hash = self.web3.eth.send_raw_transaction(signed_tx.raw_transaction)
-                logger.info("Campaign configured in Registry (retry): %s (tx: %s)", campaign_id, tx_hash.hex())
-                # Esperar confirmación
-                self.web3.eth.wait_for_transaction_receipt(tx_hash, timeout=60)
-                return tx_hash.hex()
-            raise
+            self.nonces.mark_confirmed(tx_hash)
+        return tx_hash
 
-    def configure_campaign_minter(self, minter_address: str, campaign_id: str, base_uri: str = "ipfs://QmExample/") -> str:
+    def configure_campaign_minter(
+        self, minter_address: str, campaign_id: str, base_uri: str = "ipfs://QmExample/", wait: bool = True
+    ) -> str:
         """Configura una campaña en LootBoxMinter si no existe."""
         if not self.private_key:
             raise ValueError("Private key requerida para transacciones")
@@ -527,53 +770,15 @@ class CeloToolbox:
         contract = self.web3.eth.contract(address=self.checksum(minter_address), abi=abi)
         campaign_bytes = self._campaign_bytes(campaign_id)
         
-        # Obtener nonce con manejo de errores
-        # Usar nonce "pending" para incluir transacciones pendientes
-        nonce = self.web3.eth.get_transaction_count(self.account.address, "pending")
-        
-        # Si hay transacciones pendientes, aumentar multiplicador de gas
-        confirmed_nonce = self.web3.eth.get_transaction_count(self.account.address)
-        gas_multiplier = 1.4 if nonce > confirmed_nonce else 1.2
-        if nonce > confirmed_nonce:
-            logger.warning(
-                "Transacciones pendientes detectadas (nonce: %s -> %s), usando gas fees aumentados",
-                confirmed_nonce, nonce
-            )
-        
-        try:
-            gas_fees = self._get_gas_fees(multiplier=gas_multiplier)
-            tx = contract.functions.configureCampaign(campaign_bytes, base_uri).build_transaction({
-                "from": self.account.address,
-                "nonce": nonce,
-                **gas_fees,
-            })
-            
-            signed_tx = self.web3.eth.account.sign_transaction(tx, self.private_key)
-            tx_hash = self.web3.eth.send_raw_transaction(signed_tx.raw_transaction)
-            logger.info("Campaign configured in Minter: %s (tx: %s)", campaign_id, tx_hash.hex())
-            # Esperar confirmación para evitar race conditions
+        tx_hash = self._send_transaction(
+            contract.functions.configureCampaign(campaign_bytes, base_uri), "Minter configureCampaign"
+        )
+        logger.info("Campaign configured in Minter: %s (tx: %s)", campaign_id, tx_hash)
+        # Esperar confirmación: los mints de la campaña dependen de esta configuración
+        if wait:
             self.web3.eth.wait_for_transaction_receipt(tx_hash, timeout=60)
-            return tx_hash.hex()
-        except ValueError as e:
-            error_msg = str(e)
-            if "replacement transaction underpriced" in error_msg.lower() or "nonce too low" in error_msg.lower() or "max fee per gas" in error_msg.lower():
-                # Reintentar con gas fees aún más altos y actualizar nonce
-                logger.warning("Transacción rechazada (gas fees bajos o nonce), reintentando...")
-                # Actualizar nonce por si acaso
-                nonce = self.web3.eth.get_transaction_count(self.account.address, "pending")
-                gas_fees = self._get_gas_fees(multiplier=1.8)
-                tx = contract.functions.configureCampaign(campaign_bytes, base_uri).build_transaction({
-                    "from": self.account.address,
-                    "nonce": nonce,
-                    **gas_fees,
-                })
-                signed_tx = self.web3.eth.account.sign_transaction(tx, self.private_key)
-                tx_hash = self.web3.eth.send_raw_transaction(signed_tx.raw_transaction)
-                logger.info("Campaign configured in Minter (retry): %s (tx: %s)", campaign_id, tx_hash.hex())
-                # Esperar confirmación
-                self.web3.eth.wait_for_transaction_receipt(tx_hash, timeout=60)
-                return tx_hash.hex()
-            raise
+            self.nonces.mark_confirmed(tx_hash)
+        return tx_hash
 
     def initialize_campaign_vault(
         self,
@@ -581,6 +786,7 @@ class CeloToolbox:
         campaign_id: str,
         token_address: str,
         reward_per_recipient: int,  # En wei (ej: 0.15 * 1e18 para 0.15 cUSD)
+        wait: bool = True,
     ) -> str:
         """Inicializa una campaña en LootBoxVault si no existe."""
         if not self.private_key:
@@ -617,40 +823,12 @@ class CeloToolbox:
         campaign_bytes = self._campaign_bytes(campaign_id)
         token_checksum = self.checksum(token_address)
         
-        # Usar nonce "pending" para incluir transacciones pendientes
-        nonce = self.web3.eth.get_transaction_count(self.account.address, "pending")
-        
-        # Si hay transacciones pendientes, aumentar multiplicador de gas
-        confirmed_nonce = self.web3.eth.get_transaction_count(self.account.address)
-        gas_multiplier = 1.4 if nonce > confirmed_nonce else 1.2
-        if nonce > confirmed_nonce:
-            logger.warning(
-                "Transacciones pendientes detectadas (nonce: %s -> %s), usando gas fees aumentados",
-                confirmed_nonce, nonce
-            )
-        
         try:
-            gas_fees = self._get_gas_fees(multiplier=gas_multiplier)
-            tx = contract.functions.initializeCampaign(
-                campaign_bytes,
-                token_checksum,
-                reward_per_recipient
-            ).build_transaction({
-                "from": self.account.address,
-                "nonce": nonce,
-                **gas_fees,
-            })
-            
-            signed_tx = self.web3.eth.account.sign_transaction(tx, self.private_key)
-            tx_hash = self.web3.eth.send_raw_transaction(signed_tx.raw_transaction)
-            logger.info(
-                "Campaign initialized in Vault: %s (token: %s, reward: %s wei) (tx: %s)",
-                campaign_id, token_address, reward_per_recipient, tx_hash.hex()
+            tx_hash = self._send_transaction(
+                contract.functions.initializeCampaign(campaign_bytes, token_checksum, reward_per_recipient),
+                "Vault initializeCampaign",
             )
-            # Esperar confirmación para evitar race conditions
-            self.web3.eth.wait_for_transaction_receipt(tx_hash, timeout=60)
-            return tx_hash.hex()
-        except (ValueError, Exception) as e:  # noqa: BLE001
+        except Exception as e:  # noqa: BLE001
             error_msg = str(e)
             error_repr = repr(e)
             
@@ -670,28 +848,18 @@ class CeloToolbox:
                 logger.debug("Campaña %s ya está inicializada en LootBoxVault (esto es normal)", campaign_id)
                 # Lanzar error específico para que el caller lo maneje silenciosamente
                 raise ValueError(f"Campaign {campaign_id} already initialized in Vault") from e
-            elif "replacement transaction underpriced" in error_msg.lower() or "nonce too low" in error_msg.lower() or "max fee per gas" in error_msg.lower():
-                # Reintentar con gas fees más altos
-                logger.warning("Transacción rechazada (gas fees bajos o nonce), reintentando...")
-                nonce = self.web3.eth.get_transaction_count(self.account.address, "pending")
-                gas_fees = self._get_gas_fees(multiplier=1.8)
-                tx = contract.functions.initializeCampaign(
-                    campaign_bytes,
-                    token_checksum,
-                    reward_per_recipient
-                ).build_transaction({
-                    "from": self.account.address,
-                    "nonce": nonce,
-                    **gas_fees,
-                })
-                signed_tx = self.web3.eth.account.sign_transaction(tx, self.private_key)
-                tx_hash = self.web3.eth.send_raw_transaction(signed_tx.raw_transaction)
-                logger.info("Campaign initialized in Vault (retry): %s (tx: %s)", campaign_id, tx_hash.hex())
-                # Esperar confirmación
-                self.web3.eth.wait_for_transaction_receipt(tx_hash, timeout=60)
-                return tx_hash.hex()
             raise
 
+        logger.info(
+            "Campaign initialized in Vault: %s (token: %s, reward: %s wei) (tx: %s)",
+            campaign_id, token_address, reward_per_recipient, tx_hash
+        )
+        # Esperar confirmación: las distribuciones de la campaña dependen de esta inicialización
+        if wait:
+            self.web3.eth.wait_for_transaction_receipt(tx_hash, timeout=60)
+            self.nonces.mark_confirmed(tx_hash)
+        return tx_hash
+
     def get_agent_address(self) -> str:
         """Obtiene la dirección de la wallet del agente (derivada de private_key)."""
         if not self.private_key:
@@ -909,3 +1077,214 @@ class CeloToolbox:
                 "message": f"Error validando transacción: {str(e)}"
             }
 
+
+
+class AsyncCeloToolbox:
+    """Fachada asíncrona de ``CeloToolbox``: ninguna llamada on-chain corre en el event loop.
+
+    - Lecturas (``eth_call``, receipts, validación de pagos) en un pool de hilos propio.
+    - Transacciones firmadas en un único hilo dedicado. El nonce sale del ``NonceManager``
+      local, así que cada envío retorna apenas entra al mempool, sin esperar al anterior.
+    - Las confirmaciones pasan por un ``ReceiptTracker`` compartido: un solo poller por bloque
+      para todas las transacciones en vuelo, en lugar de un ``wait_for_transaction_receipt`` por tx.
+    - ``FeeBumper`` re-emite con más fee las transacciones que no entran en ``after_blocks``.
+    - ``checksum`` y ``get_agent_address`` no hacen I/O y se exponen síncronos.
+    """
+
+    def __init__(
+        self,
+        toolbox: CeloToolbox,
+        read_workers: int = 8,
+        receipt_poll_interval: float = 2.0,
+        fee_bump_policy: FeeBumpPolicy | None = None,
+    ) -> None:
+        self.sync = toolbox
+        self._read_executor = ThreadPoolExecutor(max_workers=max(1, read_workers), thread_name_prefix="celo-read")
+        self._tx_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="celo-tx")
+        self.receipts = ReceiptTracker(
+            toolbox.web3,
+            rpc_url=toolbox.rpc_url,
+            poll_interval=receipt_poll_interval,
+            executor=self._read_executor,
+        )
+        self.fee_bumper = FeeBumper(
+            toolbox,
+            fee_bump_policy or FeeBumpPolicy(),
+            read_executor=self._read_executor,
+            tx_executor=self._tx_executor,
+            poll_interval=receipt_poll_interval,
+            on_replaced=self.receipts.replace,
+        )
+
+    @property
+    def web3(self) -> Web3:
+        return self.sync.web3
+
+    def checksum(self, address: str) -> str:
+        return self.sync.checksum(address)
+
+    def get_agent_address(self) -> str:
+        return self.sync.get_agent_address()
+
+    async def _read(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._read_executor, functools.partial(fn, *args, **kwargs))
+
+    async def _transact(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self._tx_executor, functools.partial(fn, *args, **kwargs))
+        # La tx ya está difundida; si no entra en bloque la re-emite el FeeBumper en segundo plano
+        self.fee_bumper.ensure_running()
+        return result
+
+    # --- Lecturas ---
+    async def get_balance(self, address: str) -> float:
+        return await self._read(self.sync.get_balance, address)
+
+    async def can_claim(self, registry_address: str, campaign_id: str, participant: str) -> bool:
+        return await self._read(self.sync.can_claim, registry_address, campaign_id, participant)
+
+    async def can_claim_many(
+        self, registry_address: str, campaign_id: str, participants: Sequence[str]
+    ) -> dict[str, bool | None]:
+        return await self._read(self.sync.can_claim_many, registry_address, campaign_id, participants)
+
+    async def get_xp_balance(self, registry_address: str, campaign_id: str, participant: str) -> int:
+        return await self._read(self.sync.get_xp_balance, registry_address, campaign_id, participant)
+
+    async def get_xp_balances(
+        self, registry_address: str, campaign_id: str, participants: Sequence[str]
+    ) -> dict[str, int]:
+        return await self._read(self.sync.get_xp_balances, registry_address, campaign_id, participants)
+
+    async def get_claim_data_many(
+        self, registry_address: str, campaign_id: str, participants: Sequence[str]
+    ) -> dict[str, dict[str, int] | None]:
+        return await self._read(self.sync.get_claim_data_many, registry_address, campaign_id, participants)
+
+    async def confirm(self, tx_hash: str, timeout: float = 60) -> Any:
+        """Espera el receipt vía ``ReceiptTracker``; propaga timeout, reemplazo o descarte.
+
+        Solo un receipt o un reemplazo detectado liberan el nonce: una tx que vence el timeout
+        (o que el nodo descartó) sigue en vuelo para que el ``FeeBumper`` la re-emita.
+        """
+        nonces = self.sync.nonces if self.sync.private_key else None
+        nonce = nonces.nonce_for(tx_hash) if nonces else None
+        try:
+            receipt = await self.receipts.wait(
+                tx_hash,
+                timeout=timeout,
+                nonce=nonce,
+                sender=self.sync.account.address if nonces else None,
+            )
+        except TransactionReplaced:
+            if nonces:
+                nonces.mark_confirmed(tx_hash, nonce=nonce)
+            raise
+        if nonces:
+            # Por nonce: el receipt puede ser de un reemplazo con otro hash
+            nonces.mark_confirmed(tx_hash, nonce=nonce)
+        return receipt
+
+    async def get_vault_campaign(self, vault_address: str, campaign_id: str) -> dict[str, Any] | None:
+        return await self._read(self.sync.get_vault_campaign, vault_address, campaign_id)
+
+    async def wait_for_receipt(self, tx_hash: str, timeout: int = 30) -> Any:
+        """Igual que ``CeloToolbox.wait_for_receipt``: ``None`` si no se confirma a tiempo."""
+        try:
+            return await self.confirm(tx_hash, timeout=timeout)
+        except Exception as e:  # noqa: BLE001
+            logger.warning(f"Timeout o error esperando receipt para {tx_hash}: {e}")
+            return None
+
+    async def validate_payment(self, **kwargs: Any) -> dict[str, Any]:
+        return await self._read(self.sync.validate_payment, **kwargs)
+
+    async def validate_native_payment(self, **kwargs: Any) -> dict[str, Any]:
+        return await self._read(self.sync.validate_native_payment, **kwargs)
+
+    # --- Transacciones ---
+    async def grant_xp(self, **kwargs: Any) -> str:
+        return await self._transact(self.sync.grant_xp, **kwargs)
+
+    async def grant_xp_batch(self, **kwargs: Any) -> str:
+        return await self._transact(self.sync.grant_xp_batch, **kwargs)
+
+    async def supports_xp_batch(self, registry_address: str) -> bool:
+        return await self._read(self.sync.supports_xp_batch, registry_address)
+
+    async def mint_nft(self, **kwargs: Any) -> str:
+        return await self._transact(self.sync.mint_nft, **kwargs)
+
+    async def mint_nft_batch(self, **kwargs: Any) -> str:
+        return await self._transact(self.sync.mint_nft_batch, **kwargs)
+
+    def loot_minted_tokens(self, minter_address: str, receipt: Any) -> dict[str, int]:
+        return self.sync.loot_minted_tokens(minter_address, receipt)
+
+    async def minter_relative_base_uri(self, minter_address: str, campaign_id: str) -> str | None:
+        return await self._read(self.sync.minter_relative_base_uri, minter_address, campaign_id)
+
+    async def distribute_cusd(self, **kwargs: Any) -> str:
+        return await self._transact(self.sync.distribute_cusd, **kwargs)
+
+    # La configuración de campaña se confirma antes de retornar (mints y grants dependen de ella),
+    # pero la espera ocupa el poller compartido y no el hilo de transacciones
+    async def configure_campaign_registry(self, **kwargs: Any) -> str:
+        tx_hash = await self._transact(self.sync.configure_campaign_registry, wait=False, **kwargs)
+        await self.confirm(tx_hash, timeout=60)
+        return tx_hash
+
+    async def configure_campaign_minter(self, **kwargs: Any) -> str:
+        tx_hash = await self._transact(self.sync.configure_campaign_minter, wait=False, **kwargs)
+        await self.confirm(tx_hash, timeout=60)
+        return tx_hash
+
+    async def initialize_campaign_vault(self, **kwargs: Any) -> str:
+        tx_hash = await self._transact(self.sync.initialize_campaign_vault, wait=False, **kwargs)
+        await self.confirm(tx_hash, timeout=60)
+        return tx_hash
+
+    def shutdown(self) -> None:
+        self.fee_bumper.shutdown()
+        self.receipts.shutdown()
+        self._read_executor.shutdown(wait=False)
+        self._tx_executor.shutdown(wait=False)
+
+
+_async_celo_toolbox: AsyncCeloToolbox | None = None
+
+
+def get_async_celo_toolbox(settings: Any | None = None) -> AsyncCeloToolbox:
+    """Instancia compartida de ``AsyncCeloToolbox`` (un solo hilo de transacciones por proceso)."""
+    global _async_celo_toolbox
+    if _async_celo_toolbox is None:
+        if settings is None:
+            from ..config import settings as default_settings
+            settings = default_settings
+        toolbox = CeloToolbox(
+            rpc_url=settings.celo_rpc_url,
+            private_key=settings.celo_private_key or None,
+            multicall_address=settings.multicall3_address,
+            multicall_chunk_size=settings.multicall_chunk_size,
+            fee_cache_ttl_seconds=settings.fee_cache_ttl_seconds,
+        )
+        _async_celo_toolbox = AsyncCeloToolbox(
+            toolbox,
+            read_workers=settings.celo_read_workers,
+            receipt_poll_interval=settings.receipt_poll_interval_seconds,
+            fee_bump_policy=FeeBumpPolicy(
+                after_blocks=settings.fee_bump_after_blocks,
+                bump_percent=settings.fee_bump_percent,
+                max_bumps=settings.fee_bump_max_attempts,
+                max_fee_gwei=settings.fee_max_gwei,
+            ),
+        )
+    return _async_celo_toolbox
+
+
+def close_async_celo_toolbox() -> None:
+    global _async_celo_toolbox
+    if _async_celo_toolbox is not None:
+        _async_celo_toolbox.shutdown()
+        _async_celo_toolbox = None
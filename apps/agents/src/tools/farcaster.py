@@ -1,12 +1,17 @@
 from __future__ import annotations
 
 import asyncio
+import copy
 import logging
 from datetime import datetime, timezone
 from typing import Any
 
 import httpx
 
+from .cache import TTLCache
+from .rate_limiter import NeynarRateLimiter
+from .singleflight import SingleFlight
+
 logger = logging.getLogger(__name__)
 
 
@@ -33,17 +38,148 @@ def _normalize_user(payload: dict[str, Any]) -> dict[str, Any]:
 
 
 class FarcasterToolbox:
-    """Cliente para consultar Neynar API. Requiere API key válida con créditos disponibles."""
+    """Cliente para consultar Neynar API. Requiere API key válida con créditos disponibles.
+
+    Mantiene un único ``httpx.AsyncClient`` con pool de conexiones (keep-alive y HTTP/2)
+    que se reutiliza en todas las llamadas, evitando un handshake TCP+TLS por request.
+    """
 
     def __init__(
         self,
         base_url: str,
         api_token: str | None = None,
         neynar_key: str | None = None,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+        timeout: float = 10.0,
+        cache_max_entries: int = 2048,
+        profile_cache_ttl: float = 300.0,
+        followers_cache_ttl: float = 6 * 3600.0,
+        casts_cache_ttl: float = 20.0,
+        rate_limit_per_second: float = 5.0,
+        rate_limit_burst: int = 10,
+        max_429_retries: int = 3,
     ) -> None:
         self.base_url = base_url.rstrip("/")
         self.api_token = api_token
         self.neynar_key = neynar_key
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2
+        self.timeout = timeout
+        self._client: httpx.AsyncClient | None = None
+        self._client_loop: asyncio.AbstractEventLoop | None = None
+        # Cache de lecturas repetidas (perfiles, followers, casts recientes).
+        # La ventana stale-while-revalidate es igual al TTL de cada endpoint.
+        self.cache = TTLCache(max_entries=cache_max_entries)
+        # Requests idénticos concurrentes comparten una sola llamada a Neynar
+        self._singleflight = SingleFlight()
+        # Limiter central: reemplaza los sleeps fijos repartidos por los métodos
+        self.rate_limiter = NeynarRateLimiter(rate_per_second=rate_limit_per_second, burst=rate_limit_burst)
+        self.max_429_retries = max_429_retries
+        self._cache_policies = {
+            "profile": {"ttl": profile_cache_ttl, "stale_ttl": profile_cache_ttl},
+            "followers": {"ttl": followers_cache_ttl, "stale_ttl": followers_cache_ttl},
+            "casts": {"ttl": casts_cache_ttl, "stale_ttl": casts_cache_ttl},
+        }
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Devuelve el cliente HTTP compartido, creándolo si no existe.
+
+        El pool queda ligado al event loop donde se creó; si el loop cambia
+        (p. ej. scripts que llaman ``asyncio.run`` varias veces) se crea uno nuevo.
+        """
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            self._client = self._build_client()
+            self._client_loop = loop
+        return self._client
+
+    def _build_client(self) -> httpx.AsyncClient:
+        http2 = self.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.info("Paquete 'h2' no instalado, usando HTTP/1.1 para Neynar")
+                http2 = False
+        logger.info(
+            "🌐 Creando pool HTTP para Neynar (max=%d, keep-alive=%d, http2=%s)",
+            self.limits.max_connections,
+            self.limits.max_keepalive_connections,
+            http2,
+        )
+        return httpx.AsyncClient(timeout=self.timeout, limits=self.limits, http2=http2)
+
+    async def aclose(self) -> None:
+        """Cierra el pool de conexiones (llamar desde el shutdown de FastAPI)."""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+            logger.info("🔌 Pool HTTP de Neynar cerrado")
+        self._client = None
+        self._client_loop = None
+
+    async def _request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Request a Neynar pasando por el rate limiter; reintenta 429 tras la pausa indicada."""
+        for attempt in range(self.max_429_retries + 1):
+            await self.rate_limiter.acquire()
+            resp = await self.client.request(method, url, **kwargs)
+            self.rate_limiter.observe(resp.status_code, resp.headers)
+            if resp.status_code != 429:
+                return resp
+            if attempt < self.max_429_retries:
+                logger.warning(
+                    "⚠️ Rate limit (429) en %s. Reintento %d/%d tras la pausa del limiter",
+                    httpx.URL(url).path, attempt + 1, self.max_429_retries,
+                )
+        return resp
+
+    async def _get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self._request("GET", url, **kwargs)
+
+    async def _post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self._request("POST", url, **kwargs)
+
+    def invalidate_user(
+        self, fid: int | None = None, address: str | None = None, username: str | None = None
+    ) -> None:
+        """Descarta del cache todo lo conocido de un usuario (perfil, followers y casts)."""
+        if fid is not None:
+            self.cache.invalidate("user_by_fid", int(fid))
+            self.cache.invalidate("relevant_followers", int(fid))
+            self.cache.invalidate("user_recent_casts", int(fid))
+        if address:
+            self.cache.invalidate("user_by_address", address.lower().strip())
+        if username:
+            self.cache.invalidate("user_by_username", username.lower())
+
+    def invalidate_user_casts(self, fid: int) -> None:
+        """Fuerza a que la próxima lectura de casts recientes del usuario vaya a Neynar."""
+        self.cache.invalidate("user_recent_casts", int(fid))
+
+    def cache_stats(self) -> dict[str, Any]:
+        stats = self.cache.stats()
+        stats["singleflight"] = dict(self._singleflight.stats)
+        stats["rate_limiter"] = self.rate_limiter.snapshot()
+        return stats
+
+    async def _coalesced(self, key: tuple[Any, ...], fn: Any) -> Any:
+        """Ejecuta ``fn`` compartiendo el resultado con llamadas idénticas en vuelo."""
+        result = await self._singleflight.do(key, fn)
+        # Cada awaiter recibe su propia copia: los agentes mutan los dicts de casts
+        return copy.deepcopy(result)
+
+    async def _cached(self, policy: str, key: tuple[Any, ...], fn: Any) -> Any:
+        """Lectura cacheada según la política del endpoint; los misses concurrentes se coalescen."""
+        return await self.cache.get_or_fetch(
+            key, lambda: self._singleflight.do(key, fn), **self._cache_policies[policy]
+        )
 
     async def fetch_frame_stats(self, frame_id: str) -> dict[str, Any]:
         """Obtiene métricas de un frame. Requiere API token válido."""
@@ -55,13 +191,17 @@ class FarcasterToolbox:
         
         headers = {"Authorization": f"Bearer {self.api_token}"}
         
-        async with httpx.AsyncClient(base_url=self.base_url, headers=headers, timeout=10) as client:
-            resp = await client.get(f"/frames/{frame_id}")
-            resp.raise_for_status()
-            return resp.json()
+        resp = await self._get(f"{self.base_url}/frames/{frame_id}", headers=headers)
+        resp.raise_for_status()
+        return resp.json()
 
     async def fetch_recent_casts(self, channel_id: str = "global", limit: int = 10) -> list[dict[str, Any]]:
         """Busca casts recientes usando Neynar API (Producción). Requiere API key válida."""
+        return await self._coalesced(
+            ("recent_casts", channel_id, limit), lambda: self._fetch_recent_casts(channel_id, limit)
+        )
+
+    async def _fetch_recent_casts(self, channel_id: str, limit: int) -> list[dict[str, Any]]:
         
         if not self.neynar_key or self.neynar_key == "NEYNAR_API_DOCS":
             raise ValueError(
@@ -84,74 +224,51 @@ class FarcasterToolbox:
         selected_fids = random.sample(popular_fids, min(3, len(popular_fids)))
         
         all_casts: list[dict[str, Any]] = []
-        
-        async with httpx.AsyncClient(timeout=10) as client:
-            # Obtener casts de múltiples usuarios populares con rate limiting
-            # Iterar sobre los FIDs seleccionados
-            for idx, fid in enumerate(selected_fids):
-                # Agregar delay entre requests para evitar rate limiting (429)
-                if idx > 0:
-                    await asyncio.sleep(2.0)  # Aumentado a 2 segundos entre requests
-                
-                # Retry loop para cada usuario
-                for attempt in range(3):
-                    try:
-                        url = "https://api.neynar.com/v2/farcaster/feed/user/casts"
-                        params = {"fid": fid, "limit": min(limit, 10)}
-                        
-                        resp = await client.get(url, headers=headers, params=params)
-                        
-                        if resp.status_code == 402:
-                            raise ValueError(
-                                "Neynar API: Payment Required (402). Tu API key no tiene crédito o no es válida. "
-                                "Verifica tu API key en https://neynar.com o actualiza tu plan."
-                            )
-                        
-                        if resp.status_code == 429:
-                            wait_time = 2.0 * (2 ** attempt)
-                            logger.warning(
-                                "Rate limit alcanzado (429) para usuario %s. Esperando %.1fs...", fid, wait_time
-                            )
-                            await asyncio.sleep(wait_time)
-                            continue  # Reintentar
-                        
-                        resp.raise_for_status()
-                        data = resp.json()
-                        
-                        for cast in data.get("casts", []):
-                            author = cast.get("author", {})
-                            all_casts.append(
-                            {
-                                    "hash": cast.get("hash"),
-                                    "text": cast.get("text", ""),
-                                "author": {
-                                        "username": author.get("username"),
-                                        "fid": author.get("fid"),
-                                        "custody_address": author.get("custody_address"),
-                                },
-                                "reactions": {
-                                        "likes": cast.get("reactions", {}).get("likes_count", 0),
-                                        "recasts": cast.get("reactions", {}).get("recasts_count", 0),
-                                        "replies": cast.get("reactions", {}).get("replies_count", 0),
-                                    },
-                                    "timestamp": cast.get("timestamp"),
-                                    "channel_id": cast.get("thread", {}).get("channel", {}).get("id") or channel_id,
-                                }
-                            )
-                        break # Success, move to next user
-                        
-                    except httpx.HTTPStatusError as exc:
-                        if exc.response.status_code == 429:
-                            wait_time = 5 * (2 ** attempt) # 5s, 10s, 20s
-                            logger.warning(f"Rate limit alcanzado (429) para usuario {fid}. Esperando {wait_time}s...")
-                            await asyncio.sleep(wait_time)
-                            continue
-                        else:
-                            logger.warning("Error HTTP obteniendo casts del usuario %s: %s", fid, exc)
-                            break # No reintentar otros errores HTTP
-                    except Exception as exc:  # noqa: BLE001
-                        logger.warning("Error obteniendo casts del usuario %s: %s", fid, exc)
-                        break
+
+        # Obtener casts de múltiples usuarios populares en paralelo. El ritmo lo marca el
+        # rate limiter compartido (reintenta 429 respetando Retry-After), sin sleeps fijos.
+        async def fetch_for_fid(fid: int) -> None:
+            try:
+                url = "https://api.neynar.com/v2/farcaster/feed/user/casts"
+                params = {"fid": fid, "limit": min(limit, 10)}
+
+                resp = await self._get(url, headers=headers, params=params)
+
+                if resp.status_code == 402:
+                    raise ValueError(
+                        "Neynar API: Payment Required (402). Tu API key no tiene crédito o no es válida. "
+                        "Verifica tu API key en https://neynar.com o actualiza tu plan."
+                    )
+
+                resp.raise_for_status()
+                data = resp.json()
+
+                for cast in data.get("casts", []):
+                    author = cast.get("author", {})
+                    all_casts.append(
+                    {
+                            "hash": cast.get("hash"),
+                            "text": cast.get("text", ""),
+                        "author": {
+                                "username": author.get("username"),
+                                "fid": author.get("fid"),
+                                "custody_address": author.get("custody_address"),
+                        },
+                        "reactions": {
+                                "likes": cast.get("reactions", {}).get("likes_count", 0),
+                                "recasts": cast.get("reactions", {}).get("recasts_count", 0),
+                                "replies": cast.get("reactions", {}).get("replies_count", 0),
+                            },
+                            "timestamp": cast.get("timestamp"),
+                            "channel_id": cast.get("thread", {}).get("channel", {}).get("id") or channel_id,
+                        }
+                    )
+            except httpx.HTTPStatusError as exc:
+                logger.warning("Error HTTP obteniendo casts del usuario %s: %s", fid, exc)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Error obteniendo casts del usuario %s: %s", fid, exc)
+
+        await asyncio.gather(*(fetch_for_fid(fid) for fid in selected_fids))
         
         # Ordenar por timestamp y limitar resultados
         all_casts.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
@@ -159,6 +276,11 @@ class FarcasterToolbox:
 
     async def fetch_cast_engagement(self, cast_hash: str, limit: int = 50) -> list[dict[str, Any]]:
         """Retorna usuarios que interactuaron con un cast específico. Requiere API key válida."""
+        return await self._coalesced(
+            ("cast_engagement", cast_hash, limit), lambda: self._fetch_cast_engagement(cast_hash, limit)
+        )
+
+    async def _fetch_cast_engagement(self, cast_hash: str, limit: int) -> list[dict[str, Any]]:
         if not self.neynar_key or self.neynar_key == "NEYNAR_API_DOCS":
             raise ValueError(
                 "NEYNAR_API_KEY requerida para obtener engagement. "
@@ -169,36 +291,28 @@ class FarcasterToolbox:
         url = "https://api.neynar.com/v2/farcaster/cast"
         params = {"identifier": cast_hash, "type": "hash"}
 
-        # Retry logic for 429 Too Many Requests
+        # Retry logic para errores transitorios (los 429 los gestiona el rate limiter)
         max_retries = 3
-        base_delay = 2.0
         data = {} # Initialize to avoid UnboundLocalError
         
         for attempt in range(max_retries):
-            async with httpx.AsyncClient(timeout=10) as client:
-                try:
-                    resp = await client.get(url, headers=headers, params=params)
-                    
-                    if resp.status_code == 429:
-                        wait_time = base_delay * (2 ** attempt)
-                        logger.warning("⚠️ Rate limit (429) en engagement. Esperando %.1fs...", wait_time)
-                        await asyncio.sleep(wait_time)
-                        continue
-
-                    if resp.status_code == 402:
-                        raise ValueError(
-                            "Neynar API: Payment Required (402). Tu API key no tiene crédito o no es válida."
-                        )
-                    
-                    resp.raise_for_status()
-                    data = resp.json()
-                    break # Success
-                except Exception as exc:
-                    if attempt == max_retries - 1:
-                        logger.error("❌ Error final obteniendo engagement tras %d intentos: %s", max_retries, exc)
-                        return [] # Return empty list on failure
-                    logger.warning("Error temporal en engagement: %s. Reintentando...", exc)
-                    await asyncio.sleep(1.0)
+            try:
+                resp = await self._get(url, headers=headers, params=params)
+
+                if resp.status_code == 402:
+                    raise ValueError(
+                        "Neynar API: Payment Required (402). Tu API key no tiene crédito o no es válida."
+                    )
+
+                resp.raise_for_status()
+                data = resp.json()
+                break # Success
+            except Exception as exc:
+                if attempt == max_retries - 1:
+                    logger.error("❌ Error final obteniendo engagement tras %d intentos: %s", max_retries, exc)
+                    return [] # Return empty list on failure
+                logger.warning("Error temporal en engagement: %s. Reintentando...", exc)
+                await asyncio.sleep(1.0)
 
         cast = data.get("cast") or data.get("result", {}).get("cast")
         if not cast:
@@ -253,10 +367,9 @@ class FarcasterToolbox:
             url = "https://api.neynar.com/v2/farcaster/feed/user/casts"
             params = {"fid": user_fid, "limit": limit}
 
-            async with httpx.AsyncClient(timeout=10) as client:
-                resp = await client.get(url, headers=headers, params=params)
-                resp.raise_for_status()
-                data = resp.json()
+            resp = await self._get(url, headers=headers, params=params)
+            resp.raise_for_status()
+            data = resp.json()
 
             user_casts = []
             casts = data.get("casts", [])
@@ -285,7 +398,14 @@ class FarcasterToolbox:
             return []
 
     async def fetch_user_recent_casts(self, user_fid: int, limit: int = 10) -> list[dict[str, Any]]:
-        """Obtiene los casts más recientes de un usuario."""
+        """Obtiene los casts más recientes de un usuario (cacheado unos segundos)."""
+        return await self._cached(
+            "casts",
+            ("user_recent_casts", int(user_fid), limit),
+            lambda: self._fetch_user_recent_casts(user_fid, limit),
+        )
+
+    async def _fetch_user_recent_casts(self, user_fid: int, limit: int) -> list[dict[str, Any]]:
         if not self.neynar_key or self.neynar_key == "NEYNAR_API_DOCS":
             return []
 
@@ -294,10 +414,9 @@ class FarcasterToolbox:
             url = "https://api.neynar.com/v2/farcaster/feed/user/casts"
             params = {"fid": user_fid, "limit": limit}
 
-            async with httpx.AsyncClient(timeout=10) as client:
-                resp = await client.get(url, headers=headers, params=params)
-                resp.raise_for_status()
-                data = resp.json()
+            resp = await self._get(url, headers=headers, params=params)
+            resp.raise_for_status()
+            data = resp.json()
 
             casts = data.get("casts", [])
             
@@ -353,6 +472,13 @@ class FarcasterToolbox:
 
     async def fetch_relevant_followers(self, target_fid: int, viewer_fid: int = 3) -> list[dict[str, Any]]:
         """Obtiene seguidores relevantes (comunes con viewer_fid o de alto perfil)."""
+        return await self._cached(
+            "followers",
+            ("relevant_followers", int(target_fid), viewer_fid),
+            lambda: self._fetch_relevant_followers(target_fid, viewer_fid),
+        )
+
+    async def _fetch_relevant_followers(self, target_fid: int, viewer_fid: int) -> list[dict[str, Any]]:
         if not self.neynar_key or self.neynar_key == "NEYNAR_API_DOCS":
             return []
             
@@ -360,20 +486,33 @@ class FarcasterToolbox:
         params = {"target_fid": target_fid, "viewer_fid": viewer_fid}
         headers = {"accept": "application/json", "api_key": self.neynar_key}
         
-        async with httpx.AsyncClient(timeout=10) as client:
-            try:
-                resp = await client.get(url, headers=headers, params=params)
-                if resp.status_code != 200:
-                    return []
-                data = resp.json()
-                # La respuesta suele ser { "relevant_followers": [...] } o lista directa
-                return data.get("relevant_followers") or data.get("users") or []
-            except Exception as exc:
-                logger.warning("Error fetching relevant followers: %s", exc)
+        try:
+            resp = await self._get(url, headers=headers, params=params)
+            if resp.status_code != 200:
                 return []
+            data = resp.json()
+            # La respuesta suele ser { "relevant_followers": [...] } o lista directa
+            return data.get("relevant_followers") or data.get("users") or []
+        except Exception as exc:
+            logger.warning("Error fetching relevant followers: %s", exc)
+            return []
+
+    @staticmethod
+    def index_engagement_by_fid(participants: list[dict[str, Any]]) -> dict[int, dict[str, Any]]:
+        """Indexa por FID la salida de ``fetch_cast_engagement`` (para reutilizarla entre usuarios)."""
+        engagement: dict[int, dict[str, Any]] = {}
+        for participant in participants:
+            fid = participant.get("fid")
+            if fid is not None and fid not in engagement:
+                engagement[fid] = participant
+        return engagement
 
     async def analyze_user_participation_in_trend(
-        self, user_fid: int, cast_hash: str, topic_tags: list[str]
+        self,
+        user_fid: int,
+        cast_hash: str,
+        topic_tags: list[str],
+        engagement_by_fid: dict[int, dict[str, Any]] | None = None,
     ) -> dict[str, Any]:
         """Analiza la participación de un usuario en una tendencia específica.
         
@@ -381,6 +520,9 @@ class FarcasterToolbox:
         - Si participó directamente (like/recast/reply)
         - Sus casts relacionados con el tema
         - Ponderación basada en engagement
+
+        ``engagement_by_fid`` (ver ``index_engagement_by_fid``) evita volver a pedir el
+        engagement del cast cuando se analizan varios usuarios de la misma tendencia.
         """
         participation = {
             "directly_participated": False,
@@ -394,15 +536,14 @@ class FarcasterToolbox:
         }
 
         # 1. Verificar participación directa
-        # OPTIMIZATION: Reducir límite de 100 a 50 para ahorrar créditos API
-        participants = await self.fetch_cast_engagement(cast_hash, limit=50)
-        user_address = None
-        for p in participants:
-            if p.get("fid") == user_fid:
-                participation["directly_participated"] = True
-                participation["total_engagement"] += p.get("engagement_weight", 0.0)
-                user_address = p.get("custody_address")
-                break
+        if engagement_by_fid is None:
+            # OPTIMIZATION: Reducir límite de 100 a 50 para ahorrar créditos API
+            participants = await self.fetch_cast_engagement(cast_hash, limit=50) if cast_hash else []
+            engagement_by_fid = self.index_engagement_by_fid(participants)
+        direct = engagement_by_fid.get(user_fid)
+        if direct is not None:
+            participation["directly_participated"] = True
+            participation["total_engagement"] += direct.get("engagement_weight", 0.0)
 
         # 2. Buscar casts del usuario sobre el tema
         if user_fid:
@@ -430,6 +571,13 @@ class FarcasterToolbox:
         
         Retorna el perfil del usuario si existe, None si no se encuentra.
         """
+        return await self._cached(
+            "profile",
+            ("user_by_address", (custody_address or "").lower().strip()),
+            lambda: self._fetch_user_by_address(custody_address),
+        )
+
+    async def _fetch_user_by_address(self, custody_address: str) -> dict[str, Any] | None:
         if not self.neynar_key or self.neynar_key == "NEYNAR_API_DOCS":
             logger.warning("NEYNAR_API_KEY no configurada, no se puede buscar usuario por address")
             return None
@@ -452,55 +600,47 @@ class FarcasterToolbox:
             logger.warning("⚠️ Formato de dirección inválido: %s", custody_address)
             return None
         
-        # Retry logic for 429 Too Many Requests
+        # Retry logic para errores transitorios (los 429 los gestiona el rate limiter)
         max_retries = 3
-        base_delay = 2.0
         
         for attempt in range(max_retries):
-            async with httpx.AsyncClient(timeout=10) as client:
-                try:
-                    params = {"addresses": custody_address_lower}
-                    logger.info("🔍 Buscando usuario en Farcaster por address: %s (Intento %d/%d)", 
-                               custody_address_lower, attempt + 1, max_retries)
-                    
-                    resp = await client.get(url, headers=headers, params=params)
-                    
-                    if resp.status_code == 429:
-                        wait_time = base_delay * (2 ** attempt)
-                        logger.warning("⚠️ Rate limit (429) alcanzado. Esperando %.1fs...", wait_time)
-                        await asyncio.sleep(wait_time)
-                        continue
-                    
-                    if resp.status_code == 402:
-                        raise ValueError("Neynar API: Payment Required (402).")
-                    
-                    resp.raise_for_status()
-                    data = resp.json()
-                    
-                    # La respuesta es un mapa { "address": [user_obj, ...] }
-                    # Puede devolver una lista vacía si no encuentra usuarios
-                    users_list = data.get(custody_address_lower, [])
-                    
-                    if not users_list or len(users_list) == 0:
-                        logger.warning("⚠️ Usuario no encontrado en Farcaster para address: %s", custody_address)
-                        return None
-                    
-                    # Tomamos el primer usuario encontrado (usualmente el más relevante)
-                    user_data = users_list[0]
-                    
-                    # Normalizar usando la función helper
-                    normalized = _normalize_user(user_data)
-                    logger.info("✅ Usuario encontrado: @%s (FID: %s)", 
-                               normalized.get("username"), normalized.get("fid"))
-                    return normalized
-                    
-                except Exception as exc:
-                    if attempt == max_retries - 1:
-                        logger.error("❌ Error obteniendo usuario por address %s tras %d intentos: %s", 
-                                   custody_address, max_retries, exc)
-                        return None
-                    logger.warning("Error temporal obteniendo usuario: %s. Reintentando...", exc)
-                    await asyncio.sleep(1.0)
+            try:
+                params = {"addresses": custody_address_lower}
+                logger.info("🔍 Buscando usuario en Farcaster por address: %s (Intento %d/%d)", 
+                           custody_address_lower, attempt + 1, max_retries)
+
+                resp = await self._get(url, headers=headers, params=params)
+
+                if resp.status_code == 402:
+                    raise ValueError("Neynar API: Payment Required (402).")
+
+                resp.raise_for_status()
+                data = resp.json()
+
+                # La respuesta es un mapa { "address": [user_obj, ...] }
+                # Puede devolver una lista vacía si no encuentra usuarios
+                users_list = data.get(custody_address_lower, [])
+
+                if not users_list or len(users_list) == 0:
+                    logger.warning("⚠️ Usuario no encontrado en Farcaster para address: %s", custody_address)
+                    return None
+
+                # Tomamos el primer usuario encontrado (usualmente el más relevante)
+                user_data = users_list[0]
+
+                # Normalizar usando la función helper
+                normalized = _normalize_user(user_data)
+                logger.info("✅ Usuario encontrado: @%s (FID: %s)", 
+                           normalized.get("username"), normalized.get("fid"))
+                return normalized
+
+            except Exception as exc:
+                if attempt == max_retries - 1:
+                    logger.error("❌ Error obteniendo usuario por address %s tras %d intentos: %s", 
+                               custody_address, max_retries, exc)
+                    return None
+                logger.warning("Error temporal obteniendo usuario: %s. Reintentando...", exc)
+                await asyncio.sleep(1.0)
         return None
 
     async def fetch_users_by_addresses(self, custody_addresses: list[str]) -> dict[str, dict[str, Any]]:
@@ -533,25 +673,16 @@ class FarcasterToolbox:
             
             try:
                 params = {"addresses": addresses_str}
-                async with httpx.AsyncClient(timeout=15) as client:
-                    resp = await client.get(url, headers=headers, params=params)
-                    
-                    if resp.status_code == 429:
-                        logger.warning("⚠️ Rate limit (429) en bulk fetch. Esperando 2s y reintentando chunk...")
-                        await asyncio.sleep(2.0)
-                        # Simple retry once
-                        resp = await client.get(url, headers=headers, params=params)
-                        
-                    if resp.status_code == 200:
-                        data = resp.json()
-                        # Data format: { "0x...": [user1, user2], "0x...": [] }
-                        for addr, users in data.items():
-                            if users and len(users) > 0:
-                                result_map[addr.lower()] = _normalize_user(users[0])
-                    else:
-                        logger.warning("Error fetching bulk users: %s", resp.status_code)
-                        
-                await asyncio.sleep(0.2) # Rate limit kindness
+                resp = await self._get(url, headers=headers, params=params, timeout=15)
+
+                if resp.status_code == 200:
+                    data = resp.json()
+                    # Data format: { "0x...": [user1, user2], "0x...": [] }
+                    for addr, users in data.items():
+                        if users and len(users) > 0:
+                            result_map[addr.lower()] = _normalize_user(users[0])
+                else:
+                    logger.warning("Error fetching bulk users: %s", resp.status_code)
                 
             except Exception as e:
                 logger.error("Error en batch fetch users: %s", e)
@@ -563,6 +694,13 @@ class FarcasterToolbox:
         
         Retorna el perfil del usuario si existe, None si no se encuentra.
         """
+        return await self._cached(
+            "profile",
+            ("user_by_fid", int(fid)),
+            lambda: self._fetch_user_by_fid(fid),
+        )
+
+    async def _fetch_user_by_fid(self, fid: int) -> dict[str, Any] | None:
         if not self.neynar_key or self.neynar_key == "NEYNAR_API_DOCS":
             logger.warning("NEYNAR_API_KEY no configurada, no se puede buscar usuario por FID")
             return None
@@ -572,56 +710,55 @@ class FarcasterToolbox:
         # Documentación: https://docs.neynar.com/reference/user-bulk
         url = f"https://api.neynar.com/v2/farcaster/user/bulk?fids={fid}"
         
-        async with httpx.AsyncClient(timeout=10) as client:
-            try:
-                logger.info("🔍 Buscando usuario en Farcaster por FID: %d", fid)
-                resp = await client.get(url, headers=headers)
-                
-                logger.info("📡 Respuesta de Neynar API: status=%d para FID: %d", resp.status_code, fid)
-                
-                if resp.status_code == 404:
-                    logger.warning("⚠️ Usuario no encontrado (404) para FID: %d", fid)
-                    return None
-                
-                if resp.status_code == 402:
-                    raise ValueError(
-                        "Neynar API: Payment Required (402). Tu API key no tiene crédito o no es válida."
-                    )
-                
-                resp.raise_for_status()
-                data = resp.json()
-                
-                logger.debug("📦 Datos recibidos de Neynar: %s", str(data)[:200])
-                
-                # La API v2 bulk retorna {"users": [...]}
-                user_data = None
-                if isinstance(data, dict):
-                    users = data.get("users", [])
-                    if users and len(users) > 0:
-                        user_data = users[0]
-                    if not user_data and "user" in data:
-                        user_data = data["user"]
-                    if not user_data and "fid" in data:
-                        user_data = data
-                
-                if not user_data:
-                    logger.warning("⚠️ No se pudo extraer datos del usuario de la respuesta: %s", str(data)[:200])
-                    return None
-                
-                # Normalizar usando la función helper
-                normalized = _normalize_user(user_data)
-                logger.info("✅ Usuario encontrado: @%s (FID: %d)", normalized.get("username"), fid)
-                return normalized
-                
-            except httpx.HTTPStatusError as exc:
-                status_code = exc.response.status_code
-                error_text = exc.response.text[:500] if exc.response.text else "sin respuesta"
-                logger.error("❌ Error HTTP obteniendo usuario por FID %d: %s - %s", fid, status_code, error_text)
+        try:
+            logger.info("🔍 Buscando usuario en Farcaster por FID: %d", fid)
+            resp = await self._get(url, headers=headers)
+
+            logger.info("📡 Respuesta de Neynar API: status=%d para FID: %d", resp.status_code, fid)
+
+            if resp.status_code == 404:
+                logger.warning("⚠️ Usuario no encontrado (404) para FID: %d", fid)
                 return None
-            except Exception as exc:  # noqa: BLE001
-                logger.error("❌ Error obteniendo usuario por FID %d: %s", fid, exc, exc_info=True)
+
+            if resp.status_code == 402:
+                raise ValueError(
+                    "Neynar API: Payment Required (402). Tu API key no tiene crédito o no es válida."
+                )
+
+            resp.raise_for_status()
+            data = resp.json()
+
+            logger.debug("📦 Datos recibidos de Neynar: %s", str(data)[:200])
+
+            # La API v2 bulk retorna {"users": [...]}
+            user_data = None
+            if isinstance(data, dict):
+                users = data.get("users", [])
+                if users and len(users) > 0:
+                    user_data = users[0]
+                if not user_data and "user" in data:
+                    user_data = data["user"]
+                if not user_data and "fid" in data:
+                    user_data = data
+
+            if not user_data:
+                logger.warning("⚠️ No se pudo extraer datos del usuario de la respuesta: %s", str(data)[:200])
                 return None
 
+            # Normalizar usando la función helper
+            normalized = _normalize_user(user_data)
+            logger.info("✅ Usuario encontrado: @%s (FID: %d)", normalized.get("username"), fid)
+            return normalized
+
+        except httpx.HTTPStatusError as exc:
+            status_code = exc.response.status_code
+            error_text = exc.response.text[:500] if exc.response.text else "sin respuesta"
+            logger.error("❌ Error HTTP obteniendo usuario por FID %d: %s - %s", fid, status_code, error_text)
+            return None
+        except Exception as exc:  # noqa: BLE001
+            logger.error("❌ Error obteniendo usuario por FID %d: %s", fid, exc, exc_info=True)
+            return None
+
     @staticmethod
     def timestamp_age_hours(timestamp: str | None) -> float:
         if not timestamp:
@@ -646,6 +783,14 @@ class FarcasterToolbox:
             time_window: Ventana de tiempo ('1h', '24h', '7d')
             channel_id: (Opcional) Filtrar por canal específico
         """
+        return await self._coalesced(
+            ("trending_feed", limit, time_window, channel_id),
+            lambda: self._fetch_trending_feed(limit, time_window, channel_id),
+        )
+
+    async def _fetch_trending_feed(
+        self, limit: int, time_window: str, channel_id: str | None
+    ) -> list[dict[str, Any]]:
         if not self.neynar_key or self.neynar_key == "NEYNAR_API_DOCS":
             raise ValueError("NEYNAR_API_KEY requerida para obtener tendencias.")
         
@@ -662,28 +807,27 @@ class FarcasterToolbox:
         if channel_id and channel_id != "global":
             params["channel_id"] = channel_id
 
-        async with httpx.AsyncClient(timeout=10) as client:
-            # Intentar primero con api_key en header
-            headers = {"accept": "application/json", "api_key": self.neynar_key}
-            resp = await client.get(url, headers=headers, params=params)
-            
-            # Si falla con 400, probar con x-api-key
-            if resp.status_code == 400:
-                logger.warning("⚠️ Error 400 con api_key, probando con x-api-key...")
-                headers_alt = {"accept": "application/json", "x-api-key": self.neynar_key}
-                resp = await client.get(url, headers=headers_alt, params=params)
-            
-            if resp.status_code == 402:
-                raise ValueError("Neynar API: Payment Required (402). Verifica tu plan.")
-            
-            if resp.status_code != 200:
-                error_text = resp.text[:500] if resp.text else "sin respuesta"
-                logger.error(f"❌ Error obteniendo trending feed: {resp.status_code} - {error_text}")
-                # Retornar lista vacía en lugar de fallar completamente
-                return []
-            
-            data = resp.json()
-            
+        # Intentar primero con api_key en header
+        headers = {"accept": "application/json", "api_key": self.neynar_key}
+        resp = await self._get(url, headers=headers, params=params)
+
+        # Si falla con 400, probar con x-api-key
+        if resp.status_code == 400:
+            logger.warning("⚠️ Error 400 con api_key, probando con x-api-key...")
+            headers_alt = {"accept": "application/json", "x-api-key": self.neynar_key}
+            resp = await self._get(url, headers=headers_alt, params=params)
+
+        if resp.status_code == 402:
+            raise ValueError("Neynar API: Payment Required (402). Verifica tu plan.")
+
+        if resp.status_code != 200:
+            error_text = resp.text[:500] if resp.text else "sin respuesta"
+            logger.error(f"❌ Error obteniendo trending feed: {resp.status_code} - {error_text}")
+            # Retornar lista vacía en lugar de fallar completamente
+            return []
+
+        data = resp.json()
+
         casts = data.get("casts", [])
         
         # Normalizar estructura para que coincida con fetch_recent_casts
@@ -755,42 +899,41 @@ class FarcasterToolbox:
             }
         }
         
-        async with httpx.AsyncClient(timeout=10) as client:
-            try:
-                resp = await client.post(url, headers=headers, json=payload)
-                
-                # Si falla con 400, probar con x-api-key como fallback
-                if resp.status_code == 400:
-                    logger.warning("Probando con header x-api-key...")
-                    headers_alt = {
-                        "accept": "application/json", 
-                        "content-type": "application/json",
-                        "x-api-key": self.neynar_key
-                    }
-                    resp = await client.post(url, headers=headers_alt, json=payload)
-                
-                if resp.status_code == 402:
-                    logger.error("Neynar API: Sin créditos para notificaciones (402)")
-                    return {"status": "error", "code": 402, "message": "Payment Required"}
-                
-                if resp.status_code == 400:
-                    error_detail = resp.text
-                    try:
-                        error_json = resp.json()
-                        error_detail = str(error_json)
-                    except:
-                        pass
-                    logger.error("Neynar API: Bad Request (400). Payload: %s, Response: %s", payload, error_detail)
-                    return {"status": "error", "code": 400, "message": f"Bad Request: {error_detail}"}
-                
-                resp.raise_for_status()
-                result = resp.json()
-                logger.info("✅ Notificación enviada exitosamente a %d FIDs", len(target_fids))
-                return result
-                
-            except Exception as exc:
-                logger.error("Error enviando notificación: %s", exc)
-                return {"status": "error", "message": str(exc)}
+        try:
+            resp = await self._post(url, headers=headers, json=payload)
+
+            # Si falla con 400, probar con x-api-key como fallback
+            if resp.status_code == 400:
+                logger.warning("Probando con header x-api-key...")
+                headers_alt = {
+                    "accept": "application/json", 
+                    "content-type": "application/json",
+                    "x-api-key": self.neynar_key
+                }
+                resp = await self._post(url, headers=headers_alt, json=payload)
+
+            if resp.status_code == 402:
+                logger.error("Neynar API: Sin créditos para notificaciones (402)")
+                return {"status": "error", "code": 402, "message": "Payment Required"}
+
+            if resp.status_code == 400:
+                error_detail = resp.text
+                try:
+                    error_json = resp.json()
+                    error_detail = str(error_json)
+                except:
+                    pass
+                logger.error("Neynar API: Bad Request (400). Payload: %s, Response: %s", payload, error_detail)
+                return {"status": "error", "code": 400, "message": f"Bad Request: {error_detail}"}
+
+            resp.raise_for_status()
+            result = resp.json()
+            logger.info("✅ Notificación enviada exitosamente a %d FIDs", len(target_fids))
+            return result
+
+        except Exception as exc:
+            logger.error("Error enviando notificación: %s", exc)
+            return {"status": "error", "message": str(exc)}
 
     async def send_notification_custom(
         self,
@@ -815,18 +958,24 @@ class FarcasterToolbox:
             "tokens": [token]
         }
         
-        async with httpx.AsyncClient(timeout=10) as client:
-            try:
-                logger.info("📡 Enviando notificación custom a %s", url)
-                resp = await client.post(url, json=payload)
-                resp.raise_for_status()
-                return resp.json()
-            except Exception as exc:
-                logger.error("Error enviando notificación custom: %s", exc)
-                return {"status": "error", "message": str(exc)}
+        try:
+            logger.info("📡 Enviando notificación custom a %s", url)
+            resp = await self.client.post(url, json=payload)
+            resp.raise_for_status()
+            return resp.json()
+        except Exception as exc:
+            logger.error("Error enviando notificación custom: %s", exc)
+            return {"status": "error", "message": str(exc)}
 
     async def fetch_user_by_username(self, username: str) -> dict[str, Any] | None:
         """Obtiene información de un usuario de Farcaster por su username."""
+        return await self._cached(
+            "profile",
+            ("user_by_username", username.lower()),
+            lambda: self._fetch_user_by_username(username),
+        )
+
+    async def _fetch_user_by_username(self, username: str) -> dict[str, Any] | None:
         if not self.neynar_key or self.neynar_key == "NEYNAR_API_DOCS":
             return None
         
@@ -834,35 +983,34 @@ class FarcasterToolbox:
         url = "https://api.neynar.com/v2/farcaster/user/search"
         params = {"q": username, "limit": 1}
         
-        async with httpx.AsyncClient(timeout=10) as client:
-            try:
-                resp = await client.get(url, headers=headers, params=params)
-                if resp.status_code != 200:
-                    return None
-                data = resp.json()
-                users = data.get("result", {}).get("users", [])
-                if not users:
-                    return None
-                
-                # Verify exact match (case insensitive)
-                found_user = users[0]
-                if found_user.get("username", "").lower() != username.lower():
-                    logger.warning("Username mismatch: searched %s, found %s", username, found_user.get("username"))
-                    return None
-                
-                return _normalize_user(found_user)
-            except Exception as exc:
-                logger.error("Error fetching user %s: %s", username, exc)
+        try:
+            resp = await self._get(url, headers=headers, params=params)
+            if resp.status_code != 200:
+                return None
+            data = resp.json()
+            users = data.get("result", {}).get("users", [])
+            if not users:
+                return None
+
+            # Verify exact match (case insensitive)
+            found_user = users[0]
+            if found_user.get("username", "").lower() != username.lower():
+                logger.warning("Username mismatch: searched %s, found %s", username, found_user.get("username"))
                 return None
 
+            return _normalize_user(found_user)
+        except Exception as exc:
+            logger.error("Error fetching user %s: %s", username, exc)
+            return None
+
     async def fetch_casts_from_users(self, usernames: list[str], limit_per_user: int = 5) -> list[dict[str, Any]]:
         """Obtiene casts recientes de una lista específica de usuarios."""
         all_casts = []
         
-        for username in usernames:
+        async def fetch_for_user(username: str) -> None:
             user = await self.fetch_user_by_username(username)
             if not user or not user.get("fid"):
-                continue
+                return
                 
             fid = user["fid"]
             try:
@@ -871,36 +1019,37 @@ class FarcasterToolbox:
                 url = "https://api.neynar.com/v2/farcaster/feed/user/casts"
                 params = {"fid": fid, "limit": limit_per_user}
                 
-                async with httpx.AsyncClient(timeout=10) as client:
-                    resp = await client.get(url, headers=headers, params=params)
-                    if resp.status_code == 200:
-                        data = resp.json()
-                        for cast in data.get("casts", []):
-                            author = cast.get("author", {})
-                            all_casts.append({
-                                "hash": cast.get("hash"),
-                                "text": cast.get("text", ""),
-                                "author": {
-                                    "username": author.get("username"),
-                                    "fid": author.get("fid"),
-                                    "custody_address": author.get("custody_address"),
-                                    "pfp_url": author.get("pfp_url"),
-                                    "follower_count": author.get("follower_count"),
-                                },
-                                "reactions": {
-                                    "likes": cast.get("reactions", {}).get("likes_count", 0),
-                                    "recasts": cast.get("reactions", {}).get("recasts_count", 0),
-                                    "replies": cast.get("reactions", {}).get("replies_count", 0),
-                                },
-                                "timestamp": cast.get("timestamp"),
-                                "channel_id": cast.get("thread", {}).get("channel", {}).get("id") or "global",
-                                "trend_score": 0.0, # Will be calculated later but generally lower
-                                "is_targeted": True, # Flag to identify these casts
-                            })
-                    await asyncio.sleep(0.5) # Gentle rate limit
+                resp = await self._get(url, headers=headers, params=params)
+                if resp.status_code == 200:
+                    data = resp.json()
+                    for cast in data.get("casts", []):
+                        author = cast.get("author", {})
+                        all_casts.append({
+                            "hash": cast.get("hash"),
+                            "text": cast.get("text", ""),
+                            "author": {
+                                "username": author.get("username"),
+                                "fid": author.get("fid"),
+                                "custody_address": author.get("custody_address"),
+                                "pfp_url": author.get("pfp_url"),
+                                "follower_count": author.get("follower_count"),
+                            },
+                            "reactions": {
+                                "likes": cast.get("reactions", {}).get("likes_count", 0),
+                                "recasts": cast.get("reactions", {}).get("recasts_count", 0),
+                                "replies": cast.get("reactions", {}).get("replies_count", 0),
+                            },
+                            "timestamp": cast.get("timestamp"),
+                            "channel_id": cast.get("thread", {}).get("channel", {}).get("id") or "global",
+                            "trend_score": 0.0, # Will be calculated later but generally lower
+                            "is_targeted": True, # Flag to identify these casts
+                        })
             except Exception as exc:
                 logger.warning("Error fetching casts for %s: %s", username, exc)
-                
+
+        # Usuarios en paralelo; el rate limiter compartido marca el ritmo
+        await asyncio.gather(*(fetch_for_user(username) for username in usernames))
+        
         return all_casts
 
     async def crawl_embed_metadata(self, url: str) -> dict[str, Any] | None:
@@ -926,22 +1075,21 @@ class FarcasterToolbox:
         url_endpoint = "https://api.neynar.com/v2/farcaster/cast/embed/crawl"
         params = {"url": url}
         
-        async with httpx.AsyncClient(timeout=15) as client:
-            try:
-                resp = await client.get(url_endpoint, headers=headers, params=params)
-                
-                if resp.status_code == 402:
-                    logger.error("Neynar API: Sin créditos para crawl de embed (402)")
-                    return None
-                
-                resp.raise_for_status()
-                data = resp.json()
-                return data.get("metadata")
-                
-            except Exception as exc:
-                logger.warning("Error obteniendo metadatos de embed para %s: %s", url, exc)
+        try:
+            resp = await self._get(url_endpoint, headers=headers, params=params, timeout=15)
+
+            if resp.status_code == 402:
+                logger.error("Neynar API: Sin créditos para crawl de embed (402)")
                 return None
-    
+
+            resp.raise_for_status()
+            data = resp.json()
+            return data.get("metadata")
+
+        except Exception as exc:
+            logger.warning("Error obteniendo metadatos de embed para %s: %s", url, exc)
+            return None
+
     async def fetch_user_latest_cast(self, user_fid: int) -> dict[str, Any] | None:
         """Obtiene el ÚLTIMO cast (más reciente) de un usuario.
         
@@ -980,47 +1128,46 @@ class FarcasterToolbox:
             "x-api-key": self.neynar_key
         }
         
-        async with httpx.AsyncClient(timeout=30) as client:
-            try:
-                resp = await client.post(url, headers=headers)
-                resp.raise_for_status()
-                result = resp.json()
-                
-                signer_uuid = result.get("signer_uuid")
-                public_key = result.get("public_key")
-                
-                if not signer_uuid or not public_key:
-                    logger.error(f"❌ Respuesta de Neynar incompleta: {result}")
-                    return {
-                        "status": "error",
-                        "message": f"Respuesta de Neynar incompleta: falta signer_uuid o public_key"
-                    }
-                
-                return {
-                    "status": "success",
-                    "signer_uuid": signer_uuid,
-                    "public_key": public_key,
-                    "status": result.get("status", "generated")
-                }
-            except httpx.HTTPStatusError as e:
-                error_detail = "Error desconocido"
-                try:
-                    error_body = e.response.json()
-                    error_detail = error_body.get("message", error_body.get("error", str(e)))
-                except:
-                    error_detail = f"HTTP {e.response.status_code}: {e.response.text[:200]}"
-                logger.error(f"❌ Error HTTP creando signer: {error_detail}", exc_info=True)
-                return {
-                    "status": "error",
-                    "message": f"Error creando signer: {error_detail}"
-                }
-            except Exception as exc:
-                logger.error(f"❌ Error creando signer: {exc}", exc_info=True)
+        try:
+            resp = await self._post(url, headers=headers, timeout=30)
+            resp.raise_for_status()
+            result = resp.json()
+
+            signer_uuid = result.get("signer_uuid")
+            public_key = result.get("public_key")
+
+            if not signer_uuid or not public_key:
+                logger.error(f"❌ Respuesta de Neynar incompleta: {result}")
                 return {
                     "status": "error",
-                    "message": f"Error creando signer: {str(exc)}"
+                    "message": f"Respuesta de Neynar incompleta: falta signer_uuid o public_key"
                 }
-    
+
+            return {
+                "status": "success",
+                "signer_uuid": signer_uuid,
+                "public_key": public_key,
+                "status": result.get("status", "generated")
+            }
+        except httpx.HTTPStatusError as e:
+            error_detail = "Error desconocido"
+            try:
+                error_body = e.response.json()
+                error_detail = error_body.get("message", error_body.get("error", str(e)))
+            except:
+                error_detail = f"HTTP {e.response.status_code}: {e.response.text[:200]}"
+            logger.error(f"❌ Error HTTP creando signer: {error_detail}", exc_info=True)
+            return {
+                "status": "error",
+                "message": f"Error creando signer: {error_detail}"
+            }
+        except Exception as exc:
+            logger.error(f"❌ Error creando signer: {exc}", exc_info=True)
+            return {
+                "status": "error",
+                "message": f"Error creando signer: {str(exc)}"
+            }
+
     async def register_signed_key(
         self,
         signer_uuid: str,
@@ -1068,24 +1215,23 @@ class FarcasterToolbox:
             }
         }
         
-        async with httpx.AsyncClient(timeout=30) as client:
-            try:
-                resp = await client.post(url, headers=headers, json=payload)
-                resp.raise_for_status()
-                result = resp.json()
-                
-                return {
-                    "status": "success",
-                    "approval_url": result.get("approval_url"),
-                    "status": result.get("status", "pending_approval")
-                }
-            except Exception as exc:
-                logger.error(f"Error registrando signed key: {exc}", exc_info=True)
-                return {
-                    "status": "error",
-                    "message": f"Error registrando signed key: {str(exc)}"
-                }
-    
+        try:
+            resp = await self._post(url, headers=headers, json=payload, timeout=30)
+            resp.raise_for_status()
+            result = resp.json()
+
+            return {
+                "status": "success",
+                "approval_url": result.get("approval_url"),
+                "status": result.get("status", "pending_approval")
+            }
+        except Exception as exc:
+            logger.error(f"Error registrando signed key: {exc}", exc_info=True)
+            return {
+                "status": "error",
+                "message": f"Error registrando signed key: {str(exc)}"
+            }
+
     async def get_signer_status(self, signer_uuid: str) -> dict[str, Any]:
         """Obtiene el estado actual de un signer.
         
@@ -1110,26 +1256,25 @@ class FarcasterToolbox:
             "x-api-key": self.neynar_key
         }
         
-        async with httpx.AsyncClient(timeout=30) as client:
-            try:
-                resp = await client.get(url, headers=headers)
-                resp.raise_for_status()
-                result = resp.json()
-                
-                return {
-                    "status": "success",
-                    "signer_uuid": result.get("signer_uuid"),
-                    "status": result.get("status"),
-                    "public_key": result.get("public_key"),
-                    "fid": result.get("fid"),
-                    "approval_url": result.get("approval_url")
-                }
-            except Exception as exc:
-                logger.error(f"Error obteniendo estado del signer: {exc}", exc_info=True)
-                return {
-                    "status": "error",
-                    "message": f"Error obteniendo estado del signer: {str(exc)}"
-                }
+        try:
+            resp = await self._get(url, headers=headers, timeout=30)
+            resp.raise_for_status()
+            result = resp.json()
+
+            return {
+                "status": "success",
+                "signer_uuid": result.get("signer_uuid"),
+                "status": result.get("status"),
+                "public_key": result.get("public_key"),
+                "fid": result.get("fid"),
+                "approval_url": result.get("approval_url")
+            }
+        except Exception as exc:
+            logger.error(f"Error obteniendo estado del signer: {exc}", exc_info=True)
+            return {
+                "status": "error",
+                "message": f"Error obteniendo estado del signer: {str(exc)}"
+            }
 
     async def publish_cast(
         self,
@@ -1216,67 +1361,101 @@ class FarcasterToolbox:
         if parent_hash:
             payload["parent"] = parent_hash  # Neynar acepta string directamente (hash o parent_url)
         
-        async with httpx.AsyncClient(timeout=30) as client:
-            try:
-                logger.info(f"📤 Publicando cast para FID {user_fid} usando signer {signer_uuid[:8]}...")
-                resp = await client.post(url, headers=headers, json=payload)
-                
-                if resp.status_code == 402:
-                    logger.error("Neynar API: Sin créditos para publicar casts (402)")
-                    return {
-                        "status": "error",
-                        "cast_hash": None,
-                        "message": "Sin créditos en Neynar API. Se requieren 150 créditos por cast."
-                    }
-                
-                if resp.status_code == 400:
-                    error_detail = resp.text
-                    try:
-                        error_json = resp.json()
-                        error_detail = str(error_json)
-                    except:
-                        pass
-                    logger.error(f"Neynar API: Bad Request (400). Response: {error_detail}")
-                    return {
-                        "status": "error",
-                        "cast_hash": None,
-                        "message": f"Error de Neynar API: {error_detail}"
-                    }
-                
-                resp.raise_for_status()
-                result = resp.json()
-                
-                # Extraer el hash del cast publicado
-                cast_hash = None
-                if isinstance(result, dict):
-                    cast_hash = result.get("cast", {}).get("hash") or result.get("hash")
-                
-                if cast_hash:
-                    logger.info(f"✅ Cast publicado exitosamente: {cast_hash}")
-                    return {
-                        "status": "success",
-                        "cast_hash": cast_hash,
-                        "message": "Cast publicado exitosamente"
-                    }
-                else:
-                    logger.warning(f"⚠️ Respuesta de Neynar no contiene cast_hash: {result}")
-                    return {
-                        "status": "success",
-                        "cast_hash": None,
-                        "message": "Cast publicado pero no se pudo obtener el hash"
-                    }
-                
-            except httpx.HTTPStatusError as e:
-                logger.error(f"Error HTTP publicando cast: {e.response.status_code} - {e.response.text}")
+        try:
+            logger.info(f"📤 Publicando cast para FID {user_fid} usando signer {signer_uuid[:8]}...")
+            resp = await self._post(url, headers=headers, json=payload, timeout=30)
+
+            if resp.status_code == 402:
+                logger.error("Neynar API: Sin créditos para publicar casts (402)")
                 return {
                     "status": "error",
                     "cast_hash": None,
-                    "message": f"Error HTTP {e.response.status_code}: {e.response.text[:200]}"
+                    "message": "Sin créditos en Neynar API. Se requieren 150 créditos por cast."
                 }
-            except Exception as exc:
-                logger.error(f"Error publicando cast: {exc}", exc_info=True)
+
+            if resp.status_code == 400:
+                error_detail = resp.text
+                try:
+                    error_json = resp.json()
+                    error_detail = str(error_json)
+                except:
+                    pass
+                logger.error(f"Neynar API: Bad Request (400). Response: {error_detail}")
                 return {
                     "status": "error",
                     "cast_hash": None,
-                    "message": f"Error publicando cast: {str(exc)}"
+                    "message": f"Error de Neynar API: {error_detail}"
+                }
+
+            resp.raise_for_status()
+            result = resp.json()
+
+            # Extraer el hash del cast publicado
+            cast_hash = None
+            if isinstance(result, dict):
+                cast_hash = result.get("cast", {}).get("hash") or result.get("hash")
+
+            if cast_hash:
+                logger.info(f"✅ Cast publicado exitosamente: {cast_hash}")
+                return {
+                    "status": "success",
+                    "cast_hash": cast_hash,
+                    "message": "Cast publicado exitosamente"
+                }
+            else:
+                logger.warning(f"⚠️ Respuesta de Neynar no contiene cast_hash: {result}")
+                return {
+                    "status": "success",
+                    "cast_hash": None,
+                    "message": "Cast publicado pero no se pudo obtener el hash"
                 }
+
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Error HTTP publicando cast: {e.response.status_code} - {e.response.text}")
+            return {
+                "status": "error",
+                "cast_hash": None,
+                "message": f"Error HTTP {e.response.status_code}: {e.response.text[:200]}"
+            }
+        except Exception as exc:
+            logger.error(f"Error publicando cast: {exc}", exc_info=True)
+            return {
+                "status": "error",
+                "cast_hash": None,
+                "message": f"Error publicando cast: {str(exc)}"
+            }
+
+
+# Instancia global (singleton simple): un único pool HTTP por proceso
+_toolbox: FarcasterToolbox | None = None
+
+
+def get_farcaster_toolbox(settings: Any | None = None) -> FarcasterToolbox:
+    """Devuelve el ``FarcasterToolbox`` compartido por agentes, servicios y API."""
+    global _toolbox
+    if _toolbox is None:
+        if settings is None:
+            from ..config import settings
+        _toolbox = FarcasterToolbox(
+            base_url=settings.farcaster_hub_api or "https://api.neynar.com/v2",
+            api_token=settings.farcaster_api_token,
+            neynar_key=settings.neynar_api_key,
+            max_connections=settings.neynar_max_connections,
+            max_keepalive_connections=settings.neynar_max_keepalive_connections,
+            keepalive_expiry=settings.neynar_keepalive_expiry,
+            http2=settings.neynar_http2,
+            timeout=settings.neynar_timeout_seconds,
+            cache_max_entries=settings.neynar_cache_max_entries,
+            profile_cache_ttl=settings.neynar_profile_cache_ttl,
+            followers_cache_ttl=settings.neynar_followers_cache_ttl,
+            casts_cache_ttl=settings.neynar_casts_cache_ttl,
+            rate_limit_per_second=settings.neynar_rate_limit_per_second,
+            rate_limit_burst=settings.neynar_rate_limit_burst,
+        )
+    return _toolbox
+
+
+async def close_farcaster_toolbox() -> None:
+    """Cierra el pool compartido (si existe). Seguro de llamar varias veces."""
+    if _toolbox is not None:
+        await _toolbox.aclose()
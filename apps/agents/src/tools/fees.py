@@ -0,0 +1,184 @@
+"""Estimación de fees cacheada por bloque y re-emisión de transacciones atascadas (EIP-1559)."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable
+
+if TYPE_CHECKING:
+    from .celo import CeloToolbox
+
+logger = logging.getLogger(__name__)
+
+# Tip mínimo para el validador: 2 gwei o 10% del baseFee, lo que sea mayor
+MIN_PRIORITY_FEE_WEI = 2_000_000_000
+GWEI = 1_000_000_000
+
+
+@dataclass(frozen=True)
+class FeeSnapshot:
+    block_number: int | None
+    base_fee: int | None
+    gas_price: int | None
+    fetched_at: float
+
+    @property
+    def priority_fee(self) -> int:
+        return max(MIN_PRIORITY_FEE_WEI, int((self.base_fee or 0) * 0.1))
+
+
+class FeeOracle:
+    """Cachea ``baseFeePerGas`` del último bloque para no pedir ``get_block('latest')`` en cada envío.
+
+    El snapshot vale ``ttl_seconds`` (≈ tiempo de bloque); todas las transacciones de ese
+    bloque comparten la misma lectura. Redes sin EIP-1559 caen a ``gasPrice`` legacy.
+    """
+
+    def __init__(self, web3: Any, ttl_seconds: float = 1.0) -> None:
+        self.web3 = web3
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._snapshot: FeeSnapshot | None = None
+
+    @property
+    def block_number(self) -> int | None:
+        return self._snapshot.block_number if self._snapshot else None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snapshot = None
+
+    def snapshot(self) -> FeeSnapshot:
+        with self._lock:
+            cached = self._snapshot
+            if cached is not None and time.monotonic() - cached.fetched_at < self.ttl_seconds:
+                return cached
+            latest_block = self.web3.eth.get_block("latest")
+            base_fee = latest_block.get("baseFeePerGas")
+            gas_price = None if base_fee is not None else self.web3.eth.gas_price
+            self._snapshot = FeeSnapshot(
+                block_number=latest_block.get("number"),
+                base_fee=base_fee,
+                gas_price=gas_price,
+                fetched_at=time.monotonic(),
+            )
+            return self._snapshot
+
+    def fees(self, multiplier: float = 1.2) -> dict:
+        """``maxFeePerGas``/``maxPriorityFeePerGas`` con margen sobre el baseFee (o ``gasPrice`` legacy)."""
+        snapshot = self.snapshot()
+        if snapshot.base_fee is None:
+            return {"gasPrice": snapshot.gas_price}
+        priority_fee = snapshot.priority_fee
+        return {
+            "maxFeePerGas": int(snapshot.base_fee * multiplier) + priority_fee,
+            "maxPriorityFeePerGas": priority_fee,
+        }
+
+
+@dataclass
+class FeeBumpPolicy:
+    """Cuándo y cuánto subir el fee de una transacción que no entra en bloque.
+
+    Los nodos exigen al menos +10% en ambos campos para aceptar un reemplazo con el mismo
+    nonce; ``bump_percent`` por defecto deja margen sobre ese mínimo.
+    """
+
+    after_blocks: int = 3
+    bump_percent: float = 12.5
+    max_bumps: int = 5
+    max_fee_gwei: float = 500.0
+
+    def bumped_fees(self, tx: dict[str, Any], snapshot: FeeSnapshot) -> dict | None:
+        """Fees del reemplazo: +``bump_percent`` sobre los enviados y nunca bajo el mercado actual.
+
+        Devuelve ``None`` si el reemplazo superaría ``max_fee_gwei``.
+        """
+        factor = 1 + self.bump_percent / 100
+        cap = int(self.max_fee_gwei * GWEI)
+        if "maxFeePerGas" in tx:
+            priority = max(math.ceil(tx["maxPriorityFeePerGas"] * factor), snapshot.priority_fee)
+            market = 2 * (snapshot.base_fee or 0) + priority
+            max_fee = max(math.ceil(tx["maxFeePerGas"] * factor), market)
+            if max_fee > cap:
+                return None
+            return {"maxFeePerGas": max_fee, "maxPriorityFeePerGas": min(priority, max_fee)}
+        gas_price = max(math.ceil(tx["gasPrice"] * factor), snapshot.gas_price or 0)
+        return None if gas_price > cap else {"gasPrice": gas_price}
+
+
+class FeeBumper:
+    """Vigila las transacciones en vuelo del ``NonceManager`` y re-emite las atascadas.
+
+    - Corre solo mientras haya transacciones en vuelo; cada ronda hace una lectura de fees
+      (cacheada por bloque) y una de ``get_transaction_count(latest)`` para podar las minadas.
+    - Las que llevan ``after_blocks`` sin minarse se re-firman con el mismo nonce y fees
+      subidos según ``FeeBumpPolicy``; ``on_replaced(old, new)`` avisa al ``ReceiptTracker``.
+    """
+
+    def __init__(
+        self,
+        toolbox: CeloToolbox,
+        policy: FeeBumpPolicy,
+        read_executor: Executor | None = None,
+        tx_executor: Executor | None = None,
+        poll_interval: float = 2.0,
+        on_replaced: Callable[[str, str], None] | None = None,
+    ) -> None:
+        self.toolbox = toolbox
+        self.policy = policy
+        self.read_executor = read_executor
+        self.tx_executor = tx_executor
+        self.poll_interval = max(0.2, poll_interval)
+        self.on_replaced = on_replaced
+        self._task: asyncio.Task | None = None
+        self.stats = {"rounds": 0, "replacements": 0}
+
+    def ensure_running(self) -> None:
+        if not self.toolbox.private_key:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="fee-bumper")
+
+    async def _in(self, executor: Executor | None, fn: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, fn, *args)
+
+    async def _run(self) -> None:
+        nonces = self.toolbox.nonces
+        while nonces.has_inflight():
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self._bump_round()
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("⚠️ Error revisando transacciones atascadas: %s", exc)
+
+    async def _bump_round(self) -> None:
+        nonces = self.toolbox.nonces
+        self.stats["rounds"] += 1
+        mined = await self._in(
+            self.read_executor, self.toolbox.web3.eth.get_transaction_count, self.toolbox.account.address, "latest"
+        )
+        nonces.prune_mined(mined)
+        snapshot = await self._in(self.read_executor, self.toolbox.fee_oracle.snapshot)
+        if snapshot.block_number is None:
+            return
+
+        stuck = nonces.stuck(snapshot.block_number - self.policy.after_blocks, self.policy.max_bumps)
+        for nonce, old_hash in stuck:
+            new_hash = await self._in(self.tx_executor, self.toolbox.replace_transaction, nonce, self.policy)
+            if new_hash is None:
+                continue
+            self.stats["replacements"] += 1
+            if self.on_replaced is not None:
+                self.on_replaced(old_hash, new_hash)
+
+    def shutdown(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
@@ -0,0 +1,117 @@
+"""Lecturas agrupadas con Multicall3 (``aggregate3``) para reducir eth_calls al RPC de Celo."""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+from web3 import Web3
+
+logger = logging.getLogger(__name__)
+
+# Misma dirección en Celo Mainnet, Alfajores, Celo Sepolia y la mayoría de redes EVM
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+MULTICALL3_ABI = [
+    {
+        "type": "function",
+        "name": "aggregate3",
+        "stateMutability": "payable",
+        "inputs": [
+            {
+                "name": "calls",
+                "type": "tuple[]",
+                "components": [
+                    {"name": "target", "type": "address"},
+                    {"name": "allowFailure", "type": "bool"},
+                    {"name": "callData", "type": "bytes"},
+                ],
+            }
+        ],
+        "outputs": [
+            {
+                "name": "returnData",
+                "type": "tuple[]",
+                "components": [
+                    {"name": "success", "type": "bool"},
+                    {"name": "returnData", "type": "bytes"},
+                ],
+            }
+        ],
+    }
+]
+
+
+@dataclass
+class CallResult:
+    success: bool
+    return_data: bytes
+
+
+class Multicall3:
+    """Ejecuta muchas llamadas ``view`` en pocos ``eth_call`` usando ``aggregate3``.
+
+    - Las llamadas se parten en chunks de ``chunk_size``.
+    - Cada llamada usa ``allowFailure=True``: un revert solo marca esa entrada como fallida.
+    - Si un chunk entero falla (límite de gas o de payload del RPC) se divide a la mitad y
+      se reintenta; si Multicall3 no está desplegado en la red, se cae a eth_calls individuales.
+    """
+
+    def __init__(self, web3: Web3, address: str = MULTICALL3_ADDRESS, chunk_size: int = 200) -> None:
+        self.web3 = web3
+        self.address = Web3.to_checksum_address(address)
+        self.chunk_size = max(1, chunk_size)
+        self.contract = web3.eth.contract(address=self.address, abi=MULTICALL3_ABI)
+        self._available: bool | None = None
+
+    def is_available(self) -> bool:
+        if self._available is None:
+            try:
+                self._available = len(self.web3.eth.get_code(self.address)) > 0
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("No se pudo verificar Multicall3 en %s: %s", self.address, exc)
+                return False
+            if not self._available:
+                logger.warning("⚠️ Multicall3 no desplegado en %s, usando eth_calls individuales", self.address)
+        return self._available
+
+    def aggregate3(self, calls: Sequence[tuple[str, bytes]]) -> list[CallResult]:
+        """Ejecuta ``(target, calldata)`` en bloque. El resultado mantiene el orden de ``calls``."""
+        if not calls:
+            return []
+        if not self.is_available():
+            return [self._single_call(target, data) for target, data in calls]
+
+        results: list[CallResult] = []
+        for start in range(0, len(calls), self.chunk_size):
+            results.extend(self._aggregate_chunk(calls[start : start + self.chunk_size]))
+        return results
+
+    def _aggregate_chunk(self, calls: Sequence[tuple[str, bytes]]) -> list[CallResult]:
+        payload = [(Web3.to_checksum_address(target), True, data) for target, data in calls]
+        try:
+            raw = self.contract.functions.aggregate3(payload).call()
+        except Exception as exc:  # noqa: BLE001
+            if len(calls) == 1:
+                logger.warning("Multicall3 falló para una llamada individual: %s", exc)
+                return [self._single_call(*calls[0])]
+            middle = len(calls) // 2
+            logger.warning("Multicall3 falló con %d llamadas (%s), dividiendo el chunk", len(calls), exc)
+            return self._aggregate_chunk(calls[:middle]) + self._aggregate_chunk(calls[middle:])
+        return [CallResult(success=bool(success), return_data=bytes(data)) for success, data in raw]
+
+    def _single_call(self, target: str, data: bytes) -> CallResult:
+        try:
+            output = self.web3.eth.call({"to": Web3.to_checksum_address(target), "data": data})
+            return CallResult(success=True, return_data=bytes(output))
+        except Exception as exc:  # noqa: BLE001
+            revert_data = getattr(exc, "data", None)
+            if isinstance(revert_data, str) and revert_data.startswith("0x"):
+                return CallResult(success=False, return_data=bytes.fromhex(revert_data[2:]))
+            return CallResult(success=False, return_data=b"")
+
+    def decode(self, output_types: list[str], result: CallResult) -> Any:
+        """Decodifica una respuesta exitosa (un solo valor -> valor, varios -> tupla)."""
+        values = self.web3.codec.decode(output_types, result.return_data)
+        return values[0] if len(values) == 1 else values
@@ -0,0 +1,179 @@
+"""Asignación local de nonces para la wallet del agente (una sola fuente de verdad por proceso)."""
+
+from __future__ import annotations
+
+import heapq
+import logging
+import threading
+import time
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+def _hash_key(tx_hash: Any) -> str:
+    value = tx_hash.hex() if isinstance(tx_hash, (bytes, bytearray)) else str(tx_hash)
+    return value.lower().removeprefix("0x")
+
+
+class NonceManager:
+    """Entrega nonces monótonos bajo lock sin consultar la red en cada transacción.
+
+    - El primer ``allocate`` (o un ``resync``) parte de ``get_transaction_count(pending)``.
+    - Un nonce que no llegó a la red (error al construir/enviar) se libera y se reutiliza
+      antes que uno nuevo, para no dejar huecos que bloqueen las transacciones siguientes.
+    - ``resync`` vuelve a leer la cadena (tras "nonce too low" o un hueco): descarta las
+      transacciones ya minadas y recupera los nonces que quedaron sin transacción.
+    - ``inflight`` registra las transacciones enviadas y aún no confirmadas; ``reserved`` los
+      nonces entregados por ``allocate`` que todavía se están construyendo/firmando en otro hilo.
+      Ninguno de los dos cuenta como hueco en un ``resync``.
+    """
+
+    def __init__(self, web3: Any, address: str) -> None:
+        self.web3 = web3
+        self.address = address
+        self._lock = threading.Lock()
+        self._next: int | None = None
+        self._free: list[int] = []
+        self._inflight: dict[int, dict[str, Any]] = {}
+        self._reserved: set[int] = set()
+        self.stats = {"allocated": 0, "released": 0, "resyncs": 0}
+
+    def _chain_counts(self) -> tuple[int, int]:
+        pending = self.web3.eth.get_transaction_count(self.address, "pending")
+        latest = self.web3.eth.get_transaction_count(self.address, "latest")
+        return int(pending), int(latest)
+
+    def allocate(self) -> int:
+        with self._lock:
+            if self._next is None:
+                self._resync_locked()
+            self.stats["allocated"] += 1
+            if self._free:
+                nonce = heapq.heappop(self._free)
+            else:
+                nonce = self._next
+                self._next += 1
+            self._reserved.add(nonce)
+            return nonce
+
+    def mark_sent(
+        self, nonce: int, tx_hash: str, tx: dict[str, Any] | None = None, block: int | None = None
+    ) -> None:
+        """Registra la tx enviada (o su reemplazo: mismo nonce, se acumula el contador de bumps)."""
+        with self._lock:
+            self._reserved.discard(nonce)
+            previous = self._inflight.get(nonce)
+            self._inflight[nonce] = {
+                "tx_hash": tx_hash,
+                "sent_at": time.time(),
+                "tx": tx,
+                "block": block,
+                "bumps": previous["bumps"] + (previous["tx_hash"] != tx_hash) if previous else 0,
+            }
+
+    def inflight_info(self, nonce: int) -> dict[str, Any] | None:
+        with self._lock:
+            info = self._inflight.get(nonce)
+            return dict(info) if info else None
+
+    def has_inflight(self) -> bool:
+        with self._lock:
+            return bool(self._inflight)
+
+    def stuck(self, sent_before_block: int, max_bumps: int) -> list[tuple[int, str]]:
+        """``(nonce, tx_hash)`` enviadas en o antes de ``sent_before_block`` que aún admiten bump."""
+        with self._lock:
+            return [
+                (nonce, info["tx_hash"])
+                for nonce, info in sorted(self._inflight.items())
+                if info["tx"] is not None
+                and info["block"] is not None
+                and info["block"] <= sent_before_block
+                and info["bumps"] < max_bumps
+            ]
+
+    def prune_mined(self, mined_count: int) -> None:
+        """Descarta las transacciones con nonce < ``mined_count`` (ya incluidas en un bloque)."""
+        with self._lock:
+            self._inflight = {n: info for n, info in self._inflight.items() if n >= mined_count}
+
+    def nonce_for(self, tx_hash: str) -> int | None:
+        key = _hash_key(tx_hash)
+        with self._lock:
+            return next((n for n, info in self._inflight.items() if _hash_key(info["tx_hash"]) == key), None)
+
+    def mark_confirmed(self, tx_hash: str, nonce: int | None = None) -> None:
+        """La tx se minó (o la reemplazó otra con su nonce): deja de estar en vuelo."""
+        key = _hash_key(tx_hash)
+        with self._lock:
+            if nonce is not None and nonce in self._inflight:
+                del self._inflight[nonce]
+                return
+            for nonce, info in list(self._inflight.items()):
+                if _hash_key(info["tx_hash"]) == key:
+                    del self._inflight[nonce]
+                    break
+
+    def release(self, nonce: int) -> None:
+        """Devuelve un nonce que no llegó a usarse (la transacción nunca entró al mempool)."""
+        with self._lock:
+            self.stats["released"] += 1
+            self._reserved.discard(nonce)
+            if self._next is None or nonce in self._inflight or nonce in self._free:
+                return
+            if nonce == self._next - 1:
+                self._next -= 1
+            else:
+                heapq.heappush(self._free, nonce)
+
+    def resync(self, abandon: int | None = None) -> None:
+        """Re-lee la cadena; ``abandon`` es el nonce reservado que la red rechazó por estar ocupado."""
+        with self._lock:
+            if abandon is not None:
+                self._reserved.discard(abandon)
+            self._resync_locked()
+
+    def _resync_locked(self) -> None:
+        pending, latest = self._chain_counts()
+        self.stats["resyncs"] += 1
+        # Las transacciones con nonce < latest ya están minadas (o fueron reemplazadas)
+        self._inflight = {n: info for n, info in self._inflight.items() if n >= latest}
+        previous = self._next
+        next_nonce = max(pending, max(self._inflight, default=pending - 1) + 1)
+        if previous is not None:
+            next_nonce = max(next_nonce, previous)
+        # Nonces entre lo confirmado y lo asignado sin transacción conocida ni reserva viva: huecos a rellenar
+        gaps = [n for n in range(pending, next_nonce) if n not in self._inflight and n not in self._reserved]
+        self._free = sorted(set(gaps))
+        self._next = next_nonce
+        if previous is not None and (gaps or previous != next_nonce):
+            logger.warning(
+                "🔁 Nonces re-sincronizados (pending=%d, latest=%d, next=%d, huecos=%s)",
+                pending, latest, next_nonce, gaps,
+            )
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                "next": self._next,
+                "free": list(self._free),
+                "inflight": len(self._inflight),
+                "reserved": len(self._reserved),
+            }
+
+
+_managers: dict[str, NonceManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_nonce_manager(web3: Any, address: str) -> NonceManager:
+    """Un único ``NonceManager`` por cuenta en todo el proceso (compartido entre toolboxes)."""
+    key = address.lower()
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = NonceManager(web3, address)
+            _managers[key] = manager
+        return manager
@@ -0,0 +1,175 @@
+"""Rate limiter asíncrono (token bucket) con carriles de prioridad para Neynar."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from typing import Iterator, Mapping
+
+logger = logging.getLogger(__name__)
+
+# Carriles: menor número = mayor prioridad
+PRIORITY_INTERACTIVE = 0  # Requests de usuarios (/api/lootbox/run, verify-*, etc.)
+PRIORITY_BACKGROUND = 1  # Scans automáticos, sync del leaderboard, crons
+
+# La prioridad viaja por contexto: las tasks creadas dentro heredan el carril
+request_priority: ContextVar[int] = ContextVar("neynar_request_priority", default=PRIORITY_INTERACTIVE)
+
+
+@contextmanager
+def background_priority() -> Iterator[None]:
+    """Marca todas las llamadas a Neynar dentro del bloque como trabajo de fondo."""
+    token = request_priority.set(PRIORITY_BACKGROUND)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+
+def _parse_retry_after(value: str | None, now: float) -> float | None:
+    """Convierte ``Retry-After`` (segundos o fecha HTTP) a segundos de espera."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - now)
+    except (TypeError, ValueError):
+        return None
+
+
+class NeynarRateLimiter:
+    """Token bucket compartido con cola por prioridad y backoff adaptativo ante 429.
+
+    - ``acquire()`` concede un token; si no hay, el llamador espera en su carril y
+      los carriles de mayor prioridad siempre se atienden primero.
+    - ``observe()`` lee ``Retry-After`` y ``X-RateLimit-*`` de cada respuesta. Un 429
+      pausa el bucket y reduce la tasa a la mitad; los éxitos la recuperan poco a poco.
+    """
+
+    def __init__(
+        self,
+        rate_per_second: float = 5.0,
+        burst: int = 10,
+        min_rate_per_second: float = 0.5,
+        default_backoff: float = 2.0,
+        max_backoff: float = 30.0,
+    ) -> None:
+        self.max_rate = rate_per_second
+        self.min_rate = min(min_rate_per_second, rate_per_second)
+        self.rate = rate_per_second
+        self.burst = max(1, burst)
+        self.default_backoff = default_backoff
+        self.max_backoff = max_backoff
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._consecutive_429 = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._pump_task: asyncio.Task | None = None
+        self.stats = {"granted": 0, "queued": 0, "throttled": 0}
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        if now >= self._paused_until:
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+
+    def _has_waiters_before(self, priority: int) -> bool:
+        return any(not fut.done() and prio <= priority for prio, _, fut in self._waiters)
+
+    async def acquire(self, priority: int | None = None) -> None:
+        """Espera un token en el carril indicado (por defecto, el del contexto actual)."""
+        if priority is None:
+            priority = request_priority.get()
+        now = time.monotonic()
+        self._refill(now)
+        if now >= self._paused_until and self._tokens >= 1 and not self._has_waiters_before(priority):
+            self._tokens -= 1
+            self.stats["granted"] += 1
+            return
+
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+        self.stats["queued"] += 1
+        self._ensure_pump()
+        await fut
+
+    def _ensure_pump(self) -> None:
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump())
+
+    async def _pump(self) -> None:
+        """Despacha tokens a la cola por orden de prioridad (y FIFO dentro del carril)."""
+        while self._waiters:
+            # Descartar awaiters cancelados
+            while self._waiters and self._waiters[0][2].done():
+                heapq.heappop(self._waiters)
+            if not self._waiters:
+                break
+            now = time.monotonic()
+            self._refill(now)
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                continue
+            _, _, fut = heapq.heappop(self._waiters)
+            self._tokens -= 1
+            self.stats["granted"] += 1
+            fut.set_result(None)
+
+    def observe(self, status_code: int, headers: Mapping[str, str]) -> float:
+        """Ajusta el limiter según la respuesta. Devuelve la pausa aplicada (0 si ninguna)."""
+        now = time.monotonic()
+        wall_now = time.time()
+        pause = 0.0
+
+        if status_code == 429:
+            self._consecutive_429 += 1
+            self.stats["throttled"] += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            retry_after = _parse_retry_after(headers.get("retry-after"), wall_now)
+            if retry_after is None:
+                retry_after = self.default_backoff * (2 ** (self._consecutive_429 - 1))
+            pause = min(self.max_backoff, retry_after)
+        else:
+            self._consecutive_429 = 0
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+            remaining = headers.get("x-ratelimit-remaining")
+            reset = headers.get("x-ratelimit-reset")
+            if remaining is not None and reset is not None:
+                try:
+                    if int(float(remaining)) <= 0:
+                        reset_value = float(reset)
+                        # Algunos proveedores mandan epoch, otros segundos restantes
+                        wait = reset_value - wall_now if reset_value > 1e9 else reset_value
+                        pause = min(self.max_backoff, max(0.0, wait))
+                except ValueError:
+                    pass
+
+        if pause > 0:
+            self._refill(now)
+            self._paused_until = max(self._paused_until, now + pause)
+            self._tokens = 0.0
+            logger.warning("⏳ Neynar rate limit: pausando requests %.1fs (tasa actual %.2f req/s)", pause, self.rate)
+        return pause
+
+    def snapshot(self) -> dict[str, float | int]:
+        return {
+            **self.stats,
+            "rate_per_second": round(self.rate, 3),
+            "waiting": sum(1 for _, _, fut in self._waiters if not fut.done()),
+            "paused_for": round(max(0.0, self._paused_until - time.monotonic()), 2),
+        }
@@ -0,0 +1,347 @@
+"""Seguimiento de receipts en segundo plano: un solo poller resuelve todas las transacciones pendientes."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+from web3 import Web3
+from web3.datastructures import AttributeDict
+from web3.exceptions import TimeExhausted
+
+try:  # Formateador interno de web3 (hex -> int, HexBytes); sin él se consulta receipt por receipt
+    from web3._utils.method_formatters import receipt_formatter
+except ImportError:  # pragma: no cover - depende de la versión de web3
+    receipt_formatter = None
+
+logger = logging.getLogger(__name__)
+
+# Bloques seguidos en que el nodo no conoce la transacción antes de darla por descartada
+DEFAULT_DROP_AFTER_BLOCKS = 20
+
+
+class TransactionDropped(RuntimeError):
+    """La transacción desapareció del mempool sin minarse."""
+
+
+class TransactionReplaced(RuntimeError):
+    """Otra transacción con el mismo nonce fue minada en su lugar."""
+
+
+@dataclass
+class _PendingTx:
+    tx_hash: str
+    future: asyncio.Future
+    deadline: float
+    nonce: int | None = None
+    sender: str | None = None
+    missing_blocks: int = 0
+    # Hashes anteriores de la misma tx (re-emitida con más fee): cualquiera puede minarse
+    previous_hashes: tuple[str, ...] = ()
+
+
+def _normalize_hash(tx_hash: Any) -> str:
+    value = tx_hash.hex() if isinstance(tx_hash, (bytes, bytearray)) else str(tx_hash)
+    value = value.lower()
+    return value if value.startswith("0x") else f"0x{value}"
+
+
+class ReceiptTracker:
+    """Registra hashes y devuelve futures que se resuelven cuando la transacción se mina.
+
+    - Un único loop revisa cada bloque nuevo (vía ``newHeads`` si el RPC es WebSocket, si no
+      haciendo polling de ``eth_blockNumber``) y pide todos los receipts pendientes en un solo
+      batch JSON-RPC: 100 transacciones en vuelo cuestan una consulta por bloque, no 100 loops.
+    - Timeout por transacción (``TimeExhausted``, igual que ``wait_for_transaction_receipt``).
+    - Detecta reemplazos (el nonce de la cuenta ya pasó el de la tx y no hay receipt) y
+      transacciones descartadas (el nodo dejó de conocerlas durante ``drop_after_blocks``).
+    - El loop se detiene solo cuando no quedan pendientes y arranca con el siguiente registro.
+    """
+
+    def __init__(
+        self,
+        web3: Any,
+        rpc_url: str = "",
+        poll_interval: float = 2.0,
+        executor: Executor | None = None,
+        drop_after_blocks: int = DEFAULT_DROP_AFTER_BLOCKS,
+    ) -> None:
+        self.web3 = web3
+        self.rpc_url = rpc_url
+        self.poll_interval = max(0.2, poll_interval)
+        self.executor = executor
+        self.drop_after_blocks = max(1, drop_after_blocks)
+        self._pending: dict[str, _PendingTx] = {}
+        self._task: asyncio.Task | None = None
+        self._heads_task: asyncio.Task | None = None
+        self._new_head = asyncio.Event()
+        self._last_block: int | None = None
+        self.stats = {"tracked": 0, "confirmed": 0, "timeouts": 0, "dropped": 0, "replaced": 0, "polls": 0}
+
+    async def wait(
+        self,
+        tx_hash: Any,
+        timeout: float = 120,
+        nonce: int | None = None,
+        sender: str | None = None,
+    ) -> Any:
+        """Espera el receipt de ``tx_hash`` compartiendo el poller con el resto de transacciones."""
+        return await asyncio.shield(self.track(tx_hash, timeout=timeout, nonce=nonce, sender=sender))
+
+    def track(
+        self,
+        tx_hash: Any,
+        timeout: float = 120,
+        nonce: int | None = None,
+        sender: str | None = None,
+    ) -> asyncio.Future:
+        key = _normalize_hash(tx_hash)
+        deadline = time.monotonic() + timeout
+        entry = self._pending.get(key)
+        if entry is not None:
+            # Varios callers esperando la misma tx comparten el future; gana el timeout más largo
+            entry.deadline = max(entry.deadline, deadline)
+            return entry.future
+
+        loop = asyncio.get_running_loop()
+        entry = _PendingTx(tx_hash=key, future=loop.create_future(), deadline=deadline, nonce=nonce, sender=sender)
+        self._pending[key] = entry
+        self.stats["tracked"] += 1
+        self._ensure_running()
+        return entry.future
+
+    def replace(self, old_hash: Any, new_hash: Any) -> None:
+        """La tx fue re-emitida con más fee: los que esperaban ``old_hash`` pasan a esperar ``new_hash``."""
+        old_key, new_key = _normalize_hash(old_hash), _normalize_hash(new_hash)
+        entry = self._pending.pop(old_key, None)
+        if entry is None or old_key == new_key:
+            if entry is not None:
+                self._pending[old_key] = entry
+            return
+        entry.previous_hashes = (*entry.previous_hashes, old_key)
+        entry.tx_hash = new_key
+        entry.missing_blocks = 0
+        self._pending[new_key] = entry
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="receipt-tracker")
+        if self.rpc_url.startswith(("ws://", "wss://")) and (self._heads_task is None or self._heads_task.done()):
+            self._heads_task = asyncio.create_task(self._watch_new_heads(), name="receipt-tracker-heads")
+
+    async def _call(self, fn: Any, *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, fn, *args)
+
+    async def _run(self) -> None:
+        try:
+            while self._pending:
+                try:
+                    await asyncio.wait_for(self._new_head.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._new_head.clear()
+                try:
+                    await self._poll_once()
+                except Exception as exc:  # noqa: BLE001
+                    logger.warning("⚠️ Error consultando receipts pendientes (%d): %s", len(self._pending), exc)
+                self._expire()
+        finally:
+            if self._heads_task is not None and not self._heads_task.done():
+                self._heads_task.cancel()
+
+    async def _poll_once(self) -> None:
+        block = await self._call(lambda: self.web3.eth.block_number)
+        if self._last_block is not None and block <= self._last_block:
+            return
+        self._last_block = block
+        self.stats["polls"] += 1
+
+        hashes = list(self._pending)
+        lookups = [h for tx_hash in hashes for h in (tx_hash, *self._pending[tx_hash].previous_hashes)]
+        receipts = await self._call(self._fetch_receipts, lookups)
+        missing: list[str] = []
+        for tx_hash in hashes:
+            entry = self._pending.get(tx_hash)
+            if entry is None:
+                continue
+            receipt = next(
+                (receipts[h] for h in (tx_hash, *entry.previous_hashes) if receipts.get(h) is not None), None
+            )
+            if receipt is not None:
+                self.stats["confirmed"] += 1
+                self._resolve(entry, result=receipt)
+            else:
+                missing.append(tx_hash)
+        if missing:
+            await self._check_missing(missing, block)
+
+    def _fetch_receipts(self, hashes: Sequence[str]) -> dict[str, Any]:
+        """Todos los receipts en un batch JSON-RPC; ``None`` para las no minadas."""
+        raw = self._batch("eth_getTransactionReceipt", hashes)
+        if raw is None:
+            receipts: dict[str, Any] = {}
+            for tx_hash in hashes:
+                try:
+                    receipts[tx_hash] = self.web3.eth.get_transaction_receipt(tx_hash)
+                except Exception:  # noqa: BLE001 - TransactionNotFound mientras siga pendiente
+                    receipts[tx_hash] = None
+            return receipts
+        return {
+            tx_hash: AttributeDict.recursive(receipt_formatter(result)) if result else None
+            for tx_hash, result in zip(hashes, raw)
+        }
+
+    def _fetch_transactions(self, hashes: Sequence[str]) -> dict[str, Any]:
+        """Las transacciones que el nodo conoce (``None`` si no); de a una si no hay batch."""
+        raw = self._batch("eth_getTransactionByHash", hashes)
+        if raw is not None:
+            return dict(zip(hashes, raw))
+        transactions: dict[str, Any] = {}
+        for tx_hash in hashes:
+            try:
+                transactions[tx_hash] = self.web3.eth.get_transaction(tx_hash)
+            except Exception:  # noqa: BLE001 - TransactionNotFound si el nodo no la conoce
+                transactions[tx_hash] = None
+        return transactions
+
+    def _batch(self, method: str, hashes: Sequence[str]) -> list[Any] | None:
+        provider = self.web3.provider
+        if receipt_formatter is None or not hasattr(provider, "make_batch_request"):
+            return None
+        try:
+            responses = provider.make_batch_request([(method, [tx_hash]) for tx_hash in hashes])
+        except Exception as exc:  # noqa: BLE001 - p.ej. el RPC no acepta batches
+            logger.debug("Batch %s no disponible (%s), consultando de a uno", method, exc)
+            return None
+        if not isinstance(responses, list):
+            return None
+        by_id = {response.get("id"): response for response in responses}
+        ordered = sorted(by_id) if len(by_id) == len(hashes) else None
+        if ordered is None:
+            return None
+        # Los nodos pueden responder batches desordenados: se reordena por id de request
+        return [by_id[request_id].get("result") for request_id in ordered]
+
+    async def _check_missing(self, hashes: Sequence[str], block: int) -> None:
+        """Distingue pendientes legítimas de transacciones reemplazadas o descartadas.
+
+        El nonce de la cuenta se lee en ``block``, el mismo bloque (o uno anterior) que los
+        receipts ya consultados: leerlo en ``latest`` podría incluir un bloque nuevo donde la tx
+        se acaba de minar y confundirla con un reemplazo. Antes de dar una tx por reemplazada se
+        vuelven a pedir sus receipts; si el nodo la muestra con ``blockNumber`` se espera al
+        siguiente bloque en vez de fallarla.
+        """
+        entries = [entry for entry in (self._pending.get(h) for h in hashes) if entry is not None]
+        lookups = [h for entry in entries for h in (entry.tx_hash, *entry.previous_hashes)]
+        known = await self._call(self._fetch_transactions, lookups)
+
+        mined: set[str] = set()
+        for tx_hash in hashes:
+            entry = self._pending.get(tx_hash)
+            if entry is None:
+                continue
+            txs = [known.get(h) for h in (tx_hash, *entry.previous_hashes) if known.get(h)]
+            if not txs:
+                entry.missing_blocks += 1
+                continue
+            entry.missing_blocks = 0
+            tx = txs[0]
+            if entry.nonce is None and tx.get("nonce") is not None:
+                entry.nonce = int(tx["nonce"], 16) if isinstance(tx["nonce"], str) else int(tx["nonce"])
+            if entry.sender is None and tx.get("from"):
+                entry.sender = Web3.to_checksum_address(tx["from"])
+            if any(candidate.get("blockNumber") is not None for candidate in txs):
+                mined.add(tx_hash)
+
+        senders = {
+            entry.sender for entry in (self._pending.get(h) for h in hashes)
+            if entry is not None and entry.sender and entry.nonce is not None
+        }
+        mined_counts: dict[str, int] = {}
+        for sender in senders:
+            mined_counts[sender] = await self._call(self.web3.eth.get_transaction_count, sender, block)
+
+        suspects = [
+            tx_hash for tx_hash in hashes
+            if (entry := self._pending.get(tx_hash)) is not None
+            and entry.sender in mined_counts and entry.nonce is not None
+            and mined_counts[entry.sender] > entry.nonce
+        ]
+        receipts: dict[str, Any] = {}
+        if suspects:
+            recheck = [h for tx_hash in suspects for h in (tx_hash, *self._pending[tx_hash].previous_hashes)]
+            # Segunda lectura por si el nodo que respondió los receipts iba un bloque por detrás
+            receipts = await self._call(self._fetch_receipts, recheck)
+
+        for tx_hash in hashes:
+            entry = self._pending.get(tx_hash)
+            if entry is None:
+                continue
+            if tx_hash in suspects:
+                receipt = next(
+                    (receipts[h] for h in (tx_hash, *entry.previous_hashes) if receipts.get(h) is not None), None
+                )
+                if receipt is not None:
+                    self.stats["confirmed"] += 1
+                    self._resolve(entry, result=receipt)
+                elif tx_hash not in mined:
+                    # Su nonce ya se consumió, no tiene receipt ni bloque: la minó otra transacción
+                    self.stats["replaced"] += 1
+                    self._resolve(
+                        entry, error=TransactionReplaced(f"Transacción {tx_hash} reemplazada (nonce {entry.nonce})")
+                    )
+            elif entry.missing_blocks >= self.drop_after_blocks:
+                self.stats["dropped"] += 1
+                self._resolve(
+                    entry,
+                    error=TransactionDropped(f"Transacción {tx_hash} descartada tras {entry.missing_blocks} bloques"),
+                )
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for entry in [e for e in self._pending.values() if e.deadline <= now]:
+            self.stats["timeouts"] += 1
+            self._resolve(entry, error=TimeExhausted(f"Transacción {entry.tx_hash} no minada a tiempo"))
+
+    def _resolve(self, entry: _PendingTx, result: Any = None, error: Exception | None = None) -> None:
+        self._pending.pop(entry.tx_hash, None)
+        if entry.future.done():
+            return
+        if error is not None:
+            entry.future.set_exception(error)
+        else:
+            entry.future.set_result(result)
+
+    async def _watch_new_heads(self) -> None:
+        """Despierta al poller con cada ``newHeads`` del WebSocket; ante fallos queda el polling."""
+        try:
+            from web3 import AsyncWeb3, WebSocketProvider
+        except ImportError:
+            return
+        try:
+            async with AsyncWeb3(WebSocketProvider(self.rpc_url)) as w3:
+                await w3.eth.subscribe("newHeads")
+                async for _ in w3.socket.process_subscriptions():
+                    self._new_head.set()
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Suscripción newHeads no disponible (%s), usando polling cada %.1fs", exc, self.poll_interval)
+
+    def shutdown(self) -> None:
+        for task in (self._task, self._heads_task):
+            if task is not None and not task.done():
+                task.cancel()
+        for entry in list(self._pending.values()):
+            if not entry.future.done():
+                entry.future.cancel()
+        self._pending.clear()
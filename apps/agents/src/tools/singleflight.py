@@ -0,0 +1,44 @@
+"""Coalescencia de requests idénticos en vuelo (patrón single-flight)."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Comparte una única ejecución entre awaiters concurrentes de la misma clave.
+
+    - El primer llamador lanza ``fn()`` como task; los demás esperan ese mismo task.
+    - Si la llamada falla, la excepción se propaga a todos los awaiters.
+    - Cancelar a un awaiter no cancela el request compartido (se protege con ``shield``).
+    """
+
+    def __init__(self) -> None:
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.stats = {"calls": 0, "shared": 0}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.stats["calls"] += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._done(k, t))
+        else:
+            self.stats["shared"] += 1
+            logger.debug("Request coalescido con uno en vuelo: %s", key)
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Marcar la excepción como leída si todos los awaiters se cancelaron
+        if not task.cancelled():
+            task.exception()
+
+    def inflight(self) -> int:
+        return len(self._inflight)
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""Prueba del modo Redis de EnergyService contra un Redis falso en memoria (sin servidor).
+
+El doble reproduce en Python la semántica de cada script Lua y verifica que los scripts
+solo tocan claves declaradas en ``KEYS`` (lo que exigen Upstash y Redis Cluster).
+"""
+
+import json
+import math
+import os
+import time
+from types import SimpleNamespace
+
+# El servicio global que se crea al importar usa /tmp en vez de data/
+os.environ.setdefault("VERCEL", "1")
+
+from src.services import energy  # noqa: E402
+from src.services.energy import (  # noqa: E402
+    LUA_ADDRESSES,
+    LUA_ARCHIVE,
+    LUA_CONSUME,
+    LUA_MIGRATE_CHUNK,
+    LUA_REFILL,
+    REDIS_INDEX_KEY,
+    REDIS_LEGACY_KEY,
+    EnergyService,
+)
+
+RECHARGE = EnergyService.RECHARGE_TIME
+
+
+class FakeRedis:
+    """Subconjunto de redis-py: ``get``/``set`` con expiración y ``eval`` de los scripts del servicio."""
+
+    def __init__(self) -> None:
+        self.values: dict[str, str] = {}
+        self.expires: dict[str, float] = {}
+        self.zsets: dict[str, dict[str, float]] = {}
+        self.evals: list[int] = []
+        self._declared: set[str] | None = None
+
+    # --- Primitivas ---
+    def _touch(self, key: str) -> None:
+        if self._declared is not None:
+            assert key in self._declared, f"clave no declarada en KEYS: {key}"
+
+    def get(self, key: str):
+        self._touch(key)
+        if key in self.expires and self.expires[key] <= time.time():
+            self.values.pop(key, None)
+            self.expires.pop(key, None)
+        return self.values.get(key)
+
+    def set(self, key: str, value: str, px: int | None = None, nx: bool = False) -> bool:
+        if nx and self.get(key) is not None:
+            return False
+        self._touch(key)
+        self.values[key] = value
+        self.expires.pop(key, None)
+        if px is not None:
+            self.expires[key] = time.time() + px / 1000
+        return True
+
+    def delete(self, key: str) -> None:
+        self._touch(key)
+        self.values.pop(key, None)
+        self.expires.pop(key, None)
+
+    def zadd(self, key: str, score: float, member: str, nx: bool = False) -> None:
+        self._touch(key)
+        zset = self.zsets.setdefault(key, {})
+        if not (nx and member in zset):
+            zset[member] = score
+
+    # --- Scripts ---
+    def eval(self, script: str, numkeys: int, *keys_and_args):
+        keys, args = list(keys_and_args[:numkeys]), list(keys_and_args[numkeys:])
+        self.evals.append(numkeys)
+        self._declared = set(keys)
+        try:
+            return self._run(script, keys, args)
+        finally:
+            self._declared = None
+
+    @staticmethod
+    def _active(raw, now: float, recharge: float) -> list[float]:
+        return [t for t in json.loads(raw or "[]") if now - t < recharge]
+
+    def _run(self, script: str, keys: list[str], args: list):
+        if script == LUA_CONSUME:
+            now, recharge, max_energy, address = float(args[0]), float(args[1]), int(args[2]), args[3]
+            active = self._active(self.get(keys[0]), now, recharge)
+            if len(active) >= max_energy:
+                return [0, json.dumps(active)]
+            active.append(now)
+            self.set(keys[0], json.dumps(active), px=math.ceil(recharge * 1000))
+            self.zadd(keys[1], now, address)
+            return [1, json.dumps(active)]
+        if script == LUA_REFILL:
+            now, recharge, amount, address = float(args[0]), float(args[1]), int(args[2]), args[3]
+            remaining = sorted(self._active(self.get(keys[0]), now, recharge))[amount:]
+            if remaining:
+                self.set(keys[0], json.dumps(remaining), px=math.ceil((max(remaining) + recharge - now) * 1000))
+            else:
+                self.delete(keys[0])
+            self.zadd(keys[1], now, address)
+            return json.dumps(remaining)
+        if script == LUA_ADDRESSES:
+            self._touch(keys[0])
+            cutoff = float(args[0])
+            zset = self.zsets.get(keys[0], {})
+            for member in [m for m, score in zset.items() if score < cutoff]:
+                del zset[member]
+            return [m.encode("utf-8") for m, _ in sorted(zset.items(), key=lambda item: item[1])]
+        if script == LUA_MIGRATE_CHUNK:
+            now = float(args[0])
+            for i, key in enumerate(keys[1:]):
+                address, bolts, ttl = args[1 + i * 3], args[2 + i * 3], int(args[3 + i * 3])
+                if ttl > 0:
+                    self.set(key, bolts, px=ttl, nx=True)
+                decoded = json.loads(bolts)
+                self.zadd(keys[0], decoded[-1] if decoded else now, address, nx=True)
+            return len(keys) - 1
+        if script == LUA_ARCHIVE:
+            if self.get(keys[0]) is None:
+                return 0
+            self.set(keys[1], self.values.pop(keys[0]))
+            return 1
+        raise AssertionError("script desconocido")
+
+
+def _service(client: FakeRedis) -> EnergyService:
+    """Construye el servicio por la ruta real de ``REDIS_URL`` con el doble como cliente."""
+    original = energy.redis_py
+    energy.redis_py = SimpleNamespace(Redis=SimpleNamespace(from_url=lambda url: client))
+    os.environ["REDIS_URL"] = "redis://fake"
+    try:
+        return EnergyService()
+    finally:
+        energy.redis_py = original
+        del os.environ["REDIS_URL"]
+
+
+def test_consume_until_empty_then_refill():
+    client = FakeRedis()
+    service = _service(client)
+    address = "0xABC"
+    for expected in (2, 1, 0):
+        consumed, status = service.try_consume(address)
+        assert consumed and status["current_energy"] == expected
+    consumed, status = service.try_consume(address)
+    assert not consumed and status["current_energy"] == 0
+    assert service.get_status(address)["current_energy"] == 0
+    assert service.refill_energy(address, amount=2)["current_energy"] == 2
+    assert service.get_status(address)["current_energy"] == 2
+    assert service.get_all_addresses() == ["0xabc"]
+
+
+def test_migrates_legacy_blob_in_declared_chunks():
+    client = FakeRedis()
+    now = time.time()
+    legacy = {f"0x{i:040x}": {"consumed_bolts": [now - 60]} for i in range(energy.MIGRATE_CHUNK + 5)}
+    legacy["0xOLD"] = {"last_consume_time": now - 10, "energy_consumed": 2}
+    legacy["0xRECHARGED"] = {"consumed_bolts": [now - RECHARGE - 1]}
+    legacy["0xBUSY"] = {"consumed_bolts": [now - 30]}
+    client.set(REDIS_LEGACY_KEY, json.dumps(legacy))
+    # Consumos hechos por otro worker ya con el formato por usuario no se pisan
+    client.set("energy:user:0xbusy", json.dumps([now - 30, now - 20, now - 5]))
+
+    service = _service(client)
+    assert client.evals == [1 + energy.MIGRATE_CHUNK, 1 + 8, 2]  # dos lotes + archivo
+    assert client.get(REDIS_LEGACY_KEY) is None
+    assert client.get(f"{REDIS_LEGACY_KEY}:migrated") is not None
+    assert service.get_status("0xold")["current_energy"] == 2  # formato antiguo: un rayo aún recargando
+    assert service.get_status("0xrecharged")["current_energy"] == 3
+    assert service.get_status("0xbusy")["current_energy"] == 0
+    assert service.get_status(f"0x{1:040x}")["current_energy"] == 2
+    assert len(client.zsets[REDIS_INDEX_KEY]) == len(legacy)
+
+    # Re-ejecutar (otro worker o reinicio) no hace nada
+    client.evals.clear()
+    _service(client)
+    assert client.evals == []
+
+
+def test_addresses_expire_from_index():
+    client = FakeRedis()
+    service = _service(client)
+    service.try_consume("0xrecent")
+    client.zsets[REDIS_INDEX_KEY]["0xstale"] = time.time() - energy.ADDRESS_INDEX_RETENTION - 1
+    assert service.get_all_addresses() == ["0xrecent"]
+    assert "0xstale" not in client.zsets[REDIS_INDEX_KEY]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
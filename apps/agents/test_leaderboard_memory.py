@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Prueba del leaderboard en memoria: volcado write-behind, replay tras un crash y recarga externa."""
+
+import tempfile
+from pathlib import Path
+
+from src.stores.leaderboard_memory import MemoryLeaderboardStore
+from src.stores.leaderboard_sqlite import SqliteLeaderboardStore
+
+
+class FlakyBackend:
+    """Delegado que falla los ``record_many`` mientras ``failing`` esté activo."""
+
+    def __init__(self, backend: SqliteLeaderboardStore) -> None:
+        self.backend = backend
+        self.failing = False
+
+    def record_many(self, entries):
+        if self.failing:
+            raise OSError("disco lleno")
+        self.backend.record_many(entries)
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+
+def _paths() -> tuple[Path, Path]:
+    directory = Path(tempfile.mkdtemp())
+    return directory / "leaderboard.sqlite3", directory / "leaderboard.sqlite.log"
+
+
+def _memory(db_path: Path, log_path: Path, backend=None) -> MemoryLeaderboardStore:
+    return MemoryLeaderboardStore(backend or SqliteLeaderboardStore(db_path), log_path, flush_interval=3600)
+
+
+def _crash(store: MemoryLeaderboardStore) -> None:
+    """Simula la muerte del proceso: sin volcado final ni cierre ordenado."""
+    store._closed = True
+
+
+def _ranking(store) -> list[tuple[str, int]]:
+    return [(entry["address"], entry["xp"]) for entry in store.top(limit=100)]
+
+
+def test_flush_writes_dirty_entries_and_clears_segments():
+    db_path, log_path = _paths()
+    store = _memory(db_path, log_path)
+    store.record({"address": "0xA", "xp": 10})
+    store.increment_score({"address": "0xa"}, 5)
+    store.record({"address": "0xB", "xp": 3})
+    assert SqliteLeaderboardStore(db_path).count() == 0  # aún solo en memoria + log
+    assert log_path.read_text("utf-8").count("\n") == 3
+
+    store.flush()
+    assert _ranking(SqliteLeaderboardStore(db_path)) == [("0xa", 15), ("0xb", 3)]
+    assert store.stats["flushes"] == 1 and store.stats["flushed_entries"] == 2
+    assert not list(log_path.parent.glob("*.pending"))
+    assert store.get_rank("0xB") == 2
+    store.close()
+
+
+def test_replay_log_after_crash():
+    db_path, log_path = _paths()
+    store = _memory(db_path, log_path)
+    store.record({"address": "0xA", "xp": 10})
+    store.flush()
+    store.increment_score({"address": "0xa"}, 7)
+    store.record({"address": "0xC", "xp": 1})
+    _crash(store)
+
+    recovered = _memory(db_path, log_path)
+    assert recovered.stats["replayed"] == 2
+    assert _ranking(recovered) == [("0xa", 17), ("0xc", 1)]
+    # El replay se vuelca al arrancar: el store durable ya tiene lo re-aplicado
+    assert _ranking(SqliteLeaderboardStore(db_path)) == [("0xa", 17), ("0xc", 1)]
+    recovered.close()
+
+
+def test_failed_flush_keeps_pending_segment_for_replay():
+    db_path, log_path = _paths()
+    backend = FlakyBackend(SqliteLeaderboardStore(db_path))
+    store = _memory(db_path, log_path, backend=backend)
+    store.record({"address": "0xA", "xp": 4})
+    backend.failing = True
+    store.flush()
+    assert list(log_path.parent.glob("*.pending"))
+    store.record({"address": "0xB", "xp": 2})
+    _crash(store)
+
+    recovered = _memory(db_path, log_path)
+    assert _ranking(recovered) == [("0xa", 4), ("0xb", 2)]
+    assert _ranking(SqliteLeaderboardStore(db_path)) == [("0xa", 4), ("0xb", 2)]
+    assert not list(log_path.parent.glob("*.pending"))
+    recovered.close()
+
+
+def test_external_rebuild_discards_memory_and_dirty_entries():
+    db_path, log_path = _paths()
+    store = _memory(db_path, log_path)
+    store.record({"address": "0xA", "xp": 100})
+    store.flush()
+    store.record({"address": "0xB", "xp": 50})  # sucia y anterior a la reconstrucción
+
+    # Otro proceso (scripts/rebuild_leaderboard.py) reemplaza el store durable
+    SqliteLeaderboardStore(db_path).replace_all([{"address": "0xa", "xp": 10}, {"address": "0xc", "xp": 5}])
+    store.flush()
+    assert _ranking(store) == [("0xa", 10), ("0xc", 5)]
+    assert _ranking(SqliteLeaderboardStore(db_path)) == [("0xa", 10), ("0xc", 5)]
+    store.close()
+
+    # Tampoco vuelve a aparecer por replay al reiniciar
+    restarted = _memory(db_path, log_path)
+    assert _ranking(restarted) == [("0xa", 10), ("0xc", 5)]
+    restarted.close()
+
+
+def test_external_merge_reloads_and_keeps_local_changes():
+    db_path, log_path = _paths()
+    store = _memory(db_path, log_path)
+    store.record({"address": "0xA", "xp": 10})
+    store.flush()
+    store.record({"address": "0xD", "xp": 7})
+
+    # scripts/sync_leaderboard.py fusiona entradas sin reconstruir
+    SqliteLeaderboardStore(db_path).record_many([{"address": "0xe", "xp": 3}, {"address": "0xa", "xp": 12}])
+    store.flush()
+    expected = [("0xa", 12), ("0xd", 7), ("0xe", 3)]
+    assert _ranking(store) == expected
+    assert _ranking(SqliteLeaderboardStore(db_path)) == expected
+    store.close()
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Prueba de las lecturas agrupadas vía Multicall3 contra un proveedor RPC falso (sin red)."""
+
+from eth_abi import decode, encode
+from web3 import Web3
+from web3.providers.base import BaseProvider
+
+from src.tools.celo import CeloToolbox
+from src.tools.multicall import MULTICALL3_ADDRESS
+
+REGISTRY = "0x00000000000000000000000000000000000000AA"
+CAMPAIGN_NOT_CONFIGURED = Web3.keccak(text="CampaignNotConfigured()")[:4]
+AGGREGATE3 = Web3.keccak(text="aggregate3((address,bool,bytes)[])")[:4]
+SELECTORS = {
+    Web3.keccak(text="canClaim(bytes32,address)")[:4]: "canClaim",
+    Web3.keccak(text="getXpBalance(bytes32,address)")[:4]: "getXpBalance",
+    Web3.keccak(text="getClaimData(bytes32,address)")[:4]: "getClaimData",
+}
+
+
+class FakeRegistryProvider(BaseProvider):
+    """Simula Multicall3 y un LootAccessRegistry: XP = último byte de la dirección.
+
+    Las direcciones terminadas en ``ff`` revierten con ``CampaignNotConfigured()`` y un
+    ``aggregate3`` con más de ``max_batch`` llamadas falla entero (límite del RPC).
+    """
+
+    def __init__(self, max_batch: int = 1000, multicall_deployed: bool = True) -> None:
+        super().__init__()
+        self.max_batch = max_batch
+        self.multicall_deployed = multicall_deployed
+        self.aggregate_sizes: list[int] = []
+        self.single_calls = 0
+
+    def _registry_call(self, data: bytes) -> tuple[bool, bytes]:
+        fn_name = SELECTORS[data[:4]]
+        _, participant = decode(["bytes32", "address"], data[4:])
+        tail = int(participant[-2:], 16)
+        if tail == 0xFF:
+            return False, CAMPAIGN_NOT_CONFIGURED
+        if fn_name == "canClaim":
+            return True, encode(["bool"], [tail % 2 == 0])
+        if fn_name == "getXpBalance":
+            return True, encode(["uint256"], [tail])
+        return True, encode(["(uint64,uint32)"], [(1_700_000_000 + tail, tail)])
+
+    def make_request(self, method, params):
+        if method == "eth_chainId":
+            return {"jsonrpc": "2.0", "id": 1, "result": "0xaef3"}
+        if method == "eth_getCode":
+            code = "0x6080" if self.multicall_deployed else "0x"
+            return {"jsonrpc": "2.0", "id": 1, "result": code}
+        if method == "eth_call":
+            tx = params[0]
+            data = Web3.to_bytes(hexstr=tx.get("data") or tx.get("input"))
+            if data[:4] == AGGREGATE3:
+                (calls,) = decode(["(address,bool,bytes)[]"], data[4:])
+                if len(calls) > self.max_batch:
+                    return {"jsonrpc": "2.0", "id": 1, "error": {"code": -32000, "message": "out of gas"}}
+                self.aggregate_sizes.append(len(calls))
+                results = [self._registry_call(call_data) for _, _, call_data in calls]
+                return {"jsonrpc": "2.0", "id": 1, "result": Web3.to_hex(encode(["(bool,bytes)[]"], [results]))}
+            self.single_calls += 1
+            success, output = self._registry_call(data)
+            if not success:
+                return {
+                    "jsonrpc": "2.0", "id": 1,
+                    "error": {"code": 3, "message": "execution reverted", "data": Web3.to_hex(output)},
+                }
+            return {"jsonrpc": "2.0", "id": 1, "result": Web3.to_hex(output)}
+        raise NotImplementedError(method)
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return True
+
+
+def _toolbox(provider: FakeRegistryProvider, chunk_size: int) -> CeloToolbox:
+    return CeloToolbox(rpc_url="http://fake", web3=Web3(provider), multicall_chunk_size=chunk_size)
+
+
+def _participants(n: int) -> list[str]:
+    # 0x..01, 0x..02, ...; la cola 0xff aparece en la posición 255
+    return [Web3.to_checksum_address(f"0x{i:040x}") for i in range(1, n + 1)]
+
+
+def test_chunking_and_split_on_failure():
+    provider = FakeRegistryProvider(max_batch=60)
+    balances = _toolbox(provider, chunk_size=100).get_xp_balances(REGISTRY, "demo-campaign", _participants(250))
+    # Chunks de 100 que el RPC rechaza (>60) se dividen a la mitad: 50+50+50+50+50
+    assert provider.aggregate_sizes == [50, 50, 50, 50, 50]
+    assert provider.single_calls == 0
+    assert balances == {address: int(address[-2:], 16) for address in _participants(250)}
+
+
+def test_per_call_failure_is_isolated():
+    provider = FakeRegistryProvider()
+    toolbox = _toolbox(provider, chunk_size=200)
+    participants = _participants(256)
+    claims = toolbox.can_claim_many(REGISTRY, "demo-campaign", participants)
+    balances = toolbox.get_xp_balances(REGISTRY, "demo-campaign", participants)
+    assert provider.aggregate_sizes == [200, 56, 200, 56]
+    failed = participants[254]  # ...ff revierte
+    assert claims[failed] is None and balances[failed] == 0
+    assert claims[participants[0]] is False and claims[participants[1]] is True
+    assert sum(value is None for value in claims.values()) == 1
+
+
+def test_decodes_claim_data_tuple():
+    provider = FakeRegistryProvider()
+    participants = _participants(3)
+    claim_data = _toolbox(provider, chunk_size=200).get_claim_data_many(REGISTRY, "demo-campaign", participants)
+    assert claim_data[participants[2]] == {"last_claim_at": 1_700_000_003, "total_claims": 3}
+
+
+def test_falls_back_to_single_calls_without_multicall():
+    provider = FakeRegistryProvider(multicall_deployed=False)
+    toolbox = _toolbox(provider, chunk_size=200)
+    participants = _participants(256)[250:]
+    balances = toolbox.get_xp_balances(REGISTRY, "demo-campaign", participants)
+    assert provider.aggregate_sizes == [] and provider.single_calls == len(participants)
+    assert balances[participants[4]] == 0  # ...ff revierte
+    assert balances[participants[0]] == 251
+    assert toolbox.multicall.address == Web3.to_checksum_address(MULTICALL3_ADDRESS)
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
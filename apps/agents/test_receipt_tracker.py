@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Prueba de ReceiptTracker contra una cadena falsa: minadas, reemplazadas y la carrera receipt/nonce."""
+
+import asyncio
+
+from web3.datastructures import AttributeDict
+
+from src.tools.receipt_tracker import ReceiptTracker, TransactionReplaced
+
+SENDER = "0x00000000000000000000000000000000000000AA"
+OUR_TX = "0x" + "11" * 32
+OTHER_TX = "0x" + "22" * 32
+
+
+class FakeEth:
+    """Cadena mínima: ``mined`` mapea hash -> bloque y ``nonce_mined_at`` el bloque que consumió el nonce 5.
+
+    Sin ``make_batch_request`` en el proveedor, así el tracker usa las llamadas de a una.
+    """
+
+    def __init__(self) -> None:
+        self.head = 100
+        self.mined: dict[str, int] = {}
+        self.nonce_mined_at: int | None = None
+        self.count_blocks: list = []
+        self.on_receipt_poll = None
+
+    @property
+    def block_number(self) -> int:
+        return self.head
+
+    def get_transaction_receipt(self, tx_hash: str):
+        block = self.mined.get(tx_hash)
+        receipt = AttributeDict({"transactionHash": tx_hash, "blockNumber": block, "status": 1}) if block else None
+        if self.on_receipt_poll is not None:
+            hook, self.on_receipt_poll = self.on_receipt_poll, None
+            hook()
+        if receipt is None:
+            raise LookupError("receipt no encontrado")
+        return receipt
+
+    def get_transaction(self, tx_hash: str):
+        if tx_hash != OUR_TX:
+            raise LookupError("tx desconocida")
+        return AttributeDict({"hash": tx_hash, "nonce": 5, "from": SENDER, "blockNumber": self.mined.get(tx_hash)})
+
+    def get_transaction_count(self, sender: str, block_identifier):
+        self.count_blocks.append(block_identifier)
+        block = self.head if block_identifier == "latest" else block_identifier
+        consumed = self.nonce_mined_at is not None and self.nonce_mined_at <= block
+        return 6 if consumed else 5
+
+
+class FakeWeb3:
+    def __init__(self) -> None:
+        self.eth = FakeEth()
+        self.provider = object()
+
+
+async def _wait(tracker: ReceiptTracker, timeout: float = 5.0):
+    return await tracker.wait(OUR_TX, timeout=timeout, nonce=5, sender=SENDER)
+
+
+def test_tx_mined_between_receipt_poll_and_nonce_read_is_confirmed():
+    web3 = FakeWeb3()
+    eth = web3.eth
+
+    def mine_next_block():
+        # Justo después de leer receipts en el bloque 100 la tx se mina en el 101
+        eth.head = 101
+        eth.mined[OUR_TX] = 101
+        eth.nonce_mined_at = 101
+
+    eth.on_receipt_poll = mine_next_block
+    tracker = ReceiptTracker(web3, poll_interval=0.2)
+    receipt = asyncio.run(_wait(tracker))
+    assert receipt["blockNumber"] == 101
+    assert tracker.stats["replaced"] == 0 and tracker.stats["confirmed"] == 1
+    assert eth.count_blocks and all(block == 100 for block in eth.count_blocks)
+
+
+def test_tx_known_in_a_block_without_receipt_is_not_replaced():
+    web3 = FakeWeb3()
+    eth = web3.eth
+    # Nodo desfasado: ve el nonce consumido y la tx con bloque, pero aún no sirve el receipt
+    eth.nonce_mined_at = 100
+    real_receipt = eth.get_transaction_receipt
+    eth.mined[OUR_TX] = 100
+    calls = {"n": 0}
+
+    def lagging_receipt(tx_hash):
+        calls["n"] += 1
+        if calls["n"] <= 2:
+            raise LookupError("receipt aún no indexado")
+        return real_receipt(tx_hash)
+
+    eth.get_transaction_receipt = lagging_receipt
+
+    def advance():
+        eth.head += 1
+
+    tracker = ReceiptTracker(web3, poll_interval=0.2)
+
+    async def run():
+        future = asyncio.ensure_future(_wait(tracker))
+        while not future.done():
+            await asyncio.sleep(0.1)
+            advance()
+        return await future
+
+    receipt = asyncio.run(run())
+    assert receipt["status"] == 1
+    assert tracker.stats["replaced"] == 0
+
+
+def test_nonce_consumed_by_another_tx_is_replaced():
+    web3 = FakeWeb3()
+    eth = web3.eth
+    eth.nonce_mined_at = 100
+    eth.mined[OTHER_TX] = 100
+    tracker = ReceiptTracker(web3, poll_interval=0.2)
+    try:
+        asyncio.run(_wait(tracker))
+    except TransactionReplaced:
+        pass
+    else:
+        raise AssertionError("se esperaba TransactionReplaced")
+    assert tracker.stats["replaced"] == 1
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -87,8 +87,31 @@ contract LootAccessRegistry {
 
     uint32 public constant MAX_XP_PER_GRANT = 10000; // Límite máximo de XP por grant (protección contra overflow)
 
+    uint256 public constant MAX_XP_BATCH_SIZE = 100; // Límite de seguridad para evitar gas griefing
+
     function grantXp(bytes32 campaignId, address participant, uint32 amount) external onlyReporter {
         if (!campaignRules[campaignId].exists) revert CampaignNotConfigured();
+        _grantXp(campaignId, participant, amount);
+    }
+
+    /// @notice Otorga XP a varios participantes en una sola transacción (un XpGranted por entrada).
+    /// @dev Un participante puede repetirse: cada entrada suma sobre el balance acumulado.
+    function grantXpBatch(bytes32 campaignId, address[] calldata participants, uint32[] calldata amounts)
+        external
+        onlyReporter
+    {
+        if (!campaignRules[campaignId].exists) revert CampaignNotConfigured();
+        uint256 count = participants.length;
+        require(count > 0, "participants empty");
+        require(count <= MAX_XP_BATCH_SIZE, "batch too large");
+        require(amounts.length == count, "amounts length mismatch");
+
+        for (uint256 i = 0; i < count; i++) {
+            _grantXp(campaignId, participants[i], amounts[i]);
+        }
+    }
+
+    function _grantXp(bytes32 campaignId, address participant, uint32 amount) internal {
         require(participant != address(0), "participant zero");
         require(amount > 0, "amount zero");
         require(amount <= MAX_XP_PER_GRANT, "amount too large"); // Protección contra amounts excesivos
@@ -22,6 +22,8 @@ contract LootBoxMinter is ERC721, Ownable {
     mapping(bytes32 => CampaignConfig) public campaigns;
     mapping(address => bool) public agents;
     mapping(uint256 => string) private tokenURIs;
+    // Campaña de los tokens minteados con una clave relativa: tokenURI = baseURI + clave
+    mapping(uint256 => bytes32) private tokenCampaign;
     mapping(uint256 => bool) public soulboundToken;
 
     event CampaignConfigured(bytes32 indexed campaignId, string baseURI);
@@ -61,6 +63,9 @@ contract LootBoxMinter is ERC721, Ownable {
 
     uint256 public constant MAX_MINT_BATCH_SIZE = 50; // Límite de seguridad para evitar gas griefing
 
+    // Claves relativas (p.ej. hash de contenido de la metadata) caben en un solo slot de storage
+    uint256 public constant MAX_RELATIVE_URI_LENGTH = 31;
+
     function mintBatch(
         bytes32 campaignId,
         address[] calldata recipients,
@@ -90,6 +95,9 @@ contract LootBoxMinter is ERC721, Ownable {
             string memory storedURI =
                 bytes(metadataURIs[i]).length > 0 ? metadataURIs[i] : string.concat(config.baseURI, tokenId.toString());
             tokenURIs[tokenId] = storedURI;
+            if (_isRelativeURI(metadataURIs[i])) {
+                tokenCampaign[tokenId] = campaignId;
+            }
             soulboundToken[tokenId] = soulboundFlags[i];
             emit LootMinted(campaignId, recipients[i], tokenId, soulboundFlags[i]);
         }
@@ -107,9 +115,23 @@ contract LootBoxMinter is ERC721, Ownable {
         if (bytes(uri).length == 0) {
             return "";
         }
+        bytes32 campaignId = tokenCampaign[tokenId];
+        if (campaignId != bytes32(0)) {
+            return string.concat(campaigns[campaignId].baseURI, uri);
+        }
         return uri;
     }
 
+    /// @dev Relativa = corta y sin esquema (sin ':'); las URIs absolutas (ipfs://, https://, data:) se guardan tal cual.
+    function _isRelativeURI(string calldata uri) internal pure returns (bool) {
+        bytes calldata raw = bytes(uri);
+        if (raw.length == 0 || raw.length > MAX_RELATIVE_URI_LENGTH) return false;
+        for (uint256 i = 0; i < raw.length; i++) {
+            if (raw[i] == bytes1(":")) return false;
+        }
+        return true;
+    }
+
     function _update(address to, uint256 tokenId, address auth) internal override returns (address) {
         if (soulboundToken[tokenId] && to != address(0) && auth != address(0)) revert SoulboundTransfer();
         return super._update(to, tokenId, auth);
@@ -10,6 +10,8 @@ contract LootAccessRegistryTest is Test {
     address internal reporter = address(0xBEEF);
     address internal participant = address(0xCAFE);
 
+    event XpGranted(bytes32 indexed campaignId, address indexed participant, uint32 amount, uint256 newBalance);
+
     function setUp() public {
         registry = new LootAccessRegistry(address(this));
         registry.configureCampaign(campaignId, 1 days);
@@ -53,6 +55,80 @@ contract LootAccessRegistryTest is Test {
         registry.grantXp(campaignId, participant, 25);
         assertEq(registry.getXpBalance(campaignId, participant), 75);
     }
-}
 
+    function _batch(uint256 n, uint160 offset)
+        internal
+        pure
+        returns (address[] memory participants, uint32[] memory amounts)
+    {
+        participants = new address[](n);
+        amounts = new uint32[](n);
+        for (uint256 i = 0; i < n; i++) {
+            participants[i] = address(uint160(0x1000) + offset + uint160(i));
+            amounts[i] = uint32(10 + i);
+        }
+    }
+
+    function testGrantXpBatch() public {
+        (address[] memory participants, uint32[] memory amounts) = _batch(3, 0);
+        participants[2] = participants[0]; // repetido: suma sobre el balance acumulado
+
+        vm.expectEmit(true, true, false, true);
+        emit XpGranted(campaignId, participants[0], amounts[0], amounts[0]);
+        vm.prank(reporter);
+        registry.grantXpBatch(campaignId, participants, amounts);
+
+        assertEq(registry.getXpBalance(campaignId, participants[0]), uint256(amounts[0]) + amounts[2]);
+        assertEq(registry.getXpBalance(campaignId, participants[1]), amounts[1]);
+    }
+
+    function testGrantXpBatchGuards() public {
+        (address[] memory participants, uint32[] memory amounts) = _batch(2, 0);
+
+        vm.prank(address(0xDEAD));
+        vm.expectRevert(LootAccessRegistry.NotReporter.selector);
+        registry.grantXpBatch(campaignId, participants, amounts);
+
+        vm.prank(reporter);
+        vm.expectRevert(LootAccessRegistry.CampaignNotConfigured.selector);
+        registry.grantXpBatch(keccak256("unknown"), participants, amounts);
+
+        uint32[] memory mismatched = new uint32[](1);
+        mismatched[0] = 1;
+        vm.prank(reporter);
+        vm.expectRevert("amounts length mismatch");
+        registry.grantXpBatch(campaignId, participants, mismatched);
+
+        amounts[1] = registry.MAX_XP_PER_GRANT() + 1;
+        vm.prank(reporter);
+        vm.expectRevert("amount too large");
+        registry.grantXpBatch(campaignId, participants, amounts);
+        assertEq(registry.getXpBalance(campaignId, participants[0]), 0, "El batch revierte completo");
+    }
 
+    function testGrantXpBatchReducesGasPerGrant() public {
+        uint256 n = 20;
+        // Costo intrínseco de cada transacción (no lo mide gasleft dentro del test)
+        uint256 txBase = 21_000;
+
+        (address[] memory singles, uint32[] memory singleAmounts) = _batch(n, 0);
+        uint256 singleGas;
+        for (uint256 i = 0; i < n; i++) {
+            vm.prank(reporter);
+            uint256 before = gasleft();
+            registry.grantXp(campaignId, singles[i], singleAmounts[i]);
+            singleGas += before - gasleft() + txBase;
+        }
+
+        (address[] memory batched, uint32[] memory batchAmounts) = _batch(n, uint160(n));
+        vm.prank(reporter);
+        uint256 start = gasleft();
+        registry.grantXpBatch(campaignId, batched, batchAmounts);
+        uint256 batchGas = start - gasleft() + txBase;
+
+        emit log_named_uint("gas por grant (grantXp)", singleGas / n);
+        emit log_named_uint("gas por grant (grantXpBatch)", batchGas / n);
+        assertLt(batchGas / n, singleGas / n, "grantXpBatch debe costar menos gas por grant");
+        assertEq(registry.getXpBalance(campaignId, batched[n - 1]), batchAmounts[n - 1]);
+    }
+}
@@ -39,6 +39,61 @@ contract LootBoxMinterTest is Test {
         assertTrue(minter.soulboundToken(2));
     }
 
+    function testRelativeMetadataKeyResolvesAgainstBaseURI() public {
+        address[] memory recipients = new address[](2);
+        recipients[0] = address(0xA);
+        recipients[1] = address(0xB);
+        string[] memory metadata = new string[](2);
+        metadata[0] = "3f2a9c0d41be77e0a5d1c8f2";
+        metadata[1] = "data:application/json;base64,e30=";
+        bool[] memory flags = new bool[](2);
+
+        vm.prank(agent);
+        minter.mintBatch(campaignId, recipients, metadata, flags);
+
+        assertEq(minter.tokenURI(1), "ipfs://base/3f2a9c0d41be77e0a5d1c8f2");
+        assertEq(minter.tokenURI(2), "data:application/json;base64,e30=");
+
+        // El host de la metadata se puede migrar reconfigurando la campaña
+        minter.configureCampaign(campaignId, "https://cdn.example/m/");
+        assertEq(minter.tokenURI(1), "https://cdn.example/m/3f2a9c0d41be77e0a5d1c8f2");
+    }
+
+    function testRelativeMetadataKeyReducesMintGas() public {
+        uint256 n = 10;
+        address[] memory inlineRecipients = new address[](n);
+        address[] memory keyRecipients = new address[](n);
+        string[] memory inlineMetadata = new string[](n);
+        string[] memory keyMetadata = new string[](n);
+        bool[] memory flags = new bool[](n);
+        // Metadata típica de una carta (JSON en base64) frente a su clave de contenido
+        string memory json = string.concat(
+            "data:application/json;base64,eyJuYW1lIjoiTG9vdCBDYXJkIiwiZGVzY3JpcHRpb24iOiJDYXJ0YSBnZW5lcmFkYSBwYXJhIHVu",
+            "IGNhc3QgdmlyYWwiLCJpbWFnZSI6Imh0dHBzOi8vZXhhbXBsZS5jb20vY2FyZC5wbmciLCJhdHRyaWJ1dGVzIjpbeyJ0cmFpdF90eXBl",
+            "IjoiUmFyaXR5IiwidmFsdWUiOiJFcGljIn0seyJ0cmFpdF90eXBlIjoiVHlwZSIsInZhbHVlIjoiRmlyZSJ9XX0="
+        );
+        for (uint256 i = 0; i < n; i++) {
+            inlineRecipients[i] = address(uint160(0x1000 + i));
+            keyRecipients[i] = address(uint160(0x2000 + i));
+            inlineMetadata[i] = json;
+            keyMetadata[i] = "3f2a9c0d41be77e0a5d1c8f2";
+        }
+
+        vm.prank(agent);
+        uint256 gasBefore = gasleft();
+        minter.mintBatch(campaignId, inlineRecipients, inlineMetadata, flags);
+        uint256 inlineGas = gasBefore - gasleft();
+
+        vm.prank(agent);
+        gasBefore = gasleft();
+        minter.mintBatch(campaignId, keyRecipients, keyMetadata, flags);
+        uint256 keyGas = gasBefore - gasleft();
+
+        emit log_named_uint("gas por mint (data URI)", inlineGas / n);
+        emit log_named_uint("gas por mint (clave relativa)", keyGas / n);
+        assertLt(keyGas * 2, inlineGas);
+    }
+
     function testSoulboundPreventsTransfer() public {
         address[] memory recipients = new address[](1);
         recipients[0] = address(0xAA);